@@ -0,0 +1,22 @@
+"""
+India Oasis - Storefront Load Test
+==================================
+
+Reproducible before/after benchmark of the storefront:
+
+1. builds a disposable database (SQLite file or a dedicated local MySQL
+   schema) and fills it with a synthetic catalog (``catalog.py``);
+2. starts local stub servers for Melhor Envio, Mercado Pago and Olist
+   (``stubs.py``), so no request leaves the machine;
+3. starts the app with ``benchmarks.settings`` pointing at the stubs;
+4. drives scripted journeys (browse -> search -> product -> cart add ->
+   checkout -> webhook) from concurrent virtual users (``journeys.py``,
+   ``load.py``);
+5. writes p50/p95/p99 latency, throughput and queries per request for each
+   endpoint as JSON.
+
+Usage:
+    python -m benchmarks run --products 2000 --users 50 --concurrency 8 --duration 60 --output before.json
+    python -m benchmarks run --db mysql --output after.json
+    python -m benchmarks compare before.json after.json
+"""
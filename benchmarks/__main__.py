@@ -0,0 +1,246 @@
+"""Command line: ``python -m benchmarks run|compare|cache`` (see benchmarks/__init__.py)"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import requests
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.catalog import PASSWORD, WORDS, customer_email, generate  # noqa: E402
+from benchmarks.load import compare, run_load, summarize  # noqa: E402
+from benchmarks.stubs import StubServer  # noqa: E402
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def setup_django(args, stub_url):
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+    os.environ['BENCHMARK_DB'] = args.db
+    os.environ['BENCHMARK_STUB_URL'] = stub_url
+    if args.sqlite_path:
+        os.environ['BENCHMARK_SQLITE_PATH'] = args.sqlite_path
+    import django
+    django.setup()
+
+
+def prepare_database(args):
+    """Recreate the benchmark database and load the synthetic catalog"""
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.core.management import call_command
+    from django.db import connection
+
+    if not args.reuse_db:
+        if args.db == 'sqlite':
+            connection.close()
+            Path(settings.DATABASES['default']['NAME']).unlink(missing_ok=True)
+        call_command('migrate', interactive=False, run_syncdb=True, verbosity=0)
+        if args.db == 'mysql':
+            call_command('flush', interactive=False, verbosity=0)
+        print(f'Gerando catálogo em {settings.DATABASES["default"]["NAME"]}...', file=sys.stderr)
+        sizes = generate(products=args.products, users=args.users, reviews=args.reviews,
+                         orders=args.orders, seed=args.seed, stdout=sys.stderr)
+    else:
+        sizes = None
+    cache.clear()
+    return sizes
+
+
+def journey_data(users):
+    """Slugs, ids and e-mails the journeys pick from"""
+    from django.conf import settings
+    from store.models import Category, Product
+
+    products = dict(
+        Product.objects.filter(available=True).order_by('pk').values_list('slug', 'pk')[:1000]
+    )
+    return {
+        'products': list(products),
+        'product_ids': products,
+        'categories': list(Category.objects.filter(is_active=True).values_list('slug', flat=True)),
+        'search_terms': WORDS,
+        'emails': [customer_email(i) for i in range(users)],
+        'ceps': ['01001-000', '20040-020', '30130-010', '80010-000', '90010-150'],
+        'csrf_cookie': settings.CSRF_COOKIE_NAME,
+    }
+
+
+def start_app(args, env):
+    port = args.port
+    log = open(args.server_log, 'w')
+    process = subprocess.Popen(
+        [sys.executable, str(PROJECT_ROOT / 'manage.py'), 'runserver', f'127.0.0.1:{port}',
+         '--noreload', '--insecure', '--skip-checks'],
+        cwd=PROJECT_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f'O servidor terminou ao iniciar; veja {args.server_log}')
+        try:
+            if requests.get(f'{url}/health/live/', timeout=1).status_code == 200:
+                return process, url
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise SystemExit(f'O servidor não respondeu em 60s; veja {args.server_log}')
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def command_run(args):
+    stubs = StubServer(port=args.stub_port, latency_ms=args.stub_latency).start()
+    setup_django(args, stubs.url)
+    from django.db import connection
+
+    sizes = prepare_database(args)
+    data = journey_data(args.users)
+    connection.close()
+
+    process = None
+    try:
+        if args.url:
+            url = args.url.rstrip('/')
+        else:
+            process, url = start_app(args, dict(os.environ))
+        print(f'Carga em {url}: {args.concurrency} usuários, {args.warmup}s aquecimento + {args.duration}s',
+              file=sys.stderr)
+        samples, elapsed, completed, failures = run_load(
+            url, data, concurrency=args.concurrency, duration=args.duration, warmup=args.warmup,
+            mix=parse_mix(args.mix), seed=args.seed, password=PASSWORD,
+        )
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        stubs.stop()
+
+    totals, endpoints = summarize(samples, elapsed)
+    report = {
+        'meta': {
+            'label': args.label,
+            'revision': git_revision(),
+            'finished_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'database': connection.vendor,
+            'dataset': sizes,
+            'concurrency': args.concurrency,
+            'duration_s': round(elapsed, 2),
+            'warmup_s': args.warmup,
+            'mix': parse_mix(args.mix),
+            'stub_latency_ms': args.stub_latency,
+            'stub_calls': dict(stubs.calls),
+            'journeys': {
+                'completed': completed,
+                'failed': sum(failures.values()),
+                'failures': dict(failures.most_common()),
+            },
+        },
+        'totals': totals,
+        'endpoints': endpoints,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(output + '\n', encoding='utf-8')
+        print(f'Relatório salvo em {args.output}', file=sys.stderr)
+    else:
+        print(output)
+
+
+def command_compare(args):
+    before = json.loads(Path(args.before).read_text(encoding='utf-8'))
+    after = json.loads(Path(args.after).read_text(encoding='utf-8'))
+    lines, regressions = compare(before, after, threshold=args.threshold)
+    print('\n'.join(lines))
+    if regressions:
+        print('\nRegressões:')
+        for regression in regressions:
+            print(f'  {regression}')
+        sys.exit(1)
+
+
+def command_cache(args):
+    from benchmarks.cache import format_report, run_cache_benchmark
+
+    report = run_cache_benchmark(
+        args.keys, args.backends, operations=args.operations, writes=args.writes, value_size=args.value_size,
+        seed=args.seed, stdout=sys.stderr,
+    )
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + '\n', encoding='utf-8')
+        print(f'Relatório salvo em {args.output}', file=sys.stderr)
+    print(format_report(report))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Storefront load test')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run = subparsers.add_parser('run', help='Seed a database, start the app and apply load')
+    run.add_argument('--db', choices=['sqlite', 'mysql'], default='sqlite')
+    run.add_argument('--sqlite-path', help='SQLite file (default: benchmark.sqlite3)')
+    run.add_argument('--reuse-db', action='store_true', help='Keep the existing benchmark database')
+    run.add_argument('--products', type=int, default=2000)
+    run.add_argument('--users', type=int, default=100)
+    run.add_argument('--reviews', type=int, default=5000)
+    run.add_argument('--orders', type=int, default=2000)
+    run.add_argument('--seed', type=int, default=42)
+    run.add_argument('--concurrency', type=int, default=8)
+    run.add_argument('--duration', type=int, default=60, help='Measured seconds')
+    run.add_argument('--warmup', type=int, default=10, help='Seconds of load before measuring')
+    run.add_argument('--mix', default='browse=3,purchase=1', help='Journey weights')
+    run.add_argument('--stub-latency', type=int, default=0, help='Delay of the stub APIs in ms')
+    run.add_argument('--stub-port', type=int, default=0)
+    run.add_argument('--port', type=int, default=8801, help='Port for the app server')
+    run.add_argument('--url', help='Load an already running server instead of starting one')
+    run.add_argument('--server-log', default=os.path.join(tempfile.gettempdir(), 'india-oasis-benchmark-server.log'))
+    run.add_argument('--label', default='', help='Free text stored in the report')
+    run.add_argument('--output', help='JSON report file (default: stdout)')
+    run.set_defaults(func=command_run)
+
+    comparison = subparsers.add_parser('compare', help='Compare two reports')
+    comparison.add_argument('before')
+    comparison.add_argument('after')
+    comparison.add_argument('--threshold', type=float, default=10.0,
+                            help='p95 increase (%%) reported as a regression')
+    comparison.set_defaults(func=command_compare)
+
+    cache = subparsers.add_parser('cache', help='Compare the cache backends usable without Redis')
+    cache.add_argument('--keys', type=int, nargs='+', default=[10000, 100000])
+    cache.add_argument('--backends', nargs='+', choices=['sqlite', 'filebased', 'locmem'],
+                       default=['sqlite', 'filebased', 'locmem'])
+    cache.add_argument('--operations', type=int, default=10000, help='Timed reads per read phase')
+    cache.add_argument('--writes', type=int, default=200, help='Timed writes per write phase (set, incr)')
+    cache.add_argument('--value-size', type=int, default=2048, help='Bytes per cached value')
+    cache.add_argument('--seed', type=int, default=42)
+    cache.add_argument('--output', help='Also write the numbers as JSON')
+    cache.set_defaults(func=command_cache)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
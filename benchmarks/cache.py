@@ -0,0 +1,139 @@
+"""
+Micro-benchmark of the cache backends usable without Redis.
+
+Compares ``SQLiteCache`` (india_oasis_project/sqlite_cache.py) with
+``FileBasedCache`` and ``LocMemCache`` at a given number of keys:
+
+The store is filled with ``keys`` page-sized entries first (not timed), then:
+
+- ``set``: writes of new keys (FileBasedCache lists its whole directory on
+  each write, so the write phases are kept to ``--writes`` operations);
+- ``get``: random reads of existing keys;
+- ``get_many``: random batches of 20 keys;
+- ``incr``: counters, the rate-limit / view-count pattern;
+- ``set_full``: writes past ``MAX_ENTRIES``, where the backends cull.
+
+Usage:
+    python -m benchmarks cache --keys 10000 100000
+"""
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+BACKENDS = {
+    'sqlite': 'india_oasis_project.sqlite_cache.SQLiteCache',
+    'filebased': 'django.core.cache.backends.filebased.FileBasedCache',
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+}
+
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def _measure(operation, arguments):
+    timings = []
+    started = time.perf_counter()
+    for argument in arguments:
+        before = time.perf_counter()
+        operation(argument)
+        timings.append(time.perf_counter() - before)
+    elapsed = time.perf_counter() - started
+    return {
+        'ops_per_s': round(len(timings) / elapsed),
+        'p50_us': round(_percentile(timings, 50) * 1e6, 1),
+        'p99_us': round(_percentile(timings, 99) * 1e6, 1),
+    }
+
+
+def _backend(name, directory, max_entries):
+    from django.utils.module_loading import import_string
+
+    location = {
+        'sqlite': str(Path(directory) / 'cache.sqlite3'),
+        'filebased': str(Path(directory) / 'files'),
+        'locmem': f'benchmark-{directory}',
+    }[name]
+    return import_string(BACKENDS[name])(location, {
+        'TIMEOUT': 3600, 'OPTIONS': {'MAX_ENTRIES': max_entries},
+    })
+
+
+def _prefill(cache, names, value):
+    """Store ``names`` without timing it (FileBasedCache: its own file writer, no per-write cull)"""
+    from django.core.cache.backends.filebased import FileBasedCache
+
+    if isinstance(cache, FileBasedCache):
+        cache._createdir()
+        for key in names:
+            with open(cache._key_to_file(key), 'wb') as cache_file:
+                cache._write_content(cache_file, cache.default_timeout, value)
+        return
+    for start in range(0, len(names), 1000):
+        cache.set_many({key: value for key in names[start:start + 1000]})
+
+
+def run_backend(name, keys, operations, writes, value_size, seed):
+    """Numbers for one backend holding ``keys`` entries"""
+    rng = random.Random(seed)
+    value = {'content': b'x' * value_size, 'etag': '"abc"', 'versions': ('a', 'b')}
+    directory = tempfile.mkdtemp(prefix=f'cache-bench-{name}-')
+    try:
+        cache = _backend(name, directory, max_entries=keys * 2)
+        names = [f'pagina-produto:produto-{i}' for i in range(keys)]
+        _prefill(cache, names, value)
+
+        new = [f'nova:{i}' for i in range(writes)]
+        results = {'set': _measure(lambda key: cache.set(key, value), new)}
+
+        sample = [rng.choice(names) for _ in range(operations)]
+        results['get'] = _measure(cache.get, sample)
+
+        batches = [rng.sample(names, 20) for _ in range(max(1, operations // 20))]
+        results['get_many'] = _measure(cache.get_many, batches)
+
+        counters = [f'contador:{i}' for i in range(100)]
+        cache.set_many({counter: 0 for counter in counters})
+        results['incr'] = _measure(cache.incr, [rng.choice(counters) for _ in range(writes)])
+
+        # Same storage with a limit it is already past: writes trigger culling
+        full = _backend(name, directory, max_entries=keys)
+        extra = [f'extra:{i}' for i in range(writes)]
+        results['set_full'] = _measure(lambda key: full.set(key, value), extra)
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def run_cache_benchmark(key_counts, backends, operations=10000, writes=200, value_size=2048, seed=42,
+                        stdout=None):
+    """{keys: {backend: {operation: numbers}}}"""
+    from django.conf import settings
+
+    if not settings.configured:
+        settings.configure()
+    report = {}
+    for keys in key_counts:
+        report[keys] = {}
+        for name in backends:
+            if stdout:
+                print(f'{name}: {keys} chaves...', file=stdout)
+            report[keys][name] = run_backend(name, keys, operations, writes, value_size, seed)
+    return report
+
+
+def format_report(report):
+    lines = []
+    for keys, backends in report.items():
+        lines.append(f'\n{keys} chaves')
+        lines.append(f'{"backend":<10} {"operação":<9} {"ops/s":>10} {"p50 µs":>9} {"p99 µs":>9}')
+        for name, operations in backends.items():
+            for operation, numbers in operations.items():
+                lines.append(
+                    f'{name:<10} {operation:<9} {numbers["ops_per_s"]:>10} '
+                    f'{numbers["p50_us"]:>9} {numbers["p99_us"]:>9}'
+                )
+    return '\n'.join(lines)
@@ -0,0 +1,141 @@
+"""
+Synthetic data for the load test.
+
+``generate`` fills an empty database with categories, products, customers,
+reviews and orders (spread over the last 90 days, with items), then
+rebuilds the sales rollups. Everything is written with ``bulk_create`` in
+batches and a fixed random seed, so two runs with the same sizes produce
+the same dataset.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+BATCH_SIZE = 1000
+PASSWORD = 'benchmark-senha'
+
+CATEGORY_NAMES = [
+    'Chás', 'Especiarias', 'Incensos', 'Óleos Essenciais', 'Ayurveda',
+    'Temperos', 'Cosméticos Naturais', 'Decoração', 'Yoga', 'Livros',
+]
+WORDS = [
+    'masala', 'chai', 'cúrcuma', 'gengibre', 'cardamomo', 'canela', 'sândalo',
+    'lavanda', 'jasmim', 'tulsi', 'ghee', 'neem', 'cravo', 'açafrão', 'manjericão',
+    'orgânico', 'premium', 'tradicional', 'artesanal', 'puro',
+]
+STATES = ['SP', 'RJ', 'MG', 'RS', 'PR', 'BA', 'SC', 'PE', 'DF', 'GO']
+STATUSES = ['payment_approved'] * 5 + ['delivered'] * 3 + ['shipped', 'awaiting_payment', 'pending', 'cancelled']
+
+
+def customer_email(index):
+    return f'cliente{index}@benchmark.example.com'
+
+
+def generate(products=2000, users=100, reviews=5000, orders=2000, seed=42, stdout=None):
+    """Create the dataset; returns the number of rows per model"""
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from django.db import transaction
+    from django.utils import timezone
+    from django.utils.text import slugify
+
+    from payment_processing.dashboard import rebuild_rollups
+    from store.constants import DEFAULT_PRODUCT_IMAGE
+    from store.models import Category, CustomerProfile, Order, OrderItem, Product, Review
+
+    rng = random.Random(seed)
+
+    def log(message):
+        if stdout is not None:
+            stdout.write(f'{message}\n')
+
+    with transaction.atomic():
+        categories = Category.objects.bulk_create([
+            Category(name=name, slug=slugify(name), description=name, sort_order=i)
+            for i, name in enumerate(CATEGORY_NAMES)
+        ])
+        log(f'{len(categories)} categorias')
+
+        # Every customer shares one hash: hashing each password would dominate the setup
+        password = make_password(PASSWORD)
+        User.objects.bulk_create([
+            User(username=customer_email(i), email=customer_email(i), first_name=f'Cliente {i}', password=password)
+            for i in range(users)
+        ], batch_size=BATCH_SIZE)
+        user_ids = list(User.objects.filter(email__endswith='@benchmark.example.com').values_list('pk', flat=True))
+        CustomerProfile.objects.bulk_create([CustomerProfile(user_id=pk) for pk in user_ids], batch_size=BATCH_SIZE)
+        log(f'{len(user_ids)} clientes (senha: {PASSWORD})')
+
+        batch = []
+        for i in range(products):
+            name = ' '.join(rng.sample(WORDS, 3)).title()
+            price = Decimal(rng.randrange(990, 29990)) / 100
+            batch.append(Product(
+                category=categories[i % len(categories)], name=f'{name} {i}', slug=f'{slugify(name)}-{i}',
+                description=f'{name}. Produto sintético para teste de carga.', short_description=name,
+                price=price, discount_price=(price * Decimal('0.85')).quantize(Decimal('0.01')) if i % 7 == 0 else None,
+                sku=f'BENCH-{i:06d}', stock=1_000_000, image=DEFAULT_PRODUCT_IMAGE,
+                peso=Decimal(rng.randrange(1, 20)) / 10,
+                is_featured=i % 50 == 0, is_new=i % 40 == 1, is_bestseller=i % 30 == 2,
+            ))
+        Product.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+        product_rows = list(Product.objects.values_list('pk', 'name', 'sku', 'price'))
+        log(f'{len(product_rows)} produtos')
+
+        # At most one review per (product, user)
+        pairs = set()
+        limit = min(reviews, len(product_rows) * len(user_ids))
+        while len(pairs) < limit:
+            pairs.add((rng.choice(product_rows)[0], rng.choice(user_ids)))
+        Review.objects.bulk_create([
+            Review(product_id=product_id, user_id=user_id, rating=rng.choice([3, 4, 4, 5, 5, 5]),
+                   title='Avaliação', comment='Gostei muito do produto.')
+            for product_id, user_id in pairs
+        ], batch_size=BATCH_SIZE)
+        log(f'{len(pairs)} avaliações')
+
+        now = timezone.now()
+        order_rows, order_items = [], []
+        for i in range(orders):
+            lines = [
+                (product_id, name, sku, price, rng.randint(1, 3))
+                for product_id, name, sku, price in rng.sample(product_rows, min(len(product_rows), rng.randint(1, 4)))
+            ]
+            status = rng.choice(STATUSES)
+            order_rows.append(Order(
+                user_id=rng.choice(user_ids), first_name='Cliente', last_name=str(i),
+                email=customer_email(i % max(users, 1)), address='Rua das Especiarias', number=str(i),
+                neighborhood='Centro', postal_code='01001-000', city='São Paulo', state=rng.choice(STATES),
+                status=status, paid=status in ('payment_approved', 'shipped', 'delivered'),
+                payment_method=rng.choice(['pix', 'credit_card', 'ticket']),
+                total_price=Decimal('25.00') + sum(price * quantity for *_, price, quantity in lines),
+                shipping_cost=Decimal('25.00'),
+            ))
+            order_items.append(lines)
+        Order.objects.bulk_create(order_rows, batch_size=BATCH_SIZE)
+        # Empty database: the new orders are the ids in creation order
+        order_ids = list(Order.objects.order_by('pk').values_list('pk', flat=True))
+
+        items = [
+            OrderItem(order_id=order_id, product_id=product_id, product_name=name,
+                      product_sku=sku, price=price, quantity=quantity)
+            for order_id, lines in zip(order_ids, order_items)
+            for product_id, name, sku, price, quantity in lines
+        ]
+        OrderItem.objects.bulk_create(items, batch_size=BATCH_SIZE)
+
+        # auto_now_add ignores the value passed to bulk_create: spread the dates afterwards
+        by_day = {}
+        for order_id in order_ids:
+            by_day.setdefault(rng.randrange(90), []).append(order_id)
+        for day, ids in by_day.items():
+            Order.objects.filter(pk__in=ids).update(created=now - timedelta(days=day, minutes=rng.randrange(1440)))
+        log(f'{len(order_ids)} pedidos, {len(items)} itens')
+
+        rollups = rebuild_rollups()
+        log(f'{rollups} linhas de agregados de vendas')
+
+    return {
+        'categories': len(categories), 'products': len(product_rows), 'users': len(user_ids),
+        'reviews': len(pairs), 'orders': len(order_ids), 'order_items': len(items),
+    }
@@ -0,0 +1,129 @@
+"""
+Scripted user journeys.
+
+Each journey is a function ``journey(client, data, rng)`` that performs a
+sequence of requests through ``JourneyClient``, which times every request
+and reads the query count from the ``Server-Timing`` header. A step that
+answers with an unexpected status ends the journey (and counts as an error
+for its endpoint).
+"""
+import re
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+QUERIES_RE = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+class JourneyError(Exception):
+    pass
+
+
+class Recorder:
+    """Samples of every request, shared by the virtual users"""
+
+    def __init__(self):
+        self.samples = []
+        self.recording = False
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, latency, status, queries, ok):
+        if not self.recording:
+            return
+        with self._lock:
+            self.samples.append((endpoint, latency, status, queries, ok))
+
+
+class JourneyClient:
+    """HTTP session of one virtual user (cookies, CSRF token, timings)"""
+
+    def __init__(self, base_url, recorder, csrf_cookie='csrftoken', timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.csrf_cookie = csrf_cookie
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    @property
+    def csrf_token(self):
+        return self.session.cookies.get(self.csrf_cookie, '')
+
+    def request(self, endpoint, method, path, expect=(200,), anonymous=False, **kwargs):
+        headers = kwargs.pop('headers', {})
+        if method != 'GET' and not anonymous:
+            headers['X-CSRFToken'] = self.csrf_token
+        sender = requests if anonymous else self.session
+        started = time.perf_counter()
+        try:
+            response = sender.request(
+                method, f'{self.base_url}{path}', headers=headers, timeout=self.timeout,
+                allow_redirects=False, **kwargs
+            )
+        except requests.RequestException as e:
+            self.recorder.add(endpoint, time.perf_counter() - started, 0, None, False)
+            raise JourneyError(f'{endpoint}: {e}') from e
+        latency = time.perf_counter() - started
+
+        match = QUERIES_RE.search(response.headers.get('Server-Timing', ''))
+        ok = response.status_code in expect
+        self.recorder.add(endpoint, latency, response.status_code, int(match.group(1)) if match else None, ok)
+        if not ok:
+            raise JourneyError(f'{endpoint}: HTTP {response.status_code}')
+        return response
+
+    def ajax(self, endpoint, path, **kwargs):
+        headers = {'X-Requested-With': 'XMLHttpRequest'}
+        return self.request(endpoint, 'POST', path, headers=headers, **kwargs)
+
+    def login(self, email, password):
+        self.request('login_page', 'GET', '/accounts/login/')
+        self.request('login', 'POST', '/accounts/login/', expect=(302,), data={
+            'username': email, 'password': password,
+            'csrfmiddlewaretoken': self.csrf_token,
+        })
+
+
+def browse(client, data, rng):
+    """Visitor: home, a category, a search, two products"""
+    client.request('home', 'GET', '/')
+    client.request('category', 'GET', f'/products/{rng.choice(data["categories"])}/')
+    client.request('search', 'GET', '/products/', params={'q': rng.choice(data['search_terms'])})
+    for slug in rng.sample(data['products'], 2):
+        client.request('product_detail', 'GET', f'/product/{slug}/')
+
+
+def purchase(client, data, rng):
+    """Logged-in customer: browse -> search -> product -> cart -> checkout -> payment -> webhook"""
+    client.request('home', 'GET', '/')
+    client.request('search', 'GET', '/products/', params={'q': rng.choice(data['search_terms'])})
+    slug, product_id = rng.choice(list(data['product_ids'].items()))
+    client.request('product_detail', 'GET', f'/product/{slug}/')
+    response = client.ajax('cart_add', f'/cart/add/{product_id}/', data={'quantity': rng.randint(1, 3)})
+    if not response.json().get('success'):
+        raise JourneyError('cart_add: produto não adicionado')
+    client.request('cart', 'GET', '/cart/')
+    client.request('shipping_quote', 'POST', '/cart/calculate-shipping/', json={'cep': rng.choice(data['ceps'])})
+    client.request('checkout', 'GET', '/checkout/')
+    response = client.request('order_create', 'POST', '/order/create/', expect=(302,), data={
+        'first_name': 'Cliente', 'last_name': 'Benchmark', 'email': 'cliente@benchmark.example.com',
+        'phone': '11999999999', 'address': 'Rua das Especiarias', 'number': '10',
+        'neighborhood': 'Centro', 'postal_code': '01001-000', 'city': 'São Paulo', 'state': 'SP',
+    })
+    # Errors (stock, invalid form) redirect back to the cart or checkout
+    if not response.headers.get('Location', '').endswith('/payment/create/'):
+        raise JourneyError(f'order_create: redirecionado para {response.headers.get("Location")}')
+    # The stub preference carries the order id in the checkout URL
+    response = client.request('payment_create', 'GET', '/payment/create/', expect=(302,))
+    reference = parse_qs(urlparse(response.headers.get('Location', '')).query).get('ref', [''])[0]
+    if not reference:
+        raise JourneyError('payment_create: pedido não encontrado no redirecionamento')
+    client.request('webhook', 'POST', '/payment/webhook/', anonymous=True,
+                   json={'type': 'payment', 'data': {'id': reference}})
+
+
+JOURNEYS = {
+    'browse': browse,
+    'purchase': purchase,
+}
@@ -0,0 +1,172 @@
+"""
+Concurrent load generator and report.
+
+``run_load`` starts ``concurrency`` virtual users (threads), each with its
+own session, repeating journeys picked by weight until the time is up.
+Requests made during the warm-up are not recorded. ``summarize`` turns the
+samples into per-endpoint latency percentiles, throughput and queries per
+request.
+"""
+import math
+import random
+from collections import Counter
+import threading
+import time
+
+from .journeys import JOURNEYS, JourneyClient, JourneyError, Recorder
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(values)))
+    return values[rank - 1]
+
+
+def run_load(base_url, data, concurrency=8, duration=60, warmup=10, mix=None, seed=42, password=''):
+    """Run the journeys; returns (samples, measured seconds, journeys completed, failure reasons)"""
+    mix = mix or {'browse': 3, 'purchase': 1}
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    recorder = Recorder()
+    stop = threading.Event()
+    counts = {'completed': 0}
+    failures = Counter()
+    lock = threading.Lock()
+
+    def virtual_user(index):
+        rng = random.Random(seed + index)
+        client = JourneyClient(base_url, recorder, csrf_cookie=data['csrf_cookie'])
+        logged_in = False
+        while not stop.is_set():
+            name = rng.choices(names, weights)[0]
+            try:
+                if name != 'browse' and not logged_in:
+                    client.login(data['emails'][index % len(data['emails'])], password)
+                    logged_in = True
+                JOURNEYS[name](client, data, rng)
+                failure = None
+            except JourneyError as e:
+                failure = str(e)
+            if recorder.recording:
+                with lock:
+                    if failure is None:
+                        counts['completed'] += 1
+                    else:
+                        failures[failure] += 1
+
+    threads = [
+        threading.Thread(target=virtual_user, args=(i,), name=f'virtual-user-{i}', daemon=True)
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(warmup)
+    recorder.recording = True
+    started = time.perf_counter()
+    time.sleep(duration)
+    recorder.recording = False
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=60)
+    return recorder.samples, elapsed, counts['completed'], failures
+
+
+def summarize(samples, elapsed):
+    """Per-endpoint statistics (latency in ms) and overall totals"""
+    by_endpoint = {}
+    for endpoint, latency, status, queries, ok in samples:
+        by_endpoint.setdefault(endpoint, []).append((latency, status, queries, ok))
+
+    endpoints = {}
+    for endpoint, rows in sorted(by_endpoint.items()):
+        latencies = sorted(latency * 1000 for latency, _, _, ok in rows if ok)
+        queries = [q for _, _, q, ok in rows if ok and q is not None]
+        errors = sum(1 for *_, ok in rows if not ok)
+        statuses = {}
+        for _, status, _, _ in rows:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        endpoints[endpoint] = {
+            'requests': len(rows),
+            'errors': errors,
+            'statuses': statuses,
+            'throughput_rps': round(len(rows) / elapsed, 2),
+            'latency_ms': {
+                'p50': _round(percentile(latencies, 50)),
+                'p95': _round(percentile(latencies, 95)),
+                'p99': _round(percentile(latencies, 99)),
+                'mean': _round(sum(latencies) / len(latencies)) if latencies else None,
+                'max': _round(latencies[-1]) if latencies else None,
+            },
+            'queries_per_request': {
+                'mean': _round(sum(queries) / len(queries)) if queries else None,
+                'max': max(queries) if queries else None,
+            },
+        }
+
+    all_latencies = sorted(latency * 1000 for _, latency, _, _, ok in samples if ok)
+    totals = {
+        'requests': len(samples),
+        'errors': sum(1 for *_, ok in samples if not ok),
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else 0,
+        'latency_ms': {
+            'p50': _round(percentile(all_latencies, 50)),
+            'p95': _round(percentile(all_latencies, 95)),
+            'p99': _round(percentile(all_latencies, 99)),
+        },
+    }
+    return totals, endpoints
+
+
+def compare(before, after, threshold=10.0):
+    """
+    Lines comparing two reports and the list of regressions: p95 latency
+    more than ``threshold`` percent slower, or more queries per request (the
+    mean varies a little with the products picked, hence the half query).
+    """
+    lines = [f'{"endpoint":<16} {"p50 ms":>17} {"p95 ms":>17} {"p99 ms":>17} {"queries":>13} {"req/s":>15}']
+    regressions = []
+    for endpoint in sorted(set(before['endpoints']) | set(after['endpoints'])):
+        old = before['endpoints'].get(endpoint)
+        new = after['endpoints'].get(endpoint)
+        if old is None or new is None:
+            lines.append(f'{endpoint:<16} only in {"after" if old is None else "before"}')
+            continue
+        columns = [
+            _delta(old['latency_ms'][key], new['latency_ms'][key]) for key in ('p50', 'p95', 'p99')
+        ]
+        old_queries = old['queries_per_request']['mean']
+        new_queries = new['queries_per_request']['mean']
+        lines.append(
+            f'{endpoint:<16} {columns[0]:>17} {columns[1]:>17} {columns[2]:>17} '
+            f'{_pair(old_queries, new_queries):>13} {_pair(old["throughput_rps"], new["throughput_rps"]):>15}'
+        )
+        if _change(old['latency_ms']['p95'], new['latency_ms']['p95']) > threshold:
+            regressions.append(f'{endpoint}: p95 {old["latency_ms"]["p95"]} -> {new["latency_ms"]["p95"]} ms')
+        if old_queries is not None and new_queries is not None and new_queries > old_queries + 0.5:
+            regressions.append(f'{endpoint}: queries {old_queries} -> {new_queries}')
+    return lines, regressions
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+def _change(old, new):
+    if not old or new is None:
+        return 0.0
+    return (new - old) / old * 100
+
+
+def _delta(old, new):
+    if old is None or new is None:
+        return '-'
+    return f'{old:.0f}->{new:.0f} {_change(old, new):+.0f}%'
+
+
+def _pair(old, new):
+    if old is None or new is None:
+        return '-'
+    return f'{old:g}->{new:g}'
@@ -0,0 +1,81 @@
+"""
+Settings used by the load test: production settings with a disposable
+database, external APIs pointed at the local stubs and ``Server-Timing``
+on every response (the load generator reads the query count from it).
+
+Environment:
+    BENCHMARK_DB            sqlite (default) or mysql
+    BENCHMARK_SQLITE_PATH   SQLite file (default: benchmark.sqlite3 in the project)
+    BENCHMARK_DB_NAME       MySQL schema, flushed on every run (default: india_oasis_benchmark);
+                            user, password and host come from the usual DB_* variables
+    BENCHMARK_STUB_URL      base URL of the stub servers (set by ``python -m benchmarks run``)
+"""
+import os
+import tempfile
+
+# The production settings require these; the benchmark never talks to the real services
+for _name, _value in {
+    'SECRET_KEY': 'benchmark-not-secret',
+    'DB_NAME': 'india_oasis_benchmark',
+    'DB_USER': 'root',
+    'DB_PASSWORD': '',
+    'MERCADO_PAGO_PUBLIC_KEY': 'TEST-benchmark',
+    'MERCADO_PAGO_ACCESS_TOKEN': 'TEST-benchmark',
+}.items():
+    os.environ.setdefault(_name, _value)
+os.environ['DEBUG'] = 'False'
+
+from india_oasis_project.settings import *  # noqa: E402,F401,F403
+from india_oasis_project.settings import BASE_DIR, DATABASES  # noqa: E402
+
+BENCHMARK_DB = os.environ.get('BENCHMARK_DB', 'sqlite')
+if BENCHMARK_DB == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('BENCHMARK_SQLITE_PATH', str(BASE_DIR / 'benchmark.sqlite3')),
+            # runserver answers in threads: take the write lock when the transaction
+            # starts and wait for it, instead of failing on a read -> write upgrade
+            'OPTIONS': {'timeout': 30, 'transaction_mode': 'IMMEDIATE'},
+        }
+    }
+elif BENCHMARK_DB == 'mysql':
+    DATABASES['default']['NAME'] = os.environ.get('BENCHMARK_DB_NAME', 'india_oasis_benchmark')
+else:
+    raise ValueError(f'BENCHMARK_DB must be sqlite or mysql, not {BENCHMARK_DB!r}')
+
+ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+
+# The committed migrations lag behind the models: create the schema straight
+# from the models (migrate --run-syncdb), like the test database
+MIGRATION_MODULES = {app: None for app in ('store', 'payment_processing', 'email_service')}
+
+# No collectstatic step: serve the source files (runserver --insecure)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+STATIC_BUNDLES_ENABLED = False
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'india-oasis-benchmark-cache'),
+        'TIMEOUT': 300,
+    }
+}
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+PERFORMANCE_SERVER_TIMING = 'all'
+PERFORMANCE_LOG_SAMPLE_RATE = 0
+
+# External services -> local stubs
+BENCHMARK_STUB_URL = os.environ.get('BENCHMARK_STUB_URL', 'http://127.0.0.1:8765')
+MELHOR_ENVIO_API_URL = f'{BENCHMARK_STUB_URL}/melhorenvio'
+os.environ['OLIST_NFE_BASE_URL'] = f'{BENCHMARK_STUB_URL}/olist'
+
+import mercadopago.config.config  # noqa: E402
+
+# The SDK has no option for the API host; the class attribute is read per request
+mercadopago.config.config.Config._Config__api_base_url = f'{BENCHMARK_STUB_URL}/mercadopago'
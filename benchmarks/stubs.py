@@ -0,0 +1,135 @@
+"""
+Local stand-ins for the external APIs used by the storefront.
+
+One threaded HTTP server answers, under a path prefix per service:
+
+- ``/melhorenvio/api/v2/me/shipment/calculate``: PAC and SEDEX quotes;
+- ``/mercadopago/checkout/preferences``: a preference whose ``init_point``
+  carries the order id (``external_reference``);
+- ``/mercadopago/v1/payments/<id>``: an approved payment for order ``<id>``;
+- ``/olist/emitir``: an issued NF-e.
+
+``latency_ms`` delays every answer, to approximate the real services.
+"""
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _shipping_quote(payload, path):
+    products = payload.get('products') or [{}]
+    weight = sum(p.get('weight', 0) for p in products) / 1000
+    return 200, [
+        {'id': 1, 'name': 'PAC', 'price': f'{18 + weight * 2:.2f}', 'delivery_time': 7,
+         'company': {'name': 'Correios'}},
+        {'id': 2, 'name': 'SEDEX', 'price': f'{32 + weight * 4:.2f}', 'delivery_time': 2,
+         'company': {'name': 'Correios'}},
+    ]
+
+
+def _preference(payload, path):
+    reference = payload.get('external_reference') or '0'
+    preference_id = f'bench-{reference}'
+    return 201, {
+        'id': preference_id,
+        'init_point': f'https://www.mercadopago.com.br/checkout?pref_id={preference_id}&ref={reference}',
+        'sandbox_init_point': f'https://sandbox.mercadopago.com.br/checkout?pref_id={preference_id}',
+        'external_reference': reference,
+    }
+
+
+def _payment(payload, path):
+    payment_id = path.rsplit('/', 1)[-1]
+    return 200, {
+        'id': int(payment_id) if payment_id.isdigit() else payment_id,
+        'status': 'approved',
+        'payment_type_id': 'pix',
+        # The load generator uses the order id as payment id
+        'external_reference': payment_id,
+    }
+
+
+def _nfe(payload, path):
+    number = str(int(time.time() * 1000))[-9:]
+    return 200, {
+        'numero': number,
+        'status': 'emitida',
+        'pdf_url': f'https://nfe.example.com/{number}.pdf',
+        'xml_url': f'https://nfe.example.com/{number}.xml',
+    }
+
+
+# (method, path pattern) -> handler(payload, path) returning (status, body)
+ROUTES = [
+    ('POST', re.compile(r'^/melhorenvio/api/v2/me/shipment/calculate$'), 'melhorenvio.quote', _shipping_quote),
+    ('POST', re.compile(r'^/mercadopago/checkout/preferences$'), 'mercadopago.preference', _preference),
+    ('GET', re.compile(r'^/mercadopago/v1/payments/[^/]+$'), 'mercadopago.payment', _payment),
+    ('POST', re.compile(r'^/olist/emitir$'), 'olist.nfe', _nfe),
+]
+
+
+class StubServer:
+    """Threaded HTTP server with the stub routes, started in the background"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=0):
+        self.latency = latency_ms / 1000
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _dispatch(self):
+                path = self.path.split('?', 1)[0]
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                for method, pattern, name, handler in ROUTES:
+                    if method == self.command and pattern.match(path):
+                        try:
+                            payload = json.loads(body) if body else {}
+                        except ValueError:
+                            payload = {}
+                        status, data = handler(payload, path)
+                        break
+                else:
+                    name, status, data = 'unknown', 404, {'message': f'no stub for {self.command} {path}'}
+                with server._lock:
+                    server.calls[name] += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                content = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = _dispatch
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='benchmark-stubs', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
+from store.paginators import EstimatedCountPaginator
 from .models import EmailTemplate, EmailLog, EmailConfig, EmailQueue
 
 @admin.register(EmailTemplate)
@@ -44,7 +45,10 @@ class EmailTemplateAdmin(admin.ModelAdmin):
 class EmailLogAdmin(admin.ModelAdmin):
     list_display = ['recipient_email', 'recipient_name', 'template_name', 'status', 'attempts', 'sent_at', 'created_at']
     list_filter = ['status', 'email_template__email_type', 'sent_at', 'created_at']
+    list_select_related = ['email_template']
     search_fields = ['recipient_email', 'recipient_name', 'subject']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = ['recipient_email', 'recipient_name', 'user', 'order', 'email_template', 'subject', 'status', 'sent_at', 'error_message', 'attempts', 'created_at']
 
     fieldsets = (
@@ -142,7 +146,11 @@ class EmailConfigAdmin(admin.ModelAdmin):
 class EmailQueueAdmin(admin.ModelAdmin):
     list_display = ['recipient_email', 'template_name', 'priority_display', 'attempts', 'max_attempts', 'is_processed', 'scheduled_at', 'created_at']
     list_filter = ['priority', 'is_processed', 'email_template__email_type', 'scheduled_at', 'created_at']
+    list_select_related = ['email_template']
     search_fields = ['recipient_email', 'recipient_name']
+    autocomplete_fields = ['user', 'order', 'email_template']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = ['attempts', 'created_at']
 
     fieldsets = (
@@ -1,3 +1,28 @@
 from django.test import TestCase
+from india_oasis_project.testing import ChangelistQueryCountMixin
 
-# Create your tests here.
+
+class EmailAdminQueryCountTest(ChangelistQueryCountMixin, TestCase):
+    """O changelist de logs e da fila não pode fazer uma consulta por linha"""
+
+    def create_rows(self, start, count):
+        from email_service.models import EmailTemplate, EmailLog, EmailQueue
+        # email_type é único: as linhas se revezam entre dois templates
+        templates = [
+            EmailTemplate.objects.get_or_create(
+                email_type=email_type,
+                defaults={'name': f'Template {email_type}', 'subject': 'Assunto', 'html_content': '<p>Olá</p>'},
+            )[0]
+            for email_type, _ in EmailTemplate.EMAIL_TYPES[:2]
+        ]
+        for i in range(start, start + count):
+            template = templates[i % 2]
+            EmailLog.objects.create(recipient_email=f'c{i}@example.com', email_template=template, subject='Assunto')
+            EmailQueue.objects.create(recipient_email=f'c{i}@example.com', email_template=template)
+
+    def test_changelists_com_consultas_constantes(self):
+        from django.urls import reverse
+        self.assertConstantQueries([
+            reverse('admin:email_service_emaillog_changelist'),
+            reverse('admin:email_service_emailqueue_changelist'),
+        ])
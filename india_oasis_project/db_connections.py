@@ -0,0 +1,46 @@
+"""
+Database connections of the WSGI workers.
+
+By default connections are persistent (``DB_CONN_MAX_AGE``) and pinged
+before being reused after a request (``DB_CONN_HEALTH_CHECKS``), so a
+worker does not repeat the MySQL handshake on every request. With
+``DB_POOL_MAX_SIZE`` the in-process pool (india_oasis_project/mysql_pool)
+is used instead, for workers serving requests from several threads.
+
+``prewarm_connections`` runs when a worker loads the WSGI application, so
+the first request does not pay for the handshake either. Connection time
+per request is in the ``dbconn`` entry of ``Server-Timing`` and in the
+performance log; pool usage is in ``/health/?detail=1``.
+"""
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def prewarm_connections():
+    """Open connections before the first request; {alias: opened}. Failures are only logged."""
+    from django.db import connections
+    if not getattr(settings, 'DATABASE_PREWARM', True):
+        return {}
+    opened = {}
+    for alias in connections:
+        connection = connections[alias]
+        try:
+            if hasattr(connection, 'open_pooled'):
+                opened[alias] = connection.pool.prewarm(connection.open_pooled)
+            elif connection.settings_dict['CONN_MAX_AGE']:
+                # Persistent connections are per thread: Passenger serves
+                # requests in the thread that loaded the application
+                connection.ensure_connection()
+                opened[alias] = 1
+        except Exception as e:
+            logger.warning(f"Could not pre-warm database connection '{alias}': {e}")
+    return opened
+
+
+def pool_stats():
+    """{alias: usage} of this worker's connection pools (empty without pooling)"""
+    from .mysql_pool.pool import pool_stats
+    return pool_stats()
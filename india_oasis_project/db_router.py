@@ -0,0 +1,190 @@
+"""
+Read-replica routing with read-your-writes stickiness.
+
+``ReplicaRouter`` sends reads of catalog models (``REPLICA_MODELS``) made
+while serving a request to one of ``DATABASE_REPLICAS``; writes and every
+other read go to the primary (``default``). Cron jobs and management
+commands (no request) read from the primary too: they often write back
+what they read (prices, imported stock, rankings), and lagged input would
+end up stored on the primary. Catalog reads also stay on the primary when:
+
+- the visitor wrote recently: ``ReplicaPinMiddleware`` marks any unsafe
+  request (cart add, order create, review...) with a cookie, and requests
+  carrying it within ``DATABASE_REPLICA_PIN_SECONDS`` read from the
+  primary, as does the unsafe request itself;
+- the primary is inside a transaction (checkout locks, reads that must see
+  the transaction's own writes);
+- every replica lags more than ``DATABASE_REPLICA_MAX_LAG`` seconds or
+  cannot be probed. Lag comes from ``SHOW REPLICA STATUS`` and is memoized
+  per process for ``DATABASE_REPLICA_LAG_CHECK_SECONDS``.
+
+A request keeps the replica it picked first, so its queries see a single
+snapshot. Reads whose result goes into a shared cache (product page, review
+feed, ``cached_query``) run inside ``use_primary()``: the caches are
+invalidated in the primary's ``on_commit``, and a lagging replica would
+store the old data under the new version. Analytics reads that tolerate lag on any model (order export)
+opt in with ``queryset.using(read_replica())``.
+
+Replicas are never migrated: they copy the primary's schema.
+"""
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = 'primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+# Catalog data: shown to every visitor, written by staff and cron jobs
+REPLICA_MODELS = frozenset({
+    'store.category', 'store.product', 'store.banner', 'store.review', 'store.responsiveimage',
+    'store.productrecommendation', 'store.productranking',
+})
+
+# Routing state of the request being served: {'pinned': bool, 'replica': alias}
+_request_state = ContextVar('replica_routing', default=None)
+
+_lock = threading.Lock()
+_lag = {}  # alias -> (checked at, seconds behind or None)
+
+
+def probe_lag(alias):
+    """Seconds the replica is behind the primary; None if replication is stopped"""
+    connection = connections[alias]
+    if connection.vendor != 'mysql':
+        return 0.0
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute('SHOW REPLICA STATUS')
+        except DatabaseError:
+            cursor.execute('SHOW SLAVE STATUS')  # MySQL < 8.0.22, MariaDB < 10.5.1
+        row = cursor.fetchone()
+        columns = [column[0] for column in cursor.description or ()]
+    if row is None:
+        return None
+    status = dict(zip(columns, row))
+    lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+    return None if lag is None else float(lag)
+
+
+def replica_lag(alias):
+    """Memoized ``probe_lag``; a failing probe counts as stopped replication"""
+    now = time.monotonic()
+    with _lock:
+        cached = _lag.get(alias)
+    if cached and now - cached[0] < settings.DATABASE_REPLICA_LAG_CHECK_SECONDS:
+        return cached[1]
+    try:
+        lag = probe_lag(alias)
+    except Exception as e:
+        logger.warning(f"Replica {alias} lag probe failed: {e}")
+        lag = None
+    with _lock:
+        _lag[alias] = (now, lag)
+    return lag
+
+
+def healthy_replicas():
+    return [
+        alias for alias in settings.DATABASE_REPLICAS
+        if (lag := replica_lag(alias)) is not None and lag <= settings.DATABASE_REPLICA_MAX_LAG
+    ]
+
+
+def read_replica():
+    """Alias for reads that tolerate lag: the request's replica, a healthy one, or the primary"""
+    state = _request_state.get()
+    if state is not None and 'replica' in state:
+        return state['replica']
+    replicas = healthy_replicas()
+    alias = random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+    if state is not None:
+        state['replica'] = alias
+    return alias
+
+
+@contextmanager
+def use_primary():
+    """Catalog reads inside the block go to the primary (results that fill a shared cache)"""
+    state = _request_state.get()
+    if state is None or state['pinned']:
+        yield
+        return
+    token = _request_state.set({**state, 'pinned': True})
+    try:
+        yield
+    finally:
+        _request_state.reset(token)
+
+
+class ReplicaRouter:
+    """Catalog reads to a replica, everything else to the primary"""
+
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or model._meta.label_lower not in REPLICA_MODELS:
+            # None: Django uses the hinted instance's database, else the primary
+            return None
+        state = _request_state.get()
+        # Outside a request (cron, commands) or pinned after a write
+        if state is None or state['pinned']:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return read_replica()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaPinMiddleware:
+    """
+    Read-your-writes: unsafe requests read from the primary and pin the
+    visitor to it for ``DATABASE_REPLICA_PIN_SECONDS`` through a cookie.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        unsafe = request.method not in SAFE_METHODS
+        token = _request_state.set({'pinned': unsafe or self._pinned(request)})
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+
+        if unsafe:
+            seconds = settings.DATABASE_REPLICA_PIN_SECONDS
+            response.set_cookie(
+                PIN_COOKIE, str(int(time.time()) + seconds), max_age=seconds,
+                secure=request.is_secure(), httponly=True, samesite='Lax',
+            )
+        return response
+
+    @staticmethod
+    def _pinned(request):
+        try:
+            return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
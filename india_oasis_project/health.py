@@ -0,0 +1,206 @@
+"""
+Health check endpoints.
+
+- ``/health/live/``: liveness. The process answers; no I/O at all.
+- ``/health/ready/``: readiness. Database, cache, media directory and e-mail
+  queue depth. Load balancers only get a status code and a one-word body.
+- ``/health/``: same probes as readiness, with per-check detail and latency
+  when requested by a staff user (``?detail=1``), plus this worker's
+  catalog cache hit ratios, database pool usage and local CEP dataset.
+
+Probe results are memoized in-process for ``HEALTH_CHECK_CACHE_SECONDS``
+so frequent polling does not reach MySQL, and every probe runs in a worker
+thread with a hard ``HEALTH_CHECK_TIMEOUT`` so a stuck database cannot hang
+the Passenger worker serving the request.
+"""
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+
+logger = logging.getLogger(__name__)
+
+STARTED_AT = time.time()
+
+# Bounded pool: probes stuck past their timeout keep a thread busy, but
+# never more than this many, and later probes simply time out as well
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='health')
+_lock = threading.Lock()
+_memo = {'expires': 0.0, 'results': None}
+
+
+def _cache_seconds():
+    return getattr(settings, 'HEALTH_CHECK_CACHE_SECONDS', 5)
+
+
+def _timeout():
+    return getattr(settings, 'HEALTH_CHECK_TIMEOUT', 2.0)
+
+
+def check_database():
+    from django.db import connection
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    finally:
+        # Probe threads are short-lived; never leave their connection open
+        connection.close()
+    return 'ok', ''
+
+
+def check_cache():
+    from django.core.cache import cache
+    key = f'health:{os.getpid()}'
+    value = str(time.time())
+    cache.set(key, value, 30)
+    if cache.get(key) != value:
+        return 'error', 'cache did not return the value just written'
+    return 'ok', ''
+
+
+def check_media():
+    media_root = str(settings.MEDIA_ROOT)
+    with tempfile.NamedTemporaryFile(dir=media_root, prefix='.health-'):
+        pass
+    return 'ok', ''
+
+
+def check_email_queue():
+    from django.db import connection
+    from django.db.models import F
+    from email_service.models import EmailQueue
+    warning = getattr(settings, 'HEALTH_EMAIL_QUEUE_WARNING', 200)
+    try:
+        # LIMIT keeps the count bounded even when the queue is huge
+        depth = EmailQueue.objects.filter(
+            is_processed=False, attempts__lt=F('max_attempts')
+        )[:warning + 1].count()
+    finally:
+        connection.close()
+    if depth > warning:
+        return 'warning', f'more than {warning} e-mails pending'
+    return 'ok', f'{depth} pending'
+
+
+# name -> (probe, critical: failing it makes the app not ready)
+CHECKS = {
+    'database': (check_database, True),
+    'cache': (check_cache, True),
+    'media': (check_media, True),
+    'email_queue': (check_email_queue, False),
+}
+
+
+def _run_check(probe):
+    started = time.perf_counter()
+    try:
+        status, message = probe()
+    except Exception as e:
+        status, message = 'error', f'{type(e).__name__}: {e}'
+    return status, message, round((time.perf_counter() - started) * 1000, 1)
+
+
+def run_checks():
+    """Run every probe in parallel, each bounded by the timeout"""
+    timeout = _timeout()
+    futures = {name: _executor.submit(_run_check, probe) for name, (probe, _) in CHECKS.items()}
+    deadline = time.monotonic() + timeout
+    results = {}
+    for name, future in futures.items():
+        try:
+            status, message, latency = future.result(timeout=max(0, deadline - time.monotonic()))
+        except FutureTimeout:
+            future.cancel()
+            status, message, latency = 'error', f'timed out after {timeout}s', timeout * 1000
+        if status == 'error':
+            logger.warning(f"Health check {name} failed: {message}")
+        results[name] = {
+            'status': status,
+            'critical': CHECKS[name][1],
+            'latency_ms': latency,
+            'message': message,
+        }
+    return results
+
+
+def get_results():
+    """Probe results memoized for a few seconds, shared by all endpoints"""
+    now = time.monotonic()
+    with _lock:
+        if _memo['results'] is not None and now < _memo['expires']:
+            return _memo['results'], True
+    results = run_checks()
+    with _lock:
+        _memo.update(results=results, expires=time.monotonic() + _cache_seconds())
+    return results, False
+
+
+def overall_status(results):
+    if any(r['status'] == 'error' and r['critical'] for r in results.values()):
+        return 'error'
+    if any(r['status'] != 'ok' for r in results.values()):
+        return 'degraded'
+    return 'ok'
+
+
+def database_pool_stats():
+    from .db_connections import pool_stats
+    return pool_stats()
+
+
+def catalog_cache_stats():
+    # Per process: each Passenger worker reports its own local LRU
+    from store.catalog_cache import cache_stats
+    return cache_stats()
+
+
+def cep_dataset_info():
+    from store.ceps import info
+    return info()
+
+
+def _wants_detail(request):
+    # request.user hits the session/user tables: only resolve it on demand
+    return request.GET.get('detail') and getattr(request, 'user', None) and request.user.is_staff
+
+
+def _response(request):
+    results, cached = get_results()
+    status = overall_status(results)
+    payload = {'status': status}
+    if _wants_detail(request):
+        payload.update(
+            version=getattr(settings, 'VERSION', ''),
+            uptime_seconds=round(time.time() - STARTED_AT),
+            cached=cached,
+            checks=results,
+            catalog_cache=catalog_cache_stats(),
+            database_pools=database_pool_stats(),
+            cep_dataset=cep_dataset_info(),
+        )
+    return JsonResponse(payload, status=503 if status == 'error' else 200)
+
+
+@never_cache
+def liveness_check(request):
+    """The process is up and serving requests (no database, cache or disk)"""
+    return JsonResponse({'status': 'ok'})
+
+
+@never_cache
+def readiness_check(request):
+    """Critical dependencies reachable; 503 takes the instance out of rotation"""
+    return _response(request)
+
+
+@never_cache
+def health_check(request):
+    """Readiness summary; staff get per-check status and latency with ?detail=1"""
+    return _response(request)
@@ -0,0 +1,24 @@
+"""
+MySQL database backend with an in-process connection pool.
+
+For threaded workers: the threads of one process share up to ``max_size``
+open MySQL connections instead of each thread paying the TCP/TLS/auth
+handshake. Django's connection for a thread takes a pooled connection on
+first use and gives it back when Django closes it (end of the request,
+with ``CONN_MAX_AGE = 0``).
+
+Settings::
+
+    DATABASES['default'] = {
+        'ENGINE': 'india_oasis_project.mysql_pool',
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {'pool': {'min_size': 2, 'max_size': 8, 'timeout': 5, 'check_idle': 30}},
+        ...
+    }
+
+- ``min_size``: connections opened by ``prewarm_connections`` at startup;
+- ``max_size``: open connections per process (idle + in use);
+- ``timeout``: seconds a thread waits for a free connection before failing;
+- ``check_idle``: connections idle longer than this are pinged before use
+  and replaced if the server dropped them (``wait_timeout``, restarts).
+"""
@@ -0,0 +1,57 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS
+from django.db.backends.mysql import base as mysql
+
+from .pool import PoolTimeout, get_pool
+
+
+class DatabaseWrapper(mysql.DatabaseWrapper):
+    """Django's MySQL backend taking its connections from a per-process pool"""
+
+    def __init__(self, settings_dict, alias=DEFAULT_DB_ALIAS):
+        super().__init__(settings_dict, alias)
+        if settings_dict.get('CONN_MAX_AGE'):
+            raise ImproperlyConfigured(
+                f"Database '{alias}': the connection pool needs CONN_MAX_AGE = 0 "
+                "(connections go back to the pool at the end of each request)."
+            )
+        self._session_initialized = False
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict['OPTIONS'].get('pool') or {}, check=lambda c: c.ping())
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        try:
+            connection, self._session_initialized = self.pool.acquire(
+                lambda: super(DatabaseWrapper, self).get_new_connection(conn_params)
+            )
+        except PoolTimeout as e:
+            raise mysql.Database.OperationalError(str(e)) from e
+        return connection
+
+    def init_connection_state(self):
+        # Session variables survive on a pooled connection: set them once
+        if not self._session_initialized:
+            super().init_connection_state()
+
+    def open_pooled(self):
+        """A new raw connection for ``prewarm_connections``"""
+        return super().get_new_connection(self.get_connection_params())
+
+    def _close(self):
+        connection, pool = self.connection, self.pool
+        if self.errors_occurred:
+            pool.discard(connection)
+            return
+        try:
+            connection.rollback()
+        except mysql.Database.Error:
+            pool.discard(connection)
+        else:
+            pool.release(connection)
@@ -0,0 +1,180 @@
+"""
+Thread-safe pool of DB-API connections, independent of Django and MySQLdb.
+"""
+import collections
+import os
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    """No connection became free within the pool timeout"""
+
+
+class ConnectionPool:
+    """
+    Up to ``max_size`` connections per process. Idle connections are reused
+    newest first (the least likely to have been dropped by the server) and
+    pinged with ``check`` when idle for more than ``check_idle`` seconds.
+    """
+
+    def __init__(self, max_size, min_size=0, timeout=5.0, check_idle=30.0, check=None):
+        self.max_size = max_size
+        self.min_size = min(min_size, max_size)
+        self.timeout = timeout
+        self.check_idle = check_idle
+        self.check = check
+        self.pid = os.getpid()
+        self._idle = collections.deque()  # (connection, released at, session initialized)
+        self._size = 0  # open connections, idle or in use
+        self._condition = threading.Condition()
+        self._stats = collections.Counter()
+
+    def acquire(self, connect):
+        """
+        A connection and whether its session was already initialized by a
+        previous user; opens one with ``connect()`` if there is room.
+        """
+        started = time.monotonic()
+        deadline = started + self.timeout
+        while True:
+            connection, released, initialized = self._take(deadline)
+            if connection is None:
+                try:
+                    connection = connect()
+                except Exception:
+                    self._forget()
+                    raise
+                self._count(started, created=1)
+                return connection, False
+            if time.monotonic() - released <= self.check_idle or self._alive(connection):
+                self._count(started, reused=1)
+                return connection, initialized
+            self._discard(connection, 'discarded')
+
+    def _take(self, deadline):
+        with self._condition:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, None, False
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(f'no free connection after {self.timeout}s ({self.max_size} in use)')
+                self._stats['waits'] += 1
+                self._condition.wait(remaining)
+
+    def _alive(self, connection):
+        try:
+            self.check(connection)
+            return True
+        except Exception:
+            return False
+
+    def _count(self, started, **counters):
+        with self._condition:
+            self._stats.update(counters)
+            self._stats['acquired'] += 1
+            self._stats['wait_us'] += int((time.monotonic() - started) * 1e6)
+
+    def _forget(self, reason=None):
+        """One less open connection: lets a waiting thread open a new one"""
+        with self._condition:
+            self._size -= 1
+            if reason:
+                self._stats[reason] += 1
+            self._condition.notify()
+
+    def _discard(self, connection, reason):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        self._forget(reason)
+
+    def release(self, connection, initialized=True):
+        """Back to the pool (the caller has rolled back any transaction)"""
+        if os.getpid() != self.pid:
+            return
+        with self._condition:
+            self._idle.append((connection, time.monotonic(), initialized))
+            self._condition.notify()
+
+    def discard(self, connection):
+        """Close a connection that errored instead of returning it"""
+        if os.getpid() != self.pid:
+            return
+        self._discard(connection, 'broken')
+
+    def prewarm(self, connect):
+        """Open connections up to ``min_size``; returns how many were opened"""
+        opened = []
+        try:
+            while self._size < self.min_size:
+                with self._condition:
+                    if self._size >= self.min_size:
+                        break
+                    self._size += 1
+                try:
+                    opened.append(connect())
+                except Exception:
+                    self._forget()
+                    raise
+        finally:
+            for connection in opened:
+                self.release(connection, initialized=False)
+            with self._condition:
+                self._stats['created'] += len(opened)
+        return len(opened)
+
+    def stats(self):
+        with self._condition:
+            stats = dict(self._stats)
+            idle = len(self._idle)
+            size = self._size
+        acquired = stats.get('acquired', 0)
+        return {
+            'max_size': self.max_size,
+            'open': size,
+            'idle': idle,
+            'in_use': size - idle,
+            'acquired': acquired,
+            'created': stats.get('created', 0),
+            'reused': stats.get('reused', 0),
+            'waits': stats.get('waits', 0),
+            'timeouts': stats.get('timeouts', 0),
+            'discarded': stats.get('discarded', 0) + stats.get('broken', 0),
+            'avg_acquire_ms': round(stats.get('wait_us', 0) / acquired / 1000, 3) if acquired else 0,
+        }
+
+
+# One pool per database alias and process: a forked worker never reuses
+# its parent's sockets
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, options, check=None):
+    key = (os.getpid(), alias)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(
+                max_size=int(options.get('max_size', 8)),
+                min_size=int(options.get('min_size', 0)),
+                timeout=float(options.get('timeout', 5)),
+                check_idle=float(options.get('check_idle', 30)),
+                check=check,
+            )
+        return pool
+
+
+def pool_stats():
+    """{alias: stats} of this process's pools"""
+    pid = os.getpid()
+    with _pools_lock:
+        pools = {alias: pool for (owner, alias), pool in _pools.items() if owner == pid}
+    return {alias: pool.stats() for alias, pool in pools.items()}
@@ -0,0 +1,299 @@
+"""
+Per-request performance instrumentation.
+
+``PerformanceMiddleware`` measures, for every request:
+
+- database queries (count and time) through ``connection.execute_wrapper``;
+- database connections opened or taken from the pool (count and time);
+- cache hits and misses on the configured cache backends;
+- outbound HTTP calls made with ``requests`` (Mercado Pago, Melhor Envio,
+  Olist), count and time;
+- template rendering time;
+- total time, keyed by the resolved view name.
+
+Staff users get the numbers in a ``Server-Timing`` header (visible in the
+browser dev tools). A sample of requests (``PERFORMANCE_LOG_SAMPLE_RATE``)
+is written as JSON lines to the ``performance`` logger, and every request
+slower than ``PERFORMANCE_SLOW_REQUEST_MS`` is logged to
+``performance.slow`` with its slowest queries.
+"""
+import heapq
+import itertools
+import logging
+import random
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('performance')
+slow_logger = logging.getLogger('performance.slow')
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Counters for the request being served in the current context"""
+
+    def __init__(self, keep_queries):
+        self.started = time.perf_counter()
+        self.db_count = 0
+        self.db_time = 0.0
+        self.db_connect_count = 0
+        self.db_connect_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.http_count = 0
+        self.http_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.keep_queries = keep_queries
+        self._queries = []  # min-heap with the slowest queries
+        self._sequence = itertools.count()
+
+    def add_query(self, sql, duration):
+        self.db_count += 1
+        self.db_time += duration
+        entry = (duration, next(self._sequence), sql[:1000])
+        if len(self._queries) < self.keep_queries:
+            heapq.heappush(self._queries, entry)
+        elif self.keep_queries and duration > self._queries[0][0]:
+            heapq.heapreplace(self._queries, entry)
+
+    def slowest_queries(self):
+        return [
+            {'ms': round(duration * 1000, 2), 'sql': sql}
+            for duration, _, sql in sorted(self._queries, reverse=True)
+        ]
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.total_time * 1000, 2),
+            'db_queries': self.db_count,
+            'db_ms': round(self.db_time * 1000, 2),
+            'db_connects': self.db_connect_count,
+            'db_connect_ms': round(self.db_connect_time * 1000, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'http_calls': self.http_count,
+            'http_ms': round(self.http_time * 1000, 2),
+            'template_ms': round(self.template_time * 1000, 2),
+        }
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.db_count} queries"',
+            f'dbconn;dur={self.db_connect_time * 1000:.1f};desc="{self.db_connect_count} connects"',
+            f'cache;desc="{self.cache_hits} hit / {self.cache_misses} miss"',
+            f'http;dur={self.http_time * 1000:.1f};desc="{self.http_count} calls"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'total;dur={self.total_time * 1000:.1f}',
+        ])
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - started)
+
+
+# Instrumentation of cache, HTTP client and templates is installed once per
+# process by patching the classes in use; outside a request it is a no-op.
+
+_installed = False
+_MISSING = object()
+# Set while get_many runs: BaseCache.get_many calls self.get for each key
+_in_get_many = ContextVar('cache_get_many', default=False)
+
+
+def _instrument_cache_class(cls):
+    if getattr(cls, '_performance_instrumented', False):
+        return
+    original_get, original_get_many = cls.get, cls.get_many
+
+    def get(self, key, default=None, version=None):
+        metrics = _current.get()
+        if metrics is None or _in_get_many.get():
+            return original_get(self, key, default, version)
+        value = original_get(self, key, _MISSING, version)
+        if value is _MISSING:
+            metrics.cache_misses += 1
+            return default
+        metrics.cache_hits += 1
+        return value
+
+    def get_many(self, keys, version=None):
+        metrics = _current.get()
+        if metrics is None or _in_get_many.get():
+            return original_get_many(self, keys, version)
+        keys = list(keys)
+        token = _in_get_many.set(True)
+        try:
+            found = original_get_many(self, keys, version)
+        finally:
+            _in_get_many.reset(token)
+        metrics.cache_hits += len(found)
+        metrics.cache_misses += len(keys) - len(found)
+        return found
+
+    cls.get, cls.get_many = get, get_many
+    cls._performance_instrumented = True
+
+
+def _instrument_database_class(cls):
+    if getattr(cls, '_performance_instrumented', False):
+        return
+    original_connect = cls.connect
+
+    def connect(self):
+        metrics = _current.get()
+        if metrics is None:
+            return original_connect(self)
+        started = time.perf_counter()
+        try:
+            return original_connect(self)
+        finally:
+            metrics.db_connect_count += 1
+            metrics.db_connect_time += time.perf_counter() - started
+
+    cls.connect = connect
+    cls._performance_instrumented = True
+
+
+def _instrument_requests():
+    try:
+        from requests.sessions import Session
+    except ImportError:
+        return
+    if getattr(Session, '_performance_instrumented', False):
+        return
+    original_send = Session.send
+
+    def send(self, request, **kwargs):
+        metrics = _current.get()
+        if metrics is None:
+            return original_send(self, request, **kwargs)
+        started = time.perf_counter()
+        try:
+            return original_send(self, request, **kwargs)
+        finally:
+            metrics.http_count += 1
+            metrics.http_time += time.perf_counter() - started
+
+    Session.send = send
+    Session._performance_instrumented = True
+
+
+def _instrument_templates():
+    from django.template.backends.django import Template
+    if getattr(Template, '_performance_instrumented', False):
+        return
+    original_render = Template.render
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return original_render(self, context, request)
+        # Nested renders (render_to_string inside a view) count only once
+        metrics.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return original_render(self, context, request)
+        finally:
+            metrics.template_depth -= 1
+            if not metrics.template_depth:
+                metrics.template_time += time.perf_counter() - started
+
+    Template.render = render
+    Template._performance_instrumented = True
+
+
+def install_instrumentation():
+    global _installed
+    if _installed:
+        return
+    from django.core.cache import caches
+    for alias in settings.CACHES:
+        _instrument_cache_class(type(caches[alias]))
+    for alias in connections:
+        _instrument_database_class(type(connections[alias]))
+    _instrument_requests()
+    _instrument_templates()
+    _installed = True
+
+
+class PerformanceMiddleware:
+    """
+    Records per-request timings. Place it first in ``MIDDLEWARE`` so the
+    measurement covers every other middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'PERFORMANCE_MONITORING', True)
+        self.sample_rate = getattr(settings, 'PERFORMANCE_LOG_SAMPLE_RATE', 0.05)
+        self.slow_ms = getattr(settings, 'PERFORMANCE_SLOW_REQUEST_MS', 1000)
+        self.top_queries = getattr(settings, 'PERFORMANCE_SLOW_QUERY_COUNT', 5)
+        self.server_timing = getattr(settings, 'PERFORMANCE_SERVER_TIMING', 'staff')
+        if self.enabled:
+            install_instrumentation()
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        metrics = RequestMetrics(self.top_queries)
+        token = _current.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(_query_wrapper))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        if self._show_server_timing(request):
+            response['Server-Timing'] = metrics.server_timing()
+        self._log(request, response, metrics)
+        return response
+
+    def _show_server_timing(self, request):
+        if self.server_timing == 'all':
+            return True
+        if self.server_timing != 'staff':
+            return False
+        # Avoid loading the session/user for anonymous visitors
+        if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+            return False
+        user = getattr(request, 'user', None)
+        return bool(user is not None and user.is_staff)
+
+    def _log(self, request, response, metrics):
+        data = metrics.as_dict()
+        slow = data['total_ms'] >= self.slow_ms
+        if not slow and random.random() >= self.sample_rate:
+            return
+
+        match = getattr(request, 'resolver_match', None)
+        data.update(
+            view=match.view_name if match else None,
+            method=request.method,
+            path=request.path,
+            status=response.status_code,
+        )
+        if slow:
+            data['slow_queries'] = metrics.slowest_queries()
+            slow_logger.warning('slow request', extra=data)
+        else:
+            logger.info('request', extra=data)
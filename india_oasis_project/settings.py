@@ -44,6 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'india_oasis_project.performance.PerformanceMiddleware',
+    'india_oasis_project.db_router.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -86,6 +88,9 @@ DATABASES = {
         'PASSWORD': env('DB_PASSWORD'),
         'HOST': env('DB_HOST', default='localhost'),
         'PORT': env('DB_PORT', default='3306'),
+        # Persistent connections, pinged before reuse (india_oasis_project/db_connections.py)
+        'CONN_MAX_AGE': env.int('DB_CONN_MAX_AGE', default=300),
+        'CONN_HEALTH_CHECKS': env.bool('DB_CONN_HEALTH_CHECKS', default=True),
         'OPTIONS': {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
             'charset': 'utf8mb4',
@@ -93,6 +98,28 @@ DATABASES = {
     }
 }
 
+# In-process pool shared by a worker's threads (india_oasis_project/mysql_pool); 0 = off
+DATABASE_POOL_MAX_SIZE = env.int('DB_POOL_MAX_SIZE', default=0)
+if DATABASE_POOL_MAX_SIZE:
+    DATABASES['default'].update(ENGINE='india_oasis_project.mysql_pool', CONN_MAX_AGE=0)
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': env.int('DB_POOL_MIN_SIZE', default=1),
+        'max_size': DATABASE_POOL_MAX_SIZE,
+        'timeout': env.float('DB_POOL_TIMEOUT', default=5.0),
+        'check_idle': env.int('DB_POOL_CHECK_IDLE', default=30),
+    }
+DATABASE_PREWARM = env.bool('DB_PREWARM', default=True)  # open connections when a worker starts
+
+# Read replicas (india_oasis_project/db_router.py): same credentials, one
+# alias per host; catalog reads go there unless the visitor just wrote
+DATABASE_REPLICAS = []
+for _index, _host in enumerate(env.list('DB_REPLICA_HOSTS', default=[]), start=1):
+    DATABASES[f'replica{_index}'] = {**DATABASES['default'], 'HOST': _host, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica{_index}')
+DATABASE_REPLICA_MAX_LAG = env.float('DB_REPLICA_MAX_LAG', default=5.0)  # seconds; above it reads use the primary
+DATABASE_REPLICA_LAG_CHECK_SECONDS = env.int('DB_REPLICA_LAG_CHECK_SECONDS', default=5)
+DATABASE_REPLICA_PIN_SECONDS = env.int('DB_REPLICA_PIN_SECONDS', default=10)  # primary-only after a write
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -122,6 +149,23 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'public_html' / 'static'
 
+# collectstatic minifies, bundles, content-hashes and pre-compresses assets
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'india_oasis_project.staticfiles.PrecompressedManifestStaticFilesStorage',
+    },
+}
+
+# Bundles built by collectstatic (rendered with {% static_bundle %})
+STATIC_BUNDLES = {
+    'css/site.bundle.css': ['css/star-rating.css', 'css/styles.css', 'css/custom.css'],
+    'js/site.bundle.js': ['js/star-rating.js', 'js/toast-system.js'],
+}
+STATIC_BUNDLES_ENABLED = env.bool('STATIC_BUNDLES_ENABLED', default=not DEBUG)
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'public_html' / 'media'
@@ -136,6 +180,18 @@ MERCADO_PAGO_ACCESS_TOKEN = env('MERCADO_PAGO_ACCESS_TOKEN')
 # Melhor Envio Settings
 MELHOR_ENVIO_TOKEN = env('MELHOR_ENVIO_TOKEN', default='')
 MELHOR_ENVIO_CEP_ORIGEM = env('MELHOR_ENVIO_CEP_ORIGEM', default='01034-001')
+MELHOR_ENVIO_API_URL = env('MELHOR_ENVIO_API_URL', default='https://api.melhorenvio.com.br')
+
+# Shipping quotes (store/shipping.py): Melhor Envio service ids quoted in parallel
+# (1 PAC, 2 SEDEX, 3 Jadlog .Package, 4 Jadlog .Com), per-service timeout and
+# total budget in seconds; services still pending at the budget are skipped
+SHIPPING_QUOTE_SERVICES = env.list('SHIPPING_QUOTE_SERVICES', default=['1', '2'])
+SHIPPING_QUOTE_TIMEOUT = env.float('SHIPPING_QUOTE_TIMEOUT', default=5.0)
+SHIPPING_QUOTE_BUDGET = env.float('SHIPPING_QUOTE_BUDGET', default=6.0)
+SHIPPING_QUOTE_WORKERS = env.int('SHIPPING_QUOTE_WORKERS', default=8)
+
+# Local CEP dataset for address autofill and validation (store/ceps.py, loaded with import_ceps)
+CEP_DATABASE_PATH = env('CEP_DATABASE_PATH', default=str(BASE_DIR / 'data' / 'ceps.sqlite3'))
 
 # Email Settings (simplified for cPanel)
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -164,6 +220,10 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'pythonjsonlogger.jsonlogger.JsonFormatter',
+            'format': '%(asctime)s %(levelname)s %(name)s %(message)s',
+        },
     },
     'handlers': {
         'file': {
@@ -178,6 +238,12 @@ LOGGING = {
             'filename': BASE_DIR / 'logs' / 'django-error.log',
             'formatter': 'verbose',
         },
+        'performance_file': {
+            'level': 'INFO',
+            'class': 'logging.FileHandler',
+            'filename': BASE_DIR / 'logs' / 'performance.log',
+            'formatter': 'json',
+        },
     },
     'loggers': {
         'django': {
@@ -195,6 +261,12 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        # JSON lines from PerformanceMiddleware (sampled + slow requests)
+        'performance': {
+            'handlers': ['performance_file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
@@ -229,14 +301,15 @@ DATA_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB
 FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB
 MAX_UPLOAD_SIZE = 5242880  # 5MB
 
-# Cache Configuration (file-based cache for cPanel)
+# Cache Configuration: one SQLite file in WAL mode shared by the Passenger
+# workers (no Redis on cPanel); see india_oasis_project/sqlite_cache.py
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
-        'LOCATION': BASE_DIR / 'cache',
+        'BACKEND': 'india_oasis_project.sqlite_cache.SQLiteCache',
+        'LOCATION': BASE_DIR / 'cache' / 'cache.sqlite3',
         'TIMEOUT': 300,  # 5 minutes
         'OPTIONS': {
-            'MAX_ENTRIES': 1000,
+            'MAX_ENTRIES': env.int('CACHE_MAX_ENTRIES', default=50000),
         },
     }
 }
@@ -248,6 +321,30 @@ ORDER_TIMEOUT_MINUTES = env.int('ORDER_TIMEOUT_MINUTES', default=30)
 # Version
 VERSION = env('VERSION', default='1.0.0-cpanel')
 
+# Health checks (/health/, /health/ready/, /health/live/)
+HEALTH_CHECK_CACHE_SECONDS = env.int('HEALTH_CHECK_CACHE_SECONDS', default=5)
+HEALTH_CHECK_TIMEOUT = env.float('HEALTH_CHECK_TIMEOUT', default=2.0)
+HEALTH_EMAIL_QUEUE_WARNING = env.int('HEALTH_EMAIL_QUEUE_WARNING', default=200)
+
+# Request instrumentation (india_oasis_project/performance.py)
+PERFORMANCE_MONITORING = env.bool('PERFORMANCE_MONITORING', default=True)
+PERFORMANCE_LOG_SAMPLE_RATE = env.float('PERFORMANCE_LOG_SAMPLE_RATE', default=0.05)
+PERFORMANCE_SLOW_REQUEST_MS = env.int('PERFORMANCE_SLOW_REQUEST_MS', default=1000)
+PERFORMANCE_SLOW_QUERY_COUNT = env.int('PERFORMANCE_SLOW_QUERY_COUNT', default=5)
+PERFORMANCE_SERVER_TIMING = env('PERFORMANCE_SERVER_TIMING', default='staff')  # staff, all or off
+
+# Full-page cache of the product detail page (store/page_cache.py)
+PRODUCT_PAGE_CACHE_ENABLED = env.bool('PRODUCT_PAGE_CACHE_ENABLED', default=True)
+PRODUCT_PAGE_CACHE_SECONDS = env.int('PRODUCT_PAGE_CACHE_SECONDS', default=60 * 15)
+PRODUCT_PAGE_EDGE_MAX_AGE = env.int('PRODUCT_PAGE_EDGE_MAX_AGE', default=0)  # s-maxage for a CDN; 0 = off
+
+# Per-process LRU in front of the shared cache for catalog data (store/catalog_cache.py)
+CATALOG_LOCAL_CACHE_MAX_ENTRIES = env.int('CATALOG_LOCAL_CACHE_MAX_ENTRIES', default=500)
+CATALOG_LOCAL_CACHE_SECONDS = env.int('CATALOG_LOCAL_CACHE_SECONDS', default=300)
+
+# Products lose the "new" flag after this many days (compute_rankings)
+NEW_PRODUCT_DAYS = env.int('NEW_PRODUCT_DAYS', default=30)
+
 # cPanel specific settings
 FORCE_SCRIPT_NAME = env('FORCE_SCRIPT_NAME', default='')
 USE_X_FORWARDED_HOST = True
@@ -263,8 +360,7 @@ ADMIN_SITE_TITLE = 'India Oasis Admin Portal'
 ADMIN_INDEX_TITLE = 'Bem-vindo ao India Oasis Admin'
 
 # Performance optimizations for shared hosting
-DATABASE_ROUTERS = []
-DATABASE_CONNECTION_POOLING = False
+DATABASE_ROUTERS = ['india_oasis_project.db_router.ReplicaRouter']
 
 # Disable debug toolbar and development tools
 INTERNAL_IPS = []
@@ -0,0 +1,14 @@
+"""
+Settings for the test suite:
+
+    python manage.py test --settings=india_oasis_project.settings_test
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, STORAGES
+
+# Second database playing the read replica in ReplicaRouterTest
+# (store/tests.py); the test runner creates and migrates it with default
+DATABASES['replica'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}
+
+# No collectstatic step: the manifest storage is strict about missing entries
+STORAGES = {**STORAGES, 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}}
@@ -0,0 +1,282 @@
+"""
+Cache backend for hosts without Redis/Memcached: one SQLite file in WAL mode.
+
+``FileBasedCache`` keeps one pickle file per key: every hit opens and
+unpickles a file, and once ``MAX_ENTRIES`` is reached every write lists the
+whole directory and deletes random files. This backend keeps all entries
+in a single table instead:
+
+- WAL journal: readers never block each other or the writer, so the
+  Passenger worker processes share the file safely; writers take the lock
+  up front (``BEGIN IMMEDIATE``) and wait up to ``TIMEOUT_SECONDS``;
+- reads are served through ``mmap`` (``MMAP_SIZE`` bytes of the file);
+- approximate LRU eviction: each row has an ``accessed`` time, refreshed on
+  a hit at most once per ``ACCESS_RESOLUTION`` seconds (a write per read
+  would serialize all readers); past ``MAX_ENTRIES`` the expired rows and
+  then the least recently used ``1/CULL_FREQUENCY`` are deleted;
+- the entry count is kept by triggers, so checking it costs one row read;
+- integers are stored as SQLite integers and ``incr``/``decr`` run under
+  the write lock, so counters stay exact across processes;
+- ``get_many``/``set_many``/``delete_many`` run in one statement or one
+  transaction.
+
+Settings::
+
+    CACHES = {'default': {
+        'BACKEND': 'india_oasis_project.sqlite_cache.SQLiteCache',
+        'LOCATION': BASE_DIR / 'cache' / 'cache.sqlite3',
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    }}
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Bound parameters per statement (SQLite builds before 3.32 allow 999)
+MAX_VARIABLES = 900
+MAX_INTEGER = 2 ** 63 - 1
+
+SCHEMA = """
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+CREATE TABLE IF NOT EXISTS cache_stats (id INTEGER PRIMARY KEY CHECK (id = 0), entries INTEGER NOT NULL);
+INSERT OR IGNORE INTO cache_stats (id, entries) VALUES (0, 0);
+CREATE TRIGGER IF NOT EXISTS cache_count_insert AFTER INSERT ON cache
+BEGIN UPDATE cache_stats SET entries = entries + 1 WHERE id = 0; END;
+CREATE TRIGGER IF NOT EXISTS cache_count_delete AFTER DELETE ON cache
+BEGIN UPDATE cache_stats SET entries = entries - 1 WHERE id = 0; END;
+COMMIT;
+"""
+
+
+def _chunks(items, size=MAX_VARIABLES):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class SQLiteCache(BaseCache):
+    """Django cache backend storing every entry in one SQLite database"""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = Path(location)
+        self._busy_timeout = float(options.get('TIMEOUT_SECONDS', 5))
+        self._mmap_size = int(options.get('MMAP_SIZE', 64 * 1024 * 1024))
+        self._access_resolution = float(options.get('ACCESS_RESOLUTION', 60))
+        self._local = threading.local()
+
+    # Connections: one per thread, reopened after a fork (Passenger workers)
+
+    def _connection(self):
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self._path, timeout=self._busy_timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode = WAL')
+            # WAL + NORMAL: a power loss may drop the last commits, never corrupt
+            connection.execute('PRAGMA synchronous = NORMAL')
+            connection.execute(f'PRAGMA mmap_size = {self._mmap_size}')
+            connection.executescript(SCHEMA)
+            local.connection, local.pid = connection, os.getpid()
+        return local.connection
+
+    class _write:
+        """``BEGIN IMMEDIATE`` ... ``COMMIT``: takes the write lock before reading"""
+
+        def __init__(self, connection):
+            self.connection = connection
+
+        def __enter__(self):
+            self.connection.execute('BEGIN IMMEDIATE')
+            return self.connection
+
+        def __exit__(self, exc_type, exc, traceback):
+            self.connection.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+    # Values: integers as SQLite integers (atomic incr), the rest pickled
+
+    def _encode(self, value):
+        if type(value) is int and -MAX_INTEGER - 1 <= value <= MAX_INTEGER:
+            return value
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _decode(value):
+        return value if isinstance(value, int) else pickle.loads(value)
+
+    def _expires(self, timeout):
+        return self.get_backend_timeout(timeout)
+
+    # Reads
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        connection = self._connection()
+        now = time.time()
+        row = connection.execute(
+            'SELECT value, expires, accessed FROM cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            return default
+        if now - row[2] > self._access_resolution:
+            with self._write(connection):
+                connection.execute('UPDATE cache SET accessed = ? WHERE key = ?', (now, key))
+        return self._decode(row[0])
+
+    def get_many(self, keys, version=None):
+        keys = {self.make_and_validate_key(key, version=version): key for key in keys}
+        connection = self._connection()
+        now = time.time()
+        found, stale = {}, []
+        for chunk in _chunks(list(keys)):
+            placeholders = ', '.join('?' * len(chunk))
+            for key, value, expires, accessed in connection.execute(
+                f'SELECT key, value, expires, accessed FROM cache WHERE key IN ({placeholders})', chunk
+            ):
+                if expires is not None and expires <= now:
+                    continue
+                found[keys[key]] = self._decode(value)
+                if now - accessed > self._access_resolution:
+                    stale.append((now, key))
+        if stale:
+            with self._write(connection):
+                connection.executemany('UPDATE cache SET accessed = ? WHERE key = ?', stale)
+        return found
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._connection().execute(
+            'SELECT 1 FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)', (key, time.time())
+        ).fetchone() is not None
+
+    # Writes
+
+    def _upsert(self, connection, rows):
+        connection.executemany(
+            'INSERT INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET '
+            'value = excluded.value, expires = excluded.expires, accessed = excluded.accessed',
+            rows
+        )
+        self._cull(connection)
+
+    def _cull(self, connection):
+        entries = connection.execute('SELECT entries FROM cache_stats WHERE id = 0').fetchone()[0]
+        if entries <= self._max_entries:
+            return
+        connection.execute('DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?', (time.time(),))
+        entries = connection.execute('SELECT entries FROM cache_stats WHERE id = 0').fetchone()[0]
+        if entries > self._max_entries:
+            if self._cull_frequency == 0:
+                connection.execute('DELETE FROM cache')
+            else:
+                connection.execute(
+                    'DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+                    (entries // self._cull_frequency,)
+                )
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = (key, self._encode(value), self._expires(timeout), time.time())
+        connection = self._connection()
+        with self._write(connection):
+            self._upsert(connection, [row])
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires, now = self._expires(timeout), time.time()
+        rows = [
+            (self.make_and_validate_key(key, version=version), self._encode(value), expires, now)
+            for key, value in data.items()
+        ]
+        if rows:
+            connection = self._connection()
+            with self._write(connection):
+                self._upsert(connection, rows)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        connection = self._connection()
+        with self._write(connection):
+            # Only replaces an expired entry
+            cursor = connection.execute(
+                'INSERT INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET '
+                'value = excluded.value, expires = excluded.expires, accessed = excluded.accessed '
+                'WHERE cache.expires IS NOT NULL AND cache.expires <= ?',
+                (key, self._encode(value), self._expires(timeout), now, now)
+            )
+            added = cursor.rowcount == 1
+            if added:
+                self._cull(connection)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        connection = self._connection()
+        with self._write(connection):
+            cursor = connection.execute(
+                'UPDATE cache SET expires = ?, accessed = ? '
+                'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (self._expires(timeout), now, key, now)
+            )
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        connection = self._connection()
+        with self._write(connection):
+            row = connection.execute(
+                'SELECT value FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)', (key, now)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            if isinstance(row[0], int) and -MAX_INTEGER - 1 <= row[0] + delta <= MAX_INTEGER:
+                # The write lock is held: nobody else changes the row in between
+                value = row[0] + delta
+            else:
+                value = self._decode(row[0]) + delta
+            connection.execute(
+                'UPDATE cache SET value = ?, accessed = ? WHERE key = ?', (self._encode(value), now, key)
+            )
+        return value
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        connection = self._connection()
+        with self._write(connection):
+            cursor = connection.execute('DELETE FROM cache WHERE key = ?', (key,))
+        return cursor.rowcount == 1
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if not keys:
+            return
+        connection = self._connection()
+        with self._write(connection):
+            for chunk in _chunks(keys):
+                connection.execute(f'DELETE FROM cache WHERE key IN ({", ".join("?" * len(chunk))})', chunk)
+
+    def clear(self):
+        connection = self._connection()
+        with self._write(connection):
+            connection.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Called at the end of every request: the per-thread connection is kept
+        pass
@@ -0,0 +1,133 @@
+"""
+Static files storage for cPanel deployments.
+
+Extends Django's ManifestStaticFilesStorage so that ``collectstatic``:
+
+1. minifies the project CSS/JS (conservatively, no external tools);
+2. builds the bundles declared in ``settings.STATIC_BUNDLES``;
+3. writes content-hashed copies of every file plus ``staticfiles.json``;
+4. emits pre-compressed ``.gz`` (and ``.br`` when the optional ``brotli``
+   package is installed) next to each hashed text asset, which Apache serves
+   directly through the rules in ``.htaccess``.
+"""
+import gzip
+import logging
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # Optional: only gzip variants are written
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+_CSS_TOKENS = re.compile(
+    r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|(/\*.*?\*/)',
+    re.DOTALL
+)
+
+
+def minify_css(source):
+    """Remove comments and redundant whitespace, leaving strings untouched"""
+    output = []
+    position = 0
+    for match in _CSS_TOKENS.finditer(source):
+        output.append(_squeeze_css(source[position:match.start()]))
+        if match.group(1):
+            output.append(match.group(1))
+        position = match.end()
+    output.append(_squeeze_css(source[position:]))
+    return ''.join(output).strip()
+
+
+def _squeeze_css(chunk):
+    chunk = re.sub(r'\s+', ' ', chunk)
+    chunk = re.sub(r'\s*([{};,>])\s*', r'\1', chunk)
+    chunk = re.sub(r':\s+', ':', chunk)
+    return chunk.replace(';}', '}')
+
+
+def minify_js(source):
+    """
+    Conservative JS minification: drops blank lines only. Indentation and
+    ``//`` comments stay, since telling them apart from the contents of
+    strings and template literals needs a real tokenizer; the ``.gz``/``.br``
+    variants take care of the remaining whitespace.
+    """
+    return '\n'.join(line for line in source.splitlines() if line.strip()) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage with minification, bundling and pre-compression"""
+
+    minify_prefixes = ('css/', 'js/')
+    compressible_extensions = ('.css', '.js', '.svg', '.json', '.txt', '.xml', '.html')
+    min_compress_size = 512
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = dict(paths)
+            self._minify(paths)
+            self._build_bundles(paths)
+
+        yield from super().post_process(paths, dry_run, **options)
+
+        if not dry_run:
+            self._compress(set(self.hashed_files.values()))
+
+    def _read(self, paths, name):
+        storage, path = paths[name]
+        with storage.open(path) as source_file:
+            return source_file.read().decode('utf-8')
+
+    def _write(self, name, content):
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(content.encode('utf-8')))
+
+    def _minify(self, paths):
+        """Minify the collected copies and hash those instead of the sources"""
+        for name in list(paths):
+            extension = name[name.rfind('.'):]
+            if not name.startswith(self.minify_prefixes) or extension not in MINIFIERS:
+                continue
+            if '.min.' in name or name.endswith('.bundle' + extension):
+                continue
+            self._write(name, MINIFIERS[extension](self._read(paths, name)))
+            paths[name] = (self, name)
+
+    def _build_bundles(self, paths):
+        for bundle, members in getattr(settings, 'STATIC_BUNDLES', {}).items():
+            missing = [member for member in members if member not in paths]
+            if missing:
+                logger.warning(f"Bundle {bundle} skipped, missing: {', '.join(missing)}")
+                continue
+            separator = ';\n' if bundle.endswith('.js') else '\n'
+            self._write(bundle, separator.join(self._read(paths, member) for member in members))
+            paths[bundle] = (self, bundle)
+
+    def _compress(self, names):
+        for name in names:
+            if not name.endswith(self.compressible_extensions):
+                continue
+            with self.open(name) as asset:
+                content = asset.read()
+            if len(content) < self.min_compress_size:
+                continue
+
+            variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variants['.br'] = brotli.compress(content, quality=11)
+
+            for suffix, compressed in variants.items():
+                if len(compressed) < len(content):
+                    if self.exists(name + suffix):
+                        self.delete(name + suffix)
+                    self._save(name + suffix, ContentFile(compressed))
@@ -0,0 +1,33 @@
+"""Helpers shared by the apps' test suites."""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class ChangelistQueryCountMixin:
+    """
+    Admin changelists must not run one query per row: the same pages are
+    measured with a few rows and with more, and the counts must match.
+    Subclasses implement ``create_rows(start, count)``.
+    """
+
+    def setUp(self):
+        super().setUp()
+        from django.contrib.auth.models import User
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'admin123')
+        self.client.force_login(self.admin)
+
+    def create_rows(self, start, count):
+        raise NotImplementedError
+
+    def count_queries(self, url):
+        self.client.get(url)  # warms the session and content type caches
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def assertConstantQueries(self, urls, few=2, more=10):
+        self.create_rows(0, few)
+        counts = {url: self.count_queries(url) for url in urls}
+        self.create_rows(few, more)
+        self.assertEqual(counts, {url: self.count_queries(url) for url in urls})
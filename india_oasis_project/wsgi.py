@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'india_oasis_project.settings')
 
 application = get_wsgi_application()
+
+from india_oasis_project.db_connections import prewarm_connections  # noqa: E402
+
+prewarm_connections()
@@ -23,6 +23,10 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'india_oasis_project.settings_cp
 try:
     from django.core.wsgi import get_wsgi_application
     application = get_wsgi_application()
+
+    # Open the MySQL connections now, not on the first visitor's request
+    from india_oasis_project.db_connections import prewarm_connections
+    prewarm_connections()
 except ImportError:
     # Handle import errors gracefully
     import traceback
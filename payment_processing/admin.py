@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import PaymentConfig, Notification
+from .models import PaymentConfig, Notification, SalesRollup
 from django.urls import path
 from django.utils.html import format_html
 from django.urls import reverse
@@ -26,3 +26,15 @@ class NotificationAdmin(admin.ModelAdmin):
     search_fields = ("message",)
     readonly_fields = ("event_type", "message", "created_at")
     ordering = ("-created_at",)
+
+@admin.register(SalesRollup)
+class SalesRollupAdmin(admin.ModelAdmin):
+    list_display = ("bucket", "granularity", "status", "payment_method", "state", "orders", "revenue")
+    list_filter = ("granularity", "status", "payment_method")
+    ordering = ("-bucket",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
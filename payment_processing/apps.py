@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PaymentProcessingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'payment_processing'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,199 @@
+"""
+Agregados do painel de pagamentos.
+
+``SalesRollup`` guarda, por hora e por dia, a contagem e a receita dos
+pedidos agrupadas por status, forma de pagamento e estado. Os sinais em
+``signals.py`` aplicam deltas (+1/-1) a cada criação, transição ou remoção
+de pedido; ``rebuild_rollups`` recalcula um período a partir dos pedidos
+(backfill e correção de alterações feitas com ``queryset.update()``).
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from .models import Notification, SalesRollup
+
+GRANULARITIES = ('hour', 'day')
+# Status em que o pagamento foi confirmado (entram na receita)
+PAID_STATUSES = ('payment_approved', 'processing', 'shipped', 'delivered')
+PENDING_STATUSES = ('awaiting_payment', 'pending')
+
+NOTIFICACOES_CACHE_KEY = 'painel:notificacoes'
+NOTIFICACOES_CACHE_TIMEOUT = 60 * 5
+
+
+def bucket_start(moment, granularity):
+    """Início da hora/dia (no fuso do projeto) que contém ``moment``"""
+    local = timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        local = local.replace(hour=0)
+    return local
+
+
+def rollup_key(order):
+    """Dimensões do pedido que determinam sua linha no agregado"""
+    return (
+        order.created,
+        order.status,
+        order.payment_method or '',
+        order.state or '',
+        order.total_price or Decimal('0'),
+    )
+
+
+def apply_delta(key, orders):
+    """Soma ``orders`` pedidos (1 ou -1) com a chave dada em cada granularidade"""
+    created, status, payment_method, state, total_price = key
+    revenue = total_price * orders
+    for granularity in GRANULARITIES:
+        lookup = {
+            'granularity': granularity,
+            'bucket': bucket_start(created, granularity),
+            'status': status,
+            'payment_method': payment_method,
+            'state': state,
+        }
+        updated = SalesRollup.objects.filter(**lookup).update(
+            orders=F('orders') + orders, revenue=F('revenue') + revenue
+        )
+        if updated:
+            continue
+        try:
+            with transaction.atomic():
+                SalesRollup.objects.create(orders=orders, revenue=revenue, **lookup)
+        except IntegrityError:
+            # Outra requisição criou a linha entre o UPDATE e o INSERT
+            SalesRollup.objects.filter(**lookup).update(
+                orders=F('orders') + orders, revenue=F('revenue') + revenue
+            )
+
+
+def record_transition(old_key, new_key):
+    """Move o pedido da linha antiga para a nova (None = inexistente)"""
+    if old_key == new_key:
+        return
+    if old_key is not None:
+        apply_delta(old_key, -1)
+    if new_key is not None:
+        apply_delta(new_key, 1)
+
+
+def rebuild_rollups(since=None):
+    """
+    Recalcula os agregados a partir dos pedidos criados desde ``since``
+    (início do dia; None = todo o histórico). Retorna o número de linhas.
+    """
+    from store.models import Order
+
+    orders = Order.objects.all()
+    rollups = SalesRollup.objects.all()
+    if since is not None:
+        since = bucket_start(since, 'day')
+        orders = orders.filter(created__gte=since)
+        rollups = rollups.filter(bucket__gte=since)
+
+    truncs = {
+        'hour': TruncHour('created', tzinfo=timezone.get_current_timezone()),
+        'day': TruncDay('created', tzinfo=timezone.get_current_timezone()),
+    }
+    with transaction.atomic():
+        rollups.delete()
+        rows = []
+        for granularity, trunc in truncs.items():
+            grouped = (
+                orders.annotate(period=trunc)
+                .values('period', 'status', 'payment_method', 'state')
+                .annotate(total=Count('id'), receita=Sum('total_price'))
+                .order_by()
+            )
+            rows.extend(
+                SalesRollup(
+                    granularity=granularity, bucket=row['period'], status=row['status'],
+                    payment_method=row['payment_method'] or '', state=row['state'] or '',
+                    orders=row['total'], revenue=row['receita'] or 0,
+                )
+                for row in grouped
+            )
+        SalesRollup.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def status_totals():
+    """{status: pedidos} de todo o histórico, a partir dos agregados diários"""
+    return dict(
+        SalesRollup.objects.filter(granularity='day')
+        .values_list('status')
+        .annotate(total=Sum('orders'))
+        .filter(total__gt=0)
+        .order_by('status')
+    )
+
+
+def _series(granularity, since, step, periods):
+    rows = {
+        row['bucket']: row for row in
+        SalesRollup.objects.filter(granularity=granularity, bucket__gte=since)
+        .values('bucket')
+        .annotate(
+            total=Sum('orders'),
+            pagos=Sum('orders', filter=Q(status__in=PAID_STATUSES)),
+            receita=Sum('revenue', filter=Q(status__in=PAID_STATUSES)),
+        )
+        .order_by('bucket')
+    }
+    series = {'labels': [], 'pedidos': [], 'pagos': [], 'receita': []}
+    for i in range(periods):
+        bucket = since + step * i
+        row = rows.get(bucket, {})
+        series['labels'].append(bucket)
+        series['pedidos'].append(row.get('total') or 0)
+        series['pagos'].append(row.get('pagos') or 0)
+        series['receita'].append(float(row.get('receita') or 0))
+    return series
+
+
+def daily_series(days=90):
+    """Pedidos, pedidos pagos e receita por dia nos últimos ``days`` dias"""
+    since = bucket_start(timezone.now(), 'day') - timedelta(days=days - 1)
+    series = _series('day', since, timedelta(days=1), days)
+    series['labels'] = [bucket.strftime('%d/%m') for bucket in series['labels']]
+    return series
+
+
+def hourly_series(hours=24):
+    """Pedidos, pedidos pagos e receita por hora nas últimas ``hours`` horas"""
+    since = bucket_start(timezone.now(), 'hour') - timedelta(hours=hours - 1)
+    series = _series('hour', since, timedelta(hours=1), hours)
+    series['labels'] = [timezone.localtime(bucket).strftime('%Hh') for bucket in series['labels']]
+    return series
+
+
+def notificacoes_payload():
+    """Últimas notificações e total de não lidas, em cache até a próxima mudança"""
+    payload = cache.get(NOTIFICACOES_CACHE_KEY)
+    if payload is None:
+        notificacoes = Notification.objects.order_by('-created_at')[:10]
+        payload = {
+            'notificacoes': [
+                {
+                    'id': n.id,
+                    'event_type': n.get_event_type_display(),
+                    'message': n.message,
+                    'created_at': timezone.localtime(n.created_at).strftime('%d/%m/%Y %H:%M'),
+                    'is_read': n.is_read,
+                }
+                for n in notificacoes
+            ],
+            'nao_lidas': Notification.objects.filter(is_read=False).count(),
+        }
+        cache.set(NOTIFICACOES_CACHE_KEY, payload, NOTIFICACOES_CACHE_TIMEOUT)
+    return payload
+
+
+def invalidate_notificacoes():
+    cache.delete(NOTIFICACOES_CACHE_KEY)
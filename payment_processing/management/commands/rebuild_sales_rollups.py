@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from payment_processing.dashboard import rebuild_rollups
+
+
+class Command(BaseCommand):
+    """
+    Recalcula os agregados do painel de pagamentos a partir dos pedidos.
+
+    Os agregados são mantidos a cada transição de pedido; este comando faz o
+    backfill inicial e corrige desvios de alterações em massa
+    (``queryset.update()`` não dispara sinais). Agende diariamente no cron
+    com ``--days 2``.
+    """
+    help = 'Recalcula os agregados de vendas (por hora e por dia) do painel de pagamentos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Recalcula apenas os últimos N dias (padrão: todo o histórico).',
+        )
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(days=options['days'] - 1) if options['days'] else None
+        rows = rebuild_rollups(since)
+        periodo = f"últimos {options['days']} dia(s)" if since else 'todo o histórico'
+        self.stdout.write(self.style.SUCCESS(f'{rows} linha(s) de agregado recalculada(s) ({periodo}).'))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-18 23:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payment_processing', '0002_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hora'), ('day', 'Dia')], max_length=4, verbose_name='Granularidade')),
+                ('bucket', models.DateTimeField(verbose_name='Início do Período')),
+                ('status', models.CharField(max_length=20, verbose_name='Status')),
+                ('payment_method', models.CharField(blank=True, max_length=30, verbose_name='Forma de Pagamento')),
+                ('state', models.CharField(blank=True, max_length=100, verbose_name='Estado')),
+                ('orders', models.IntegerField(default=0, verbose_name='Pedidos')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Receita')),
+            ],
+            options={
+                'verbose_name': 'Agregado de Vendas',
+                'verbose_name_plural': 'Agregados de Vendas',
+                'constraints': [models.UniqueConstraint(fields=('granularity', 'bucket', 'status', 'payment_method', 'state'), name='unique_sales_rollup_bucket')],
+            },
+        ),
+    ]
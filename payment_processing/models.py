@@ -33,3 +33,37 @@ class Notification(models.Model):
 
     def __str__(self):
         return f"[{self.get_event_type_display()}] {self.message}"
+
+
+class SalesRollup(models.Model):
+    """
+    Agregado de pedidos e receita por hora ou dia, status, forma de
+    pagamento e estado, mantido incrementalmente a cada transição de pedido.
+
+    O período é o da criação do pedido; o status é o atual. O painel de
+    pagamentos lê apenas esta tabela.
+    """
+    GRANULARITY_CHOICES = [
+        ("hour", "Hora"),
+        ("day", "Dia"),
+    ]
+    granularity = models.CharField("Granularidade", max_length=4, choices=GRANULARITY_CHOICES)
+    bucket = models.DateTimeField("Início do Período")
+    status = models.CharField("Status", max_length=20)
+    payment_method = models.CharField("Forma de Pagamento", max_length=30, blank=True)
+    state = models.CharField("Estado", max_length=100, blank=True)
+    orders = models.IntegerField("Pedidos", default=0)
+    revenue = models.DecimalField("Receita", max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = "Agregado de Vendas"
+        verbose_name_plural = "Agregados de Vendas"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["granularity", "bucket", "status", "payment_method", "state"],
+                name="unique_sales_rollup_bucket",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_granularity_display()} {self.bucket:%d/%m/%Y %H:%M} [{self.status}] {self.orders}"
@@ -0,0 +1,47 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from store.models import Order
+from .dashboard import invalidate_notificacoes, record_transition, rollup_key
+from .models import Notification
+
+ROLLUP_FIELDS = {'created', 'status', 'payment_method', 'state', 'total_price'}
+
+
+@receiver(post_init, sender=Order)
+def snapshot_rollup_key(sender, instance, **kwargs):
+    """Guarda a chave do agregado como carregada do banco (sem consultas extras)"""
+    # Em from_db o post_init dispara antes de _state.adding ser ajustado: usa o pk
+    if instance.pk is None or ROLLUP_FIELDS & instance.get_deferred_fields():
+        instance._rollup_key = None
+    else:
+        instance._rollup_key = rollup_key(instance)
+
+
+@receiver(pre_save, sender=Order)
+def load_rollup_key(sender, instance, raw=False, **kwargs):
+    """Pedido carregado com campos adiados: busca a chave antiga antes de salvar"""
+    if raw or instance._state.adding or instance._rollup_key is not None:
+        return
+    previous = Order.objects.filter(pk=instance.pk).only(*ROLLUP_FIELDS).first()
+    instance._rollup_key = rollup_key(previous) if previous else None
+
+
+@receiver(post_save, sender=Order)
+def update_sales_rollup(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    new_key = rollup_key(instance)
+    record_transition(None if created else instance._rollup_key, new_key)
+    instance._rollup_key = new_key
+
+
+@receiver(post_delete, sender=Order)
+def remove_from_sales_rollup(sender, instance, **kwargs):
+    record_transition(instance._rollup_key, None)
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def refresh_notificacoes(sender, **kwargs):
+    invalidate_notificacoes()
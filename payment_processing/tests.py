@@ -53,3 +53,154 @@ class NfeIntegracaoTestCase(TestCase):
         self.assertEqual(self.order.nfe_status, 'emitida')
         self.assertEqual(self.order.nfe_pdf_url, 'http://exemplo.com/nfe.pdf')
         self.assertEqual(self.order.nfe_xml_url, 'http://exemplo.com/nfe.xml')
+
+
+class ExportarPedidosTestCase(TestCase):
+    """Exportação de pedidos em streaming, com filtros e retomada por id"""
+
+    def setUp(self):
+        from decimal import Decimal
+        from django.contrib.auth.models import User
+        from store.models import Category, Product, OrderItem
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'senha123', is_staff=True)
+        categoria = Category.objects.create(name='Chás', slug='chas')
+        produto = Product.objects.create(
+            category=categoria, name='Chá Verde', slug='cha-verde', description='Chá',
+            price=Decimal('10.00'), sku='CHA-1', image='products/cha.jpg'
+        )
+        self.pedidos = []
+        for i, status in enumerate(['payment_approved', 'awaiting_payment', 'payment_approved']):
+            pedido = Order.objects.create(
+                user=self.staff, first_name='Cliente', last_name=str(i), email='c@example.com',
+                address='Rua A', postal_code='01001-000', city='São Paulo', state='SP',
+                status=status, total_price=Decimal('20.00')
+            )
+            OrderItem.objects.create(order=pedido, product=produto, quantity=2)
+            self.pedidos.append(pedido)
+        self.client.force_login(self.staff)
+
+    def _exportar(self, **params):
+        from django.urls import reverse
+        response = self.client.get(reverse('payment_processing:exportar_pedidos'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv_com_itens_e_filtro_de_status(self):
+        import csv
+        linhas = list(csv.DictReader(self._exportar(status='payment_approved').splitlines()))
+        self.assertEqual([int(l['order_id']) for l in linhas], [self.pedidos[0].id, self.pedidos[2].id])
+        self.assertEqual((linhas[0]['product_sku'], linhas[0]['quantity'], linhas[0]['price']), ('CHA-1', '2', '10.00'))
+
+    def test_jsonl_retomado_pelo_ultimo_id(self):
+        import json
+        pedidos = [json.loads(l) for l in self._exportar(formato='jsonl', apos_id=self.pedidos[0].id).splitlines()]
+        self.assertEqual([p['id'] for p in pedidos], [self.pedidos[1].id, self.pedidos[2].id])
+        self.assertEqual(pedidos[0]['items'][0]['product_name'], 'Chá Verde')
+
+    def test_consultas_por_lote(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from store.order_export import export_csv, filter_orders
+        with CaptureQueriesContext(connection) as context:
+            linhas = list(export_csv(filter_orders(), chunk_size=2))
+        self.assertEqual(len(linhas), 4)
+        # 2 lotes (pedidos + itens) e a consulta final vazia
+        self.assertEqual(len(context.captured_queries), 5)
+
+    def test_parametros_invalidos(self):
+        from django.urls import reverse
+        url = reverse('payment_processing:exportar_pedidos')
+        self.assertEqual(self.client.get(url, {'inicio': '31/12/2024'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'formato': 'xml'}).status_code, 400)
+
+
+class SalesRollupTestCase(TestCase):
+    """Agregados do painel mantidos a cada transição de pedido"""
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+        self.user = User.objects.create_user('staff', 'staff@example.com', 'senha123', is_staff=True)
+
+    def _pedido(self, **kwargs):
+        from decimal import Decimal
+        dados = dict(
+            user=self.user, first_name='Cliente', last_name='Teste', email='c@example.com',
+            address='Rua A', postal_code='01001-000', city='São Paulo', state='SP',
+            total_price=Decimal('50.00'),
+        )
+        dados.update(kwargs)
+        return Order.objects.create(**dados)
+
+    def _snapshot(self):
+        from payment_processing.models import SalesRollup
+        return sorted(
+            SalesRollup.objects.filter(orders__gt=0)
+            .values_list('granularity', 'bucket', 'status', 'payment_method', 'state', 'orders', 'revenue')
+        )
+
+    def test_transicoes_atualizam_agregados(self):
+        from decimal import Decimal
+        from payment_processing.dashboard import status_totals
+        pedido = self._pedido()
+        self._pedido(state='RJ')
+        self.assertEqual(status_totals(), {'awaiting_payment': 2})
+
+        pedido = Order.objects.get(pk=pedido.pk)
+        pedido.status = 'payment_approved'
+        pedido.payment_method = 'credit_card'
+        pedido.save()
+        self.assertEqual(status_totals(), {'awaiting_payment': 1, 'payment_approved': 1})
+
+        # Pedido carregado com campos adiados ainda move a linha correta
+        parcial = Order.objects.only('id', 'status').get(pk=pedido.pk)
+        parcial.status = 'shipped'
+        parcial.save(update_fields=['status'])
+        self.assertEqual(status_totals(), {'awaiting_payment': 1, 'shipped': 1})
+
+        Order.objects.get(pk=pedido.pk).delete()
+        self.assertEqual(status_totals(), {'awaiting_payment': 1})
+
+        dia = [r for r in self._snapshot() if r[0] == 'day']
+        self.assertEqual([(r[2], r[4], r[5], r[6]) for r in dia], [('awaiting_payment', 'RJ', 1, Decimal('50.00'))])
+
+    def test_rebuild_igual_ao_incremental(self):
+        from payment_processing.dashboard import rebuild_rollups
+        for status in ('awaiting_payment', 'payment_approved', 'payment_approved'):
+            self._pedido(status=status, payment_method='pix')
+        incremental = self._snapshot()
+        rebuild_rollups()
+        self.assertEqual(self._snapshot(), incremental)
+
+    def test_painel_le_apenas_agregados(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.urls import reverse
+        self._pedido(status='payment_approved')
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('payment_processing:painel_pagamentos'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['serie_diaria']['pagos'][-1], 1)
+        self.assertEqual(len(response.context['serie_diaria']['labels']), 90)
+        pedidos = [q['sql'] for q in context.captured_queries if 'store_order' in q['sql']]
+        # Apenas a lista dos últimos pedidos lê a tabela de pedidos
+        self.assertEqual(len(pedidos), 1)
+        self.assertNotIn('GROUP BY', pedidos[0])
+
+    def test_badge_de_notificacoes_em_cache(self):
+        from django.core.cache import cache
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.urls import reverse
+        from payment_processing.models import Notification
+        cache.clear()
+        Notification.objects.create(event_type='novo_pedido', message='Pedido #1')
+        self.client.force_login(self.user)
+        url = reverse('payment_processing:notificacoes_recentes')
+        self.assertEqual(self.client.get(url).json()['nao_lidas'], 1)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        self.assertFalse([q for q in context.captured_queries if 'notification' in q['sql']])
+        Notification.objects.create(event_type='novo_pedido', message='Pedido #2')
+        self.assertEqual(self.client.get(url).json()['nao_lidas'], 2)
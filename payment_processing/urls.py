@@ -1,6 +1,6 @@
 from django.urls import path
 from . import views
-from .views import painel_pagamentos, reprocessar_pedido, cancelar_pedido, reprocessar_todos_pendentes, notificacoes_recentes
+from .views import painel_pagamentos, reprocessar_pedido, cancelar_pedido, reprocessar_todos_pendentes, notificacoes_recentes, exportar_pedidos
 
 app_name = 'payment_processing'
 
@@ -16,4 +16,5 @@ urlpatterns = [
     path('admin/cancelar-pedido/<int:pedido_id>/', cancelar_pedido, name='cancelar_pedido'),
     path('admin/reprocessar-todos-pendentes/', reprocessar_todos_pendentes, name='reprocessar_todos_pendentes'),
     path('admin/notificacoes-recentes/', notificacoes_recentes, name='notificacoes_recentes'),
+    path('admin/exportar-pedidos/', exportar_pedidos, name='exportar_pedidos'),
 ]
@@ -4,15 +4,20 @@ import logging
 import traceback
 from django.shortcuts import render, redirect, get_object_or_404
 from django.conf import settings
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
-from store.models import Order
+from store.constants import BOUGHT_TOGETHER_COUNT
+from store.inventory import record_sale
+from store.models import Order, OrderItem
+from store.recommendations import recommended_products
 from django.contrib.admin.views.decorators import staff_member_required
-from django.db.models import Count
-from .models import Notification
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from .dashboard import PENDING_STATUSES, daily_series, rebuild_rollups, hourly_series, notificacoes_payload, status_totals
 from store.olist_nfe_service import OlistNfeService
+from store.order_export import EXPORT_FORMATS, EXPORTERS, filter_orders
 
 # Configurar logger
 logger = logging.getLogger(__name__)
@@ -228,7 +233,17 @@ def payment_success(request):
     if 'order_id' in request.session:
         del request.session['order_id']
 
-    return render(request, 'payment_processing/payment_success.html', {'order': order})
+    # "Comprados juntos" com os itens do pedido, numa consulta (subconsulta dos itens)
+    recommended = []
+    if order:
+        recommended = recommended_products(
+            OrderItem.objects.filter(order=order).values('product_id'), 'together', BOUGHT_TOGETHER_COUNT
+        )
+
+    return render(request, 'payment_processing/payment_success.html', {
+        'order': order,
+        'recommended_products': recommended,
+    })
 
 from store.views import restore_cart_from_session
 
@@ -295,10 +310,14 @@ def webhook(request):
 
                 # Update order with payment ID for reference
                 order.payment_id = payment_info['id']
+                order.payment_method = payment_info.get('payment_type_id') or ''
 
                 # Update order status based on payment status
                 payment_status = payment_info.get("status")
                 if payment_status == "approved":
+                    if not order.paid:
+                        # A reserva do estoque vira venda no razão (uma vez por pedido)
+                        record_sale(order)
                     order.status = "payment_approved"
                     order.paid = True
                     # Emissão de NF-e via Olist
@@ -343,48 +362,72 @@ def painel_pagamentos(request):
     pedidos_qs = Order.objects.all()
     if status_filtro:
         pedidos_qs = pedidos_qs.filter(status=status_filtro)
-    ultimos_pedidos = pedidos_qs.order_by('-created')[:10]
-    # Contar pedidos por status
-    status_counts = (
-        Order.objects.values('status')
-        .annotate(total=Count('id'))
-        .order_by()
-    )
-    status_labels = [s['status'] for s in status_counts]
-    status_data = [s['total'] for s in status_counts]
+    ultimos_pedidos = pedidos_qs.select_related('user').order_by('-created')[:10]
+    # Contagens por status vêm dos agregados (sem GROUP BY sobre os pedidos)
+    status_counts = status_totals()
+    status_labels = list(status_counts)
+    status_data = list(status_counts.values())
     # Alertas
-    pedidos_pendentes = Order.objects.filter(status__icontains='pending').count()
-    pedidos_erro = Order.objects.filter(status__icontains='erro').count()
+    pedidos_pendentes = sum(status_counts.get(s, 0) for s in PENDING_STATUSES)
+    pedidos_erro = sum(total for status, total in status_counts.items() if 'erro' in status)
     alertas = []
     if pedidos_pendentes > 0:
         alertas.append(f"Há {pedidos_pendentes} pagamento(s) pendente(s) aguardando ação.")
     if pedidos_erro > 0:
         alertas.append(f"Há {pedidos_erro} pagamento(s) com erro!")
-    # Status únicos para filtro
-    status_unicos = Order.objects.values_list('status', flat=True).distinct()
     return render(request, "admin/payment_processing/painel_pagamentos.html", {
         'ultimos_pedidos': ultimos_pedidos,
+        'status_choices': Order.STATUS_CHOICES,
         'status_labels': status_labels,
         'status_data': status_data,
         'alertas': alertas,
         'status_filtro': status_filtro,
-        'status_unicos': status_unicos,
+        'status_unicos': status_labels,
+        'serie_diaria': daily_series(90),
+        'serie_horaria': hourly_series(24),
     })
 
+@staff_member_required
+def exportar_pedidos(request):
+    """
+    Exporta pedidos com itens em CSV ou JSONL, em streaming.
+
+    Parâmetros (GET): formato (csv|jsonl), inicio e fim (AAAA-MM-DD), status
+    (repetível) e apos_id para retomar uma exportação interrompida a partir
+    do último pedido recebido.
+    """
+    formato = request.GET.get('formato', 'csv')
+    if formato not in EXPORTERS:
+        return HttpResponseBadRequest('Formato inválido. Use csv ou jsonl.')
+
+    datas = {}
+    for campo in ('inicio', 'fim'):
+        valor = request.GET.get(campo, '')
+        try:
+            datas[campo] = parse_date(valor) if valor else None
+        except ValueError:
+            datas[campo] = None
+        if valor and datas[campo] is None:
+            return HttpResponseBadRequest(f'Data inválida em "{campo}". Use AAAA-MM-DD.')
+
+    apos_id = request.GET.get('apos_id', '')
+    if apos_id and not apos_id.isdigit():
+        return HttpResponseBadRequest('apos_id deve ser um número.')
+
+    pedidos = filter_orders(
+        start=datas['inicio'],
+        end=datas['fim'],
+        statuses=[s for s in request.GET.getlist('status') if s],
+        after_id=int(apos_id) if apos_id else None,
+    )
+    content_type, extensao = EXPORT_FORMATS[formato]
+    response = StreamingHttpResponse(EXPORTERS[formato](pedidos), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="pedidos-{timezone.now():%Y%m%d-%H%M}.{extensao}"'
+    return response
+
 @staff_member_required
 def notificacoes_recentes(request):
-    notificacoes = Notification.objects.order_by('-created_at')[:10]
-    data = [
-        {
-            'id': n.id,
-            'event_type': n.get_event_type_display(),
-            'message': n.message,
-            'created_at': n.created_at.strftime('%d/%m/%Y %H:%M'),
-            'is_read': n.is_read,
-        }
-        for n in notificacoes
-    ]
-    return JsonResponse({'notificacoes': data, 'nao_lidas': Notification.objects.filter(is_read=False).count()})
+    return JsonResponse(notificacoes_payload())
 
 @staff_member_required
 def reprocessar_pedido(request, pedido_id):
@@ -404,7 +447,10 @@ def cancelar_pedido(request, pedido_id):
 @staff_member_required
 def reprocessar_todos_pendentes(request):
     pendentes = Order.objects.filter(status__icontains='pending')
-    for pedido in pendentes:
-        pedido.status = 'processing'
-        pedido.save()
-    return JsonResponse({'success': True, 'msg': f'{pendentes.count()} pedidos reprocessados!'})
+    # Um UPDATE só; update() não dispara os sinais, então os agregados do
+    # período afetado são recalculados em seguida
+    mais_antigo = pendentes.order_by('created').values_list('created', flat=True).first()
+    total = pendentes.update(status='processing', updated=timezone.now())
+    if total:
+        rebuild_rollups(since=mais_antigo)
+    return JsonResponse({'success': True, 'msg': f'{total} pedidos reprocessados!'})
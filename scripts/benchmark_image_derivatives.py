@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+India Oasis - Image Derivative Benchmark
+========================================
+
+Measures throughput of the responsive image pipeline (store/images.py) on
+synthetic product photos, serially and with a process pool, so changes to
+widths, formats or quality settings can be compared.
+
+Usage:
+    python scripts/benchmark_image_derivatives.py [--images 40] [--size 2000x2000] [--workers 4]
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFilter
+
+# Add project root to Python path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from store.images import render_derivatives, supported_formats  # noqa: E402
+
+
+def make_image(width, height, seed):
+    """Generate a JPEG with gradients and shapes so encoders have real work"""
+    rng = random.Random(seed)
+    image = Image.new('RGB', (width, height), tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(60):
+        x, y = rng.randrange(width), rng.randrange(height)
+        r = rng.randrange(20, max(21, width // 4))
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=tuple(rng.randrange(256) for _ in range(3)))
+    image = image.filter(ImageFilter.GaussianBlur(3))
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=92)
+    return buffer.getvalue()
+
+
+def summarize(label, elapsed, results, source_bytes):
+    files = sum(len(r['files']) for r in results)
+    output_bytes = sum(len(f[3]) for r in results for f in r['files'])
+    return {
+        'mode': label,
+        'images': len(results),
+        'derivatives': files,
+        'seconds': round(elapsed, 3),
+        'images_per_second': round(len(results) / elapsed, 2),
+        'derivatives_per_second': round(files / elapsed, 2),
+        'source_mb': round(source_bytes / 1048576, 2),
+        'output_mb': round(output_bytes / 1048576, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark responsive image derivative generation')
+    parser.add_argument('--images', type=int, default=40)
+    parser.add_argument('--size', default='2000x2000', help='Source image size WxH')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split('x'))
+    sources = [make_image(width, height, seed) for seed in range(args.images)]
+    source_bytes = sum(len(s) for s in sources)
+
+    report = {'formats': list(supported_formats()), 'source_size': args.size, 'runs': []}
+
+    start = time.perf_counter()
+    results = [render_derivatives(data) for data in sources]
+    report['runs'].append(summarize('serial', time.perf_counter() - start, results, source_bytes))
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        results = list(executor.map(render_derivatives, sources))
+    report['runs'].append(summarize(f'pool[{args.workers}]', time.perf_counter() - start, results, source_bytes))
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
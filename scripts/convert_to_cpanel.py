@@ -552,6 +552,14 @@ ADMIN_EMAIL=admin@yourdomain.com
 RewriteEngine On
 
 # Handle static files
+# Pre-compressed static assets (written by collectstatic next to each file)
+RewriteCond %{HTTP:Accept-Encoding} br
+RewriteCond %{DOCUMENT_ROOT}/public_html/static/$1.br -f
+RewriteRule ^static/(.+\\.(?:css|js|svg|json))$ /public_html/static/$1.br [E=no-gzip:1,L]
+RewriteCond %{HTTP:Accept-Encoding} gzip
+RewriteCond %{DOCUMENT_ROOT}/public_html/static/$1.gz -f
+RewriteRule ^static/(.+\\.(?:css|js|svg|json))$ /public_html/static/$1.gz [E=no-gzip:1,L]
+
 RewriteRule ^static/(.*)$ /public_html/static/$1 [L]
 RewriteRule ^media/(.*)$ /public_html/media/$1 [L]
 
@@ -583,6 +591,39 @@ RewriteRule ^media/(.*)$ /public_html/media/$1 [L]
     AddOutputFilterByType DEFLATE application/x-javascript
 </IfModule>
 
+# Content type/encoding for pre-compressed assets
+<IfModule mod_headers.c>
+    <FilesMatch "\\.css\\.(br|gz)$">
+        ForceType text/css
+    </FilesMatch>
+    <FilesMatch "\\.js\\.(br|gz)$">
+        ForceType application/javascript
+    </FilesMatch>
+    <FilesMatch "\\.svg\\.(br|gz)$">
+        ForceType image/svg+xml
+    </FilesMatch>
+    <FilesMatch "\\.json\\.(br|gz)$">
+        ForceType application/json
+    </FilesMatch>
+    <FilesMatch "\\.br$">
+        Header set Content-Encoding br
+        Header append Vary Accept-Encoding
+    </FilesMatch>
+    <FilesMatch "\\.gz$">
+        Header set Content-Encoding gzip
+        Header append Vary Accept-Encoding
+    </FilesMatch>
+
+    # Content-hashed names (collectstatic manifest and image derivatives)
+    # never change, so they can be cached forever without revalidation
+    <FilesMatch "\\.[0-9a-f]{12}\\.[a-z0-9]+(\\.(br|gz))?$">
+        Header set Cache-Control "public, max-age=31536000, immutable"
+    </FilesMatch>
+    <FilesMatch "[0-9a-f]{16}-[0-9]+w\\.(avif|webp|jpg)$">
+        Header set Cache-Control "public, max-age=31536000, immutable"
+    </FilesMatch>
+</IfModule>
+
 # Browser caching for static files
 <IfModule mod_expires.c>
     ExpiresActive on
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+India Oasis - Static Assets Size/Latency Report
+===============================================
+
+Compares the project CSS/JS as served before the asset pipeline (plain
+names, uncompressed, revalidated on every visit) with the output of
+``collectstatic`` (bundled, minified, content-hashed, pre-compressed and
+cached as immutable).
+
+Run ``python manage.py collectstatic`` first; the report reads the source
+files from ``static/`` and the manifest from ``public_html/static/``.
+
+Usage:
+    python scripts/static_assets_report.py [--static-root public_html/static] [--json]
+"""
+
+import argparse
+import gzip
+import json
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# (bandwidth in bytes/s, round-trip time in s)
+NETWORK_PROFILES = {
+    '3g': (1.6e6 / 8, 0.300),
+    '4g': (9e6 / 8, 0.100),
+    'cable': (50e6 / 8, 0.030),
+}
+
+# Assets referenced by base.html before bundling (all pages load these)
+BASE_ASSETS = ['css/star-rating.css', 'css/styles.css', 'css/custom.css', 'js/star-rating.js', 'js/toast-system.js']
+BUNDLES = ['css/site.bundle.css', 'js/site.bundle.js']
+
+
+def transfer_time(total_bytes, requests, profile, parallel=6):
+    """Rough page-load cost: request round-trips (6 per host) plus transfer"""
+    bandwidth, rtt = NETWORK_PROFILES[profile]
+    rounds = -(-requests // parallel) if requests else 0
+    return rounds * rtt + total_bytes / bandwidth
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Static assets size/latency report')
+    parser.add_argument('--static-root', default=str(PROJECT_ROOT / 'public_html' / 'static'))
+    parser.add_argument('--json', action='store_true', help='Output JSON only')
+    args = parser.parse_args()
+
+    static_root = Path(args.static_root)
+    manifest_path = static_root / 'staticfiles.json'
+    if not manifest_path.exists():
+        sys.exit(f'Manifest not found at {manifest_path}; run collectstatic first.')
+    manifest = json.loads(manifest_path.read_text())['paths']
+
+    before = [(PROJECT_ROOT / 'static' / name).read_bytes() for name in BASE_ASSETS]
+    before_bytes = sum(len(content) for content in before)
+
+    after = {}
+    for name in BUNDLES:
+        hashed = static_root / manifest[name]
+        sizes = {'raw': hashed.stat().st_size}
+        for suffix in ('gz', 'br'):
+            variant = hashed.with_name(f'{hashed.name}.{suffix}')
+            if variant.exists():
+                sizes[suffix] = variant.stat().st_size
+        after[manifest[name]] = sizes
+    after_raw = sum(s['raw'] for s in after.values())
+    after_wire = sum(min(s.values()) for s in after.values())
+
+    report = {
+        'before': {
+            'requests': len(BASE_ASSETS),
+            'bytes': before_bytes,
+            # Same bytes with on-the-fly deflate, when mod_deflate is active
+            'bytes_deflate': sum(len(gzip.compress(content, 6)) for content in before),
+        },
+        'after': {
+            'requests': len(BUNDLES),
+            'bytes_minified': after_raw,
+            'bytes_wire': after_wire,
+            'files': after,
+        },
+        'latency_ms': {},
+    }
+    for profile in NETWORK_PROFILES:
+        report['latency_ms'][profile] = {
+            'before_first_visit': round(transfer_time(before_bytes, len(BASE_ASSETS), profile) * 1000),
+            # Plain names must be revalidated (304) on every page view
+            'before_repeat_visit': round(transfer_time(0, len(BASE_ASSETS), profile) * 1000),
+            'after_first_visit': round(transfer_time(after_wire, len(BUNDLES), profile) * 1000),
+            # Immutable hashed names are served from the browser cache
+            'after_repeat_visit': 0,
+        }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print('Static assets report (base.html)')
+    print(f"  before: {report['before']['requests']} requests, {before_bytes / 1024:.1f} KB "
+          f"({report['before']['bytes_deflate'] / 1024:.1f} KB with deflate)")
+    print(f"  after:  {len(BUNDLES)} requests, {after_raw / 1024:.1f} KB minified, "
+          f"{after_wire / 1024:.1f} KB on the wire")
+    for profile, values in report['latency_ms'].items():
+        print(f"  {profile:>5}: first visit {values['before_first_visit']} ms -> {values['after_first_visit']} ms, "
+              f"repeat visit {values['before_repeat_visit']} ms -> {values['after_repeat_visit']} ms")
+
+
+if __name__ == '__main__':
+    main()
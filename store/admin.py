@@ -1,11 +1,36 @@
 from django.contrib import admin
-from .models import Category, Product, Cart, CartItem, Order, OrderItem, Wishlist, CustomerProfile, ContactMessage, Review, Banner
+from .models import Category, Product, Cart, CartItem, Order, OrderItem, Wishlist, CustomerProfile, ContactMessage, Review, Banner, ResponsiveImage, ProductRecommendation, ProductRanking, Promotion, Coupon, CouponRedemption, StockMovement
+from .catalog_io import ProductImporter, detect_format, export_rows
+from .forms import ProductImportForm
+from .images import smallest_url
+from .inventory import movement, record
+from .page_cache import invalidate_product_page
+from .paginators import EstimatedCountPaginator
+from django.contrib import messages
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.http import HttpResponseRedirect, StreamingHttpResponse
+from django.shortcuts import render
+from django.urls import path, reverse
+from django.utils import timezone
 from django.utils.html import format_html
 
+
+def variants_subquery(field):
+    """Anota os derivados responsivos da imagem na própria consulta do changelist"""
+    return Subquery(
+        ResponsiveImage.objects.filter(source=OuterRef(field), status='done').values('variants')[:1]
+    )
+
+
 @admin.register(CustomerProfile)
 class CustomerProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'full_name', 'cpf', 'telefone', 'data_nascimento', 'genero', 'cidade', 'estado',]
+    list_select_related = ['user']
     search_fields = ['user__username', 'cpf', 'telefone']
+    autocomplete_fields = ['user']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     def full_name(self, obj):
         return f"{obj.user.first_name} {obj.user.last_name}"
@@ -14,16 +39,20 @@ class CustomerProfileAdmin(admin.ModelAdmin):
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'slug']
+    search_fields = ['name']
     prepopulated_fields = {'slug': ('name',)}
 
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ('name', 'thumbnail', 'price', 'available', 'stock', 'category')
+    list_display = ('name', 'thumbnail', 'price', 'effective_price', 'available', 'stock', 'category')
     list_filter = ('available', 'category')
-    search_fields = ('name', 'description')
-    actions = ['ativar_produtos', 'desativar_produtos']
+    list_select_related = ('category',)
+    search_fields = ('name', 'description', 'sku')
+    autocomplete_fields = ('category',)
+    actions = ['ativar_produtos', 'desativar_produtos', 'exportar_produtos']
+    change_list_template = 'admin/store/product/change_list.html'
     fieldsets = (
         (None, {
-            'fields': ('category', 'name', 'slug', 'description', 'price', 'discount_price', 'sku', 'stock', 'available')
+            'fields': ('category', 'name', 'slug', 'description', 'price', 'discount_price', 'effective_price', 'sku', 'stock', 'available')
         }),
         ('Imagens do Produto', {
             'fields': ('image', 'image_1', 'image_2', 'image_3'),
@@ -36,45 +65,136 @@ class ProductAdmin(admin.ModelAdmin):
             'classes': ('collapse',),
         }),
     )
-    readonly_fields = ('created', 'updated')
+    readonly_fields = ('effective_price', 'created', 'updated')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(image_variants=variants_subquery('image'))
+
+    def save_model(self, request, obj, form, change):
+        # Estoque editado à mão: a diferença para o valor gravado entra no razão como ajuste
+        previous = None
+        if change and 'stock' in form.changed_data:
+            previous = Product.objects.select_for_update().filter(pk=obj.pk).values_list('stock', flat=True).first()
+        super().save_model(request, obj, form, change)
+        if previous is not None:
+            record([movement(obj.pk, 'adjustment', obj.stock - previous, note=f'Admin: {request.user}')])
 
     def thumbnail(self, obj):
         if obj.image:
-            return format_html('<img src="{}" width="50" height="50" style="object-fit:cover; border-radius:6px;" />', obj.image.url)
+            src = smallest_url(getattr(obj, 'image_variants', None), min_width=100) or obj.image.url
+            return format_html('<img src="{}" width="50" height="50" style="object-fit:cover; border-radius:6px;" />', src)
         return "-"
     thumbnail.short_description = 'Imagem'
 
+    def _set_available(self, queryset, available):
+        # UPDATE em massa não dispara post_save: as páginas em cache saem aqui
+        product_ids = list(queryset.values_list('pk', flat=True))
+        queryset.update(available=available)
+        transaction.on_commit(lambda: [invalidate_product_page(product_id) for product_id in product_ids])
+
     def ativar_produtos(self, request, queryset):
-        queryset.update(available=True)
+        self._set_available(queryset, True)
     ativar_produtos.short_description = "Ativar produtos selecionados"
 
     def desativar_produtos(self, request, queryset):
-        queryset.update(available=False)
+        self._set_available(queryset, False)
     desativar_produtos.short_description = "Desativar produtos selecionados"
 
+    def exportar_produtos(self, request, queryset):
+        return self._csv_response(queryset)
+    exportar_produtos.short_description = "Exportar produtos selecionados (CSV)"
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path('importar/', self.admin_site.admin_view(self.importar_view), name='store_product_import'),
+            path('exportar/', self.admin_site.admin_view(self.exportar_view), name='store_product_export'),
+        ]
+        return custom_urls + urls
+
+    def _csv_response(self, queryset):
+        response = StreamingHttpResponse(export_rows(queryset), content_type='text/csv; charset=utf-8')
+        filename = f'produtos-{timezone.now():%Y%m%d-%H%M}.csv'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def exportar_view(self, request):
+        if not self.has_view_permission(request):
+            return HttpResponseRedirect(reverse('admin:index'))
+        # Reaproveita os filtros e a busca do changelist
+        changelist = self.get_changelist_instance(request)
+        return self._csv_response(changelist.get_queryset(request).select_related(None))
+
+    def importar_view(self, request):
+        if not (self.has_add_permission(request) and self.has_change_permission(request)):
+            return HttpResponseRedirect(reverse('admin:store_product_changelist'))
+
+        result = None
+        form = ProductImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            arquivo = form.cleaned_data['arquivo']
+            importer = ProductImporter(
+                create_categories=form.cleaned_data['criar_categorias'],
+                dry_run=form.cleaned_data['dry_run'],
+            )
+            try:
+                result = importer.import_file(arquivo.file, detect_format(arquivo.name))
+            except ValueError as e:
+                messages.error(request, str(e))
+            else:
+                level = messages.WARNING if result.error_count else messages.SUCCESS
+                messages.add_message(request, level, f"Importação {'validada' if importer.dry_run else 'concluída'}: {result}.")
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Importar produtos',
+            'form': form,
+            'result': result,
+        }
+        return render(request, 'admin/store/product/import.html', context)
+
 admin.site.register(Product, ProductAdmin)
 
 @admin.register(Cart)
 class CartAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'session_id', 'created']
+    list_select_related = ['user']
+    search_fields = ['user__username', 'session_id']
+    autocomplete_fields = ['user']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 @admin.register(CartItem)
 class CartItemAdmin(admin.ModelAdmin):
     list_display = ['cart', 'product', 'quantity']
+    list_select_related = ['cart__user', 'product']
+    autocomplete_fields = ['cart', 'product']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
-    raw_id_fields = ['product']
+    autocomplete_fields = ['product']
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'first_name', 'last_name', 'email', 'address', 'postal_code', 'city', 'state', 'created', 'updated', 'status']
     list_filter = ['created', 'updated', 'status']
+    list_select_related = ['user']
+    search_fields = ['email', 'first_name', 'last_name', 'payment_id']
+    autocomplete_fields = ['user']
+    date_hierarchy = 'created'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     inlines = [OrderItemInline]
 
 @admin.register(Wishlist)
 class WishlistAdmin(admin.ModelAdmin):
-    list_display = ['user', 'created']
+    list_display = ['user', 'item_count', 'created']
+    list_select_related = ['user']
+    readonly_fields = ['item_count']
+    autocomplete_fields = ['user']
 
 @admin.register(ContactMessage)
 class ContactMessageAdmin(admin.ModelAdmin):
@@ -88,10 +208,14 @@ class ContactMessageAdmin(admin.ModelAdmin):
 
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
-    list_display = ['product', 'user', 'rating', 'comment', 'created_at']
+    list_display = ['product', 'user', 'rating', 'comment', 'helpful_count', 'created_at']
     list_filter = ['rating', 'created_at']
+    list_select_related = ['product', 'user']
     search_fields = ['comment', 'product__name', 'user__username']
-    readonly_fields = ('created_at',)
+    autocomplete_fields = ['product', 'user']
+    readonly_fields = ('helpful_count', 'created_at')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 @admin.register(Banner)
 class BannerAdmin(admin.ModelAdmin):
@@ -102,9 +226,13 @@ class BannerAdmin(admin.ModelAdmin):
     actions = ['ativar_banners', 'desativar_banners']
     fields = ('titulo', 'subtitulo', 'imagem', 'ordem', 'ativo', 'texto_botao', 'url_botao', 'cor_texto', 'cor_fundo')
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(imagem_variants=variants_subquery('imagem'))
+
     def thumbnail(self, obj):
         if obj.imagem:
-            return format_html('<img src="{}" width="80" height="40" style="object-fit:cover; border-radius:6px;" />', obj.imagem.url)
+            src = smallest_url(getattr(obj, 'imagem_variants', None), min_width=160) or obj.imagem.url
+            return format_html('<img src="{}" width="80" height="40" style="object-fit:cover; border-radius:6px;" />', src)
         return "-"
     thumbnail.short_description = 'Preview'
 
@@ -115,3 +243,81 @@ class BannerAdmin(admin.ModelAdmin):
     def desativar_banners(self, request, queryset):
         queryset.update(ativo=False)
     desativar_banners.short_description = "Desativar banners selecionados"
+
+@admin.register(ResponsiveImage)
+class ResponsiveImageAdmin(admin.ModelAdmin):
+    list_display = ('source', 'status', 'width', 'height', 'attempts', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ('source', 'content_hash')
+    readonly_fields = ('content_hash', 'width', 'height', 'variants', 'attempts', 'error_message', 'created_at', 'updated_at')
+    actions = ['reprocessar_imagens']
+
+    def reprocessar_imagens(self, request, queryset):
+        updated = queryset.update(status='pending', attempts=0)
+        self.message_user(request, f'{updated} imagens reenviadas para a fila.')
+    reprocessar_imagens.short_description = "Reprocessar imagens selecionadas"
+
+@admin.register(ProductRecommendation)
+class ProductRecommendationAdmin(admin.ModelAdmin):
+    list_display = ('product', 'kind', 'rank', 'recommended', 'score')
+    list_filter = ('kind',)
+    list_select_related = ('product', 'recommended')
+    search_fields = ('product__name', 'product__sku')
+    readonly_fields = ('product', 'recommended', 'kind', 'rank', 'score')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+@admin.register(ProductRanking)
+class ProductRankingAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'position', 'product', 'units', 'score', 'computed_at')
+    list_filter = ('kind',)
+    list_select_related = ('product',)
+    readonly_fields = ('kind', 'position', 'product', 'units', 'score', 'computed_at')
+
+@admin.register(Promotion)
+class PromotionAdmin(admin.ModelAdmin):
+    list_display = ('name', 'kind', 'value', 'starts_at', 'ends_at', 'is_active', 'applied')
+    list_filter = ('is_active', 'applied', 'kind')
+    search_fields = ('name',)
+    autocomplete_fields = ('products', 'categories')
+    readonly_fields = ('applied', 'created', 'updated')
+
+class CouponRedemptionInline(admin.TabularInline):
+    model = CouponRedemption
+    extra = 0
+    can_delete = False
+    fields = ('order', 'user', 'discount', 'created')
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+@admin.register(Coupon)
+class CouponAdmin(admin.ModelAdmin):
+    list_display = ('code', 'kind', 'value', 'min_order_value', 'uses', 'max_uses', 'max_uses_per_user', 'ends_at', 'is_active')
+    list_filter = ('is_active', 'kind')
+    search_fields = ('code',)
+    autocomplete_fields = ('categories',)
+    readonly_fields = ('uses', 'version', 'created', 'updated')
+    inlines = [CouponRedemptionInline]
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ('created', 'product', 'kind', 'quantity', 'order', 'note')
+    list_filter = ('kind', 'created')
+    list_select_related = ('product',)
+    search_fields = ('product__sku', 'product__name', 'note')
+    raw_id_fields = ('product', 'order')
+    date_hierarchy = 'created'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    # Razão só de inclusão: correções entram como ajustes (reconcile_stock --corrigir)
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
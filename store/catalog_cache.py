@@ -0,0 +1,157 @@
+"""
+Cache em dois níveis para dados quase estáticos do catálogo (menu de
+categorias, banners, contagens da barra lateral).
+
+Cada worker do Passenger mantém um LRU em memória, limitado a
+``CATALOG_LOCAL_CACHE_MAX_ENTRIES`` entradas de no máximo
+``CATALOG_LOCAL_CACHE_SECONDS`` segundos, na frente do cache compartilhado:
+um acerto local não sai do processo. ``cached_query`` procura no LRU, depois
+no cache compartilhado e só então executa a consulta, guardando o resultado
+nos dois níveis.
+
+Invalidação por versão global: ``catalogo:versao`` no cache compartilhado
+entra nas chaves compartilhadas, e o LRU local é esvaziado quando ela muda.
+``invalidate_catalog`` troca a versão (produto, categoria ou banner salvo ou
+removido, importação em massa): todos os processos descartam o que têm de
+uma vez, e as entradas compartilhadas antigas expiram sozinhas. A versão é
+lida no máximo uma vez por requisição; fora delas (comandos, shell), a cada
+uso.
+
+Os valores locais são compartilhados entre requisições: quem chama deve
+tratá-los como somente leitura e devolver listas, não QuerySets.
+
+Estatísticas de acerto por prefixo de chave (o trecho antes do primeiro
+``:``), por processo, em ``cache_stats`` e no ``/health/?detail=1``.
+"""
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_finished, request_started
+
+from india_oasis_project.db_router import use_primary
+
+from .constants import CACHE_TIMEOUT
+
+VERSION_KEY = 'catalogo:versao'
+
+_MISSING = object()
+
+
+class LocalLRU:
+    """LRU limitado, com expiração por entrada, compartilhado pelas threads do processo"""
+
+    def __init__(self):
+        self.version = None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, seconds):
+        with self._lock:
+            self._data[key] = (time.monotonic() + seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > settings.CATALOG_LOCAL_CACHE_MAX_ENTRIES:
+                self._data.popitem(last=False)
+
+    def reset(self, version):
+        with self._lock:
+            self._data.clear()
+            self.version = version
+
+    def __len__(self):
+        return len(self._data)
+
+
+_local = LocalLRU()
+_request = threading.local()
+_stats = defaultdict(Counter)
+
+
+def _request_started(**kwargs):
+    _request.active, _request.version = True, None
+
+
+def _request_finished(**kwargs):
+    _request.active, _request.version = False, None
+
+
+request_started.connect(_request_started, dispatch_uid='catalog_cache_request_started')
+request_finished.connect(_request_finished, dispatch_uid='catalog_cache_request_finished')
+
+
+def catalog_version():
+    """Versão atual do catálogo; esvazia o LRU local se ela mudou"""
+    version = getattr(_request, 'version', None)
+    if version is None:
+        version = cache.get_or_set(VERSION_KEY, lambda: uuid.uuid4().hex, None)
+        if getattr(_request, 'active', False):
+            _request.version = version
+    if version != _local.version:
+        _local.reset(version)
+    return version
+
+
+def invalidate_catalog():
+    """Nova versão: as entradas locais de todos os processos e as compartilhadas deixam de valer"""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    _request.version = None
+
+
+def cached_query(key, producer, timeout=CACHE_TIMEOUT):
+    """
+    Resultado de ``producer()`` guardado em ``key``: LRU local, depois cache
+    compartilhado, depois a consulta. ``None`` também é guardado.
+    """
+    stats = _stats[key.split(':', 1)[0]]
+    version = catalog_version()
+    value = _local.get(key)
+    if value is not _MISSING:
+        stats['local'] += 1
+        return value
+
+    shared_key = f'catalogo:{version}:{key}'
+    value = cache.get(shared_key, _MISSING)
+    if value is _MISSING:
+        stats['miss'] += 1
+        # Réplica atrasada guardaria o dado antigo sob a versão nova
+        with use_primary():
+            value = producer()
+        cache.set(shared_key, value, timeout)
+    else:
+        stats['shared'] += 1
+    _local.set(key, value, min(timeout, settings.CATALOG_LOCAL_CACHE_SECONDS))
+    return value
+
+
+def cache_stats():
+    """{prefixo: acertos locais, compartilhados, faltas e taxas de acerto} deste processo"""
+    report = {}
+    for prefix, counts in sorted(_stats.items()):
+        total = counts['local'] + counts['shared'] + counts['miss']
+        report[prefix] = {
+            'local': counts['local'],
+            'shared': counts['shared'],
+            'miss': counts['miss'],
+            'local_hit_ratio': round(counts['local'] / total, 3) if total else 0,
+            'hit_ratio': round((counts['local'] + counts['shared']) / total, 3) if total else 0,
+        }
+    return {'entries': len(_local), 'prefixes': report}
+
+
+def reset_stats():
+    _stats.clear()
@@ -0,0 +1,403 @@
+"""
+Importação e exportação em massa do catálogo de produtos.
+
+A importação lê CSV ou XLSX de forma incremental, valida as linhas em blocos
+de ``PRODUCT_IMPORT_CHUNK_SIZE`` e faz upsert por SKU com
+``bulk_create(update_conflicts=True)``: cada bloco custa poucas consultas,
+independentemente do número de linhas, e a memória usada é constante.
+
+A exportação percorre os produtos com ``.iterator()`` e gera o CSV linha a
+linha, para ser usada em ``StreamingHttpResponse`` ou gravada em arquivo.
+"""
+import csv
+import io
+import logging
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .constants import (
+    DEFAULT_PRODUCT_IMAGE, PRODUCT_IMPORT_CHUNK_SIZE, PRODUCT_EXPORT_CHUNK_SIZE, PRODUCT_IMPORT_MAX_ERRORS
+)
+from .catalog_cache import invalidate_catalog
+from .inventory import movement, record
+from .models import Category, Product, ResponsiveImage
+from .page_cache import invalidate_product_pages
+from .pricing import refresh_prices
+
+try:
+    import openpyxl
+except ImportError:  # Opcional: sem ele apenas CSV é aceito
+    openpyxl = None
+
+logger = logging.getLogger(__name__)
+
+# Colunas aceitas na importação e geradas na exportação, na ordem do arquivo
+PRODUCT_COLUMNS = (
+    'sku', 'name', 'slug', 'category', 'description', 'short_description',
+    'price', 'discount_price', 'stock', 'available', 'track_stock',
+    'peso', 'altura', 'largura', 'comprimento',
+    'origem', 'validade', 'ingredientes', 'certificacao', 'uso',
+    'image', 'image_1', 'image_2', 'image_3',
+    'meta_title', 'meta_description', 'is_featured', 'is_new', 'is_bestseller',
+)
+# Obrigatórias apenas para SKUs que ainda não existem
+REQUIRED_FOR_NEW = ('name', 'category', 'price')
+IMAGE_COLUMNS = ('image', 'image_1', 'image_2', 'image_3')
+
+TRUE_VALUES = {'1', 'true', 't', 'sim', 's', 'yes', 'y', 'x'}
+FALSE_VALUES = {'0', 'false', 'f', 'nao', 'não', 'n', 'no', ''}
+
+
+class ImportResult:
+    """Resumo de uma importação, com os erros por linha"""
+
+    def __init__(self, max_errors=PRODUCT_IMPORT_MAX_ERRORS):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.error_count = 0
+        self.errors = []
+        self.max_errors = max_errors
+
+    def add_error(self, line, sku, message):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((line, sku, message))
+
+    @property
+    def imported(self):
+        return self.created + self.updated
+
+    def __str__(self):
+        return (
+            f'{self.rows} linha(s) lida(s): {self.created} criado(s), '
+            f'{self.updated} atualizado(s), {self.error_count} erro(s)'
+        )
+
+
+def detect_format(filename):
+    return 'xlsx' if filename.lower().endswith(('.xlsx', '.xlsm')) else 'csv'
+
+
+def read_rows(file, file_format='csv'):
+    """
+    Gera ``(número da linha, dict)`` a partir de um arquivo aberto em modo
+    binário, sem carregá-lo inteiro na memória.
+    """
+    if file_format == 'xlsx':
+        yield from _read_xlsx(file)
+    else:
+        yield from _read_csv(file)
+
+
+def _read_csv(file):
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(text, dialect)
+    header = [_normalize_header(h) for h in next(reader, [])]
+    for line, values in enumerate(reader, start=2):
+        if any(values):
+            yield line, dict(zip(header, values))
+    text.detach()
+
+
+def _read_xlsx(file):
+    if openpyxl is None:
+        raise ValueError('Importação de XLSX requer o pacote openpyxl.')
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_normalize_header(h) for h in next(rows, ())]
+        for line, values in enumerate(rows, start=2):
+            values = ['' if v is None else str(v) for v in values]
+            if any(values):
+                yield line, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def _normalize_header(value):
+    return str(value or '').strip().lower()
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ProductImporter:
+    """
+    Upsert de produtos por SKU em blocos.
+
+    Colunas ausentes no arquivo e células vazias não alteram os produtos
+    existentes (uma célula de estoque em branco não zera o estoque);
+    produtos novos recebem os valores padrão do modelo.
+    """
+
+    def __init__(self, chunk_size=PRODUCT_IMPORT_CHUNK_SIZE, create_categories=False, dry_run=False):
+        self.chunk_size = chunk_size
+        self.create_categories = create_categories
+        self.dry_run = dry_run
+        self.fields = {field.name: field for field in Product._meta.concrete_fields}
+        self._categories = None
+
+    def run(self, rows, result=None):
+        result = result or ImportResult()
+        columns = None
+        for chunk in _chunks(rows, self.chunk_size):
+            if columns is None:
+                columns = [c for c in PRODUCT_COLUMNS if c in chunk[0][1]]
+                if 'sku' not in columns:
+                    raise ValueError('O arquivo precisa ter a coluna "sku".')
+            self._import_chunk(chunk, columns, result)
+        return result
+
+    def import_file(self, file, file_format='csv', result=None):
+        return self.run(read_rows(file, file_format), result)
+
+    # Categorias são poucas: carregadas uma vez, resolvidas por slug ou nome
+    def _category_id(self, value):
+        if self._categories is None:
+            self._categories = {}
+            for pk, name, slug in Category.objects.values_list('pk', 'name', 'slug'):
+                self._categories[slug.lower()] = pk
+                self._categories[name.strip().lower()] = pk
+        key = value.strip().lower()
+        if key in self._categories:
+            return self._categories[key]
+        if not self.create_categories or not key:
+            raise ValidationError(f'Categoria não encontrada: {value}')
+        if self.dry_run:
+            return None
+        category, _ = Category.objects.get_or_create(slug=slugify(value)[:100], defaults={'name': value.strip()})
+        self._categories[key] = self._categories[category.slug] = category.pk
+        return category.pk
+
+    def _clean(self, column, raw):
+        raw = (raw or '').strip()
+        if column == 'category':
+            return self._category_id(raw)
+        field = self.fields[column]
+        if field.get_internal_type() == 'BooleanField':
+            if raw.lower() in TRUE_VALUES:
+                return True
+            if raw.lower() in FALSE_VALUES:
+                return False
+            raise ValidationError(f'Valor booleano inválido: {raw}')
+        if raw == '':
+            if field.null:
+                return None
+            if field.has_default():
+                return field.get_default()
+        if field.get_internal_type() == 'DecimalField':
+            raw = raw.replace(',', '.')
+        return field.clean(raw, None)
+
+    def _build(self, values, columns, existing):
+        """Valida uma linha e retorna a instância (sem salvar)"""
+        sku = (values.get('sku') or '').strip()
+        if not sku:
+            raise ValidationError('SKU vazio.')
+
+        is_new = sku not in existing
+        if is_new:
+            missing = [c for c in REQUIRED_FOR_NEW if not (values.get(c) or '').strip()]
+            if missing:
+                raise ValidationError(f'Produto novo sem: {", ".join(missing)}')
+
+        stored = existing.get(sku)
+        product = Product(sku=sku)
+        errors = []
+        for column in columns:
+            if column == 'sku':
+                continue
+            if stored is not None and not (values.get(column) or '').strip():
+                # Célula vazia num SKU existente: mantém o valor gravado
+                setattr(product, self.fields[column].attname, stored[self.fields[column].attname])
+                continue
+            try:
+                value = self._clean(column, values.get(column))
+            except ValidationError as e:
+                errors.append(f'{column}: {"; ".join(e.messages)}')
+                continue
+            if column == 'category':
+                product.category_id = value
+            else:
+                setattr(product, column, value)
+        if errors:
+            raise ValidationError(errors)
+
+        if not is_new:
+            # O INSERT do upsert precisa dos NOT NULL mesmo sem a coluna no arquivo
+            product.slug = product.slug or stored['slug']
+            product.category_id = product.category_id or stored['category_id']
+            product.price = product.price or stored['price']
+        else:
+            product.slug = product.slug or slugify(product.name)[:200] or slugify(sku)
+            if not product.image:
+                product.image = DEFAULT_PRODUCT_IMAGE
+            if not product.description:
+                product.description = product.name
+        if product.discount_price and product.price and product.discount_price >= product.price:
+            raise ValidationError('discount_price deve ser menor que price.')
+        return product
+
+    def _import_chunk(self, chunk, columns, result):
+        result.rows += len(chunk)
+        # Leitura, upsert e razão na mesma transação: o estoque lido fica travado
+        # (select_for_update) até o movimento com a diferença ser gravado
+        with transaction.atomic():
+            existing = self._existing(chunk, columns)
+            products = {}
+            for line, values in chunk:
+                try:
+                    product = self._build(values, columns, existing)
+                except ValidationError as e:
+                    result.add_error(line, values.get('sku', ''), '; '.join(e.messages))
+                    continue
+                if product.sku in products:
+                    previous_line = products[product.sku][0]
+                    result.add_error(previous_line, product.sku, f'SKU repetido, substituído pela linha {line}.')
+                products[product.sku] = (line, product)
+
+            self._dedupe_slugs(products, existing)
+            if self.dry_run or not products:
+                self._count(result, products, existing)
+                return
+
+            update_fields = [c for c in columns if c != 'sku'] + ['updated']
+            try:
+                with transaction.atomic():
+                    self._upsert([p for _, p in products.values()], update_fields)
+            except IntegrityError:
+                # Algum conflito fora do SKU (ex.: slug): isola as linhas culpadas
+                for sku, (line, product) in list(products.items()):
+                    try:
+                        with transaction.atomic():
+                            self._upsert([product], update_fields)
+                    except IntegrityError as e:
+                        result.add_error(line, sku, str(e))
+                        del products[sku]
+
+            self._count(result, products, existing)
+            self._record_stock(products, existing, 'stock' in columns)
+
+        self._enqueue_images(p for _, p in products.values())
+        # bulk_create não passa por Product.save: recalcula o preço efetivo do bloco
+        refresh_prices(Product.objects.filter(sku__in=list(products)))
+        # bulk_create também não invalida as páginas em cache (nem as de slugs antigos)
+        invalidate_product_pages(Product.objects.filter(sku__in=list(products)).values_list('pk', flat=True))
+        invalidate_catalog()
+
+    def _existing(self, chunk, columns):
+        """Valores gravados dos SKUs existentes: NOT NULL do upsert, células vazias e estoque atual"""
+        skus = {(values.get('sku') or '').strip() for _, values in chunk}
+        stored_fields = {'slug', 'category_id', 'price', 'stock'} | {
+            self.fields[c].attname for c in columns if c != 'sku'
+        }
+        queryset = Product.objects.filter(sku__in=skus)
+        if not self.dry_run:
+            queryset = queryset.select_for_update()
+        return {values['sku']: values for values in queryset.values('sku', *stored_fields)}
+
+    def _record_stock(self, products, existing, has_stock):
+        """Diferença de estoque de cada produto gravado, como movimento de importação"""
+        deltas = {}
+        for sku, (_, product) in products.items():
+            if sku not in existing:
+                deltas[sku] = product.stock
+            elif has_stock:
+                deltas[sku] = product.stock - existing[sku]['stock']
+        deltas = {sku: delta for sku, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        # O upsert não devolve os ids no MySQL
+        ids = dict(Product.objects.filter(sku__in=list(deltas)).values_list('sku', 'id'))
+        record([movement(ids[sku], 'import', delta, note='Importação de catálogo') for sku, delta in deltas.items()])
+
+    def _upsert(self, products, update_fields):
+        now = timezone.now()
+        for product in products:
+            product.updated = now
+        kwargs = {'update_conflicts': True, 'update_fields': update_fields}
+        # MySQL não aceita alvo explícito (ON DUPLICATE KEY UPDATE)
+        if connection.features.supports_update_conflicts_with_target:
+            kwargs['unique_fields'] = ['sku']
+        Product.objects.bulk_create(products, **kwargs)
+
+    def _dedupe_slugs(self, products, existing):
+        """Evita colisão de slug de produtos novos com outros produtos"""
+        new = {
+            sku: product for sku, (_, product) in products.items()
+            if sku not in existing or product.slug != existing[sku]['slug']
+        }
+        if not new:
+            return
+        taken = set(
+            Product.objects.filter(slug__in=[p.slug for p in new.values()])
+            .exclude(sku__in=list(new)).values_list('slug', flat=True)
+        )
+        seen = set()
+        for sku, product in new.items():
+            if product.slug in taken or product.slug in seen:
+                product.slug = f'{product.slug[:150]}-{slugify(sku)}'[:200]
+            seen.add(product.slug)
+
+    def _count(self, result, products, existing):
+        for sku in products:
+            if sku in existing:
+                result.updated += 1
+            else:
+                result.created += 1
+
+    def _enqueue_images(self, products):
+        """bulk_create não dispara post_save: registra os derivados aqui"""
+        sources = {
+            getattr(product, field).name
+            for product in products for field in IMAGE_COLUMNS
+            if getattr(product, field) and getattr(product, field).name != DEFAULT_PRODUCT_IMAGE
+        }
+        if sources:
+            ResponsiveImage.objects.bulk_create(
+                [ResponsiveImage(source=source) for source in sources],
+                ignore_conflicts=True
+            )
+
+
+class _Echo:
+    """Buffer que apenas devolve o que recebe, para o csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset=None, chunk_size=PRODUCT_EXPORT_CHUNK_SIZE):
+    """Gera as linhas do CSV de produtos (cabeçalho incluso), uma a uma"""
+    queryset = Product.objects.all() if queryset is None else queryset
+    fields = ['category__slug' if c == 'category' else c for c in PRODUCT_COLUMNS]
+    writer = csv.writer(_Echo())
+    yield writer.writerow(PRODUCT_COLUMNS)
+    for values in queryset.order_by('pk').values_list(*fields).iterator(chunk_size=chunk_size):
+        yield writer.writerow([_export_value(v) for v in values])
+
+
+def _export_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    return value
@@ -0,0 +1,221 @@
+"""
+Base local de CEPs: CEP → logradouro, bairro, cidade e UF sem chamada externa.
+
+Os endereços ficam num arquivo SQLite (``CEP_DATABASE_PATH``) carregado com
+``manage.py import_ceps``:
+
+- tabela ``ceps`` com o CEP como ``INTEGER PRIMARY KEY``: a própria árvore
+  de linhas fica ordenada por CEP, sem índice à parte, e a busca é uma
+  descida na árvore;
+- leitura pelo ``mmap`` (``MMAP_SIZE``): depois das primeiras consultas as
+  páginas ficam no cache do sistema operacional, compartilhado entre os
+  workers, e a busca leva dezenas de microssegundos;
+- modo WAL: ``import_ceps`` atualiza o arquivo numa transação enquanto os
+  workers continuam lendo a versão anterior.
+
+Sem o arquivo (ou com ele vazio) ``lookup`` devolve ``None`` e
+``is_known`` considera qualquer CEP de 8 dígitos válido: a validação só
+fica mais rígida depois da primeira importação. A base só é consultada
+na entrada do CEP (cadastro, perfil, checkout e cotação de frete); nos modelos o
+validador confere apenas o formato, para que pedidos e perfis gravados com
+um CEP depois removido por um delta continuem editáveis.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+MMAP_SIZE = 256 * 1024 * 1024
+# Com que frequência um worker sem o arquivo volta a procurá-lo
+MISSING_RECHECK_SECONDS = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ceps (
+    cep INTEGER PRIMARY KEY,
+    logradouro TEXT NOT NULL,
+    bairro TEXT NOT NULL,
+    cidade TEXT NOT NULL,
+    uf TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT NOT NULL) WITHOUT ROWID;
+"""
+
+FIELDS = ('logradouro', 'bairro', 'cidade', 'uf')
+
+_local = threading.local()
+
+
+def database_path():
+    path = getattr(settings, 'CEP_DATABASE_PATH', None)
+    return Path(path) if path else Path(settings.BASE_DIR) / 'data' / 'ceps.sqlite3'
+
+
+def normalize(value):
+    """CEP só com os 8 dígitos, ou ``None`` se não tiver 8 dígitos"""
+    digits = re.sub(r'\D', '', value or '')
+    return digits if len(digits) == 8 else None
+
+
+def formatted(cep):
+    """``01001000`` → ``01001-000``"""
+    return f'{cep[:5]}-{cep[5:]}'
+
+
+def _reader():
+    """Conexão somente leitura da thread atual (reaberta após fork), ou None sem arquivo"""
+    path = database_path()
+    state = getattr(_local, 'state', None)
+    if state and state[0] == os.getpid() and state[1] == path:
+        connection, checked = state[2], state[3]
+        if connection is not None or time.monotonic() - checked < MISSING_RECHECK_SECONDS:
+            return connection
+    connection = None
+    if path.exists():
+        connection = sqlite3.connect(path, isolation_level=None)
+        connection.execute('PRAGMA query_only = ON')
+        connection.execute(f'PRAGMA mmap_size = {MMAP_SIZE}')
+    _local.state = (os.getpid(), path, connection, time.monotonic())
+    return connection
+
+
+def close():
+    """Fecha a conexão da thread atual (testes e troca de arquivo)"""
+    state = getattr(_local, 'state', None)
+    if state and state[2] is not None:
+        state[2].close()
+    _local.state = None
+
+
+def lookup(value):
+    """Endereço do CEP (``dict`` com cep, logradouro, bairro, cidade, uf) ou None"""
+    cep = normalize(value)
+    connection = _reader()
+    if cep is None or connection is None:
+        return None
+    try:
+        row = connection.execute(
+            'SELECT logradouro, bairro, cidade, uf FROM ceps WHERE cep = ?', (int(cep),)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        # Arquivo criado mas ainda sem as tabelas
+        return None
+    if row is None:
+        return None
+    return {'cep': formatted(cep), **dict(zip(FIELDS, row))}
+
+
+def total():
+    """Quantidade de CEPs carregados (0 sem base local)"""
+    connection = _reader()
+    if connection is None:
+        return 0
+    try:
+        row = connection.execute("SELECT valor FROM meta WHERE chave = 'total'").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return int(row[0]) if row else 0
+
+
+def is_available():
+    return total() > 0
+
+
+def is_known(value):
+    """CEP de 8 dígitos presente na base local; sem base carregada, só o formato conta"""
+    cep = normalize(value)
+    if cep is None:
+        return False
+    return lookup(cep) is not None or not is_available()
+
+
+def info():
+    """Resumo da base para ``/health/?detail=1``"""
+    connection = _reader()
+    if connection is None:
+        return {'available': False}
+    try:
+        meta = dict(connection.execute('SELECT chave, valor FROM meta'))
+    except sqlite3.OperationalError:
+        meta = {}
+    return {
+        'available': int(meta.get('total', 0)) > 0,
+        'total': int(meta.get('total', 0)),
+        'updated': meta.get('atualizado_em'),
+    }
+
+
+class Importer:
+    """
+    Carga da base numa única transação (os leitores veem a versão anterior
+    até o ``COMMIT``). Linhas iguais às gravadas não são reescritas, então
+    uma carga incremental só toca os CEPs alterados.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path or database_path())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.executescript(SCHEMA)
+        self.inserted = self.updated = self.deleted = 0
+        self._changed = 0
+        self._full = False
+
+    def _count(self):
+        return self.connection.execute('SELECT COUNT(*) FROM ceps').fetchone()[0]
+
+    def __enter__(self):
+        self.connection.execute('BEGIN IMMEDIATE')
+        self._before = self._count()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type:
+            self.connection.execute('ROLLBACK')
+        else:
+            if self._full:
+                self.deleted += self.connection.execute(
+                    'DELETE FROM ceps WHERE cep NOT IN (SELECT cep FROM temp.vistos)'
+                ).rowcount
+            count = self._count()
+            # O upsert conta inserções e alterações juntas: separa pela diferença de tamanho
+            self.inserted = count - self._before + self.deleted
+            self.updated = self._changed - self.inserted
+            self.connection.executemany(
+                'INSERT INTO meta (chave, valor) VALUES (?, ?) ON CONFLICT (chave) DO UPDATE SET valor = excluded.valor',
+                [('total', str(count)), ('atualizado_em', time.strftime('%Y-%m-%dT%H:%M:%S'))]
+            )
+            self.connection.execute('COMMIT')
+            # Devolve o WAL ao arquivo principal para os leitores não o percorrerem
+            self.connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        self.connection.close()
+
+    def replace_all(self):
+        """Carga completa: ao final, remove os CEPs que não vieram nesta carga"""
+        self._full = True
+        self.connection.execute('CREATE TEMP TABLE IF NOT EXISTS vistos (cep INTEGER PRIMARY KEY)')
+
+    def upsert(self, rows):
+        """``rows``: tuplas (cep, logradouro, bairro, cidade, uf) com CEP normalizado"""
+        rows = [(int(cep), *fields) for cep, *fields in rows]
+        before = self.connection.total_changes
+        self.connection.executemany(
+            'INSERT INTO ceps (cep, logradouro, bairro, cidade, uf) VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT (cep) DO UPDATE SET logradouro = excluded.logradouro, bairro = excluded.bairro, '
+            'cidade = excluded.cidade, uf = excluded.uf '
+            'WHERE (logradouro, bairro, cidade, uf) IS NOT (excluded.logradouro, excluded.bairro, '
+            'excluded.cidade, excluded.uf)',
+            rows
+        )
+        self._changed += self.connection.total_changes - before
+        if self._full:
+            self.connection.executemany('INSERT OR IGNORE INTO temp.vistos (cep) VALUES (?)', [(row[0],) for row in rows])
+
+    def delete(self, ceps):
+        self.deleted += self.connection.executemany(
+            'DELETE FROM ceps WHERE cep = ?', [(int(cep),) for cep in ceps]
+        ).rowcount
@@ -48,6 +48,34 @@ ALLOWED_IMAGE_FORMATS = ['JPEG', 'PNG', 'WEBP']
 THUMBNAIL_SIZE = (300, 300)
 LARGE_IMAGE_SIZE = (800, 800)
 
+# Responsive Image Derivatives
+IMAGE_DERIVATIVES_DIR = 'derivatives'
+IMAGE_DERIVATIVE_WIDTHS = (150, THUMBNAIL_SIZE[0], 480, LARGE_IMAGE_SIZE[0], 1200)
+IMAGE_DERIVATIVE_FORMATS = ('avif', 'webp', 'jpeg')  # AVIF only if Pillow supports it
+IMAGE_DERIVATIVE_QUALITY = {'avif': 55, 'webp': 78, 'jpeg': 82}
+IMAGE_QUEUE_BATCH_SIZE = 25
+IMAGE_MAX_ATTEMPTS = 3
+
+# Catalog Import/Export
+PRODUCT_IMPORT_CHUNK_SIZE = 1000
+PRODUCT_EXPORT_CHUNK_SIZE = 2000
+PRODUCT_IMPORT_MAX_ERRORS = 1000  # errors kept in memory for the report
+ORDER_EXPORT_CHUNK_SIZE = 500  # orders (with their items) per keyset batch
+
+# Recommendations (store/recommendations.py)
+RECOMMENDATIONS_TOP_K = 8  # neighbors stored per product and kind
+RECOMMENDATION_WISHLIST_WEIGHT = 0.5  # co-wishlist similarity vs co-purchase in "related"
+RECOMMENDATION_BATCH_SIZE = 1000  # orders / products per query in the job
+RELATED_PRODUCTS_COUNT = 4
+BOUGHT_TOGETHER_COUNT = 4
+
+# Sales Rankings (store/rankings.py)
+RANKING_SIZE = 12  # positions kept per ranking; the bestseller ones get is_bestseller
+BESTSELLER_WINDOW_DAYS = 30
+TRENDING_WINDOW_DAYS = 7  # compared with the rest of the bestseller window
+TRENDING_MIN_UNITS = 3  # units in the recent window before a product can trend
+HOME_RANKING_COUNT = 4
+
 # Contact and Communication
 MAX_CONTACT_MESSAGE_LENGTH = 2000
 CONTACT_SUBJECTS = [
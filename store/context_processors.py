@@ -1,6 +1,9 @@
-from .models import Cart, Category, Wishlist
+from .catalog_cache import cached_query
+from .models import Cart, Category
 from django.conf import settings
+from django.utils.functional import SimpleLazyObject
 from .views import get_cart  # Importa o helper correto
+from .wishlists import item_count
 
 
 def cart_processor(request):
@@ -10,14 +13,17 @@ def cart_processor(request):
     cart_count = 0
     wishlist_count = 0
 
+    # Página compartilhada (cache do detalhe de produto): os contadores vêm depois via JSON
+    if getattr(request, 'shared_page_render', False):
+        return {'cart_count': cart_count, 'wishlist_count': wishlist_count}
+
     # Sempre usa o helper para garantir consistência
     cart = get_cart(request)
     if cart:
         cart_count = cart.total_items
 
-    if request.user.is_authenticated:
-        wishlist, _ = Wishlist.objects.get_or_create(user=request.user)
-        wishlist_count = wishlist.products.count() if wishlist else 0
+    # Total desnormalizado: uma leitura, sem criar a lista de quem ainda não tem
+    wishlist_count = item_count(request.user)
 
     return {
         'cart_count': cart_count,
@@ -37,5 +43,6 @@ def categories_processor(request):
     """
     Context processor to make categories available to all templates.
     """
-    categories = Category.objects.all()
+    # Preguiçoso: páginas que não mostram o menu não consultam nada
+    categories = SimpleLazyObject(lambda: cached_query('categorias:menu', lambda: list(Category.objects.all())))
     return {'categories': categories}
@@ -0,0 +1,181 @@
+"""
+Cupons de desconto: validação no carrinho e resgate no pedido.
+
+Regras (tipo, valor, pedido mínimo, categorias, início e validade, limites)
+ficam no cache em ``cupom:<CÓDIGO>`` junto com a ``version`` do cupom.
+Salvar o cupom no admin gera uma nova versão e tira a entrada do cache ao
+fim da transação; códigos inexistentes também ficam no cache, por pouco
+tempo. Com as regras em cache, validar no carrinho custa no máximo uma
+consulta: os usos do cupom e os do cliente, lidos juntos, e só quando o
+cupom tem limite.
+
+O resgate (``redeem``), dentro da transação do pedido, é um ``UPDATE``
+condicional: ``uses = uses + 1`` só se ainda houver usos e se a versão for
+a validada. Nenhuma linha alterada quer dizer cupom esgotado ou alterado
+por outra requisição: o pedido é desfeito. O ``UPDATE`` trava a linha do
+cupom até o fim da transação, então a contagem de usos do cliente feita
+logo depois não concorre com outro resgate do mesmo cupom.
+"""
+import re
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Count, F, Q, Value
+from django.utils import timezone
+
+from .constants import LONG_CACHE_TIMEOUT, MIN_ORDER_VALUE
+from .models import Coupon, CouponRedemption
+
+# Códigos inexistentes: guardados pouco tempo (um cupom pode ser criado em seguida)
+MISSING_TIMEOUT = 60
+
+_MISSING = 'inexistente'
+
+
+def normalize(code):
+    return re.sub(r'\s', '', code or '').upper()
+
+
+def _cache_key(code):
+    return f'cupom:{code}'
+
+
+def load_rules(code):
+    """Regras do cupom como ``dict`` (o que vai para o cache), ou None"""
+    coupon = Coupon.objects.filter(code=code).prefetch_related('categories').first()
+    if coupon is None:
+        return None
+    return {
+        'id': coupon.pk,
+        'code': coupon.code,
+        'version': coupon.version,
+        'kind': coupon.kind,
+        'value': coupon.value,
+        'min_order_value': coupon.min_order_value,
+        'category_ids': frozenset(category.pk for category in coupon.categories.all()),
+        'max_uses': coupon.max_uses,
+        'max_uses_per_user': coupon.max_uses_per_user,
+        'starts_at': coupon.starts_at,
+        'ends_at': coupon.ends_at,
+        'is_active': coupon.is_active,
+    }
+
+
+def rules(code):
+    """Regras do cupom (cache por versão), ou None se o código não existe"""
+    code = normalize(code)
+    if not code:
+        return None
+    key = _cache_key(code)
+    cached = cache.get(key)
+    if cached is None:
+        cached = load_rules(code)
+        cache.set(key, cached or _MISSING, LONG_CACHE_TIMEOUT if cached else MISSING_TIMEOUT)
+    return None if cached == _MISSING else cached
+
+
+def invalidate(code):
+    cache.delete(_cache_key(normalize(code)))
+
+
+def usage(coupon_rules, user):
+    """(usos do cupom, usos do cliente) numa consulta"""
+    user_uses = Value(0)
+    if user.is_authenticated:
+        user_uses = Count('redemptions', filter=Q(redemptions__user=user))
+    return Coupon.objects.filter(pk=coupon_rules['id']).annotate(user_uses=user_uses).order_by().values_list(
+        'uses', 'user_uses'
+    ).first() or (0, 0)
+
+
+def cart_lines(cart_items):
+    """(categoria, total do item) de cada item do carrinho"""
+    return [(item.product.category_id, item.total_price) for item in cart_items]
+
+
+def evaluate(coupon_rules, lines, user, now=None, check_usage=True):
+    """
+    Desconto do cupom para os itens ``lines`` (ver ``cart_lines``):
+    ``{'code', 'id', 'version', 'discount', 'free_shipping', 'subtotal', ...}``.
+    Levanta ``ValidationError`` com a mensagem para o cliente.
+    """
+    now = now or timezone.now()
+    if not coupon_rules['is_active'] or (coupon_rules['starts_at'] and coupon_rules['starts_at'] > now):
+        raise ValidationError('Cupom inválido')
+    if coupon_rules['ends_at'] and coupon_rules['ends_at'] <= now:
+        raise ValidationError('Cupom expirado')
+
+    subtotal = sum((total for _, total in lines), Decimal('0.00'))
+    minimum = max(Decimal(str(MIN_ORDER_VALUE)), coupon_rules['min_order_value'] or Decimal('0.00'))
+    if subtotal < minimum:
+        amount = f'{minimum:.2f}'.replace('.', ',')
+        raise ValidationError(f'Pedido mínimo de R$ {amount} para este cupom')
+
+    eligible = subtotal
+    if coupon_rules['category_ids']:
+        eligible = sum(
+            (total for category_id, total in lines if category_id in coupon_rules['category_ids']), Decimal('0.00')
+        )
+        if not eligible:
+            raise ValidationError('Cupom não vale para os produtos do carrinho')
+
+    if check_usage and (coupon_rules['max_uses'] is not None or coupon_rules['max_uses_per_user'] is not None):
+        uses, user_uses = usage(coupon_rules, user)
+        if coupon_rules['max_uses'] is not None and uses >= coupon_rules['max_uses']:
+            raise ValidationError('Cupom esgotado')
+        if coupon_rules['max_uses_per_user'] is not None and user_uses >= coupon_rules['max_uses_per_user']:
+            raise ValidationError('Você já usou este cupom')
+
+    discount = Decimal('0.00')
+    if coupon_rules['kind'] == 'percentage':
+        discount = (eligible * coupon_rules['value'] / Decimal('100')).quantize(Decimal('0.01'))
+    elif coupon_rules['kind'] == 'fixed':
+        discount = min(coupon_rules['value'], eligible)
+    return {
+        'code': coupon_rules['code'],
+        'id': coupon_rules['id'],
+        'version': coupon_rules['version'],
+        'max_uses_per_user': coupon_rules['max_uses_per_user'],
+        'discount': discount,
+        'free_shipping': coupon_rules['kind'] == 'free_shipping',
+        'subtotal': subtotal,
+    }
+
+
+def validate(code, cart_items, user, now=None):
+    """Desconto do cupom ``code`` para o carrinho; ``ValidationError`` se não vale"""
+    coupon_rules = rules(code)
+    if coupon_rules is None:
+        raise ValidationError('Cupom inválido')
+    return evaluate(coupon_rules, cart_lines(cart_items), user, now=now)
+
+
+def redeem(result, order, user):
+    """
+    Registra o uso do cupom validado (``result`` de ``validate``) no pedido.
+    Deve rodar na transação que cria o pedido; ``ValidationError`` se o
+    cupom esgotou ou mudou desde a validação (quem chama desfaz o pedido).
+    """
+    taken = Coupon.objects.filter(
+        Q(max_uses__isnull=True) | Q(uses__lt=F('max_uses')),
+        pk=result['id'], version=result['version'], is_active=True,
+    ).update(uses=F('uses') + 1)
+    if not taken:
+        invalidate(result['code'])
+        raise ValidationError('Cupom esgotado ou alterado. Aplique-o novamente.')
+
+    # Linha do cupom travada pelo UPDATE: a contagem abaixo não concorre com outro resgate
+    limit = result['max_uses_per_user']
+    if limit is not None and CouponRedemption.objects.filter(coupon_id=result['id'], user=user).count() >= limit:
+        raise ValidationError('Você já usou este cupom')
+
+    CouponRedemption.objects.create(coupon_id=result['id'], user=user, order=order, discount=result['discount'])
+
+
+def release(order):
+    """Pedido cancelado: o uso do cupom volta a ficar disponível"""
+    coupon_ids = list(CouponRedemption.objects.filter(order=order).values_list('coupon_id', flat=True))
+    if coupon_ids:
+        CouponRedemption.objects.filter(order=order).delete()
+        Coupon.objects.filter(pk__in=coupon_ids, uses__gt=0).update(uses=F('uses') - 1)
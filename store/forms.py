@@ -1,10 +1,21 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User
-from .models import CustomerProfile, Review, ContactMessage
+from . import ceps
+from .models import CustomerProfile, Review, ContactMessage, validate_cep
 from .constants import CONTACT_SUBJECTS, MIN_REVIEW_LENGTH, MAX_REVIEW_LENGTH
 
-class CustomUserCreationForm(UserCreationForm):
+class KnownCepMixin:
+    """CEP conferido na base local: com ela carregada (import_ceps), o CEP precisa existir"""
+
+    def clean_cep(self):
+        cep = self.cleaned_data.get('cep')
+        if cep and not ceps.is_known(cep):
+            raise forms.ValidationError("CEP não encontrado.")
+        return cep
+
+
+class CustomUserCreationForm(KnownCepMixin, UserCreationForm):
     nome = forms.CharField(max_length=150, required=True, label="Nome Completo")
     email = forms.EmailField(required=True, label="E-mail") # Este será o username
 
@@ -12,7 +23,7 @@ class CustomUserCreationForm(UserCreationForm):
     telefone = forms.CharField(max_length=20, required=True)
     data_nascimento = forms.DateField(required=True, widget=forms.DateInput(attrs={'type': 'date'}))
     genero = forms.CharField(max_length=20, required=False)
-    cep = forms.CharField(max_length=9, required=True)
+    cep = forms.CharField(max_length=9, required=True, validators=[validate_cep])
     endereco = forms.CharField(max_length=255, required=True)
     numero = forms.CharField(max_length=20, required=True)
     complemento = forms.CharField(max_length=100, required=False)
@@ -150,7 +161,7 @@ class LoginForm(AuthenticationForm):
     )
 
 # ---- FORMULÁRIO DE PERFIL DO USUÁRIO ----
-class ProfileForm(forms.ModelForm):
+class ProfileForm(KnownCepMixin, forms.ModelForm):
     class Meta:
         model = CustomerProfile
         # Exclui o campo 'user' pois ele não deve ser editado pelo usuário
@@ -169,3 +180,15 @@ class ProfileForm(forms.ModelForm):
             'cidade': forms.TextInput(attrs={'class': 'form-input'}),
             'estado': forms.TextInput(attrs={'class': 'form-input'}),
         }
+
+
+class ProductImportForm(forms.Form):
+    arquivo = forms.FileField(label="Arquivo CSV ou XLSX")
+    criar_categorias = forms.BooleanField(required=False, label="Criar categorias inexistentes")
+    dry_run = forms.BooleanField(required=False, label="Apenas validar (não gravar)")
+
+    def clean_arquivo(self):
+        arquivo = self.cleaned_data['arquivo']
+        if not arquivo.name.lower().endswith(('.csv', '.xlsx', '.xlsm')):
+            raise forms.ValidationError("Envie um arquivo .csv ou .xlsx.")
+        return arquivo
@@ -0,0 +1,240 @@
+"""
+Geração de derivados responsivos para as imagens do catálogo.
+
+As imagens enviadas (Product, Category, Banner) são registradas em
+``ResponsiveImage`` como pendentes e processadas fora da requisição pelo
+comando ``process_image_queue`` (cron), no mesmo modelo da fila de e-mails.
+Cada derivado recebe um nome baseado no hash do conteúdo original, de modo
+que pode ser servido com cache imutável.
+"""
+import hashlib
+import io
+import logging
+
+from PIL import Image, ImageOps
+
+from .constants import (
+    IMAGE_DERIVATIVES_DIR, IMAGE_DERIVATIVE_WIDTHS, IMAGE_DERIVATIVE_FORMATS,
+    IMAGE_DERIVATIVE_QUALITY, IMAGE_MAX_ATTEMPTS, LONG_CACHE_TIMEOUT
+)
+
+logger = logging.getLogger(__name__)
+
+# Campos de imagem que recebem derivados, por modelo
+IMAGE_FIELDS = {
+    'Product': ('image', 'image_1', 'image_2', 'image_3'),
+    'Category': ('image',),
+    'Banner': ('imagem', 'imagem_mobile'),
+}
+
+FORMAT_EXTENSIONS = {'avif': 'avif', 'webp': 'webp', 'jpeg': 'jpg'}
+FORMAT_MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+
+CACHE_KEY_PREFIX = 'responsive_image'
+
+
+def supported_formats():
+    """Retorna os formatos de derivado suportados pelo Pillow instalado"""
+    extensions = Image.registered_extensions()
+    return tuple(
+        fmt for fmt in IMAGE_DERIVATIVE_FORMATS
+        if extensions.get(f'.{FORMAT_EXTENSIONS[fmt]}') in Image.SAVE
+    )
+
+
+def target_widths(original_width, widths=IMAGE_DERIVATIVE_WIDTHS):
+    """Larguras a gerar: nunca amplia a imagem original"""
+    selected = sorted(w for w in set(widths) if w < original_width)
+    return selected or [original_width]
+
+
+def derivative_name(content_hash, width, fmt):
+    """Nome imutável do derivado no storage, baseado no hash do conteúdo"""
+    return f'{IMAGE_DERIVATIVES_DIR}/{content_hash[:2]}/{content_hash[:16]}-{width}w.{FORMAT_EXTENSIONS[fmt]}'
+
+
+def render_derivatives(data, widths=IMAGE_DERIVATIVE_WIDTHS, formats=None):
+    """
+    Gera os derivados de uma imagem a partir de seus bytes.
+
+    Função pura (sem Django) para poder rodar em um pool de processos.
+
+    Returns:
+        dict com 'content_hash', 'width', 'height' e 'files', uma lista de
+        tuplas (formato, largura, nome, bytes).
+    """
+    formats = formats or supported_formats()
+    content_hash = hashlib.sha256(data).hexdigest()
+
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        image.load()
+
+    width, height = image.size
+    files = []
+    for target_width in target_widths(width, widths):
+        target_height = max(1, round(height * target_width / width))
+        resized = image if target_width == width else image.resize(
+            (target_width, target_height), Image.Resampling.LANCZOS
+        )
+        for fmt in formats:
+            frame = resized
+            if fmt == 'jpeg' and frame.mode not in ('RGB', 'L'):
+                frame = frame.convert('RGB')
+            elif frame.mode not in ('RGB', 'RGBA', 'L'):
+                frame = frame.convert('RGBA')
+
+            buffer = io.BytesIO()
+            save_kwargs = {'quality': IMAGE_DERIVATIVE_QUALITY[fmt]}
+            if fmt == 'jpeg':
+                save_kwargs.update(optimize=True, progressive=True)
+            elif fmt == 'webp':
+                save_kwargs['method'] = 4
+            frame.save(buffer, format=fmt.upper(), **save_kwargs)
+            files.append((fmt, target_width, derivative_name(content_hash, target_width, fmt), buffer.getvalue()))
+
+    return {'content_hash': content_hash, 'width': width, 'height': height, 'files': files}
+
+
+def _cache_key(source):
+    return f'{CACHE_KEY_PREFIX}:{hashlib.md5(source.encode()).hexdigest()}'
+
+
+def save_rendered(record, rendered, storage=None):
+    """Grava os derivados no storage e marca o registro como gerado"""
+    from django.core.cache import cache
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+
+    storage = storage or default_storage
+    variants = {}
+    for fmt, width, name, content in rendered['files']:
+        # Nomes derivados do hash: se já existe, o conteúdo é o mesmo
+        if not storage.exists(name):
+            name = storage.save(name, ContentFile(content))
+        variants.setdefault(fmt, {})[str(width)] = name
+
+    record.content_hash = rendered['content_hash']
+    record.width = rendered['width']
+    record.height = rendered['height']
+    record.variants = variants
+    record.status = 'done'
+    record.error_message = ''
+    record.save(update_fields=[
+        'content_hash', 'width', 'height', 'variants', 'status', 'error_message', 'updated_at'
+    ])
+    cache.delete(_cache_key(record.source))
+
+
+def mark_failed(record, error):
+    """Registra a falha; após IMAGE_MAX_ATTEMPTS o registro sai da fila"""
+    record.attempts += 1
+    record.error_message = str(error)
+    if record.attempts >= IMAGE_MAX_ATTEMPTS:
+        record.status = 'failed'
+    record.save(update_fields=['attempts', 'error_message', 'status', 'updated_at'])
+
+
+def process_record(record, storage=None):
+    """Gera e grava os derivados de um registro pendente"""
+    from django.core.files.storage import default_storage
+
+    storage = storage or default_storage
+    try:
+        with storage.open(record.source, 'rb') as source_file:
+            data = source_file.read()
+        save_rendered(record, render_derivatives(data), storage)
+        return True
+    except Exception as e:
+        logger.error(f"Erro ao gerar derivados de {record.source}: {str(e)}", exc_info=True)
+        mark_failed(record, e)
+        return False
+
+
+def enqueue_instance_images(instance):
+    """Registra como pendentes as imagens de uma instância ainda sem derivados"""
+    from .models import ResponsiveImage
+
+    sources = [
+        getattr(instance, field).name
+        for field in IMAGE_FIELDS.get(type(instance).__name__, ())
+        if getattr(instance, field)
+    ]
+    if sources:
+        ResponsiveImage.objects.bulk_create(
+            [ResponsiveImage(source=source) for source in sources],
+            ignore_conflicts=True
+        )
+    return sources
+
+
+def get_variants(source):
+    """
+    Retorna os derivados de uma imagem ({formato: {largura: nome}}).
+
+    Usa o cache para evitar uma consulta por imagem nas listagens; imagens
+    ainda sem derivados retornam dict vazio.
+    """
+    from django.core.cache import cache
+    from .models import ResponsiveImage
+
+    if not source:
+        return {}
+
+    key = _cache_key(source)
+    variants = cache.get(key)
+    if variants is None:
+        variants = ResponsiveImage.objects.filter(
+            source=source, status='done'
+        ).values_list('variants', flat=True).first() or {}
+        cache.set(key, variants, LONG_CACHE_TIMEOUT if variants else 60)
+    return variants
+
+
+def prime_variants(sources):
+    """
+    Carrega no cache, numa consulta, os derivados das imagens que ainda não
+    estão nele: uma listagem deixa de fazer uma consulta por imagem em
+    ``get_variants``.
+    """
+    from django.core.cache import cache
+    from .models import ResponsiveImage
+
+    keys = {_cache_key(source): source for source in sources if source}
+    if not keys:
+        return
+    cached = cache.get_many(list(keys))
+    missing = [source for key, source in keys.items() if key not in cached]
+    if not missing:
+        return
+
+    found = dict(
+        ResponsiveImage.objects.filter(source__in=missing, status='done').values_list('source', 'variants')
+    )
+    cache.set_many({_cache_key(source): found[source] for source in missing if found.get(source)}, LONG_CACHE_TIMEOUT)
+    cache.set_many({_cache_key(source): {} for source in missing if not found.get(source)}, 60)
+
+
+def build_srcset(variants, fmt, storage=None):
+    """Monta o atributo srcset para um formato"""
+    from django.core.files.storage import default_storage
+
+    storage = storage or default_storage
+    by_width = variants.get(fmt) or {}
+    return ', '.join(
+        f'{storage.url(name)} {width}w'
+        for width, name in sorted(by_width.items(), key=lambda item: int(item[0]))
+    )
+
+
+def smallest_url(variants, min_width=0, fmt='jpeg', storage=None):
+    """URL do menor derivado com pelo menos ``min_width`` px (ou None)"""
+    from django.core.files.storage import default_storage
+
+    storage = storage or default_storage
+    by_width = (variants or {}).get(fmt) or {}
+    candidates = sorted((int(w), name) for w, name in by_width.items())
+    for width, name in candidates:
+        if width >= min_width:
+            return storage.url(name)
+    return storage.url(candidates[-1][1]) if candidates else None
@@ -0,0 +1,112 @@
+"""
+Razão de estoque: cada alteração de ``Product.stock`` grava um
+``StockMovement`` (reserva, liberação, venda, ajuste, importação) na mesma
+transação, com ``bulk_create``. A tabela só recebe inclusões; correções
+entram como novos ajustes.
+
+Fotografias (``StockSnapshot``, comando ``stock_snapshot`` no cron) guardam
+o saldo do razão de cada produto até um movimento. O saldo atual é a última
+fotografia mais os movimentos seguintes, uma faixa curta do índice
+``(product, id)``, em vez da soma do histórico inteiro.
+
+``balances`` monta esse cálculo como subconsultas correlacionadas sobre
+os produtos: ``reconcile_stock`` percorre o catálogo numa única consulta
+(``.iterator()``), lida de uma vez só pelo banco, e recebe apenas os
+produtos cujo ``stock`` diverge do razão.
+
+A venda (pagamento aprovado) confirma a reserva do pedido: é registrada
+com quantidade 0, porque o estoque já saiu na reserva.
+"""
+from datetime import timedelta
+
+from django.db.models import BigIntegerField, Exists, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Product, StockMovement, StockSnapshot
+
+BATCH_SIZE = 1000
+
+# Movimentos mais novos que isso ficam fora da fotografia: uma transação
+# ainda aberta pode gravar um id menor que os já visíveis
+SNAPSHOT_LAG = timedelta(minutes=5)
+
+
+def movement(product_id, kind, quantity, order=None, note=''):
+    """Movimento ainda não gravado (ver ``record``)"""
+    return StockMovement(product_id=product_id, kind=kind, quantity=quantity, order=order, note=note[:200])
+
+
+def record(movements):
+    """Grava os movimentos num ``bulk_create``; os de quantidade 0 só valem para vendas"""
+    movements = [m for m in movements if m.quantity or m.kind == 'sale']
+    if movements:
+        StockMovement.objects.bulk_create(movements, batch_size=BATCH_SIZE)
+    return len(movements)
+
+
+def record_sale(order):
+    """Pagamento aprovado: a reserva de cada item do pedido vira venda"""
+    return record([
+        movement(product_id, 'sale', 0, order=order, note=f'{quantity} un.')
+        for product_id, quantity in order.items.filter(product__track_stock=True).values_list('product_id', 'quantity')
+    ])
+
+
+def balances(products=None, upto=None):
+    """
+    ``products`` (padrão: todos) anotados com ``ledger_stock``, o saldo
+    pelo razão: última fotografia + movimentos seguintes (até ``upto``).
+    """
+    snapshots = StockSnapshot.objects.filter(product=OuterRef('pk'))
+    movements = StockMovement.objects.filter(product=OuterRef('pk'), id__gt=OuterRef('snapshot_movement'))
+    if upto is not None:
+        snapshots = snapshots.filter(movement_id__lte=upto)
+        movements = movements.filter(id__lte=upto)
+    snapshots = snapshots.order_by('-movement_id')
+    delta = movements.order_by().values('product').annotate(total=Sum('quantity')).values('total')
+
+    return (products if products is not None else Product.objects.all()).order_by('pk').annotate(
+        snapshot_stock=Coalesce(Subquery(snapshots.values('stock')[:1]), Value(0), output_field=IntegerField()),
+        snapshot_movement=Coalesce(
+            Subquery(snapshots.values('movement_id')[:1]), Value(0), output_field=BigIntegerField()
+        ),
+    ).annotate(
+        ledger_stock=F('snapshot_stock') + Coalesce(Subquery(delta), Value(0), output_field=IntegerField()),
+    )
+
+
+def ledger_stock(product_id):
+    """Estoque do produto recalculado pelo razão"""
+    return balances(Product.objects.filter(pk=product_id)).values_list('ledger_stock', flat=True).first()
+
+
+def drift(products=None):
+    """(id, sku, stock, saldo do razão) dos produtos com estoque controlado que divergem"""
+    tracked = products if products is not None else Product.objects.filter(track_stock=True)
+    return balances(tracked).exclude(stock=F('ledger_stock')).values_list(
+        'pk', 'sku', 'stock', 'ledger_stock'
+    ).iterator(chunk_size=BATCH_SIZE)
+
+
+def take_snapshots(now=None):
+    """Fotografa os produtos com movimentos desde a última fotografia; retorna quantos"""
+    now = now or timezone.now()
+    upto = StockMovement.objects.filter(created__lt=now - SNAPSHOT_LAG).order_by('-id').values_list(
+        'id', flat=True
+    ).first()
+    if upto is None:
+        return 0
+
+    moved = balances(upto=upto).filter(Exists(StockMovement.objects.filter(
+        product=OuterRef('pk'), id__gt=OuterRef('snapshot_movement'), id__lte=upto
+    )))
+    taken, batch = 0, []
+    for product_id, stock in moved.values_list('pk', 'ledger_stock').iterator(chunk_size=BATCH_SIZE):
+        batch.append(StockSnapshot(product_id=product_id, stock=stock, movement_id=upto))
+        if len(batch) >= BATCH_SIZE:
+            StockSnapshot.objects.bulk_create(batch)
+            taken += len(batch)
+            batch = []
+    StockSnapshot.objects.bulk_create(batch)
+    return taken + len(batch)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from store.pricing import due_promotions, refresh_prices
+
+
+class Command(BaseCommand):
+    """
+    Aplica aos preços efetivos as promoções que começaram ou terminaram.
+
+    Feito para o cron (por exemplo, a cada minuto): sem promoção vencendo
+    ou começando, custa uma consulta. ``--all`` recalcula o catálogo
+    inteiro mesmo assim (correção de dados antigos).
+    """
+    help = 'Aplica o início e o fim das promoções aos preços efetivos dos produtos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recalcula todos os preços efetivos, mesmo sem promoção começando ou terminando.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['all'] and not due_promotions().exists():
+            self.stdout.write('Nenhuma promoção começou ou terminou.')
+            return
+        changed = refresh_prices()
+        self.stdout.write(self.style.SUCCESS(f'{changed} preço(s) efetivo(s) atualizado(s).'))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from store.recommendations import build_recommendations, count_new_orders, reset_pair_counts, with_neighbors
+
+
+class Command(BaseCommand):
+    """
+    Atualiza as recomendações de produtos (relacionados e comprados juntos).
+
+    Por padrão soma apenas os pedidos pagos desde a última execução e
+    recalcula os produtos desses pedidos e os que os têm como vizinhos.
+    ``--full`` recomeça as contagens de todos os pedidos e recalcula o
+    catálogo inteiro: use-o na primeira execução e periodicamente, para
+    refletir as listas de desejos e a popularidade de produtos sem vendas
+    novas.
+    """
+    help = 'Atualiza as recomendações de produtos a partir dos pedidos e listas de desejos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recontagem completa de todos os pedidos e de todos os produtos.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['full']:
+            reset_pair_counts()
+
+        orders, touched = count_new_orders()
+        products = build_recommendations(None if options['full'] else with_neighbors(touched))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{orders} pedido(s) contado(s); recomendações recalculadas para '
+            f'{products} produto(s) em {time.monotonic() - started:.1f}s.'
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from store.rankings import compute_rankings
+
+
+class Command(BaseCommand):
+    """
+    Recalcula os rankings de mais vendidos e em alta a partir das vendas.
+
+    Feito para o cron (por exemplo, a cada hora): grava as posições em
+    ProductRanking, atualiza ``is_bestseller`` conforme o ranking e expira
+    ``is_new`` dos produtos com mais de NEW_PRODUCT_DAYS dias.
+    """
+    help = 'Recalcula os rankings de vendas (mais vendidos e em alta) e expira produtos novos.'
+
+    def handle(self, *args, **options):
+        result = compute_rankings()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rankings gravados: {result['bestseller']} mais vendido(s), "
+            f"{result['trending']} em alta; {result['expired_new']} produto(s) deixaram de ser novos."
+        ))
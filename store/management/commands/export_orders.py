@@ -0,0 +1,51 @@
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from store.constants import ORDER_EXPORT_CHUNK_SIZE
+from store.models import Order
+from store.order_export import EXPORTERS, filter_orders
+
+
+class Command(BaseCommand):
+    """
+    Exporta pedidos com itens em CSV ou JSONL, lendo em lotes por id.
+
+    Para retomar uma exportação interrompida, use --after-id com o último
+    order_id gravado no arquivo (e --append para continuar no mesmo arquivo).
+    """
+    help = 'Exporta pedidos (com itens) em CSV ou JSONL por período e status.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORTERS), default='csv')
+        parser.add_argument('--start', type=date.fromisoformat, help='Data inicial (AAAA-MM-DD).')
+        parser.add_argument('--end', type=date.fromisoformat, help='Data final, inclusive (AAAA-MM-DD).')
+        parser.add_argument(
+            '--status',
+            action='append',
+            choices=[choice for choice, _ in Order.STATUS_CHOICES],
+            help='Filtra por status (pode ser repetido).',
+        )
+        parser.add_argument('--after-id', type=int, help='Retoma a partir deste id de pedido.')
+        parser.add_argument('--chunk-size', type=int, default=ORDER_EXPORT_CHUNK_SIZE)
+        parser.add_argument('--output', help='Arquivo de saída (padrão: saída padrão).')
+        parser.add_argument('--append', action='store_true', help='Acrescenta ao arquivo de saída.')
+
+    def handle(self, *args, **options):
+        if options['start'] and options['end'] and options['start'] > options['end']:
+            raise CommandError('--start deve ser anterior a --end.')
+
+        queryset = filter_orders(options['start'], options['end'], options['status'], options['after_id'])
+        rows = EXPORTERS[options['format']](queryset, options['chunk_size'])
+        if options['format'] == 'csv' and options['append']:
+            next(rows)  # o arquivo já tem o cabeçalho
+
+        output = sys.stdout
+        if options['output']:
+            output = open(options['output'], 'a' if options['append'] else 'w', newline='', encoding='utf-8')
+        try:
+            for row in rows:
+                output.write(row)
+        finally:
+            if options['output']:
+                output.close()
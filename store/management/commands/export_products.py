@@ -0,0 +1,50 @@
+import sys
+
+from django.core.management.base import BaseCommand
+from store.catalog_io import export_rows
+from store.models import Product
+
+
+class Command(BaseCommand):
+    """
+    Exporta o catálogo em CSV no mesmo layout aceito por import_products.
+
+    Os produtos são lidos com ``.iterator()``, então a memória usada não
+    depende do tamanho do catálogo.
+    """
+    help = 'Exporta os produtos em CSV (mesmas colunas do import_products).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Arquivo de saída (padrão: saída padrão).',
+        )
+        parser.add_argument(
+            '--category',
+            help='Exporta apenas a categoria com este slug.',
+        )
+        parser.add_argument(
+            '--available-only',
+            action='store_true',
+            help='Exporta apenas produtos disponíveis.',
+        )
+
+    def handle(self, *args, **options):
+        queryset = Product.objects.all()
+        if options['category']:
+            queryset = queryset.filter(category__slug=options['category'])
+        if options['available_only']:
+            queryset = queryset.filter(available=True)
+
+        output = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            count = -1  # cabeçalho
+            for row in export_rows(queryset):
+                output.write(row)
+                count += 1
+        finally:
+            if options['output']:
+                output.close()
+
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f'{count} produto(s) exportado(s) para {options["output"]}.'))
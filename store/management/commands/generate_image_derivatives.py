@@ -0,0 +1,80 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from store.images import IMAGE_FIELDS, render_derivatives, save_rendered, mark_failed
+from store.models import Product, Category, Banner, ResponsiveImage
+import logging
+
+logger = logging.getLogger(__name__)
+
+MODELS = {'Product': Product, 'Category': Category, 'Banner': Banner}
+
+
+def _render_file(path):
+    """Executado nos processos filhos: lê o arquivo e gera os derivados"""
+    with open(path, 'rb') as source_file:
+        return render_derivatives(source_file.read())
+
+
+class Command(BaseCommand):
+    """
+    Backfill dos derivados responsivos para toda a mídia já existente.
+
+    Registra as imagens de produtos, categorias e banners na fila e gera os
+    derivados em um pool de processos, gravando os resultados no processo
+    principal.
+    """
+    help = 'Gera derivados responsivos para as imagens já existentes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=max(1, (os.cpu_count() or 2) - 1),
+            help='Número de processos para a geração dos derivados.',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regera também as imagens já processadas ou com falha.',
+        )
+
+    def handle(self, *args, **options):
+        sources = set()
+        for model_name, fields in IMAGE_FIELDS.items():
+            for row in MODELS[model_name].objects.values_list(*fields).iterator(chunk_size=500):
+                sources.update(name for name in row if name)
+
+        ResponsiveImage.objects.bulk_create(
+            [ResponsiveImage(source=source) for source in sources],
+            ignore_conflicts=True,
+            batch_size=500
+        )
+        records = ResponsiveImage.objects.filter(source__in=sources)
+        if not options['force']:
+            records = records.filter(status='pending')
+        records = list(records)
+
+        self.stdout.write(f'{len(sources)} imagem(ns) encontrada(s), {len(records)} a processar.')
+
+        processed = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {
+                executor.submit(_render_file, default_storage.path(record.source)): record
+                for record in records
+            }
+            for future in as_completed(futures):
+                record = futures.pop(future)
+                try:
+                    save_rendered(record, future.result())
+                    processed += 1
+                except Exception as e:
+                    logger.error(f"Erro ao gerar derivados de {record.source}: {str(e)}", exc_info=True)
+                    mark_failed(record, e)
+                    failed += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{processed} imagem(ns) processada(s), {failed} com erro.'
+        ))
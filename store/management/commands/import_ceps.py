@@ -0,0 +1,86 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from store import ceps
+
+BATCH_SIZE = 10000
+
+# Códigos de operação dos arquivos de atualização (delta) do DNE dos Correios
+DELETE_OPERATIONS = {'DEL', 'EXC'}
+
+
+class Command(BaseCommand):
+    """
+    Carrega a base local de CEPs (store/ceps.py) a partir de arquivos texto.
+
+    Cada linha traz ``cep;logradouro;bairro;cidade;uf`` e, opcionalmente,
+    uma sexta coluna de operação (``INS``/``UPD``/``DEL``) como nos arquivos
+    de atualização do DNE. Por padrão a carga é incremental: CEPs novos são
+    inseridos, os alterados atualizados e os iguais não são regravados.
+    Com ``--completo`` os CEPs ausentes dos arquivos são removidos.
+    """
+    help = 'Importa/atualiza a base local de CEPs a partir de arquivos CSV (cep;logradouro;bairro;cidade;uf).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Arquivos a importar, na ordem.')
+        parser.add_argument(
+            '--completo',
+            action='store_true',
+            help='Carga completa: remove da base os CEPs que não estiverem nos arquivos.',
+        )
+        parser.add_argument('--delimitador', default=';', help='Separador de colunas (DNE: @).')
+        parser.add_argument('--encoding', default='utf-8', help='Codificação dos arquivos (DNE: latin-1).')
+        parser.add_argument('--cabecalho', action='store_true', help='Ignora a primeira linha de cada arquivo.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        invalid = 0
+        importer = ceps.Importer()
+        with importer:
+            if options['completo']:
+                importer.replace_all()
+            for path in options['paths']:
+                try:
+                    source = open(path, newline='', encoding=options['encoding'])
+                except OSError as e:
+                    raise CommandError(f'Não foi possível abrir {path}: {e}')
+                with source:
+                    reader = csv.reader(source, delimiter=options['delimitador'])
+                    if options['cabecalho']:
+                        next(reader, None)
+                    invalid += self._load(importer, reader)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'CEPs: {importer.inserted} inserido(s), {importer.updated} atualizado(s), '
+            f'{importer.deleted} removido(s), {invalid} linha(s) inválida(s) '
+            f'em {time.monotonic() - started:.1f}s.'
+        ))
+
+    def _load(self, importer, reader):
+        invalid = 0
+        rows, deleted = [], []
+        for line in reader:
+            cep = ceps.normalize(line[0]) if line else None
+            if cep is None or len(line) < 5:
+                invalid += 1
+                continue
+            # Blocos de uma operação só, na ordem do arquivo (um CEP pode sair e voltar)
+            if len(line) > 5 and line[5].strip().upper() in DELETE_OPERATIONS:
+                if rows:
+                    importer.upsert(rows)
+                    rows = []
+                deleted.append(cep)
+                continue
+            if deleted:
+                importer.delete(deleted)
+                deleted = []
+            rows.append((cep, *(value.strip() for value in line[1:4]), line[4].strip().upper()))
+            if len(rows) >= BATCH_SIZE:
+                importer.upsert(rows)
+                rows = []
+        if rows:
+            importer.upsert(rows)
+        if deleted:
+            importer.delete(deleted)
+        return invalid
@@ -0,0 +1,93 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from store.catalog_io import ImportResult, ProductImporter, detect_format
+from store.constants import PRODUCT_IMPORT_CHUNK_SIZE
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Importa produtos em massa a partir de um CSV ou XLSX, com upsert por SKU.
+
+    O arquivo é lido e gravado em blocos, com memória constante; os erros de
+    validação são reportados por linha sem interromper a importação.
+    """
+    help = 'Importa/atualiza produtos a partir de um arquivo CSV ou XLSX (upsert por SKU).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Caminho do arquivo .csv ou .xlsx.')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'xlsx'],
+            help='Formato do arquivo (padrão: pela extensão).',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=PRODUCT_IMPORT_CHUNK_SIZE,
+            help='Número de linhas validadas e gravadas por bloco.',
+        )
+        parser.add_argument(
+            '--create-categories',
+            action='store_true',
+            help='Cria as categorias que não existirem em vez de rejeitar a linha.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas valida o arquivo, sem gravar.',
+        )
+        parser.add_argument(
+            '--errors-file',
+            help='Grava todos os erros (linha, sku, mensagem) neste CSV.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        importer = ProductImporter(
+            chunk_size=options['chunk_size'],
+            create_categories=options['create_categories'],
+            dry_run=options['dry_run'],
+        )
+        result = ErrorFileResult(options['errors_file']) if options['errors_file'] else ImportResult()
+
+        started = time.monotonic()
+        try:
+            with open(path, 'rb') as source_file:
+                importer.import_file(source_file, options['format'] or detect_format(path), result)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        finally:
+            if isinstance(result, ErrorFileResult):
+                result.close()
+
+        for line, sku, message in result.errors[:20]:
+            self.stdout.write(self.style.WARNING(f'Linha {line} ({sku}): {message}'))
+        if result.error_count > 20:
+            self.stdout.write(f'... e mais {result.error_count - 20} erro(s).')
+
+        prefix = '[dry-run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}{result} em {time.monotonic() - started:.1f}s.'
+        ))
+
+
+class ErrorFileResult(ImportResult):
+    """Grava cada erro em CSV à medida que ocorre, além do resumo em memória"""
+
+    def __init__(self, path):
+        super().__init__(max_errors=20)
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(['linha', 'sku', 'erro'])
+
+    def add_error(self, line, sku, message):
+        super().add_error(line, sku, message)
+        self._writer.writerow([line, sku, message])
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from store.constants import IMAGE_QUEUE_BATCH_SIZE
+from store.images import process_record
+from store.models import ResponsiveImage
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Processa a fila de imagens pendentes, gerando os derivados responsivos.
+
+    Deve ser agendado no cron do cPanel (ex.: a cada 5 minutos), já que a
+    geração não acontece durante a requisição de upload.
+    """
+    help = 'Gera derivados AVIF/WebP/JPEG das imagens enviadas recentemente.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=IMAGE_QUEUE_BATCH_SIZE,
+            help='Número máximo de imagens processadas por execução.',
+        )
+
+    def handle(self, *args, **options):
+        limit = options['limit']
+        self.stdout.write(self.style.NOTICE(f'Processando fila de imagens às {timezone.now()}...'))
+
+        pending = ResponsiveImage.objects.filter(status='pending').order_by('created_at')[:limit]
+        processed = failed = 0
+        for record in pending:
+            if process_record(record):
+                processed += 1
+            else:
+                failed += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{processed} imagem(ns) processada(s), {failed} com erro.'
+        ))
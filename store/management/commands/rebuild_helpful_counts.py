@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from store.models import Review, ReviewHelpfulVote
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    """
+    Recalcula Review.helpful_count a partir da tabela de votos.
+
+    O contador é mantido a cada voto; este comando corrige dados antigos ou
+    divergentes (importações, edições manuais no banco) atualizando apenas
+    as avaliações cujo total difere da contagem real.
+    """
+    help = 'Recalcula o total de votos úteis das avaliações.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas informa quantas avaliações estão divergentes.',
+        )
+
+    def handle(self, *args, **options):
+        votes = Subquery(
+            ReviewHelpfulVote.objects.filter(review=OuterRef('pk')).order_by()
+            .values('review').annotate(total=Count('pk')).values('total')
+        )
+        actual = Coalesce(votes, 0)
+
+        divergent = Review.objects.annotate(actual=actual).filter(~Q(helpful_count=F('actual')))
+        if options['dry_run']:
+            self.stdout.write(f'{divergent.count()} avaliação(ões) com total de votos divergente.')
+            return
+
+        # Em blocos de ids: o MySQL não aceita UPDATE com subconsulta na mesma tabela
+        ids = list(divergent.values_list('pk', flat=True))
+        updated = 0
+        for start in range(0, len(ids), BATCH_SIZE):
+            updated += Review.objects.filter(
+                pk__in=ids[start:start + BATCH_SIZE]
+            ).update(helpful_count=actual)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{updated} avaliação(ões) corrigida(s).'
+        ))
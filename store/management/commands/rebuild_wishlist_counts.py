@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from store.models import Wishlist
+from store.wishlists import recount
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    """
+    Recalcula Wishlist.item_count a partir da tabela de produtos da lista.
+
+    O contador é mantido a cada alteração; este comando corrige dados
+    antigos ou divergentes (importações, edições manuais no banco)
+    atualizando apenas as listas cujo total difere da contagem real.
+    """
+    help = 'Recalcula o total de itens das listas de desejos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas informa quantas listas estão divergentes.',
+        )
+
+    def handle(self, *args, **options):
+        items = Subquery(
+            Wishlist.products.through.objects.filter(wishlist=OuterRef('pk')).order_by()
+            .values('wishlist').annotate(total=Count('pk')).values('total')
+        )
+        divergent = Wishlist.objects.annotate(actual=Coalesce(items, 0)).filter(~Q(item_count=F('actual')))
+        if options['dry_run']:
+            self.stdout.write(f'{divergent.count()} lista(s) de desejos com total divergente.')
+            return
+
+        # Em blocos de ids: o MySQL não aceita UPDATE com subconsulta na mesma tabela
+        ids = list(divergent.values_list('pk', flat=True))
+        updated = 0
+        for start in range(0, len(ids), BATCH_SIZE):
+            updated += recount(ids[start:start + BATCH_SIZE])
+
+        self.stdout.write(self.style.SUCCESS(f'{updated} lista(s) de desejos corrigida(s).'))
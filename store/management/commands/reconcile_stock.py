@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from store.inventory import BATCH_SIZE, drift, movement, record
+
+
+class Command(BaseCommand):
+    """
+    Compara ``Product.stock`` com o saldo do razão (última fotografia +
+    movimentos) de todo o catálogo numa única consulta e lista os produtos
+    que divergem.
+
+    Com ``--corrigir`` a diferença entra no razão como ajuste: o razão
+    passa a concordar com o estoque gravado, e a divergência fica
+    registrada para auditoria.
+    """
+    help = 'Detecta divergências entre o estoque dos produtos e o razão de movimentos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corrigir',
+            action='store_true',
+            help='Registra a diferença de cada produto divergente como ajuste no razão.',
+        )
+
+    def handle(self, *args, **options):
+        found, adjustments = 0, []
+        for product_id, sku, stock, ledger in drift():
+            found += 1
+            self.stdout.write(f'{sku}: estoque {stock}, razão {ledger} ({stock - ledger:+d})')
+            if options['corrigir']:
+                adjustments.append(movement(product_id, 'adjustment', stock - ledger, note='Reconciliação'))
+                if len(adjustments) >= BATCH_SIZE:
+                    record(adjustments)
+                    adjustments = []
+        record(adjustments)
+
+        if not found:
+            self.stdout.write(self.style.SUCCESS('Estoque e razão conferem.'))
+        elif options['corrigir']:
+            self.stdout.write(self.style.SUCCESS(f'{found} produto(s) divergente(s) ajustado(s) no razão.'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{found} produto(s) divergente(s).'))
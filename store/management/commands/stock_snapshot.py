@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from store.inventory import take_snapshots
+
+
+class Command(BaseCommand):
+    """
+    Grava uma fotografia do saldo do razão de cada produto movimentado
+    desde a fotografia anterior (store/inventory.py).
+
+    Feito para o cron (por exemplo, de hora em hora): o saldo atual passa a
+    ser a fotografia mais os poucos movimentos seguintes. Os últimos
+    minutos de movimentos ficam para a próxima execução.
+    """
+    help = 'Fotografa o saldo do razão de estoque dos produtos movimentados.'
+
+    def handle(self, *args, **options):
+        taken = take_snapshots()
+        self.stdout.write(self.style.SUCCESS(f'{taken} fotografia(s) de estoque gravada(s).'))
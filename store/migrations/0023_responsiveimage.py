@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0022_product_altura_product_comprimento_product_largura'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResponsiveImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(help_text='Caminho da imagem original no storage de mídia', max_length=255, unique=True, verbose_name='Imagem de Origem')),
+                ('content_hash', models.CharField(blank=True, max_length=64, verbose_name='Hash do Conteúdo')),
+                ('width', models.PositiveIntegerField(blank=True, null=True, verbose_name='Largura Original')),
+                ('height', models.PositiveIntegerField(blank=True, null=True, verbose_name='Altura Original')),
+                ('variants', models.JSONField(blank=True, default=dict, help_text='Formato -> {largura: caminho do derivado}', verbose_name='Derivados')),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('done', 'Gerado'), ('failed', 'Falhou')], default='pending', max_length=10, verbose_name='Status')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Tentativas')),
+                ('error_message', models.TextField(blank=True, verbose_name='Mensagem de Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Imagem Responsiva',
+                'verbose_name_plural': 'Imagens Responsivas',
+                'indexes': [models.Index(fields=['status'], name='store_respo_status_171cee_idx')],
+            },
+        ),
+    ]
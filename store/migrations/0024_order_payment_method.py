@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 23:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0023_responsiveimage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='payment_method',
+            field=models.CharField(blank=True, help_text='Tipo de pagamento informado pelo Mercado Pago (ex.: credit_card, bank_transfer)', max_length=30, verbose_name='Forma de Pagamento'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.3 on 2026-10-18 21:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_helpful_counts(apps, schema_editor):
+    Review = apps.get_model('store', 'Review')
+    ReviewHelpfulVote = apps.get_model('store', 'ReviewHelpfulVote')
+    votes = ReviewHelpfulVote.objects.filter(review=models.OuterRef('pk')).order_by().values('review')
+    Review.objects.update(helpful_count=models.functions.Coalesce(
+        models.Subquery(votes.annotate(total=models.Count('pk')).values('total')), 0
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0024_order_payment_method'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # The explicit through model reuses the table, columns and unique
+        # constraint of the automatic ManyToMany: only the state changes
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ReviewHelpfulVote',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('review', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='helpful_vote_rows', to='store.review', verbose_name='Avaliação')),
+                        ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='helpful_review_votes', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+                    ],
+                    options={
+                        'verbose_name': 'Voto Útil',
+                        'verbose_name_plural': 'Votos Úteis',
+                        'db_table': 'store_review_helpful_votes',
+                        'unique_together': {('review', 'user')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='review',
+                    name='helpful_votes',
+                    field=models.ManyToManyField(blank=True, related_name='helpful_reviews', through='store.ReviewHelpfulVote', to=settings.AUTH_USER_MODEL, verbose_name='Votos Úteis'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='helpful_count',
+            field=models.PositiveIntegerField(default=0, help_text='Mantido a cada voto; recalcule com rebuild_helpful_counts', verbose_name='Total de Votos Úteis'),
+        ),
+        migrations.RunPython(fill_helpful_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.3 on 2026-10-18 23:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0025_reviewhelpfulvote_review_helpful_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='recommendations_counted',
+            field=models.BooleanField(default=False, help_text='Itens já somados às compras conjuntas (build_recommendations)', verbose_name='Contado nas Recomendações'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['paid', 'recommendations_counted'], name='store_order_paid_865af3_idx'),
+        ),
+        migrations.CreateModel(
+            name='ProductPairCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('orders', models.PositiveIntegerField(default=0, verbose_name='Pedidos')),
+                ('other', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.product', verbose_name='Outro Produto')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.product', verbose_name='Produto')),
+            ],
+            options={
+                'verbose_name': 'Compra Conjunta',
+                'verbose_name_plural': 'Compras Conjuntas',
+                'unique_together': {('product', 'other')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('related', 'Produtos Relacionados'), ('together', 'Comprados Juntos')], max_length=10, verbose_name='Tipo')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Posição')),
+                ('score', models.FloatField(verbose_name='Similaridade')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='store.product', verbose_name='Produto')),
+                ('recommended', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommended_for', to='store.product', verbose_name='Produto Recomendado')),
+            ],
+            options={
+                'verbose_name': 'Recomendação',
+                'verbose_name_plural': 'Recomendações',
+                'ordering': ['product', 'kind', 'rank'],
+                'unique_together': {('product', 'kind', 'rank')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-19 09:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0026_order_recommendations_counted_productpaircount_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('bestseller', 'Mais Vendidos'), ('trending', 'Em Alta')], max_length=10, verbose_name='Ranking')),
+                ('position', models.PositiveSmallIntegerField(verbose_name='Posição')),
+                ('score', models.FloatField(verbose_name='Pontuação')),
+                ('units', models.PositiveIntegerField(verbose_name='Unidades na Janela')),
+                ('computed_at', models.DateTimeField(verbose_name='Calculado em')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='store.product', verbose_name='Produto')),
+            ],
+            options={
+                'verbose_name': 'Ranking de Vendas',
+                'verbose_name_plural': 'Rankings de Vendas',
+                'ordering': ['kind', 'position'],
+                'indexes': [models.Index(fields=['kind', 'position', 'product'], name='store_produ_kind_2511f3_idx')],
+                'unique_together': {('kind', 'position')},
+            },
+        ),
+    ]
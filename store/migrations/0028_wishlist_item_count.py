@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-19 10:15
+
+from django.db import migrations, models
+
+
+def fill_item_counts(apps, schema_editor):
+    Wishlist = apps.get_model('store', 'Wishlist')
+    Item = Wishlist.products.through
+    items = Item.objects.filter(wishlist=models.OuterRef('pk')).order_by().values('wishlist')
+    Wishlist.objects.update(item_count=models.functions.Coalesce(
+        models.Subquery(items.annotate(total=models.Count('pk')).values('total')), 0
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0027_productranking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wishlist',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, help_text='Mantido a cada alteração; recalcule com rebuild_wishlist_counts', verbose_name='Total de Itens'),
+        ),
+        migrations.RunPython(fill_item_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:40
+
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def fill_effective_prices(apps, schema_editor):
+    # Ainda não há promoções: o preço efetivo é o promocional ou o normal
+    Product = apps.get_model('store', 'Product')
+    Product.objects.update(effective_price=models.functions.Coalesce('discount_price', 'price'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0028_wishlist_item_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(decimal_places=2, editable=False, help_text='Menor preço entre o promocional e as promoções ativas (store/pricing.py)', max_digits=10, null=True, verbose_name='Preço Efetivo'),
+        ),
+        migrations.RunPython(fill_effective_prices, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['available', 'effective_price'], name='store_produ_availab_1f4502_idx'),
+        ),
+        migrations.CreateModel(
+            name='Promotion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Nome')),
+                ('kind', models.CharField(choices=[('percentage', 'Percentual'), ('fixed', 'Valor Fixo')], default='percentage', max_length=10, verbose_name='Tipo')),
+                ('value', models.DecimalField(decimal_places=2, help_text='Percentual (ex.: 15) ou valor em R$ abatido do preço', max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))], verbose_name='Desconto')),
+                ('starts_at', models.DateTimeField(blank=True, null=True, verbose_name='Início')),
+                ('ends_at', models.DateTimeField(blank=True, null=True, verbose_name='Fim')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Ativa')),
+                ('applied', models.BooleanField(default=False, editable=False, help_text='Estado da última aplicação (apply_promotions aplica início e fim)', verbose_name='Aplicada aos Preços')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('categories', models.ManyToManyField(blank=True, help_text='Sem produtos nem categorias, a promoção vale para a loja toda', related_name='promotions', to='store.category', verbose_name='Categorias')),
+                ('products', models.ManyToManyField(blank=True, related_name='promotions', to='store.product', verbose_name='Produtos')),
+            ],
+            options={
+                'verbose_name': 'Promoção',
+                'verbose_name_plural': 'Promoções',
+                'ordering': ['-created'],
+                'indexes': [models.Index(fields=['is_active', 'ends_at'], name='store_promo_is_acti_4f0d42_idx')],
+            },
+        ),
+    ]
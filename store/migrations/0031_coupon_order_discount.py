@@ -0,0 +1,70 @@
+# Generated by Django 5.2.3 on 2026-10-19 16:20
+
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0030_promotion_product_effective_price'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='coupon_code',
+            field=models.CharField(blank=True, max_length=30, verbose_name='Cupom'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='discount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Desconto do cupom, já abatido do valor total', max_digits=10, verbose_name='Desconto'),
+        ),
+        migrations.CreateModel(
+            name='Coupon',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(help_text='Gravado em maiúsculas, sem espaços', max_length=30, unique=True, verbose_name='Código')),
+                ('kind', models.CharField(choices=[('percentage', 'Percentual'), ('fixed', 'Valor Fixo'), ('free_shipping', 'Frete Grátis')], default='percentage', max_length=15, verbose_name='Tipo')),
+                ('value', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Percentual (ex.: 10) ou valor em R$; ignorado no frete grátis', max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Desconto')),
+                ('min_order_value', models.DecimalField(blank=True, decimal_places=2, help_text='Subtotal mínimo do carrinho; vazio usa o mínimo da loja (MIN_ORDER_VALUE)', max_digits=10, null=True, verbose_name='Pedido Mínimo')),
+                ('max_uses', models.PositiveIntegerField(blank=True, help_text='Vazio: ilimitado', null=True, verbose_name='Limite de Usos')),
+                ('max_uses_per_user', models.PositiveIntegerField(blank=True, default=1, help_text='Vazio: ilimitado', null=True, verbose_name='Limite por Cliente')),
+                ('uses', models.PositiveIntegerField(default=0, editable=False, verbose_name='Usos')),
+                ('starts_at', models.DateTimeField(blank=True, null=True, verbose_name='Início')),
+                ('ends_at', models.DateTimeField(blank=True, null=True, verbose_name='Validade')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Ativo')),
+                ('version', models.PositiveIntegerField(default=1, editable=False, help_text='Muda a cada alteração das regras; o resgate exige a versão validada', verbose_name='Versão')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('categories', models.ManyToManyField(blank=True, help_text='Desconto só sobre os itens destas categorias; vazio vale para o carrinho todo', related_name='coupons', to='store.category', verbose_name='Categorias')),
+            ],
+            options={
+                'verbose_name': 'Cupom',
+                'verbose_name_plural': 'Cupons',
+                'ordering': ['-created'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CouponRedemption',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('discount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Desconto')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Usado em')),
+                ('coupon', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='redemptions', to='store.coupon', verbose_name='Cupom')),
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='coupon_redemption', to='store.order', verbose_name='Pedido')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='coupon_redemptions', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Uso de Cupom',
+                'verbose_name_plural': 'Usos de Cupons',
+                'ordering': ['-created'],
+                'indexes': [models.Index(fields=['coupon', 'user'], name='store_coupo_coupon__334dff_idx')],
+            },
+        ),
+    ]
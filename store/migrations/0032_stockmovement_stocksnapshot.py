@@ -0,0 +1,65 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def open_ledger(apps, schema_editor):
+    # O estoque atual de cada produto é o primeiro movimento do razão
+    Product = apps.get_model('store', 'Product')
+    StockMovement = apps.get_model('store', 'StockMovement')
+    batch = []
+    for product_id, stock in Product.objects.exclude(stock=0).values_list('pk', 'stock').iterator(chunk_size=1000):
+        batch.append(StockMovement(product_id=product_id, kind='adjustment', quantity=stock, note='Saldo de abertura'))
+        if len(batch) >= 1000:
+            StockMovement.objects.bulk_create(batch)
+            batch = []
+    StockMovement.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0031_coupon_order_discount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('reserve', 'Reserva'), ('release', 'Liberação'), ('sale', 'Venda'), ('adjustment', 'Ajuste'), ('import', 'Importação')], max_length=10, verbose_name='Tipo')),
+                ('quantity', models.IntegerField(help_text='Variação de Product.stock: negativa na saída, positiva na entrada', verbose_name='Quantidade')),
+                ('note', models.CharField(blank=True, max_length=200, verbose_name='Observação')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Registrado em')),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='store.order', verbose_name='Pedido')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='store.product', verbose_name='Produto')),
+            ],
+            options={
+                'verbose_name': 'Movimento de Estoque',
+                'verbose_name_plural': 'Movimentos de Estoque',
+                'ordering': ['-id'],
+                'indexes': [
+                    models.Index(fields=['product', 'id'], name='store_stock_product_0ed136_idx'),
+                    models.Index(fields=['created'], name='store_stock_created_3cb4d5_idx'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock', models.IntegerField(verbose_name='Saldo pelo Razão')),
+                ('movement_id', models.BigIntegerField(help_text='Último movimento somado; os seguintes são as diferenças', verbose_name='Até o Movimento')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='store.product', verbose_name='Produto')),
+            ],
+            options={
+                'verbose_name': 'Fotografia de Estoque',
+                'verbose_name_plural': 'Fotografias de Estoque',
+                'ordering': ['-movement_id'],
+                'indexes': [models.Index(fields=['product', 'movement_id'], name='store_stock_product_d03f27_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.core.validators import RegexValidator, MinValueValidator, MaxValueValidator
@@ -294,6 +295,14 @@ class Product(models.Model):
         validators=[MinValueValidator(Decimal('0.01'))],
         help_text="Preço promocional (deixe em branco se não houver desconto)"
     )
+    effective_price = models.DecimalField(
+        'Preço Efetivo',
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        editable=False,
+        help_text='Menor preço entre o promocional e as promoções ativas (store/pricing.py)'
+    )
 
     # Imagens
     image = models.ImageField('Imagem Principal', upload_to='products/')
@@ -401,24 +410,42 @@ class Product(models.Model):
             models.Index(fields=['category', 'available']),
             models.Index(fields=['is_featured']),
             models.Index(fields=['created']),
+            # Filtro e ordenação por preço da listagem: uma faixa do índice
+            models.Index(fields=['available', 'effective_price']),
         ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        """Recalcula o preço efetivo quando preço, promocional ou categoria são gravados"""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'price', 'discount_price', 'category'} & set(update_fields):
+            from .pricing import effective_price
+            self.effective_price = effective_price(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'effective_price'}
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         return reverse('store:product_detail', args=[self.slug])
 
     @property
     def final_price(self):
-        """Retorna o preço final (promocional se disponível, senão o preço normal)"""
+        """Preço de venda: o efetivo (promoções incluídas), senão promocional ou normal"""
+        if self.effective_price is not None:
+            return self.effective_price
         return self.discount_price if self.discount_price else self.price
 
+    @property
+    def is_on_sale(self):
+        return self.final_price < self.price
+
     @property
     def discount_percentage(self):
         """Calcula a porcentagem de desconto"""
-        if self.discount_price and self.price:
-            return int(((self.price - self.discount_price) / self.price) * 100)
+        if self.price and self.is_on_sale:
+            return int(((self.price - self.final_price) / self.price) * 100)
         return 0
 
     @property
@@ -433,11 +460,20 @@ class Product(models.Model):
         """Retorna a média das avaliações (será calculado via annotation nas views)"""
         return getattr(self, '_average_rating', 0)
 
+    @average_rating.setter
+    def average_rating(self, value):
+        # Recebe o valor das annotations average_rating das views
+        self._average_rating = value
+
     @property
     def review_count(self):
         """Retorna o número de avaliações (será calculado via annotation nas views)"""
         return getattr(self, '_review_count', 0)
 
+    @review_count.setter
+    def review_count(self, value):
+        self._review_count = value
+
     def can_be_purchased(self, quantity=1):
         """Verifica se o produto pode ser comprado na quantidade especificada"""
         if not self.available:
@@ -446,19 +482,34 @@ class Product(models.Model):
             return True
         return self.stock >= quantity
 
-    def reserve_stock(self, quantity):
-        """Reserva estoque do produto"""
-        if self.track_stock and self.stock >= quantity:
-            self.stock -= quantity
-            self.save(update_fields=['stock'])
-            return True
-        return False
+    def reserve_stock(self, quantity, order=None):
+        """Reserva estoque do produto (registrada no razão de estoque)"""
+        if not self.track_stock:
+            return False
+        # UPDATE condicional, como a reserva do checkout: não sobrescreve
+        # alterações concorrentes com o valor lido nesta instância
+        with transaction.atomic(savepoint=False):
+            if not Product.objects.filter(pk=self.pk, stock__gte=quantity).update(stock=F('stock') - quantity):
+                return False
+            self._record_stock_change('reserve', -quantity, order)
+        self.stock -= quantity
+        return True
 
-    def release_stock(self, quantity):
-        """Libera estoque do produto"""
+    def release_stock(self, quantity, order=None):
+        """Libera estoque do produto (registrada no razão de estoque)"""
         if self.track_stock:
+            with transaction.atomic(savepoint=False):
+                Product.objects.filter(pk=self.pk).update(stock=F('stock') + quantity)
+                self._record_stock_change('release', quantity, order)
             self.stock += quantity
-            self.save(update_fields=['stock'])
+
+    def _record_stock_change(self, kind, quantity, order):
+        from .inventory import movement, record
+        from .page_cache import invalidate_product_page
+        record([movement(self.pk, kind, quantity, order=order)])
+        # UPDATE não dispara post_save: a página em cache sai aqui
+        product_id = self.pk
+        transaction.on_commit(lambda: invalidate_product_page(product_id))
 
     def clean(self):
         """Validações customizadas"""
@@ -527,10 +578,16 @@ class Review(models.Model):
     )
     helpful_votes = models.ManyToManyField(
         User,
+        through='ReviewHelpfulVote',
         related_name='helpful_reviews',
         blank=True,
         verbose_name='Votos Úteis'
     )
+    helpful_count = models.PositiveIntegerField(
+        'Total de Votos Úteis',
+        default=0,
+        help_text='Mantido a cada voto; recalcule com rebuild_helpful_counts'
+    )
     is_verified_purchase = models.BooleanField(
         'Compra Verificada',
         default=False,
@@ -558,26 +615,42 @@ class Review(models.Model):
     def __str__(self):
         return f'Avaliação de {self.user.username} para {self.product.name} ({self.rating} estrelas)'
 
-    @property
-    def helpful_count(self):
-        """Retorna o número de votos úteis para esta avaliação"""
-        return self.helpful_votes.count()
+    def toggle_helpful(self, user):
+        """
+        Alterna o voto de útil do usuário: um DELETE ou um INSERT na tabela de
+        votos e o contador ajustado com F(). Retorna se o voto ficou marcado.
+        """
+        try:
+            with transaction.atomic():
+                deleted, _ = ReviewHelpfulVote.objects.filter(review=self, user=user).delete()
+                if deleted:
+                    Review.objects.filter(pk=self.pk).update(helpful_count=F('helpful_count') - 1)
+                    is_helpful = False
+                else:
+                    ReviewHelpfulVote.objects.create(review=self, user=user)
+                    Review.objects.filter(pk=self.pk).update(helpful_count=F('helpful_count') + 1)
+                    is_helpful = True
+        except IntegrityError:
+            # Clique duplo concorrente: o outro request já gravou o voto e somou o contador
+            is_helpful = True
+        self.refresh_from_db(fields=['helpful_count'])
+        return is_helpful
 
     def mark_helpful(self, user):
         """Marca a avaliação como útil para um usuário"""
-        if user != self.user and user.is_authenticated:
-            self.helpful_votes.add(user)
+        if user != self.user and user.is_authenticated and not self.is_marked_helpful_by(user):
+            self.toggle_helpful(user)
 
     def unmark_helpful(self, user):
         """Remove a marcação de útil para um usuário"""
-        if user.is_authenticated:
-            self.helpful_votes.remove(user)
+        if user.is_authenticated and self.is_marked_helpful_by(user):
+            self.toggle_helpful(user)
 
     def is_marked_helpful_by(self, user):
         """Verifica se um usuário marcou esta avaliação como útil"""
         if not user.is_authenticated:
             return False
-        return self.helpful_votes.filter(id=user.id).exists()
+        return ReviewHelpfulVote.objects.filter(review=self, user=user).exists()
 
     @property
     def rating_stars(self):
@@ -593,6 +666,34 @@ class Review(models.Model):
             raise ValidationError('Você já avaliou este produto.')
 
 
+
+class ReviewHelpfulVote(models.Model):
+    """Voto de útil de um usuário em uma avaliação (no máximo um por par)"""
+
+    review = models.ForeignKey(
+        Review,
+        on_delete=models.CASCADE,
+        related_name='helpful_vote_rows',
+        verbose_name='Avaliação'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='helpful_review_votes',
+        verbose_name='Usuário'
+    )
+
+    class Meta:
+        # Mesma tabela e colunas do antigo ManyToMany automático
+        db_table = 'store_review_helpful_votes'
+        verbose_name = 'Voto Útil'
+        verbose_name_plural = 'Votos Úteis'
+        unique_together = ['review', 'user']
+
+    def __str__(self):
+        return f'{self.user_id} -> avaliação {self.review_id}'
+
+
 class ContactMessage(models.Model):
     """Mensagem de contato do site"""
 
@@ -844,14 +945,12 @@ class Banner(models.Model):
         return True
 
     def increment_views(self):
-        """Incrementa o contador de visualizações"""
-        self.view_count += 1
-        self.save(update_fields=['view_count'])
+        """Incrementa o contador de visualizações (UPDATE atômico, sem sinais)"""
+        Banner.objects.filter(pk=self.pk).update(view_count=F('view_count') + 1)
 
     def increment_clicks(self):
-        """Incrementa o contador de cliques"""
-        self.click_count += 1
-        self.save(update_fields=['click_count'])
+        """Incrementa o contador de cliques (UPDATE atômico, sem sinais)"""
+        Banner.objects.filter(pk=self.pk).update(click_count=F('click_count') + 1)
 
     @property
     def click_through_rate(self):
@@ -909,7 +1008,7 @@ class Cart(models.Model):
     @property
     def total_price(self):
         """Calcula o preço total do carrinho"""
-        return sum(item.total_price for item in self.items.all())
+        return sum(item.total_price for item in self.items.select_related('product'))
 
     @property
     def total_items(self):
@@ -919,7 +1018,7 @@ class Cart(models.Model):
     @property
     def total_weight(self):
         """Calcula o peso total do carrinho"""
-        return sum(item.total_weight for item in self.items.all())
+        return sum(item.total_weight for item in self.items.select_related('product'))
 
     def clear(self):
         """Limpa o carrinho"""
@@ -1055,7 +1154,20 @@ class Order(models.Model):
         decimal_places=2,
         default=Decimal('0.00')
     )
+    coupon_code = models.CharField('Cupom', max_length=30, blank=True)
+    discount = models.DecimalField(
+        'Desconto',
+        max_digits=10,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text='Desconto do cupom, já abatido do valor total'
+    )
     paid = models.BooleanField('Pago', default=False)
+    recommendations_counted = models.BooleanField(
+        'Contado nas Recomendações',
+        default=False,
+        help_text='Itens já somados às compras conjuntas (build_recommendations)'
+    )
 
     # Integração com pagamento
     preference_id = models.CharField(
@@ -1072,6 +1184,12 @@ class Order(models.Model):
         blank=True,
         help_text="ID do pagamento no Mercado Pago"
     )
+    payment_method = models.CharField(
+        'Forma de Pagamento',
+        max_length=30,
+        blank=True,
+        help_text="Tipo de pagamento informado pelo Mercado Pago (ex.: credit_card, bank_transfer)"
+    )
 
     # Nota Fiscal
     nfe_numero = models.CharField(
@@ -1125,6 +1243,7 @@ class Order(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['created']),
             models.Index(fields=['payment_id']),
+            models.Index(fields=['paid', 'recommendations_counted']),
         ]
 
     def __str__(self):
@@ -1160,8 +1279,11 @@ class Order(models.Model):
         """Cancela o pedido e libera o estoque"""
         if self.can_be_cancelled:
             # Liberar estoque dos produtos
-            for item in self.items.all():
-                item.product.release_stock(item.quantity)
+            for item in self.items.select_related('product'):
+                item.product.release_stock(item.quantity, order=self)
+            if self.coupon_code:
+                from .coupons import release
+                release(self)
 
             self.status = 'cancelled'
             self.save(update_fields=['status'])
@@ -1239,6 +1361,11 @@ class Wishlist(models.Model):
         related_name='wishlists',
         verbose_name='Produtos'
     )
+    item_count = models.PositiveIntegerField(
+        'Total de Itens',
+        default=0,
+        help_text='Mantido a cada alteração; recalcule com rebuild_wishlist_counts'
+    )
     created = models.DateTimeField('Criado em', auto_now_add=True)
     updated = models.DateTimeField('Atualizado em', auto_now=True)
 
@@ -1250,15 +1377,428 @@ class Wishlist(models.Model):
         return f'Lista de desejos de {self.user.username}'
 
     def add_product(self, product):
-        """Adiciona produto à lista de desejos"""
-        self.products.add(product)
-        self.save()
+        """Adiciona produto à lista de desejos (um INSERT IGNORE); retorna se era novo"""
+        from .wishlists import insert_item
+        return insert_item(self.pk, product.pk)
 
     def remove_product(self, product):
-        """Remove produto da lista de desejos"""
-        self.products.remove(product)
-        self.save()
+        """Remove produto da lista de desejos (um DELETE); retorna se estava na lista"""
+        from .wishlists import delete_item
+        return delete_item(self.pk, product.pk)
 
     def has_product(self, product):
         """Verifica se o produto está na lista de desejos"""
         return self.products.filter(id=product.id).exists()
+
+
+class ResponsiveImage(models.Model):
+    """Derivados responsivos (AVIF/WebP/JPEG) de uma imagem enviada ao site"""
+
+    STATUS_CHOICES = [
+        ('pending', 'Pendente'),
+        ('done', 'Gerado'),
+        ('failed', 'Falhou'),
+    ]
+
+    source = models.CharField(
+        'Imagem de Origem',
+        max_length=255,
+        unique=True,
+        help_text='Caminho da imagem original no storage de mídia'
+    )
+    content_hash = models.CharField('Hash do Conteúdo', max_length=64, blank=True)
+    width = models.PositiveIntegerField('Largura Original', null=True, blank=True)
+    height = models.PositiveIntegerField('Altura Original', null=True, blank=True)
+    variants = models.JSONField(
+        'Derivados',
+        default=dict,
+        blank=True,
+        help_text='Formato -> {largura: caminho do derivado}'
+    )
+    status = models.CharField(
+        'Status',
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='pending'
+    )
+    attempts = models.PositiveIntegerField('Tentativas', default=0)
+    error_message = models.TextField('Mensagem de Erro', blank=True)
+    created_at = models.DateTimeField('Criado em', auto_now_add=True)
+    updated_at = models.DateTimeField('Atualizado em', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Imagem Responsiva'
+        verbose_name_plural = 'Imagens Responsivas'
+        indexes = [
+            models.Index(fields=['status']),
+        ]
+
+    def __str__(self):
+        return f'{self.source} ({self.get_status_display()})'
+
+
+class ProductPairCount(models.Model):
+    """
+    Em quantos pedidos pagos dois produtos foram comprados juntos.
+
+    Cada par é guardado nos dois sentidos; a linha com ``product == other``
+    guarda em quantos pedidos o produto aparece. É a matriz esparsa de
+    co-compras que ``build_recommendations`` soma pedido a pedido.
+    """
+
+    product = models.ForeignKey(
+        Product,
+        related_name='+',
+        on_delete=models.CASCADE,
+        verbose_name='Produto'
+    )
+    other = models.ForeignKey(
+        Product,
+        related_name='+',
+        on_delete=models.CASCADE,
+        verbose_name='Outro Produto'
+    )
+    orders = models.PositiveIntegerField('Pedidos', default=0)
+
+    class Meta:
+        verbose_name = 'Compra Conjunta'
+        verbose_name_plural = 'Compras Conjuntas'
+        unique_together = ['product', 'other']
+
+    def __str__(self):
+        return f'{self.product_id} + {self.other_id}: {self.orders}'
+
+
+class ProductRecommendation(models.Model):
+    """Vizinhos mais próximos de um produto, pré-calculados por build_recommendations"""
+
+    KIND_CHOICES = [
+        ('related', 'Produtos Relacionados'),
+        ('together', 'Comprados Juntos'),
+    ]
+
+    product = models.ForeignKey(
+        Product,
+        related_name='recommendations',
+        on_delete=models.CASCADE,
+        verbose_name='Produto'
+    )
+    recommended = models.ForeignKey(
+        Product,
+        related_name='recommended_for',
+        on_delete=models.CASCADE,
+        verbose_name='Produto Recomendado'
+    )
+    kind = models.CharField('Tipo', max_length=10, choices=KIND_CHOICES)
+    rank = models.PositiveSmallIntegerField('Posição')
+    score = models.FloatField('Similaridade')
+
+    class Meta:
+        verbose_name = 'Recomendação'
+        verbose_name_plural = 'Recomendações'
+        ordering = ['product', 'kind', 'rank']
+        # A leitura é sempre "vizinhos de X deste tipo, em ordem": um só índice
+        unique_together = ['product', 'kind', 'rank']
+
+    def __str__(self):
+        return f'{self.product_id} -> {self.recommended_id} ({self.kind} #{self.rank})'
+
+
+class ProductRanking(models.Model):
+    """Posições de vendas calculadas por compute_rankings (mais vendidos e em alta)"""
+
+    KIND_CHOICES = [
+        ('bestseller', 'Mais Vendidos'),
+        ('trending', 'Em Alta'),
+    ]
+
+    kind = models.CharField('Ranking', max_length=10, choices=KIND_CHOICES)
+    position = models.PositiveSmallIntegerField('Posição')
+    product = models.ForeignKey(
+        Product,
+        related_name='rankings',
+        on_delete=models.CASCADE,
+        verbose_name='Produto'
+    )
+    score = models.FloatField('Pontuação')
+    units = models.PositiveIntegerField('Unidades na Janela')
+    computed_at = models.DateTimeField('Calculado em')
+
+    class Meta:
+        verbose_name = 'Ranking de Vendas'
+        verbose_name_plural = 'Rankings de Vendas'
+        ordering = ['kind', 'position']
+        unique_together = ['kind', 'position']
+        indexes = [
+            # Cobre a leitura da home: (kind, posição <= n) -> produto sem ler a tabela
+            models.Index(fields=['kind', 'position', 'product']),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} #{self.position}: {self.product_id}'
+
+
+class Promotion(models.Model):
+    """Promoção de preço por produto, por categoria ou na loja toda, com janela de validade"""
+
+    KIND_CHOICES = [
+        ('percentage', 'Percentual'),
+        ('fixed', 'Valor Fixo'),
+    ]
+
+    name = models.CharField('Nome', max_length=100)
+    kind = models.CharField('Tipo', max_length=10, choices=KIND_CHOICES, default='percentage')
+    value = models.DecimalField(
+        'Desconto',
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal('0.01'))],
+        help_text='Percentual (ex.: 15) ou valor em R$ abatido do preço'
+    )
+    products = models.ManyToManyField(
+        Product,
+        related_name='promotions',
+        blank=True,
+        verbose_name='Produtos'
+    )
+    categories = models.ManyToManyField(
+        Category,
+        related_name='promotions',
+        blank=True,
+        verbose_name='Categorias',
+        help_text='Sem produtos nem categorias, a promoção vale para a loja toda'
+    )
+    starts_at = models.DateTimeField('Início', blank=True, null=True)
+    ends_at = models.DateTimeField('Fim', blank=True, null=True)
+    is_active = models.BooleanField('Ativa', default=True)
+    applied = models.BooleanField(
+        'Aplicada aos Preços',
+        default=False,
+        editable=False,
+        help_text='Estado da última aplicação (apply_promotions aplica início e fim)'
+    )
+    created = models.DateTimeField('Criado em', auto_now_add=True)
+    updated = models.DateTimeField('Atualizado em', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Promoção'
+        verbose_name_plural = 'Promoções'
+        ordering = ['-created']
+        indexes = [
+            models.Index(fields=['is_active', 'ends_at']),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    def is_running(self, now):
+        return (
+            self.is_active
+            and (self.starts_at is None or self.starts_at <= now)
+            and (self.ends_at is None or self.ends_at > now)
+        )
+
+    def discounted(self, price):
+        """Preço com o desconto desta promoção (nunca abaixo de R$ 0,01)"""
+        if self.kind == 'percentage':
+            price = price * (Decimal('100') - self.value) / Decimal('100')
+        else:
+            price = price - self.value
+        return max(price.quantize(Decimal('0.01')), Decimal('0.01'))
+
+    def clean(self):
+        """Validações customizadas"""
+        super().clean()
+        if self.kind == 'percentage' and self.value is not None and self.value >= 100:
+            raise ValidationError('O desconto percentual deve ser menor que 100%.')
+        if self.starts_at and self.ends_at and self.ends_at <= self.starts_at:
+            raise ValidationError('O fim da promoção deve ser depois do início.')
+
+
+class Coupon(models.Model):
+    """Cupom de desconto com limites de uso, valor mínimo, categorias e validade (store/coupons.py)"""
+
+    KIND_CHOICES = [
+        ('percentage', 'Percentual'),
+        ('fixed', 'Valor Fixo'),
+        ('free_shipping', 'Frete Grátis'),
+    ]
+
+    code = models.CharField('Código', max_length=30, unique=True, help_text='Gravado em maiúsculas, sem espaços')
+    kind = models.CharField('Tipo', max_length=15, choices=KIND_CHOICES, default='percentage')
+    value = models.DecimalField(
+        'Desconto',
+        max_digits=10,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        validators=[MinValueValidator(Decimal('0.00'))],
+        help_text='Percentual (ex.: 10) ou valor em R$; ignorado no frete grátis'
+    )
+    min_order_value = models.DecimalField(
+        'Pedido Mínimo',
+        max_digits=10,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        help_text='Subtotal mínimo do carrinho; vazio usa o mínimo da loja (MIN_ORDER_VALUE)'
+    )
+    categories = models.ManyToManyField(
+        Category,
+        related_name='coupons',
+        blank=True,
+        verbose_name='Categorias',
+        help_text='Desconto só sobre os itens destas categorias; vazio vale para o carrinho todo'
+    )
+    max_uses = models.PositiveIntegerField('Limite de Usos', blank=True, null=True, help_text='Vazio: ilimitado')
+    max_uses_per_user = models.PositiveIntegerField(
+        'Limite por Cliente', blank=True, null=True, default=1, help_text='Vazio: ilimitado'
+    )
+    uses = models.PositiveIntegerField('Usos', default=0, editable=False)
+    starts_at = models.DateTimeField('Início', blank=True, null=True)
+    ends_at = models.DateTimeField('Validade', blank=True, null=True)
+    is_active = models.BooleanField('Ativo', default=True)
+    version = models.PositiveIntegerField(
+        'Versão',
+        default=1,
+        editable=False,
+        help_text='Muda a cada alteração das regras; o resgate exige a versão validada'
+    )
+    created = models.DateTimeField('Criado em', auto_now_add=True)
+    updated = models.DateTimeField('Atualizado em', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Cupom'
+        verbose_name_plural = 'Cupons'
+        ordering = ['-created']
+
+    def __str__(self):
+        return self.code
+
+    def save(self, *args, **kwargs):
+        self.code = re.sub(r'\s', '', self.code or '').upper()
+        # Contadores gravados à parte (update_fields) não mudam as regras
+        if self.pk and kwargs.get('update_fields') is None:
+            self.version = F('version') + 1
+        super().save(*args, **kwargs)
+        if hasattr(self.version, 'resolve_expression'):
+            self.refresh_from_db(fields=['version'])
+
+    def clean(self):
+        """Validações customizadas"""
+        super().clean()
+        if self.kind == 'percentage' and self.value is not None and not 0 < self.value < 100:
+            raise ValidationError('O desconto percentual deve estar entre 0 e 100%.')
+        if self.kind == 'fixed' and self.value is not None and self.value <= 0:
+            raise ValidationError('Informe o valor do desconto.')
+        if self.starts_at and self.ends_at and self.ends_at <= self.starts_at:
+            raise ValidationError('A validade deve ser depois do início.')
+
+
+class CouponRedemption(models.Model):
+    """Uso de um cupom em um pedido"""
+
+    coupon = models.ForeignKey(
+        Coupon,
+        related_name='redemptions',
+        on_delete=models.CASCADE,
+        verbose_name='Cupom'
+    )
+    user = models.ForeignKey(
+        User,
+        related_name='coupon_redemptions',
+        on_delete=models.CASCADE,
+        verbose_name='Usuário'
+    )
+    order = models.OneToOneField(
+        Order,
+        related_name='coupon_redemption',
+        on_delete=models.CASCADE,
+        verbose_name='Pedido'
+    )
+    discount = models.DecimalField('Desconto', max_digits=10, decimal_places=2)
+    created = models.DateTimeField('Usado em', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Uso de Cupom'
+        verbose_name_plural = 'Usos de Cupons'
+        ordering = ['-created']
+        indexes = [
+            models.Index(fields=['coupon', 'user']),
+        ]
+
+    def __str__(self):
+        return f'{self.coupon} - Pedido #{self.order_id}'
+
+
+class StockMovement(models.Model):
+    """Movimento de estoque (razão só de inclusão; store/inventory.py)"""
+
+    KIND_CHOICES = [
+        ('reserve', 'Reserva'),
+        ('release', 'Liberação'),
+        ('sale', 'Venda'),
+        ('adjustment', 'Ajuste'),
+        ('import', 'Importação'),
+    ]
+
+    product = models.ForeignKey(
+        Product,
+        related_name='stock_movements',
+        on_delete=models.CASCADE,
+        verbose_name='Produto'
+    )
+    kind = models.CharField('Tipo', max_length=10, choices=KIND_CHOICES)
+    quantity = models.IntegerField(
+        'Quantidade',
+        help_text='Variação de Product.stock: negativa na saída, positiva na entrada'
+    )
+    order = models.ForeignKey(
+        Order,
+        related_name='stock_movements',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        verbose_name='Pedido'
+    )
+    note = models.CharField('Observação', max_length=200, blank=True)
+    created = models.DateTimeField('Registrado em', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Movimento de Estoque'
+        verbose_name_plural = 'Movimentos de Estoque'
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['product', 'id']),
+            models.Index(fields=['created']),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.quantity:+d} - {self.product_id}'
+
+
+class StockSnapshot(models.Model):
+    """Saldo do razão de um produto até um movimento (base para recalcular o estoque)"""
+
+    product = models.ForeignKey(
+        Product,
+        related_name='stock_snapshots',
+        on_delete=models.CASCADE,
+        verbose_name='Produto'
+    )
+    stock = models.IntegerField('Saldo pelo Razão')
+    movement_id = models.BigIntegerField(
+        'Até o Movimento',
+        help_text='Último movimento somado; os seguintes são as diferenças'
+    )
+    created = models.DateTimeField('Criado em', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Fotografia de Estoque'
+        verbose_name_plural = 'Fotografias de Estoque'
+        ordering = ['-movement_id']
+        indexes = [
+            models.Index(fields=['product', 'movement_id']),
+        ]
+
+    def __str__(self):
+        return f'{self.product_id}: {self.stock} (até #{self.movement_id})'
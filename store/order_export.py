@@ -0,0 +1,114 @@
+"""
+Exportação de pedidos (com itens) em CSV ou JSONL, em streaming.
+
+Os pedidos são lidos em lotes por chave (``id > último id``) e os itens de
+cada lote são carregados com um único ``prefetch_related``: a memória fica
+limitada a um lote, cada consulta é curta (sem cursor aberto durante toda a
+resposta) e uma exportação interrompida pode ser retomada a partir do
+último ``order_id`` recebido.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils import timezone
+
+from india_oasis_project.db_router import read_replica
+
+from .constants import ORDER_EXPORT_CHUNK_SIZE
+from .models import Order, OrderItem
+
+ORDER_FIELDS = (
+    'id', 'created', 'status', 'paid', 'user_id', 'email', 'first_name', 'last_name', 'phone',
+    'address', 'number', 'complement', 'neighborhood', 'postal_code', 'city', 'state',
+    'total_price', 'shipping_cost', 'shipping_method', 'tracking_code', 'payment_id', 'nfe_numero',
+)
+ITEM_FIELDS = ('product_id', 'product_sku', 'product_name', 'quantity', 'price')
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson; charset=utf-8', 'jsonl'),
+}
+
+
+def filter_orders(start=None, end=None, statuses=None, after_id=None):
+    """
+    Pedidos criados entre ``start`` e ``end`` (datas, inclusive), com os
+    status informados e ``id`` maior que ``after_id`` (retomada). Lidos de
+    uma réplica quando houver (a exportação tolera alguns segundos de atraso).
+    """
+    queryset = Order.objects.using(read_replica())
+    if start:
+        queryset = queryset.filter(created__gte=timezone.make_aware(datetime.combine(start, time.min)))
+    if end:
+        queryset = queryset.filter(created__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)))
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    if after_id:
+        queryset = queryset.filter(pk__gt=after_id)
+    return queryset
+
+
+def iter_batches(queryset, chunk_size=ORDER_EXPORT_CHUNK_SIZE):
+    """Gera listas de pedidos em ordem de id, com os itens pré-carregados"""
+    queryset = queryset.only(*ORDER_FIELDS).order_by('pk')
+    items = Prefetch('items', queryset=OrderItem.objects.only('order_id', *ITEM_FIELDS).order_by('pk'))
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_id)[:chunk_size])
+        if not batch:
+            return
+        prefetch_related_objects(batch, items)
+        yield batch
+        last_id = batch[-1].pk
+
+
+def _order_values(order):
+    return [getattr(order, field) for field in ORDER_FIELDS]
+
+
+def _item_values(item):
+    return [getattr(item, field) for field in ITEM_FIELDS]
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def export_csv(queryset, chunk_size=ORDER_EXPORT_CHUNK_SIZE):
+    """Uma linha por item (pedidos sem itens geram uma linha com os campos do item vazios)"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(('order_' + f if f == 'id' else f for f in ORDER_FIELDS + ITEM_FIELDS))
+    empty_item = [''] * len(ITEM_FIELDS)
+    for batch in iter_batches(queryset, chunk_size):
+        for order in batch:
+            values = _order_values(order)
+            values[1] = order.created.isoformat()
+            items = order.items.all()
+            if not items:
+                yield writer.writerow(values + empty_item)
+            for item in items:
+                yield writer.writerow(values + _item_values(item))
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'Tipo não serializável: {type(value).__name__}')
+
+
+def export_jsonl(queryset, chunk_size=ORDER_EXPORT_CHUNK_SIZE):
+    """Um objeto JSON por pedido, com a lista de itens"""
+    for batch in iter_batches(queryset, chunk_size):
+        for order in batch:
+            data = dict(zip(ORDER_FIELDS, _order_values(order)))
+            data['items'] = [dict(zip(ITEM_FIELDS, _item_values(item))) for item in order.items.all()]
+            yield json.dumps(data, default=_json_default, ensure_ascii=False) + '\n'
+
+
+EXPORTERS = {'csv': export_csv, 'jsonl': export_jsonl}
@@ -0,0 +1,106 @@
+"""
+Cache de página inteira do detalhe de produto.
+
+A página é renderizada como para um visitante anônimo (sem nada do usuário)
+e guardada por slug junto com a versão do produto e a do feed de avaliações
+em que foi gerada; vale enquanto as duas versões não mudarem. O estado de
+cada usuário (menu da conta, coração da lista de desejos, se já avaliou,
+votos úteis, token CSRF) chega depois por ``product_page_state`` em JSON,
+e o contador do carrinho pela chamada que o base.html já faz.
+
+As respostas levam ``ETag``/``Last-Modified`` para GETs condicionais (304
+sem renderizar) e ``Cache-Control: public`` com ``s-maxage`` configurável
+para um CDN na frente.
+
+Invalidação só do produto afetado, trocando a versão dele:
+``invalidate_product_page`` no ``post_save``/``post_delete`` do produto, nas
+ações de ativar e desativar do admin e na reserva de estoque do pedido
+(UPDATE em massa, sem sinal); ``invalidate_product_pages`` no recálculo de
+preços e na importação. Avaliações e votos trocam a versão do feed.
+"""
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .reviews import feed_version
+
+
+def _version_key(product_id):
+    return f'produto:{product_id}:versao'
+
+
+def _page_key(slug):
+    return f'pagina-produto:{slug}'
+
+
+def product_version(product_id):
+    return cache.get_or_set(_version_key(product_id), lambda: uuid.uuid4().hex, None)
+
+
+def invalidate_product_page(product_id):
+    """A página em cache do produto deixa de valer (qualquer slug)"""
+    cache.set(_version_key(product_id), uuid.uuid4().hex, None)
+
+
+def invalidate_product_pages(product_ids):
+    """Várias páginas de uma vez (recálculo de preços, importação em massa)"""
+    cache.set_many({_version_key(product_id): uuid.uuid4().hex for product_id in product_ids}, None)
+
+
+def can_use_page_cache(request):
+    """GET sem mensagens pendentes (a página em cache não as mostraria)"""
+    if not settings.PRODUCT_PAGE_CACHE_ENABLED or request.method != 'GET':
+        return False
+    return not len(messages.get_messages(request))
+
+
+def current_versions(product_id):
+    """Versões do produto e do feed de avaliações: a página depende das duas"""
+    return product_version(product_id), feed_version(product_id)
+
+
+def get_cached_page(slug):
+    """Página em cache ainda válida para o slug, ou None"""
+    page = cache.get(_page_key(slug))
+    if page is None:
+        return None
+    if page['versions'] != current_versions(page['product_id']):
+        return None
+    return page
+
+
+def store_page(slug, product_id, versions, content):
+    """
+    Guarda a renderização com as versões lidas ANTES de renderizar: uma
+    mudança durante a renderização já invalida o que foi guardado.
+    """
+    page = {
+        'product_id': product_id,
+        'versions': versions,
+        'content': content,
+        'etag': f'"{hashlib.md5(content).hexdigest()}"',
+        'last_modified': int(time.time()),
+    }
+    cache.set(_page_key(slug), page, settings.PRODUCT_PAGE_CACHE_SECONDS)
+    return page
+
+
+def page_response(request, page):
+    """Resposta da página em cache, ou 304 se o cliente já tem esta versão"""
+    response = HttpResponse(page['content'])
+    response['ETag'] = page['etag']
+    response['Last-Modified'] = http_date(page['last_modified'])
+    # O navegador revalida sempre (barato: 304); um CDN pode guardar por s-maxage
+    patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+    if settings.PRODUCT_PAGE_EDGE_MAX_AGE:
+        patch_cache_control(response, s_maxage=settings.PRODUCT_PAGE_EDGE_MAX_AGE)
+    return get_conditional_response(
+        request, etag=page['etag'], last_modified=page['last_modified'], response=response
+    )
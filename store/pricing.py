@@ -0,0 +1,123 @@
+"""
+Preço efetivo dos produtos: o menor entre o preço promocional do próprio
+produto (``discount_price``) e o de cada promoção em vigor que o alcança
+(por produto, por categoria ou na loja toda). Promoções não se acumulam.
+
+O resultado fica gravado em ``Product.effective_price``, indexado junto de
+``available``: filtrar e ordenar por preço na listagem é uma faixa do
+índice, e carrinho, pedido e páginas usam o mesmo valor (``final_price``).
+
+Quando é recalculado:
+
+- ``Product.save`` recalcula o próprio produto (promoções em cache);
+- alterações em promoções recalculam o catálogo ao fim da transação;
+- ``apply_promotions`` (cron, a cada minuto) aplica as promoções que
+  começaram ou terminaram desde a última execução;
+- a importação em massa recalcula os produtos de cada bloco.
+
+Só as linhas cujo preço mudou são gravadas, e só as páginas desses produtos
+saem do cache.
+"""
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .catalog_cache import cached_query, invalidate_catalog
+from .models import Product, Promotion
+from .page_cache import invalidate_product_pages
+
+BATCH_SIZE = 1000
+
+
+def load_promotions():
+    """Promoções ativas que ainda não terminaram, com ``product_ids`` e ``category_ids``"""
+    promotions = list(
+        Promotion.objects.filter(Q(ends_at__isnull=True) | Q(ends_at__gt=timezone.now()), is_active=True)
+        .prefetch_related('products', 'categories')
+    )
+    for promotion in promotions:
+        promotion.product_ids = {product.pk for product in promotion.products.all()}
+        promotion.category_ids = {category.pk for category in promotion.categories.all()}
+        # O cache guarda só os ids
+        promotion._prefetched_objects_cache = {}
+    return promotions
+
+
+def cached_promotions():
+    return cached_query('promocoes:ativas', load_promotions)
+
+
+def best_price(product_id, category_id, price, discount_price, promotions, now):
+    """Menor preço do produto entre o promocional e as promoções em vigor em ``now``"""
+    best = discount_price or price
+    for promotion in promotions:
+        if not promotion.is_running(now):
+            continue
+        storewide = not promotion.product_ids and not promotion.category_ids
+        if storewide or product_id in promotion.product_ids or category_id in promotion.category_ids:
+            best = min(best, promotion.discounted(price))
+    return best
+
+
+def effective_price(product, promotions=None, now=None):
+    if product.price is None:
+        return None
+    return best_price(
+        product.pk, product.category_id, product.price, product.discount_price,
+        cached_promotions() if promotions is None else promotions, now or timezone.now()
+    )
+
+
+def _running(now):
+    return (
+        Q(is_active=True)
+        & (Q(starts_at__isnull=True) | Q(starts_at__lte=now))
+        & (Q(ends_at__isnull=True) | Q(ends_at__gt=now))
+    )
+
+
+def due_promotions(now=None):
+    """Promoções que começaram ou terminaram desde a última aplicação"""
+    running = _running(now or timezone.now())
+    return Promotion.objects.filter((running & Q(applied=False)) | (~running & Q(applied=True)))
+
+
+def refresh_prices(products=None, now=None):
+    """
+    Recalcula ``effective_price`` de ``products`` (queryset; padrão: o
+    catálogo inteiro) e grava apenas o que mudou. Retorna quantos mudaram.
+    """
+    now = now or timezone.now()
+    full = products is None
+    promotions = load_promotions()
+    rows = (products if products is not None else Product.objects.all()).order_by().values_list(
+        'pk', 'category_id', 'price', 'discount_price', 'effective_price'
+    )
+
+    changed = []
+    for pk, category_id, price, discount_price, current in rows.iterator(chunk_size=BATCH_SIZE):
+        price = best_price(pk, category_id, price, discount_price, promotions, now)
+        if price != current:
+            changed.append(Product(pk=pk, effective_price=price))
+
+    with transaction.atomic():
+        Product.objects.bulk_update(changed, ['effective_price'], batch_size=BATCH_SIZE)
+        if full:
+            running = _running(now)
+            Promotion.objects.filter(running, applied=False).update(applied=True)
+            Promotion.objects.filter(~running, applied=True).update(applied=False)
+
+    if changed:
+        # Nova versão (não só a remoção da página): uma renderização em curso
+        # guarda o preço antigo sob versões que já não valem
+        invalidate_product_pages(product.pk for product in changed)
+        invalidate_catalog()
+    return len(changed)
+
+
+def schedule_refresh():
+    """Um recálculo do catálogo ao fim da transação, por mais alterações que ela tenha"""
+    connection = transaction.get_connection()
+    if any(entry[1] is refresh_prices for entry in connection.run_on_commit):
+        return
+    transaction.on_commit(refresh_prices)
@@ -0,0 +1,105 @@
+"""
+Rankings de vendas: "mais vendidos" e "em alta".
+
+``compute_rankings`` agrega numa consulta as unidades vendidas em pedidos
+pagos na janela de ``BESTSELLER_WINDOW_DAYS`` dias, e as da janela recente
+de ``TRENDING_WINDOW_DAYS`` dias:
+
+- mais vendidos: velocidade de venda (unidades por dia na janela);
+- em alta: razão entre a velocidade recente e a do restante da janela, com
+  uma venda por janela somada às duas para que produtos com poucas vendas
+  não disparem; exige ``TRENDING_MIN_UNITS`` unidades recentes.
+
+As ``RANKING_SIZE`` primeiras posições de cada ranking são regravadas em
+``ProductRanking`` numa transação; ``is_bestseller`` passa a refletir o
+ranking e ``is_new`` expira depois de ``NEW_PRODUCT_DAYS`` dias.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .constants import (
+    BESTSELLER_WINDOW_DAYS, RANKING_SIZE, TRENDING_MIN_UNITS, TRENDING_WINDOW_DAYS
+)
+from .models import OrderItem, Product, ProductRanking
+
+
+def sales_in_window(now):
+    """{produto: (unidades na janela, unidades na janela recente)} dos pedidos pagos"""
+    recent_since = now - timedelta(days=TRENDING_WINDOW_DAYS)
+    rows = OrderItem.objects.filter(
+        order__paid=True,
+        order__created__gte=now - timedelta(days=BESTSELLER_WINDOW_DAYS),
+        product__available=True,
+    ).values('product_id').annotate(
+        units=Sum('quantity'),
+        recent=Coalesce(Sum('quantity', filter=Q(order__created__gte=recent_since)), 0),
+    ).order_by()
+    return {row['product_id']: (row['units'], row['recent']) for row in rows}
+
+
+def bestseller_scores(sales):
+    """Velocidade de venda: unidades por dia na janela"""
+    return {
+        product_id: units / BESTSELLER_WINDOW_DAYS
+        for product_id, (units, _) in sales.items()
+    }
+
+
+def trending_scores(sales):
+    """Aceleração: velocidade recente / velocidade no restante da janela (suavizadas)"""
+    prior = 1 / BESTSELLER_WINDOW_DAYS
+    baseline_days = BESTSELLER_WINDOW_DAYS - TRENDING_WINDOW_DAYS
+    scores = {}
+    for product_id, (units, recent) in sales.items():
+        if recent < TRENDING_MIN_UNITS:
+            continue
+        score = (recent / TRENDING_WINDOW_DAYS + prior) / ((units - recent) / baseline_days + prior)
+        if score > 1:
+            scores[product_id] = score
+    return scores
+
+
+def _ranked(kind, scores, sales, now):
+    ordered = sorted(scores, key=lambda product_id: (-scores[product_id], -sales[product_id][1], product_id))
+    return [
+        ProductRanking(kind=kind, position=position, product_id=product_id,
+                       score=scores[product_id], units=sales[product_id][0], computed_at=now)
+        for position, product_id in enumerate(ordered[:RANKING_SIZE], start=1)
+    ]
+
+
+def compute_rankings(now=None):
+    """
+    Recalcula os rankings e os indicadores dos produtos; devolve
+    {ranking: posições gravadas, 'expired_new': produtos que deixaram de ser novos}.
+    """
+    now = now or timezone.now()
+    sales = sales_in_window(now)
+    bestsellers = _ranked('bestseller', bestseller_scores(sales), sales, now)
+    trending = _ranked('trending', trending_scores(sales), sales, now)
+    top = [ranking.product_id for ranking in bestsellers]
+
+    with transaction.atomic():
+        ProductRanking.objects.all().delete()
+        ProductRanking.objects.bulk_create(bestsellers + trending)
+        Product.objects.filter(is_bestseller=True).exclude(id__in=top).update(is_bestseller=False)
+        Product.objects.filter(id__in=top, is_bestseller=False).update(is_bestseller=True)
+
+    expired = Product.objects.filter(
+        is_new=True, created__lt=now - timedelta(days=settings.NEW_PRODUCT_DAYS)
+    ).update(is_new=False)
+    return {'bestseller': len(bestsellers), 'trending': len(trending), 'expired_new': expired}
+
+
+def ranked_products(kind, limit):
+    """Produtos disponíveis nas ``limit`` primeiras posições do ranking, em ordem"""
+    return list(
+        Product.objects.filter(
+            rankings__kind=kind, rankings__position__lte=limit, available=True
+        ).order_by('rankings__position')
+    )
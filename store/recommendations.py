@@ -0,0 +1,240 @@
+"""
+Recomendações item a item: "produtos relacionados" e "comprados juntos".
+
+O cálculo é offline (``build_recommendations``). As co-compras dos pedidos
+pagos ficam somadas em ``ProductPairCount``, a matriz esparsa produto x
+produto, atualizada só com os pedidos ainda não contados; as co-ocorrências
+nas listas de desejos (estado atual, não histórico) são contadas em memória
+a cada execução. A similaridade entre dois produtos é o cosseno entre as
+suas colunas, ``c(a, b) / sqrt(n(a) * n(b))``, e os
+``RECOMMENDATIONS_TOP_K`` vizinhos de cada produto vão para
+``ProductRecommendation``:
+
+- ``together``: só co-compras;
+- ``related``: co-compras + co-listas de desejos com peso
+  ``RECOMMENDATION_WISHLIST_WEIGHT``, completado com os mais vistos da
+  mesma categoria.
+
+As páginas leem os vizinhos com uma consulta pelo índice (produto, tipo,
+posição).
+"""
+import math
+from collections import Counter, defaultdict
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import connection, transaction
+from django.db.models import Avg, Count, F, Max, Min, Q
+
+from .constants import (
+    RECOMMENDATION_BATCH_SIZE, RECOMMENDATION_WISHLIST_WEIGHT, RECOMMENDATIONS_TOP_K
+)
+from .models import Order, OrderItem, Product, ProductPairCount, ProductRecommendation, Wishlist
+from .page_cache import invalidate_product_page
+
+
+def baskets(rows):
+    """(cesta, produto) ordenados por cesta -> conjuntos de produtos de cada cesta"""
+    for _, group in groupby(rows, key=itemgetter(0)):
+        yield {product_id for _, product_id in group}
+
+
+def co_occurrences(product_baskets):
+    """
+    Matriz esparsa ``{produto: Counter({outro: cestas com os dois})}``; a
+    diagonal ``matrix[a][a]`` é o número de cestas com o produto.
+    """
+    matrix = defaultdict(Counter)
+    for basket in product_baskets:
+        for product_id in basket:
+            matrix[product_id].update(basket)
+    return matrix
+
+
+def cosine(matrix, product_id):
+    """Similaridade do produto com cada vizinho na matriz: {outro: cosseno}"""
+    row = matrix.get(product_id)
+    if not row:
+        return {}
+    total = row[product_id]
+    return {
+        other: count / math.sqrt(total * matrix[other][other])
+        for other, count in row.items()
+        if other != product_id and matrix[other][other]
+    }
+
+
+def count_new_orders():
+    """
+    Soma à ``ProductPairCount`` os pedidos pagos ainda não contados, em
+    blocos; devolve (pedidos contados, produtos cujas linhas mudaram).
+    """
+    counted, touched = 0, set()
+    while True:
+        order_ids = list(
+            Order.objects.filter(paid=True, recommendations_counted=False)
+            .order_by('id').values_list('id', flat=True)[:RECOMMENDATION_BATCH_SIZE]
+        )
+        if not order_ids:
+            return counted, touched
+
+        items = (
+            OrderItem.objects.filter(order_id__in=order_ids)
+            .order_by('order_id').values_list('order_id', 'product_id')
+        )
+        increments = co_occurrences(baskets(items))
+        with transaction.atomic():
+            _add_pair_counts(increments)
+            Order.objects.filter(id__in=order_ids).update(recommendations_counted=True)
+        counted += len(order_ids)
+        touched.update(increments)
+
+
+def with_neighbors(product_ids):
+    """
+    ``product_ids`` e os produtos que têm algum deles como vizinho: o
+    cosseno usa a diagonal do vizinho, então quando ela muda as notas (e a
+    ordem) dos vizinhos dele também mudam.
+    """
+    product_ids = list(product_ids)
+    affected = set(product_ids)
+    for start in range(0, len(product_ids), RECOMMENDATION_BATCH_SIZE):
+        affected.update(
+            ProductPairCount.objects.filter(other_id__in=product_ids[start:start + RECOMMENDATION_BATCH_SIZE])
+            .order_by().values_list('product_id', flat=True).distinct()
+        )
+    return affected
+
+
+def _add_pair_counts(increments):
+    current = {
+        (product_id, other_id): orders
+        for product_id, other_id, orders in ProductPairCount.objects.filter(
+            product_id__in=list(increments)
+        ).values_list('product_id', 'other_id', 'orders')
+    }
+    rows = [
+        ProductPairCount(product_id=product_id, other_id=other_id,
+                         orders=current.get((product_id, other_id), 0) + count)
+        for product_id, row in increments.items()
+        for other_id, count in row.items()
+    ]
+    kwargs = {'update_conflicts': True, 'update_fields': ['orders']}
+    # MySQL não aceita alvo explícito (ON DUPLICATE KEY UPDATE)
+    if connection.features.supports_update_conflicts_with_target:
+        kwargs['unique_fields'] = ['product', 'other']
+    ProductPairCount.objects.bulk_create(rows, batch_size=RECOMMENDATION_BATCH_SIZE, **kwargs)
+
+
+def reset_pair_counts():
+    """Descarta as contagens: a próxima ``count_new_orders`` recomeça de todos os pedidos"""
+    with transaction.atomic():
+        ProductPairCount.objects.all().delete()
+        Order.objects.filter(recommendations_counted=True).update(recommendations_counted=False)
+
+
+def _purchase_matrix(product_ids):
+    """Linhas de co-compra dos produtos + a diagonal dos vizinhos (para o cosseno)"""
+    matrix = defaultdict(Counter)
+    for product_id, other_id, orders in ProductPairCount.objects.filter(
+        product_id__in=product_ids
+    ).values_list('product_id', 'other_id', 'orders'):
+        matrix[product_id][other_id] = orders
+
+    missing = {other for row in matrix.values() for other in row} - set(matrix)
+    missing = list(missing)
+    for start in range(0, len(missing), RECOMMENDATION_BATCH_SIZE):
+        for product_id, orders in ProductPairCount.objects.filter(
+            product_id__in=missing[start:start + RECOMMENDATION_BATCH_SIZE], other_id=F('product_id')
+        ).values_list('product_id', 'orders'):
+            matrix[product_id][product_id] = orders
+    return matrix
+
+
+def _wishlist_matrix():
+    through = Wishlist.products.through
+    rows = through.objects.order_by('wishlist_id').values_list('wishlist_id', 'product_id')
+    return co_occurrences(baskets(rows.iterator(chunk_size=RECOMMENDATION_BATCH_SIZE)))
+
+
+def _top(scores, available, exclude, limit):
+    ranked = sorted(
+        ((score, other) for other, score in scores.items() if other in available and other not in exclude),
+        key=lambda pair: (-pair[0], pair[1])
+    )
+    return [(other, score) for score, other in ranked[:limit]]
+
+
+def build_recommendations(product_ids=None):
+    """
+    Recalcula os vizinhos de ``product_ids`` (de todos os produtos se None)
+    a partir das contagens atuais; devolve quantos produtos foram recalculados.
+    """
+    # Catálogo em ordem de popularidade: completa os relacionados por categoria
+    catalog = list(
+        Product.objects.filter(available=True).order_by('-view_count', 'id').values_list('id', 'category_id')
+    )
+    available = {product_id for product_id, _ in catalog}
+    by_category = defaultdict(list)
+    for product_id, category_id in catalog:
+        by_category[category_id].append(product_id)
+    category_of = dict(catalog)
+
+    if product_ids is None:
+        ProductRecommendation.objects.filter(product__available=False).delete()
+        product_ids = [product_id for product_id, _ in catalog]
+    product_ids = sorted(set(product_ids) & available)
+    wishlists = _wishlist_matrix()
+
+    for start in range(0, len(product_ids), RECOMMENDATION_BATCH_SIZE):
+        batch = product_ids[start:start + RECOMMENDATION_BATCH_SIZE]
+        purchases = _purchase_matrix(batch)
+        rows = []
+        for product_id in batch:
+            bought = cosine(purchases, product_id)
+            together = _top(bought, available, {product_id}, RECOMMENDATIONS_TOP_K)
+
+            scores = Counter(bought)
+            for other, score in cosine(wishlists, product_id).items():
+                scores[other] += RECOMMENDATION_WISHLIST_WEIGHT * score
+            related = _top(scores, available, {product_id}, RECOMMENDATIONS_TOP_K)
+            chosen = {product_id} | {other for other, _ in related}
+            for other in by_category[category_of[product_id]]:
+                if len(related) >= RECOMMENDATIONS_TOP_K:
+                    break
+                if other not in chosen:
+                    related.append((other, 0.0))
+
+            for kind, neighbors in (('together', together), ('related', related)):
+                rows += [
+                    ProductRecommendation(product_id=product_id, recommended_id=other,
+                                          kind=kind, rank=rank, score=score)
+                    for rank, (other, score) in enumerate(neighbors, start=1)
+                ]
+
+        with transaction.atomic():
+            ProductRecommendation.objects.filter(product_id__in=batch).delete()
+            ProductRecommendation.objects.bulk_create(rows, batch_size=RECOMMENDATION_BATCH_SIZE)
+        for product_id in batch:
+            transaction.on_commit(lambda product_id=product_id: invalidate_product_page(product_id))
+    return len(product_ids)
+
+
+def recommended_products(product_ids, kind, limit):
+    """
+    Produtos recomendados para ``product_ids`` (ids ou subconsulta), numa
+    consulta pelo índice de ``ProductRecommendation``: os vizinhos de mais de
+    um produto são unidos pela melhor similaridade, sem os próprios produtos.
+    """
+    return list(
+        Product.objects.filter(
+            available=True,
+            recommended_for__product_id__in=product_ids,
+            recommended_for__kind=kind,
+        ).exclude(id__in=product_ids).select_related('category').annotate(
+            score=Max('recommended_for__score'),
+            best_rank=Min('recommended_for__rank'),
+            average_rating=Avg('reviews__rating', filter=Q(reviews__is_approved=True)),
+            review_count=Count('reviews', filter=Q(reviews__is_approved=True), distinct=True),
+        ).order_by('-score', 'best_rank', 'id')[:limit]
+    )
@@ -0,0 +1,149 @@
+"""
+Feed de avaliações de um produto: paginação por chave, ordenação, filtro
+por estrelas e cache por página.
+
+A página seguinte é pedida com o cursor devolvido pela anterior (os valores
+de ordenação da última avaliação, em base64), então cada página é uma
+consulta ``WHERE (chave) < (cursor) LIMIT n`` que não piora com a
+profundidade e não repete nem pula avaliações quando novas chegam.
+
+As páginas e o resumo (distribuição de notas) ficam em cache sob uma versão
+por produto, trocada sempre que uma avaliação ou um voto muda
+(``invalidate_review_feed``): as entradas antigas simplesmente expiram.
+"""
+import base64
+import json
+import uuid
+from datetime import datetime
+from functools import reduce
+from operator import or_
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from india_oasis_project.db_router import use_primary
+
+from .constants import CACHE_TIMEOUT, MAX_RATING, MIN_RATING, REVIEWS_PER_PAGE
+from .models import Review
+
+# Ordenação -> campos (nome, decrescente); o id desempata e garante uma ordem total
+REVIEW_SORTS = {
+    'newest': (('created_at', True), ('id', True)),
+    'helpful': (('helpful_count', True), ('created_at', True), ('id', True)),
+    'rating_desc': (('rating', True), ('created_at', True), ('id', True)),
+    'rating_asc': (('rating', False), ('created_at', True), ('id', True)),
+}
+DEFAULT_REVIEW_SORT = 'newest'
+
+REVIEW_FIELDS = ('id', 'rating', 'title', 'comment', 'helpful_count', 'created_at', 'user__username')
+
+
+def feed_version(product_id):
+    return cache.get_or_set(f'avaliacoes:{product_id}:versao', lambda: uuid.uuid4().hex, None)
+
+
+def invalidate_review_feed(product_id):
+    """Descarta as páginas e o resumo em cache das avaliações do produto"""
+    cache.set(f'avaliacoes:{product_id}:versao', uuid.uuid4().hex, None)
+
+
+def parse_feed_params(params):
+    """Valida ``sort``, ``stars`` e ``cursor``; levanta ValueError com a mensagem para o cliente"""
+    sort = params.get('sort') or DEFAULT_REVIEW_SORT
+    if sort not in REVIEW_SORTS:
+        raise ValueError(f'Ordenação inválida. Use: {", ".join(REVIEW_SORTS)}.')
+
+    stars = params.get('stars') or None
+    if stars is not None:
+        if not stars.isdigit() or not MIN_RATING <= int(stars) <= MAX_RATING:
+            raise ValueError(f'Filtro de estrelas deve estar entre {MIN_RATING} e {MAX_RATING}.')
+        stars = int(stars)
+
+    cursor = params.get('cursor') or None
+    if cursor is not None:
+        decode_cursor(sort, cursor)
+    return sort, stars, cursor
+
+
+def encode_cursor(sort, review):
+    values = []
+    for field, _ in REVIEW_SORTS[sort]:
+        value = review[field]
+        values.append(value.isoformat() if isinstance(value, datetime) else value)
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(sort, cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        fields = REVIEW_SORTS[sort]
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise ValueError
+        return [
+            datetime.fromisoformat(value) if field == 'created_at' else int(value)
+            for (field, _), value in zip(fields, values)
+        ]
+    except (ValueError, TypeError):
+        raise ValueError('Cursor inválido.')
+
+
+def _after(sort, values):
+    """Linhas depois do cursor na ordem ``sort`` (comparação lexicográfica das chaves)"""
+    fields = REVIEW_SORTS[sort]
+    clauses = []
+    for position, (field, descending) in enumerate(fields):
+        equal = {name: value for (name, _), value in zip(fields[:position], values)}
+        clauses.append(Q(**equal, **{f'{field}__{"lt" if descending else "gt"}': values[position]}))
+    return reduce(or_, clauses)
+
+
+def review_page(product_id, sort=DEFAULT_REVIEW_SORT, stars=None, cursor=None, per_page=REVIEWS_PER_PAGE):
+    """
+    Uma página de avaliações aprovadas: (lista de dicts, cursor da próxima
+    página ou None). O usuário vem em ``review['user']['username']``.
+    """
+    key = f'avaliacoes:{product_id}:{feed_version(product_id)}:{sort}:{stars or ""}:{cursor or ""}:{per_page}'
+    page = cache.get(key)
+    if page is not None:
+        return page
+
+    queryset = Review.objects.filter(product_id=product_id, is_approved=True)
+    if stars:
+        queryset = queryset.filter(rating=stars)
+    if cursor:
+        queryset = queryset.filter(_after(sort, decode_cursor(sort, cursor)))
+    ordering = [f'-{field}' if descending else field for field, descending in REVIEW_SORTS[sort]]
+    with use_primary():
+        rows = list(queryset.order_by(*ordering).values(*REVIEW_FIELDS)[:per_page + 1])
+
+    reviews = [
+        {**{field: row[field] for field in REVIEW_FIELDS[:-1]}, 'user': {'username': row['user__username']}}
+        for row in rows[:per_page]
+    ]
+    next_cursor = encode_cursor(sort, reviews[-1]) if len(rows) > per_page else None
+    page = (reviews, next_cursor)
+    cache.set(key, page, CACHE_TIMEOUT)
+    return page
+
+
+def rating_summary(product_id):
+    """Total de avaliações aprovadas e distribuição por nota ({nota: {count, percentage}})"""
+    key = f'avaliacoes:{product_id}:{feed_version(product_id)}:resumo'
+    summary = cache.get(key)
+    if summary is not None:
+        return summary
+
+    with use_primary():
+        counts = dict(
+            Review.objects.filter(product_id=product_id, is_approved=True).order_by()
+            .values_list('rating').annotate(total=Count('id'))
+        )
+    total = sum(counts.values())
+    distribution = {}
+    if total:
+        for rating in range(MIN_RATING, MAX_RATING + 1):
+            count = counts.get(rating, 0)
+            distribution[rating] = {'count': count, 'percentage': int(count / total * 100)}
+    summary = (total, distribution)
+    cache.set(key, summary, CACHE_TIMEOUT)
+    return summary
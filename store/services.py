@@ -1,8 +1,9 @@
 import requests
 from django.conf import settings
 
-def calcular_frete_melhor_envio(cep_origem, cep_destino, peso_kg, valor_produtos, altura_cm, largura_cm, comprimento_cm, token=None, servicos=None):
-    url = 'https://api.melhorenvio.com.br/api/v2/me/shipment/calculate'
+def calcular_frete_melhor_envio(cep_origem, cep_destino, peso_kg, valor_produtos, altura_cm, largura_cm, comprimento_cm, token=None, servicos=None, timeout=None):
+    base_url = getattr(settings, 'MELHOR_ENVIO_API_URL', 'https://api.melhorenvio.com.br')
+    url = f'{base_url}/api/v2/me/shipment/calculate'
     if token is None:
         token = settings.MELHOR_ENVIO_TOKEN
     headers = {
@@ -23,7 +24,9 @@ def calcular_frete_melhor_envio(cep_origem, cep_destino, peso_kg, valor_produtos
         }],
         "services": servicos or [],  # Ex: ["1", "2"] para PAC e SEDEX
     }
-    response = requests.post(url, json=payload, headers=headers)
+    if timeout is None:
+        timeout = getattr(settings, 'SHIPPING_QUOTE_TIMEOUT', 5)
+    response = requests.post(url, json=payload, headers=headers, timeout=timeout)
     if response.status_code == 200:
         return response.json()
     else:
@@ -0,0 +1,137 @@
+"""
+Cotação de frete em paralelo: um pedido ao Melhor Envio por serviço
+(``SHIPPING_QUOTE_SERVICES``: PAC, SEDEX, Jadlog...), todos ao mesmo tempo.
+
+- cada serviço tem seu prazo (``SHIPPING_QUOTE_TIMEOUT``, timeout do
+  ``requests``): uma transportadora lenta não atrasa as outras;
+- a cotação inteira tem um orçamento (``SHIPPING_QUOTE_BUDGET``): o que não
+  respondeu até lá sai como ``timeout`` e a página mostra o que chegou;
+- ``iter_quotes`` (WSGI) e ``aiter_quotes`` (ASGI) entregam cada serviço
+  assim que ele responde, para o carrinho ir mostrando as opções.
+
+As chamadas HTTP são bloqueantes (``requests``) e rodam num pool de threads
+por processo; no ASGI o laço de eventos só aguarda o pool, sem bloquear.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+
+import requests
+from django.conf import settings
+
+from .services import calcular_frete_melhor_envio
+
+_executor = (None, None)  # (pid, pool)
+_executor_lock = threading.Lock()
+
+
+def _pool():
+    """Pool de threads do processo (recriado após fork dos workers)"""
+    global _executor
+    with _executor_lock:
+        pid, pool = _executor
+        if pid != os.getpid():
+            pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'SHIPPING_QUOTE_WORKERS', 8), thread_name_prefix='frete'
+            )
+            _executor = (os.getpid(), pool)
+        return pool
+
+
+def services():
+    return list(getattr(settings, 'SHIPPING_QUOTE_SERVICES', ['1', '2']))
+
+
+def package_for(cart):
+    """Peso, dimensões e valor do carrinho como um volume só"""
+    items = list(cart.items.select_related('product'))
+    if not items:
+        return None
+    return {
+        'peso_kg': sum(item.total_weight for item in items),
+        'valor_produtos': float(cart.total_price),
+        'altura_cm': float(max(item.product.altura for item in items)),
+        'largura_cm': float(max(item.product.largura for item in items)),
+        'comprimento_cm': float(sum(item.product.comprimento * item.quantity for item in items)),
+    }
+
+
+def _timed_out(service):
+    return {'service': service, 'erro': 'Tempo esgotado', 'timeout': True}
+
+
+def quote_service(service, cep_destino, package):
+    """Cotação de um serviço: ``{'service', 'options'}`` ou ``{'service', 'erro'}``"""
+    try:
+        result = calcular_frete_melhor_envio(
+            cep_origem=getattr(settings, 'MELHOR_ENVIO_CEP_ORIGEM', '01034-001'),
+            cep_destino=cep_destino,
+            servicos=[service],
+            timeout=getattr(settings, 'SHIPPING_QUOTE_TIMEOUT', 5),
+            **package
+        )
+    except requests.Timeout:
+        return _timed_out(service)
+    except requests.RequestException as e:
+        return {'service': service, 'erro': str(e)}
+    if not isinstance(result, list):
+        return {'service': service, 'erro': result.get('erro', 'Erro ao calcular frete')}
+    # O Melhor Envio devolve o serviço com "error" quando ele não atende o trecho
+    options = [option for option in result if not option.get('error')]
+    if not options:
+        return {'service': service, 'erro': next((o['error'] for o in result if o.get('error')), 'Indisponível')}
+    return {'service': service, 'options': options}
+
+
+def iter_quotes(cep_destino, package, service_ids=None):
+    """Resultados por serviço na ordem em que chegam, dentro do orçamento"""
+    service_ids = service_ids or services()
+    budget = getattr(settings, 'SHIPPING_QUOTE_BUDGET', 6)
+    futures = {_pool().submit(quote_service, service, cep_destino, package): service for service in service_ids}
+    pending = set(futures)
+    try:
+        for future in as_completed(futures, timeout=budget):
+            pending.discard(future)
+            yield future.result()
+    except FuturesTimeout:
+        # As threads restantes terminam sozinhas pelo timeout do requests
+        for future in pending:
+            yield _timed_out(futures[future])
+
+
+async def aiter_quotes(cep_destino, package, service_ids=None):
+    """Versão para ASGI de ``iter_quotes``: aguarda o pool sem bloquear o laço"""
+    service_ids = service_ids or services()
+    budget = getattr(settings, 'SHIPPING_QUOTE_BUDGET', 6)
+    loop = asyncio.get_running_loop()
+    tasks = {
+        asyncio.ensure_future(loop.run_in_executor(_pool(), quote_service, service, cep_destino, package)): service
+        for service in service_ids
+    }
+    deadline = time.monotonic() + budget
+    pending = set(tasks)
+    while pending:
+        done, pending = await asyncio.wait(
+            pending, timeout=max(deadline - time.monotonic(), 0), return_when=asyncio.FIRST_COMPLETED
+        )
+        if not done:
+            break
+        for task in done:
+            yield task.result()
+    for task in pending:
+        task.cancel()
+        yield _timed_out(tasks[task])
+
+
+def collect(results):
+    """Junta os resultados: (opções ordenadas por preço, serviços sem cotação)"""
+    options, failed = [], []
+    for result in results:
+        if 'options' in result:
+            options.extend(result['options'])
+        else:
+            failed.append(result)
+    options.sort(key=lambda option: float(option.get('price') or 0))
+    return options, failed
@@ -0,0 +1,124 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .catalog_cache import invalidate_catalog
+from .images import enqueue_instance_images
+from .inventory import movement, record
+from .coupons import invalidate as invalidate_coupon
+from .models import Product, Category, Banner, Coupon, Promotion, Review, Wishlist
+from .page_cache import invalidate_product_page
+from .pricing import schedule_refresh
+from .reviews import invalidate_review_feed
+from .wishlists import recount
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Banner)
+def enqueue_responsive_images(sender, instance, raw=False, **kwargs):
+    """Agenda a geração de derivados das imagens enviadas (processadas via cron)"""
+    if raw:
+        return
+    transaction.on_commit(lambda: enqueue_instance_images(instance))
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def refresh_review_feed(sender, instance, raw=False, **kwargs):
+    """Nova versão do feed de avaliações do produto (páginas e distribuição)"""
+    if raw:
+        return
+    transaction.on_commit(lambda: invalidate_review_feed(instance.product_id))
+
+
+@receiver(post_save, sender=Product)
+def record_opening_stock(sender, instance, created, raw=False, **kwargs):
+    """Estoque com que o produto foi criado: primeiro movimento do razão"""
+    if raw or not created or not instance.stock:
+        return
+    record([movement(instance.pk, 'adjustment', instance.stock, note='Estoque inicial')])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def refresh_product_page(sender, instance, raw=False, **kwargs):
+    """A página em cache do produto (preço, estoque, textos, remoção) deixa de valer"""
+    if raw:
+        return
+    # Lido agora: depois do delete o pk da instância vira None
+    product_id = instance.pk
+    transaction.on_commit(lambda: invalidate_product_page(product_id))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Banner)
+@receiver(post_delete, sender=Banner)
+def refresh_catalog_cache(sender, instance, raw=False, **kwargs):
+    """Nova versão do catálogo: menus, banners e contagens em cache deixam de valer"""
+    if raw:
+        return
+    transaction.on_commit(invalidate_catalog)
+
+
+@receiver(m2m_changed, sender=Wishlist.products.through)
+def refresh_wishlist_count(sender, instance, action, reverse, pk_set, **kwargs):
+    """Admin e código que usam ``wishlist.products``: recalcula ``item_count``"""
+    if action == 'pre_clear' and reverse:
+        # product.wishlists.clear() chega sem pk_set: guarda as listas afetadas
+        instance._cleared_wishlist_ids = list(
+            Wishlist.products.through.objects.filter(product=instance).values_list('wishlist_id', flat=True)
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        recount([instance.pk])
+    elif action == 'post_clear':
+        recount(instance.__dict__.pop('_cleared_wishlist_ids', ()))
+    elif pk_set:
+        recount(pk_set)
+
+
+@receiver(pre_delete, sender=Product)
+def discount_deleted_product(sender, instance, **kwargs):
+    """As linhas da lista de desejos saem em cascata, sem sinal: desconta antes"""
+    Wishlist.objects.filter(
+        pk__in=Wishlist.products.through.objects.filter(product=instance).values('wishlist_id')
+    ).update(item_count=F('item_count') - 1)
+
+
+@receiver(post_save, sender=Promotion)
+@receiver(post_delete, sender=Promotion)
+@receiver(m2m_changed, sender=Promotion.products.through)
+@receiver(m2m_changed, sender=Promotion.categories.through)
+def refresh_effective_prices(sender, raw=False, action=None, **kwargs):
+    """Promoção criada, alterada ou removida: recalcula os preços efetivos e renova o catálogo"""
+    if raw or action not in (None, 'post_add', 'post_remove', 'post_clear'):
+        return
+    schedule_refresh()
+    transaction.on_commit(invalidate_catalog)
+
+
+@receiver(post_save, sender=Coupon)
+@receiver(post_delete, sender=Coupon)
+def refresh_coupon_rules(sender, instance, raw=False, **kwargs):
+    """Regras do cupom alteradas: a versão em cache deixa de valer"""
+    if raw:
+        return
+    transaction.on_commit(lambda: invalidate_coupon(instance.code))
+
+
+@receiver(m2m_changed, sender=Coupon.categories.through)
+def refresh_coupon_categories(sender, instance, action, reverse, pk_set, **kwargs):
+    """Categorias do cupom mudaram: nova versão (resgates validados antes falham)"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    coupons = Coupon.objects.filter(pk__in=pk_set or ()) if reverse else Coupon.objects.filter(pk=instance.pk)
+    codes = list(coupons.values_list('code', flat=True))
+    coupons.update(version=F('version') + 1)
+    transaction.on_commit(lambda: [invalidate_coupon(code) for code in codes])
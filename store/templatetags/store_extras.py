@@ -1,4 +1,11 @@
 from django import template
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.forms.utils import flatatt
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from store.images import FORMAT_MIME_TYPES, build_srcset, get_variants
 
 register = template.Library()
 
@@ -30,3 +37,75 @@ def get_item(dictionary, key):
     {{ rating_distribution|get_item:5 }}
     """
     return dictionary.get(key)
+
+
+@register.simple_tag
+def image_srcset(image, fmt='jpeg'):
+    """
+    Retorna o srcset dos derivados responsivos de uma imagem.
+
+    Uso:
+    <img src="{{ product.image.url }}" srcset="{% image_srcset product.image 'webp' %}" sizes="50vw">
+    """
+    if not image:
+        return ''
+    return build_srcset(get_variants(image.name), fmt)
+
+
+@register.simple_tag
+def responsive_image(image, alt='', sizes='100vw', **attrs):
+    """
+    Renderiza um <picture> com fontes AVIF/WebP e fallback JPEG.
+
+    Enquanto os derivados não forem gerados, renderiza a imagem original.
+
+    Uso:
+    {% responsive_image product.image alt=product.name sizes="25vw" class="w-full" loading="lazy" %}
+    """
+    attrs = {key.replace('_', '-'): value for key, value in attrs.items()}
+    if not image:
+        return format_html(
+            '<img src="{}" alt="{}"{}>', static('images/default_product.png'), alt, flatatt(attrs)
+        )
+
+    variants = get_variants(image.name)
+    if not variants:
+        return format_html('<img src="{}" alt="{}"{}>', image.url, alt, flatatt(attrs))
+
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (FORMAT_MIME_TYPES[fmt], build_srcset(variants, fmt), sizes)
+            for fmt in ('avif', 'webp') if fmt in variants
+        )
+    )
+    fallback = variants.get('jpeg') or {}
+    largest = max(fallback, key=int) if fallback else None
+    src = default_storage.url(fallback[largest]) if largest else image.url
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" alt="{}"{}></picture>',
+        sources, src, build_srcset(variants, 'jpeg'), sizes, alt, flatatt(attrs)
+    )
+
+
+@register.simple_tag
+def static_bundle(bundle):
+    """
+    Inclui um bundle de CSS/JS definido em settings.STATIC_BUNDLES.
+
+    Em produção aponta para o bundle minificado e com hash gerado pelo
+    collectstatic; em desenvolvimento inclui os arquivos individuais.
+
+    Uso:
+    {% static_bundle 'css/site.bundle.css' %}
+    """
+    if getattr(settings, 'STATIC_BUNDLES_ENABLED', False):
+        files = [bundle]
+    else:
+        files = settings.STATIC_BUNDLES[bundle]
+
+    if bundle.endswith('.css'):
+        markup = '<link rel="stylesheet" href="{}" />'
+    else:
+        markup = '<script src="{}"></script>'
+    return format_html_join('\n', markup, ((static(name),) for name in files))
@@ -1,5 +1,8 @@
-from django.test import TestCase
+from django.conf import settings
+from django.test import TestCase, TransactionTestCase
+from unittest import skipUnless
 from unittest.mock import patch
+from india_oasis_project.testing import ChangelistQueryCountMixin
 from store.services import calcular_frete_melhor_envio
 
 # Create your tests here.
@@ -28,3 +31,1737 @@ class CalculoFreteMelhorEnvioTest(TestCase):
         self.assertIsInstance(resultado, list)
         self.assertEqual(resultado[0]['name'], 'PAC')
         self.assertEqual(resultado[0]['price'], 25.50)
+
+
+class ShippingQuoteTest(TestCase):
+    """Cotação de frete em paralelo, com prazo e resultados parciais"""
+
+    PACKAGE = {
+        'peso_kg': 1.0, 'valor_produtos': 100.0, 'altura_cm': 10.0, 'largura_cm': 15.0, 'comprimento_cm': 20.0,
+    }
+
+    def _fake_api(self, delays):
+        import time
+
+        def quote(servicos, **kwargs):
+            service = servicos[0]
+            time.sleep(delays[service])
+            return [{'id': service, 'name': f'Serviço {service}', 'price': str(10 + int(service)),
+                     'delivery_time': 3, 'company': {'name': 'Transportadora'}}]
+        return patch('store.shipping.calcular_frete_melhor_envio', side_effect=quote)
+
+    def test_servicos_em_paralelo_e_orcamento(self):
+        import time
+        from django.test import override_settings
+        from store.shipping import collect, iter_quotes
+        with self._fake_api({'1': 0.2, '2': 0.2, '3': 0.2}):
+            started = time.monotonic()
+            options, failed = collect(iter_quotes('01001-000', self.PACKAGE, ['2', '1', '3']))
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual([option['id'] for option in options], ['1', '2', '3'])
+        self.assertEqual(failed, [])
+
+        # Serviço lento fica de fora; os demais chegam dentro do orçamento
+        with self._fake_api({'1': 0.05, '2': 1.0}), override_settings(SHIPPING_QUOTE_BUDGET=0.3):
+            started = time.monotonic()
+            options, failed = collect(iter_quotes('01001-000', self.PACKAGE, ['1', '2']))
+        self.assertLess(time.monotonic() - started, 0.6)
+        self.assertEqual([option['id'] for option in options], ['1'])
+        self.assertEqual(failed, [{'service': '2', 'erro': 'Tempo esgotado', 'timeout': True}])
+
+    def test_versao_assincrona(self):
+        import asyncio
+        from django.test import override_settings
+        from store.shipping import aiter_quotes
+
+        async def gather():
+            return [result async for result in aiter_quotes('01001-000', self.PACKAGE, ['1', '2'])]
+
+        with self._fake_api({'1': 0.05, '2': 1.0}), override_settings(SHIPPING_QUOTE_BUDGET=0.3):
+            results = asyncio.run(gather())
+        self.assertEqual([result['service'] for result in results], ['1', '2'])
+        self.assertTrue(results[1]['timeout'])
+
+    def test_streaming_uma_linha_por_servico(self):
+        import json
+        from decimal import Decimal
+        from django.test import override_settings
+        from django.urls import reverse
+        from store.models import Cart, CartItem, Category, Product
+        category = Category.objects.create(name='Chás', slug='chas')
+        product = Product.objects.create(
+            category=category, name='Chá', slug='cha', description='Chá', sku='CHA-1',
+            price=Decimal('10.00'), stock=3, image='products/cha.jpg'
+        )
+        cart = Cart.objects.create()
+        CartItem.objects.create(cart=cart, product=product, quantity=2)
+        session = self.client.session
+        session['cart_id'] = cart.pk
+        session.save()
+
+        with self._fake_api({'1': 0.1, '2': 0.0}), override_settings(SHIPPING_QUOTE_SERVICES=['1', '2']):
+            response = self.client.post(
+                reverse('store:shipping_quotes_stream'), json.dumps({'cep': '01001-000'}),
+                content_type='application/json'
+            )
+            self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+            lines = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([line.get('service') for line in lines], ['2', '1', None])
+        self.assertEqual(lines[-1], {'done': True})
+
+
+class ResponsiveImagePipelineTest(TestCase):
+    def _jpeg_bytes(self, size=(1000, 500)):
+        import io
+        from PIL import Image
+        buffer = io.BytesIO()
+        Image.new('RGB', size, (200, 120, 40)).save(buffer, format='JPEG')
+        return buffer.getvalue()
+
+    def test_render_derivatives_nao_amplia_e_usa_hash(self):
+        from store.images import render_derivatives
+        rendered = render_derivatives(self._jpeg_bytes(), widths=(300, 800, 1200), formats=('webp', 'jpeg'))
+        widths = sorted({width for fmt, width, name, data in rendered['files']})
+        self.assertEqual(widths, [300, 800])
+        self.assertEqual((rendered['width'], rendered['height']), (1000, 500))
+        for fmt, width, name, data in rendered['files']:
+            self.assertIn(rendered['content_hash'][:16], name)
+
+    def test_srcset_usa_derivados_gerados(self):
+        import tempfile
+        from django.core.cache import cache
+        from django.core.files.storage import FileSystemStorage
+        from django.template import Context, Template
+        from store.images import render_derivatives, save_rendered
+        from store.models import ResponsiveImage
+
+        with tempfile.TemporaryDirectory() as media_root:
+            storage = FileSystemStorage(location=media_root, base_url='/media/')
+            with patch('django.core.files.storage.default_storage', storage):
+                record = ResponsiveImage.objects.create(source='products/chai.jpg')
+                rendered = render_derivatives(self._jpeg_bytes(), widths=(150, 300), formats=('webp', 'jpeg'))
+                save_rendered(record, rendered, storage)
+                cache.clear()
+
+                image = type('Image', (), {'name': 'products/chai.jpg', 'url': '/media/products/chai.jpg'})()
+                html = Template(
+                    '{% load store_extras %}{% responsive_image image alt="Chai" sizes="50vw" %}'
+                ).render(Context({'image': image}))
+
+        record.refresh_from_db()
+        self.assertEqual(record.status, 'done')
+        self.assertIn('type="image/webp"', html)
+        self.assertIn('150w', html)
+        self.assertIn('300w', html)
+
+
+class StaticAssetMinificationTest(TestCase):
+    def test_minify_css_preserva_strings(self):
+        from india_oasis_project.staticfiles import minify_css
+        css = "/* header */\n.a  ,  .b {\n  content: 'x  /* y */';\n  color : red;\n}\n"
+        self.assertEqual(minify_css(css), ".a,.b{content:'x  /* y */';color :red}")
+
+    def test_minify_js_so_remove_linhas_em_branco(self):
+        from india_oasis_project.staticfiles import minify_js
+        js = "// comentário\nconst a = `\n    //cdn.example.com/x.js\n`\n\n  \nfunction b() {\n    return 1\n}\n"
+        self.assertEqual(
+            minify_js(js), "// comentário\nconst a = `\n    //cdn.example.com/x.js\n`\nfunction b() {\n    return 1\n}\n"
+        )
+
+    def test_templates_so_referenciam_arquivos_estaticos_existentes(self):
+        # O manifesto é estrito: {% static %} de um arquivo inexistente derruba a página em produção
+        import re
+        from pathlib import Path
+        from django.conf import settings
+        from django.contrib.staticfiles import finders
+        missing = []
+        for template in Path(settings.BASE_DIR, 'templates').rglob('*.html'):
+            for name in re.findall(r"\{% static ['\"]([^'\"]+)['\"]", template.read_text(encoding='utf-8')):
+                if not finders.find(name):
+                    missing.append(f'{template.name}: {name}')
+        self.assertEqual(missing, [])
+
+
+class AdminChangelistQueryCountTest(ChangelistQueryCountMixin, TestCase):
+    """O número de consultas do changelist não pode crescer com o número de linhas"""
+
+    def setUp(self):
+        from store.models import Category
+        super().setUp()
+        self.category = Category.objects.create(name='Chás', slug='chas')
+
+    def create_rows(self, start, count):
+        from decimal import Decimal
+        from django.contrib.auth.models import User
+        from store.models import Product, Review, Cart, CartItem, Order, CustomerProfile
+        for i in range(start, start + count):
+            user = User.objects.create_user(f'cliente{i}', f'cliente{i}@example.com', 'senha123')
+            CustomerProfile.objects.create(user=user)
+            product = Product.objects.create(
+                category=self.category, name=f'Chá {i}', slug=f'cha-{i}', description='Chá',
+                price=Decimal('10.00'), sku=f'SKU-{i}', image=f'products/cha-{i}.jpg'
+            )
+            Review.objects.create(product=product, user=user, rating=5)
+            cart = Cart.objects.create(user=user)
+            CartItem.objects.create(cart=cart, product=product, quantity=1)
+            Order.objects.create(
+                user=user, first_name='Cliente', last_name=str(i), email=user.email,
+                address='Rua A', postal_code='01001-000', city='São Paulo', state='SP',
+                total_price=Decimal('10.00')
+            )
+
+    def test_changelists_com_consultas_constantes(self):
+        from django.urls import reverse
+        self.assertConstantQueries([
+            reverse(f'admin:store_{model}_changelist')
+            for model in ('order', 'review', 'cartitem', 'cart', 'customerprofile', 'product', 'wishlist')
+        ])
+
+
+class ProductImportExportTest(TestCase):
+    """Importação em massa (upsert por SKU) e exportação em streaming"""
+
+    def setUp(self):
+        from decimal import Decimal
+        from store.models import Category, Product
+        self.category = Category.objects.create(name='Chás', slug='chas')
+        self.product = Product.objects.create(
+            category=self.category, name='Chá Verde', slug='cha-verde', description='Chá',
+            price=Decimal('10.00'), sku='SKU-1', stock=3, image='products/cha-verde.jpg'
+        )
+
+    def _import(self, content, **kwargs):
+        import io
+        from store.catalog_io import ProductImporter
+        return ProductImporter(**kwargs).import_file(io.BytesIO(content.encode('utf-8')))
+
+    def test_upsert_por_sku_com_erros_por_linha(self):
+        from decimal import Decimal
+        from store.models import Product
+        result = self._import(
+            'sku;name;category;price;stock;available\n'
+            'SKU-1;Chá Verde Premium;chas;12,50;7;sim\n'
+            'SKU-2;Chá Preto;Chás;9.90;4;1\n'
+            'SKU-3;Chá Branco;chas;abc;1;1\n'
+            'SKU-4;Masala;temperos;15;1;1\n'
+        )
+        self.assertEqual((result.rows, result.created, result.updated, result.error_count), (4, 1, 1, 2))
+        self.assertEqual([line for line, _, _ in result.errors], [4, 5])
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.name, 'Chá Verde Premium')
+        self.assertEqual(self.product.price, Decimal('12.50'))
+        self.assertEqual(self.product.stock, 7)
+        self.assertEqual(self.product.slug, 'cha-verde')
+        self.assertEqual(self.product.image.name, 'products/cha-verde.jpg')
+
+        novo = Product.objects.get(sku='SKU-2')
+        self.assertEqual((novo.slug, novo.category, novo.price), ('cha-preto', self.category, Decimal('9.90')))
+        self.assertFalse(Product.objects.filter(sku__in=['SKU-3', 'SKU-4']).exists())
+
+    def test_colunas_ausentes_nao_alteram_e_consultas_por_bloco(self):
+        from decimal import Decimal
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from store.models import Product
+        result = self._import('sku,stock\nSKU-1,42\n')
+        self.assertEqual(result.updated, 1)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.name, self.product.price), (42, 'Chá Verde', Decimal('10.00')))
+
+        # Célula vazia num SKU existente mantém o valor gravado (não vira o padrão do campo)
+        result = self._import('sku,name,stock,available\nSKU-1,Chá Verde Extra,,\n')
+        self.assertEqual((result.updated, result.error_count), (1, 0))
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.available, self.product.name), (42, True, 'Chá Verde Extra'))
+
+        counts = []
+        for prefix, total in (('A', 5), ('B', 100)):
+            rows = 'sku,name,category,price\n' + ''.join(f'{prefix}-{i},Produto {prefix}{i},chas,5\n' for i in range(total))
+            with CaptureQueriesContext(connection) as context:
+                result = self._import(rows)
+            self.assertEqual(result.created, total)
+            counts.append(len(context.captured_queries))
+        # Apenas o INSERT pode ser dividido em lotes pelo backend (limite de parâmetros do SQLite)
+        self.assertLessEqual(counts[1] - counts[0], 3)
+
+    def test_exportacao_pode_ser_reimportada(self):
+        from django.contrib.auth.models import User
+        from django.urls import reverse
+        from store.models import Product
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'admin123')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:store_product_export'))
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(content.startswith('sku,name,slug,category,'))
+        self.assertIn('SKU-1,Chá Verde,cha-verde,chas,', content)
+
+        Product.objects.filter(sku='SKU-1').update(stock=0)
+        result = self._import(content)
+        self.assertEqual((result.updated, result.error_count), (1, 0))
+        self.assertEqual(Product.objects.get(sku='SKU-1').stock, 3)
+
+
+class HealthCheckTest(TestCase):
+    """Endpoints de saúde: liveness sem I/O, readiness em cache e com timeout"""
+
+    def setUp(self):
+        from india_oasis_project import health
+        self.health = health
+        health._memo.update(results=None, expires=0.0)
+
+    def test_liveness_sem_consultas(self):
+        from django.urls import reverse
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('liveness_check'))
+        self.assertEqual(response.json(), {'status': 'ok'})
+
+    def test_readiness_em_cache_e_detalhe_para_staff(self):
+        from django.contrib.auth.models import User
+        from django.urls import reverse
+        from unittest.mock import patch
+        response = self.client.get(reverse('readiness_check'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'ok'})
+
+        with patch.object(self.health, 'run_checks') as run_checks:
+            self.client.get(reverse('readiness_check'))
+        run_checks.assert_not_called()
+
+        staff = User.objects.create_user('staff', 'staff@example.com', 'senha123', is_staff=True)
+        self.client.force_login(staff)
+        data = self.client.get(reverse('health_check'), {'detail': 1}).json()
+        self.assertTrue(data['cached'])
+        self.assertEqual(set(data['checks']), {'database', 'cache', 'media', 'email_queue'})
+        self.assertIn('latency_ms', data['checks']['database'])
+
+    def test_probe_travado_respeita_timeout(self):
+        import threading
+        from django.test import override_settings
+        from django.urls import reverse
+        from unittest.mock import patch
+        release = threading.Event()
+
+        def stuck():
+            release.wait(5)
+            return 'ok', ''
+
+        checks = dict(self.health.CHECKS, database=(stuck, True))
+        with override_settings(HEALTH_CHECK_TIMEOUT=0.2), patch.object(self.health, 'CHECKS', checks):
+            response = self.client.get(reverse('readiness_check'))
+        release.set()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json(), {'status': 'error'})
+
+
+class PerformanceMiddlewareTest(TestCase):
+    """Server-Timing para staff e log de requisições lentas"""
+
+    def test_server_timing_apenas_para_staff(self):
+        from django.contrib.auth.models import User
+        from django.urls import reverse
+        response = self.client.get(reverse('store:about'))
+        self.assertNotIn('Server-Timing', response)
+
+        staff = User.objects.create_user('staff', 'staff@example.com', 'senha123', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse('store:product_list'))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertIn('tpl;dur=', timing)
+        self.assertRegex(timing, r'dbconn;dur=[\d.]+;desc="\d+ connects"')
+        self.assertIn('total;dur=', timing)
+
+    def test_log_de_requisicao_lenta_com_consultas(self):
+        from django.test import override_settings
+        from django.urls import reverse
+        with override_settings(PERFORMANCE_SLOW_REQUEST_MS=0, PERFORMANCE_SLOW_QUERY_COUNT=2):
+            # O middleware lê as configurações ao ser instanciado
+            from django.test import Client
+            with self.assertLogs('performance.slow', 'WARNING') as logs:
+                Client().get(reverse('store:product_list'))
+        record = logs.records[0]
+        self.assertEqual(record.view, 'store:product_list')
+        self.assertEqual(record.status, 200)
+        self.assertLessEqual(len(record.slow_queries), 2)
+        self.assertGreaterEqual(record.db_queries, len(record.slow_queries))
+
+    def test_get_many_conta_cada_chave_uma_vez(self):
+        from django.core.cache.backends.locmem import LocMemCache
+        from india_oasis_project import performance
+        # LocMemCache herda BaseCache.get_many, que chama self.get por chave
+        cache = LocMemCache('performance-test', {})
+        performance._instrument_cache_class(LocMemCache)
+        cache.set('a', 1)
+        metrics = performance.RequestMetrics(keep_queries=0)
+        token = performance._current.set(metrics)
+        try:
+            self.assertEqual(cache.get_many(['a', 'b']), {'a': 1})
+            cache.get('a')
+        finally:
+            performance._current.reset(token)
+        self.assertEqual((metrics.cache_hits, metrics.cache_misses), (2, 1))
+
+
+# Orçamento de consultas SQL por rota e perfil, medido com o cache vazio.
+# Uma view que passar do orçamento (ou cujo número de consultas crescer com
+# o volume de dados) falha o teste abaixo. Ao otimizar uma view, reduza o
+# número correspondente aqui.
+QUERY_BUDGETS = {
+    ('store:home', 'anon'): 10,
+    ('store:home', 'user'): 12,
+    ('store:about', 'anon'): 4,
+    ('store:about', 'user'): 6,
+    ('store:contact', 'anon'): 4,
+    ('store:contact', 'user'): 6,
+    ('store:terms', 'anon'): 4,
+    ('store:terms', 'user'): 6,
+    ('store:privacy', 'anon'): 4,
+    ('store:privacy', 'user'): 6,
+    ('store:product_list', 'anon'): 7,
+    ('store:product_list', 'user'): 10,
+    ('store:product_list_by_category', 'anon'): 8,
+    ('store:product_list_by_category', 'user'): 11,
+    ('store:product_detail', 'anon'): 13,
+    ('store:product_detail', 'user'): 20,
+    ('store:product_page_state', 'anon'): 1,
+    ('store:product_page_state', 'user'): 6,
+    ('store:cart', 'anon'): 14,
+    ('store:cart', 'user'): 16,
+    ('store:cart_add', 'anon'): 9,
+    ('store:cart_add', 'user'): 10,
+    ('store:cart_remove', 'anon'): 9,
+    ('store:cart_remove', 'user'): 10,
+    ('store:cart_count', 'anon'): 4,
+    ('store:cart_count', 'user'): 5,
+    ('store:calculate_shipping_ajax', 'anon'): 4,
+    ('store:calculate_shipping_ajax', 'user'): 5,
+    ('store:cep_lookup', 'anon'): 1,
+    ('store:shipping_quotes_stream', 'anon'): 4,
+    ('store:shipping_quotes_stream', 'user'): 5,
+    ('store:apply_coupon', 'anon'): 9,
+    ('store:apply_coupon', 'user'): 10,
+    ('store:checkout', 'user'): 12,
+    ('store:create_order_and_payment', 'user'): 24,
+    ('store:profile', 'user'): 15,
+    ('store:signup', 'anon'): 4,
+    ('store:login', 'anon'): 4,
+    ('store:logout', 'user'): 4,
+    ('store:wishlist', 'user'): 7,
+    ('store:wishlist_add', 'user'): 6,
+    ('store:wishlist_remove', 'user'): 5,
+    ('store:toggle_wishlist', 'user'): 7,
+    ('store:add_review', 'user'): 7,
+    ('store:review_feed', 'anon'): 3,
+    ('store:review_feed', 'user'): 5,
+    ('store:mark_review_helpful', 'user'): 9,
+    ('payment_processing:create_payment', 'user'): 4,
+    ('payment_processing:custom_create_preference', 'anon'): 1,
+    ('payment_processing:payment_success', 'user'): 10,
+    ('payment_processing:payment_failure', 'user'): 20,
+    ('payment_processing:payment_pending', 'user'): 9,
+    ('payment_processing:webhook', 'anon'): 3,
+    ('payment_processing:painel_pagamentos', 'staff'): 16,
+    ('payment_processing:reprocessar_pedido', 'staff'): 14,
+    ('payment_processing:cancelar_pedido', 'staff'): 14,
+    ('payment_processing:reprocessar_todos_pendentes', 'staff'): 10,
+    ('payment_processing:notificacoes_recentes', 'staff'): 4,
+    ('payment_processing:exportar_pedidos', 'staff'): 5,
+}
+
+
+class QueryBudgetTest(TestCase):
+    """
+    Percorre todas as rotas de store e payment_processing como visitante,
+    cliente e staff, com o catálogo em dois tamanhos (1x e 10x): o número de
+    consultas deve ser o mesmo nos dois e caber em QUERY_BUDGETS.
+    """
+
+    SCALE = 3  # unidades de dados no tamanho 1x
+
+    # (nome da URL, método, perfis, status esperado)
+    ROUTES = [
+        ('store:home', 'get', ('anon', 'user'), 200),
+        ('store:about', 'get', ('anon', 'user'), 200),
+        ('store:contact', 'get', ('anon', 'user'), 200),
+        ('store:terms', 'get', ('anon', 'user'), 200),
+        ('store:privacy', 'get', ('anon', 'user'), 200),
+        ('store:product_list', 'get', ('anon', 'user'), 200),
+        ('store:product_list_by_category', 'get', ('anon', 'user'), 200),
+        ('store:product_detail', 'get', ('anon', 'user'), 200),
+        ('store:product_page_state', 'get', ('anon', 'user'), 200),
+        ('store:cart', 'get', ('anon', 'user'), 200),
+        ('store:cart_add', 'post', ('anon', 'user'), 200),
+        ('store:cart_remove', 'post', ('anon', 'user'), 200),
+        ('store:cart_count', 'get', ('anon', 'user'), 200),
+        ('store:calculate_shipping_ajax', 'post', ('anon', 'user'), 200),
+        ('store:cep_lookup', 'get', ('anon',), 503),
+        ('store:shipping_quotes_stream', 'post', ('anon', 'user'), 200),
+        ('store:apply_coupon', 'post', ('anon', 'user'), 200),
+        ('store:checkout', 'get', ('user',), 200),
+        ('store:create_order_and_payment', 'post', ('user',), 302),
+        ('store:profile', 'get', ('user',), 200),
+        ('store:signup', 'get', ('anon',), 200),
+        ('store:login', 'get', ('anon',), 200),
+        ('store:logout', 'post', ('user',), 302),
+        ('store:wishlist', 'get', ('user',), 200),
+        ('store:wishlist_add', 'post', ('user',), 200),
+        ('store:wishlist_remove', 'post', ('user',), 200),
+        ('store:toggle_wishlist', 'post', ('user',), 200),
+        ('store:add_review', 'post', ('user',), 302),
+        ('store:review_feed', 'get', ('anon', 'user'), 200),
+        ('store:mark_review_helpful', 'post', ('user',), 200),
+        ('payment_processing:create_payment', 'get', ('user',), 302),
+        ('payment_processing:custom_create_preference', 'post', ('anon',), 200),
+        ('payment_processing:payment_success', 'get', ('user',), 200),
+        ('payment_processing:payment_failure', 'get', ('user',), 200),
+        ('payment_processing:payment_pending', 'get', ('user',), 200),
+        ('payment_processing:webhook', 'post', ('anon',), 200),
+        ('payment_processing:painel_pagamentos', 'get', ('staff',), 200),
+        ('payment_processing:reprocessar_pedido', 'get', ('staff',), 200),
+        ('payment_processing:cancelar_pedido', 'get', ('staff',), 200),
+        ('payment_processing:reprocessar_todos_pendentes', 'get', ('staff',), 200),
+        ('payment_processing:notificacoes_recentes', 'get', ('staff',), 200),
+        ('payment_processing:exportar_pedidos', 'get', ('staff',), 200),
+    ]
+
+    # Destino esperado dos redirecionamentos de sucesso
+    REDIRECTS = {
+        'store:create_order_and_payment': '/payment/create/',
+        'store:add_review': '/product/cha-livre/',
+        'payment_processing:create_payment': 'https://mp.example.com/',
+    }
+
+    def setUp(self):
+        from decimal import Decimal
+        from django.contrib.auth.models import User
+        from store.models import Cart, Category, Coupon, CustomerProfile, Product, Wishlist
+
+        self.categories = [
+            Category.objects.create(name=name, slug=slug)
+            for name, slug in (('Chás', 'chas'), ('Especiarias', 'especiarias'), ('Incensos', 'incensos'))
+        ]
+        self.customer = User.objects.create_user('cliente', 'cliente@example.com', 'senha123')
+        CustomerProfile.objects.create(user=self.customer)
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'senha123', is_staff=True)
+        self.customer_cart = Cart.objects.create(user=self.customer)
+        self.anon_cart = Cart.objects.create()
+        self.wishlist = Wishlist.objects.create(user=self.customer)
+        # Produto fora do carrinho, da lista de desejos e sem avaliação do cliente
+        self.free_product = Product.objects.create(
+            category=self.categories[0], name='Chá livre', slug='cha-livre', description='Chá',
+            price=Decimal('30.00'), stock=1000, sku='SKU-LIVRE', image='products/cha-livre.jpg'
+        )
+        self.featured = Product.objects.create(
+            category=self.categories[0], name='Chá destaque', slug='cha-destaque', description='Chá',
+            price=Decimal('40.00'), stock=1000, sku='SKU-DESTAQUE', image='products/cha-destaque.jpg',
+            is_featured=True
+        )
+        Coupon.objects.create(code='PRIMEIRA10', value=Decimal('10'), max_uses=1000)
+        self.units = 0
+
+    def _grow(self, units):
+        """Acrescenta unidades de dados até o total ``units``"""
+        from decimal import Decimal
+        from django.contrib.auth.models import User
+        from payment_processing.models import Notification
+        from store.models import CartItem, Order, OrderItem, Product, Review
+
+        for unit in range(self.units, units):
+            reviewer = User.objects.create_user(f'avaliador{unit}', f'avaliador{unit}@example.com', 'senha123')
+            products = Product.objects.bulk_create([
+                Product(
+                    category=self.categories[i % len(self.categories)], name=f'Produto {unit}-{i}',
+                    slug=f'produto-{unit}-{i}', description='Produto', price=Decimal('10.00') + i,
+                    stock=1000, sku=f'SKU-{unit}-{i}', image=f'products/produto-{unit}-{i}.jpg',
+                    is_featured=i == 0, is_new=i == 1, is_bestseller=i == 2,
+                )
+                for i in range(20)
+            ])
+            Review.objects.bulk_create(
+                [Review(product=product, user=reviewer, rating=1 + i % 5) for i, product in enumerate(products)]
+                + [Review(product=self.featured, user=reviewer, rating=4, comment='Muito bom')]
+            )
+            CartItem.objects.bulk_create([
+                CartItem(cart=self.customer_cart, product=products[0], quantity=2),
+                CartItem(cart=self.anon_cart, product=products[1], quantity=1),
+            ])
+            self.wishlist.products.add(products[2])
+            for owner, status in ((self.customer, 'payment_approved'), (reviewer, 'pending')):
+                order = Order.objects.create(
+                    user=owner, first_name='Cliente', last_name=str(unit), email=owner.email,
+                    address='Rua A', postal_code='01001-000', city='São Paulo', state='SP',
+                    status=status, total_price=Decimal('50.00'), payment_method='pix',
+                )
+                OrderItem.objects.bulk_create([
+                    OrderItem(order=order, product=product, product_name=product.name,
+                              product_sku=product.sku, price=product.price, quantity=1)
+                    for product in products[3:5]
+                ])
+            Notification.objects.create(event_type='payment_approved', message=f'Pedido {unit} aprovado')
+        self.units = units
+
+    def _request(self, name):
+        """kwargs da URL, dados e cabeçalhos de cada rota"""
+        import json
+        from store.models import Order, Review
+
+        pending = Order.objects.filter(status='pending').order_by('pk').first()
+        review = Review.objects.filter(product=self.featured).order_by('pk').first()
+        ajax = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+        requests = {
+            'store:product_list_by_category': ({'category_slug': 'chas'}, None, {}),
+            'store:product_detail': ({'slug': self.featured.slug}, None, {}),
+            'store:product_page_state': ({'product_id': self.featured.pk}, {'reviews': '1,2,3'}, {}),
+            'store:cart_add': ({'product_id': self.free_product.pk}, {'quantity': 1}, ajax),
+            'store:cart_remove': ({'product_id': self._cart_product_id}, None, ajax),
+            'store:calculate_shipping_ajax': (
+                {}, json.dumps({'cep': '01001-000'}), {'content_type': 'application/json'}
+            ),
+            'store:cep_lookup': ({'cep': '01001000'}, None, {}),
+            'store:shipping_quotes_stream': (
+                {}, json.dumps({'cep': '01001-000'}), {'content_type': 'application/json'}
+            ),
+            'store:apply_coupon': ({}, json.dumps({'code': 'primeira10'}), {'content_type': 'application/json'}),
+            'store:create_order_and_payment': ({}, {
+                'first_name': 'Cliente', 'last_name': 'Teste', 'email': 'cliente@example.com',
+                'address': 'Rua A', 'number': '1', 'neighborhood': 'Centro',
+                'postal_code': '01001-000', 'city': 'São Paulo', 'state': 'SP',
+            }, {}),
+            'store:wishlist_add': ({'product_id': self.free_product.pk}, None, ajax),
+            'store:wishlist_remove': (
+                {'product_id': self.wishlist.products.order_by('pk').values_list('pk', flat=True)[0]}, None, ajax
+            ),
+            'store:toggle_wishlist': ({}, {'product_id': self.free_product.pk}, {}),
+            'store:add_review': ({'product_id': self.free_product.pk}, {'rating': 5, 'comment': 'Ótimo'}, {}),
+            'store:review_feed': ({'product_id': self.featured.pk}, {'sort': 'helpful'}, {}),
+            'store:mark_review_helpful': ({'review_id': review.pk}, None, {}),
+            'payment_processing:custom_create_preference': (
+                {}, json.dumps({'items': [{'title': 'Chá', 'quantity': 1, 'unit_price': 10}]}),
+                {'content_type': 'application/json'}
+            ),
+            'payment_processing:webhook': (
+                {}, json.dumps({'type': 'payment', 'data': {'id': '123'}}), {'content_type': 'application/json'}
+            ),
+            'payment_processing:reprocessar_pedido': ({'pedido_id': pending.pk}, None, {}),
+            'payment_processing:cancelar_pedido': ({'pedido_id': pending.pk}, None, {}),
+        }
+        return requests.get(name, ({}, None, {}))
+
+    @property
+    def _cart_product_id(self):
+        return self._cart.items.order_by('pk').values_list('product_id', flat=True)[0]
+
+    def _measure(self, name, method, role):
+        from django.core.cache import cache
+        from django.db import connection, transaction
+        from django.test import Client
+        from django.test.utils import CaptureQueriesContext
+        from django.urls import reverse
+        from store.models import Order
+
+        # Cada medição roda em um savepoint desfeito ao final: as rotas que
+        # alteram dados encontram sempre o mesmo estado
+        with transaction.atomic():
+            cache.clear()
+            self.client = Client()
+            self._cart = self.anon_cart
+            if role != 'anon':
+                self.client.force_login(self.staff if role == 'staff' else self.customer)
+                self._cart = self.customer_cart
+            session = self.client.session
+            if role == 'anon':
+                session['cart_id'] = self.anon_cart.pk
+            else:
+                session['order_id'] = Order.objects.filter(user=self.customer).order_by('pk').values_list(
+                    'pk', flat=True
+                )[0]
+            session.save()
+
+            kwargs, data, extra = self._request(name)
+            url = reverse(name, kwargs=kwargs)
+            with CaptureQueriesContext(connection) as context:
+                response = getattr(self.client, method)(url, data, **extra)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            transaction.set_rollback(True)
+        return response.status_code, response.get('Location', ''), len(context.captured_queries)
+
+    def test_todas_as_rotas_tem_orcamento(self):
+        from payment_processing.urls import urlpatterns as payment_urls
+        from store.urls import urlpatterns as store_urls
+        names = {f'store:{p.name}' for p in store_urls} | {f'payment_processing:{p.name}' for p in payment_urls}
+        routes = {(name, role) for name, _, roles, _ in self.ROUTES for role in roles}
+        self.assertEqual(names, {name for name, *_ in self.ROUTES}, 'Rota sem medição em ROUTES')
+        self.assertEqual(routes, set(QUERY_BUDGETS), 'QUERY_BUDGETS fora de sincronia com ROUTES')
+
+    def _measure_all(self):
+        counts = {}
+        for name, method, roles, status in self.ROUTES:
+            for role in roles:
+                code, location, queries = self._measure(name, method, role)
+                self.assertEqual(code, status, f'{name} ({role}) respondeu {code}')
+                # Os caminhos de erro também redirecionam: confere o destino
+                expected = self.REDIRECTS.get(name)
+                if expected:
+                    self.assertTrue(location.startswith(expected), f'{name} ({role}) redirecionou para {location}')
+                counts[(name, role)] = queries
+        return counts
+
+    @patch('store.shipping.calcular_frete_melhor_envio')
+    @patch('payment_processing.views.mercadopago.SDK')
+    @patch('payment_processing.views.sdk')
+    def test_consultas_dentro_do_orcamento_e_constantes(self, sdk, sdk_class, frete):
+        from store.models import Order
+        frete.return_value = [{'id': '1', 'name': 'PAC', 'price': 25.5}]
+        preference = {'status': 201, 'response': {'id': 'pref-1', 'init_point': 'https://mp.example.com/p'}}
+        sdk.preference.return_value.create.return_value = preference
+        sdk_class.return_value.preference.return_value.create.return_value = preference
+
+        self._grow(self.SCALE)
+        sdk.payment.return_value.get.return_value = {'response': {
+            'id': 123, 'status': 'in_process', 'payment_type_id': 'pix',
+            'external_reference': str(Order.objects.filter(status='pending').order_by('pk').first().pk),
+        }}
+        small = self._measure_all()
+        self._grow(self.SCALE * 10)
+        large = self._measure_all()
+
+        grew = {key: (small[key], large[key]) for key in small if large[key] != small[key]}
+        over = {key: (large[key], QUERY_BUDGETS.get(key)) for key in large if large[key] > QUERY_BUDGETS.get(key, 0)}
+        report = '\n'.join(f'    {key!r}: {large[key]},' for key in large)
+        self.assertFalse(grew, f'Consultas crescem com o volume de dados (1x, 10x): {grew}')
+        self.assertFalse(over, f'Acima do orçamento (medido, orçamento): {over}\nMedido:\n{report}')
+
+
+class ReviewHelpfulVoteTest(TestCase):
+    """Contador de votos úteis persistido e comando de recálculo"""
+
+    def setUp(self):
+        from decimal import Decimal
+        from django.contrib.auth.models import User
+        from store.models import Category, Product, Review
+        category = Category.objects.create(name='Chás', slug='chas')
+        product = Product.objects.create(
+            category=category, name='Chá Verde', slug='cha-verde', description='Chá',
+            price=Decimal('10.00'), stock=3, image='products/cha-verde.jpg'
+        )
+        author = User.objects.create_user('autor', 'autor@example.com', 'senha123')
+        self.voter = User.objects.create_user('leitor', 'leitor@example.com', 'senha123')
+        self.review = Review.objects.create(product=product, user=author, rating=5)
+
+    def test_alternar_voto_mantem_contador(self):
+        from django.urls import reverse
+        self.client.force_login(self.voter)
+        url = reverse('store:mark_review_helpful', args=[self.review.pk])
+
+        # sessão, usuário, avaliação, DELETE, INSERT, UPDATE e releitura do contador (+ savepoint)
+        with self.assertNumQueries(9):
+            data = self.client.post(url).json()
+        self.assertEqual((data['is_helpful'], data['helpful_count']), (True, 1))
+
+        data = self.client.post(url).json()
+        self.assertEqual((data['is_helpful'], data['helpful_count']), (False, 0))
+        self.review.refresh_from_db()
+        self.assertEqual(self.review.helpful_count, 0)
+        self.assertFalse(self.review.helpful_votes.exists())
+
+    def test_recalculo_corrige_apenas_divergentes(self):
+        import io
+        from django.core.management import call_command
+        from store.models import Review, ReviewHelpfulVote
+        ReviewHelpfulVote.objects.create(review=self.review, user=self.voter)
+
+        output = io.StringIO()
+        call_command('rebuild_helpful_counts', stdout=output)
+        self.assertIn('1 avaliação(ões) corrigida(s)', output.getvalue())
+        self.assertEqual(Review.objects.get(pk=self.review.pk).helpful_count, 1)
+
+        output = io.StringIO()
+        call_command('rebuild_helpful_counts', '--dry-run', stdout=output)
+        self.assertIn('0 avaliação(ões)', output.getvalue())
+
+
+class WishlistTest(TestCase):
+    """Lista de desejos: uma escrita por alteração e total desnormalizado"""
+
+    def setUp(self):
+        from decimal import Decimal
+        from django.contrib.auth.models import User
+        from store.models import Category, Product
+        category = Category.objects.create(name='Chás', slug='chas')
+        self.products = [
+            Product.objects.create(
+                category=category, name=f'Chá {i}', slug=f'cha-{i}', description='Chá',
+                sku=f'CHA-{i}', price=Decimal('10.00'), stock=3, image=f'products/cha-{i}.jpg'
+            )
+            for i in range(3)
+        ]
+        self.user = User.objects.create_user('cliente', 'cliente@example.com', 'senha123')
+
+    def test_alternar_e_adicionar_mantem_total(self):
+        from store.models import Wishlist
+        from store.wishlists import add_product, item_count, remove_product, toggle_product
+        first, second, _ = self.products
+        self.assertEqual(item_count(self.user), 0)
+        self.assertFalse(remove_product(self.user, first.id))
+        self.assertFalse(Wishlist.objects.filter(user=self.user).exists())
+
+        self.assertTrue(toggle_product(self.user, first.id))
+        self.assertTrue(add_product(self.user, second.id))
+        self.assertFalse(add_product(self.user, second.id))
+        self.assertEqual(item_count(self.user), 2)
+
+        # Lista existente: DELETE e UPDATE do total, sem consulta de existência
+        with self.assertNumQueries(3):
+            self.assertFalse(toggle_product(self.user, first.id))
+        self.assertEqual(item_count(self.user), 1)
+
+        # Alterações pelo admin e exclusão de produto também ajustam o total
+        wishlist = Wishlist.objects.get(user=self.user)
+        wishlist.products.add(first)
+        self.assertEqual(item_count(self.user), 2)
+        second.delete()
+        self.assertEqual(item_count(self.user), 1)
+        first.wishlists.clear()
+        self.assertEqual(item_count(self.user), 0)
+
+    def test_grade_consulta_lista_uma_vez(self):
+        from django.contrib.auth.models import AnonymousUser
+        from store.wishlists import add_product, wishlisted_ids
+        add_product(self.user, self.products[1].id)
+        ids = [product.id for product in self.products]
+        with self.assertNumQueries(1):
+            self.assertEqual(wishlisted_ids(self.user, ids), {self.products[1].id})
+        with self.assertNumQueries(0):
+            self.assertEqual(wishlisted_ids(AnonymousUser(), ids), set())
+
+    def test_recalculo_corrige_apenas_divergentes(self):
+        import io
+        from django.core.management import call_command
+        from store.models import Wishlist
+        from store.wishlists import add_product
+        add_product(self.user, self.products[0].id)
+        Wishlist.objects.update(item_count=5)
+
+        output = io.StringIO()
+        call_command('rebuild_wishlist_counts', '--dry-run', stdout=output)
+        self.assertIn('1 lista(s) de desejos', output.getvalue())
+        call_command('rebuild_wishlist_counts', stdout=io.StringIO())
+        self.assertEqual(Wishlist.objects.get().item_count, 1)
+
+
+class PromotionPricingTest(TestCase):
+    """Promoções materializadas em effective_price: listagem, carrinho e agenda"""
+
+    def setUp(self):
+        from decimal import Decimal
+        from store.models import Category, Product
+        self.teas = Category.objects.create(name='Chás', slug='chas')
+        spices = Category.objects.create(name='Especiarias', slug='especiarias')
+        self.tea = Product.objects.create(
+            category=self.teas, name='Chá Verde', slug='cha-verde', description='Chá', sku='CHA-1',
+            price=Decimal('100.00'), discount_price=Decimal('90.00'), stock=3, image='products/cha.jpg'
+        )
+        self.spice = Product.objects.create(
+            category=spices, name='Cúrcuma', slug='curcuma', description='Especiaria', sku='ESP-1',
+            price=Decimal('50.00'), stock=3, image='products/curcuma.jpg'
+        )
+
+    def _promotion(self, **fields):
+        from decimal import Decimal
+        from store.models import Promotion
+        with self.captureOnCommitCallbacks(execute=True):
+            promotion = Promotion.objects.create(name='Semana do Chá', kind='percentage', value=Decimal('20'), **fields)
+            promotion.categories.add(self.teas)
+        return promotion
+
+    def test_promocao_por_categoria_na_listagem_e_no_carrinho(self):
+        from decimal import Decimal
+        from django.urls import reverse
+        from store.models import Cart, CartItem
+        self._promotion()
+        self.tea.refresh_from_db()
+        self.spice.refresh_from_db()
+        # 20% sobre o preço cheio vence o promocional; não se acumulam
+        self.assertEqual((self.tea.final_price, self.spice.final_price), (Decimal('80.00'), Decimal('50.00')))
+
+        response = self.client.get(reverse('store:product_list'), {'max_price': '85', 'sort': 'price'})
+        self.assertEqual([p.sku for p in response.context['products']], ['ESP-1', 'CHA-1'])
+        response = self.client.get(reverse('store:product_list'), {'min_price': '60', 'sort': '-price'})
+        self.assertEqual([p.sku for p in response.context['products']], ['CHA-1'])
+
+        cart = Cart.objects.create()
+        CartItem.objects.create(cart=cart, product=self.tea, quantity=2)
+        self.assertEqual(Cart.objects.get(pk=cart.pk).total_price, Decimal('160.00'))
+
+        # Gravar só o estoque (e o movimento no razão) não recalcula; mudar o preço sim
+        with self.assertNumQueries(2):
+            self.tea.reserve_stock(1)
+        self.tea.price = Decimal('200.00')
+        self.tea.save()
+        self.assertEqual(self.tea.effective_price, Decimal('90.00'))
+
+    def test_inicio_e_fim_aplicados_pelo_comando(self):
+        import io
+        from datetime import timedelta
+        from decimal import Decimal
+        from django.core.management import call_command
+        from django.utils import timezone
+        from store.models import Product, Promotion
+        now = timezone.now()
+        promotion = self._promotion(starts_at=now + timedelta(hours=1))
+        self.assertEqual(Product.objects.get(pk=self.tea.pk).effective_price, Decimal('90.00'))
+
+        # Chegou a hora (sem sinais): o cron aplica
+        Promotion.objects.filter(pk=promotion.pk).update(starts_at=now - timedelta(minutes=1))
+        output = io.StringIO()
+        call_command('apply_promotions', stdout=output)
+        self.assertIn('1 preço(s) efetivo(s) atualizado(s)', output.getvalue())
+        self.assertEqual(Product.objects.get(pk=self.tea.pk).effective_price, Decimal('80.00'))
+
+        output = io.StringIO()
+        with self.assertNumQueries(1):
+            call_command('apply_promotions', stdout=output)
+        self.assertIn('Nenhuma promoção', output.getvalue())
+
+        Promotion.objects.filter(pk=promotion.pk).update(ends_at=now)
+        call_command('apply_promotions', stdout=io.StringIO())
+        self.assertEqual(Product.objects.get(pk=self.tea.pk).effective_price, Decimal('90.00'))
+
+
+class CouponTest(TestCase):
+    """Cupons: regras em cache por versão, restrições e resgate com UPDATE condicional"""
+
+    def setUp(self):
+        from decimal import Decimal
+        from django.contrib.auth.models import User
+        from django.core.cache import cache
+        from store.models import Cart, CartItem, Category, Coupon, Product
+        cache.clear()
+        self.teas = Category.objects.create(name='Chás', slug='chas')
+        spices = Category.objects.create(name='Especiarias', slug='especiarias')
+        tea = Product.objects.create(
+            category=self.teas, name='Chá Verde', slug='cha-verde', description='Chá', sku='CHA-1',
+            price=Decimal('40.00'), stock=10, image='products/cha.jpg'
+        )
+        spice = Product.objects.create(
+            category=spices, name='Cúrcuma', slug='curcuma', description='Especiaria', sku='ESP-1',
+            price=Decimal('20.00'), stock=10, image='products/curcuma.jpg'
+        )
+        self.user = User.objects.create_user('cliente', 'cliente@example.com', 'senha123')
+        self.cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=self.cart, product=tea, quantity=2)
+        CartItem.objects.create(cart=self.cart, product=spice, quantity=1)
+        self.coupon = Coupon.objects.create(code=' primeira 10 ', value=Decimal('10'), max_uses=2)
+
+    def _items(self):
+        return list(self.cart.items.select_related('product'))
+
+    def test_regras_em_cache_e_nova_versao_ao_salvar(self):
+        from decimal import Decimal
+        from store import coupons
+        self.assertEqual(self.coupon.code, 'PRIMEIRA10')
+        items = self._items()
+        self.assertEqual(coupons.validate('primeira10', items, self.user)['discount'], Decimal('10.00'))
+        # Regras do cache: só os usos (cupom e cliente, juntos) vão ao banco
+        with self.assertNumQueries(1):
+            coupons.validate('PRIMEIRA10', items, self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.coupon.kind, self.coupon.value = 'fixed', Decimal('15.00')
+            self.coupon.save()
+            self.coupon.categories.add(self.teas)
+        self.coupon.refresh_from_db()
+        self.assertEqual(self.coupon.version, 3)
+        result = coupons.validate('PRIMEIRA10', items, self.user)
+        self.assertEqual((result['discount'], result['version']), (Decimal('15.00'), 3))
+
+    def test_restricoes(self):
+        from datetime import timedelta
+        from decimal import Decimal
+        from django.core.exceptions import ValidationError
+        from django.utils import timezone
+        from store import coupons
+        from store.models import Category, Coupon
+        items = self._items()
+        Coupon.objects.create(code='CHAS50', value=Decimal('50'), max_uses_per_user=None).categories.add(self.teas)
+        Coupon.objects.create(code='MINIMO', kind='fixed', value=Decimal('5'), min_order_value=Decimal('500'))
+        Coupon.objects.create(code='VENCIDO', value=Decimal('5'), ends_at=timezone.now() - timedelta(days=1))
+        Coupon.objects.create(code='OUTRA', value=Decimal('5')).categories.add(
+            Category.objects.create(name='Incensos', slug='incensos')
+        )
+
+        # Só os itens da categoria entram na base do desconto; sem limites, nenhuma consulta de uso
+        coupons.validate('CHAS50', items, self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(coupons.validate('CHAS50', items, self.user)['discount'], Decimal('40.00'))
+        for code, message in (
+            ('MINIMO', 'Pedido mínimo de R$ 500,00 para este cupom'),
+            ('VENCIDO', 'Cupom expirado'),
+            ('OUTRA', 'Cupom não vale para os produtos do carrinho'),
+            ('NAOEXISTE', 'Cupom inválido'),
+        ):
+            with self.assertRaisesMessage(ValidationError, message):
+                coupons.validate(code, items, self.user)
+
+    def test_resgate_condicional_limites_e_cancelamento(self):
+        from decimal import Decimal
+        from django.contrib.auth.models import User
+        from django.core.exceptions import ValidationError
+        from store import coupons
+        from store.models import Coupon, Order
+        other = User.objects.create_user('outro', 'outro@example.com', 'senha123')
+        third = User.objects.create_user('terceiro', 'terceiro@example.com', 'senha123')
+
+        def order(user):
+            return Order.objects.create(
+                user=user, first_name='Cliente', last_name='Teste', email=user.email, address='Rua A',
+                number='1', neighborhood='Centro', postal_code='01001-000', city='São Paulo', state='SP',
+                total_price=Decimal('90.00'), coupon_code='PRIMEIRA10', discount=Decimal('10.00'),
+            )
+
+        result = coupons.validate('PRIMEIRA10', self._items(), self.user)
+        first = order(self.user)
+        coupons.redeem(result, first, self.user)
+        # Limite por cliente (1): a segunda tentativa do mesmo cliente é recusada
+        with self.assertRaisesMessage(ValidationError, 'Você já usou este cupom'):
+            coupons.validate('PRIMEIRA10', self._items(), self.user)
+        coupons.redeem(result, order(other), other)
+        # Validado antes de esgotar: o UPDATE condicional não conta o terceiro uso
+        with self.assertRaisesMessage(ValidationError, 'Cupom esgotado ou alterado'):
+            coupons.redeem(result, order(third), third)
+        self.assertEqual(Coupon.objects.get().uses, 2)
+
+        # Regras alteradas depois da validação também recusam o resgate
+        self.coupon.refresh_from_db()
+        self.coupon.max_uses = 10
+        self.coupon.save()
+        with self.assertRaisesMessage(ValidationError, 'Cupom esgotado ou alterado'):
+            coupons.redeem(result, order(third), third)
+
+        self.assertTrue(first.cancel())
+        self.assertEqual(Coupon.objects.get().uses, 1)
+        self.assertEqual(coupons.validate('PRIMEIRA10', self._items(), self.user)['discount'], Decimal('10.00'))
+
+    def test_carrinho_e_pedido(self):
+        import json
+        from decimal import Decimal
+        from django.urls import reverse
+        from store.models import Coupon, CouponRedemption, Order
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('store:apply_coupon'), json.dumps({'code': 'primeira10'}), content_type='application/json'
+        )
+        self.assertEqual(response.json()['total'], '90.00')
+        self.assertEqual(self.client.session['coupon_code'], 'PRIMEIRA10')
+
+        response = self.client.get(reverse('store:checkout'))
+        self.assertEqual(response.context['total_with_shipping'], Decimal('115.00'))
+
+        response = self.client.post(reverse('store:create_order_and_payment'), {
+            'first_name': 'Cliente', 'last_name': 'Teste', 'email': 'cliente@example.com',
+            'address': 'Rua A', 'number': '1', 'neighborhood': 'Centro',
+            'postal_code': '01001-000', 'city': 'São Paulo', 'state': 'SP',
+        })
+        self.assertRedirects(response, reverse('payment_processing:create_payment'), fetch_redirect_response=False)
+        order = Order.objects.get()
+        self.assertEqual((order.coupon_code, order.discount, order.total_price), ('PRIMEIRA10', Decimal('10.00'), Decimal('115.00')))
+        self.assertEqual(CouponRedemption.objects.get().order, order)
+        self.assertEqual(Coupon.objects.get().uses, 1)
+        self.assertNotIn('coupon_code', self.client.session)
+
+
+class StockLedgerTest(TestCase):
+    """Razão de estoque: movimentos de cada alteração, fotografias e reconciliação"""
+
+    def setUp(self):
+        from decimal import Decimal
+        from django.contrib.auth.models import User
+        from store.models import Category, Order, Product
+        category = Category.objects.create(name='Chás', slug='chas')
+        self.product = Product.objects.create(
+            category=category, name='Chá Verde', slug='cha-verde', description='Chá', sku='CHA-1',
+            price=Decimal('10.00'), stock=10, image='products/cha.jpg'
+        )
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'senha123', is_staff=True)
+        self.order = Order.objects.create(
+            user=self.staff, first_name='Cliente', last_name='Teste', email='staff@example.com', address='Rua A',
+            number='1', neighborhood='Centro', postal_code='01001-000', city='São Paulo', state='SP',
+            total_price=Decimal('30.00'),
+        )
+
+    def test_movimentos_e_fotografia(self):
+        from datetime import timedelta
+        from types import SimpleNamespace
+        from django.contrib import admin
+        from django.test import RequestFactory
+        from django.utils import timezone
+        from store import inventory
+        from store.models import Product, StockMovement, StockSnapshot
+
+        self.assertTrue(self.product.reserve_stock(3, order=self.order))
+        self.product.release_stock(1, order=self.order)
+        request = RequestFactory().post('/')
+        request.user = self.staff
+        self.product.stock = 25
+        admin.site._registry[Product].save_model(request, self.product, SimpleNamespace(changed_data=['stock']), True)
+        self.assertEqual(
+            list(StockMovement.objects.order_by('id').values_list('kind', 'quantity')),
+            [('adjustment', 10), ('reserve', -3), ('release', 1), ('adjustment', 17)]
+        )
+        self.assertEqual(inventory.ledger_stock(self.product.pk), 25)
+
+        self.assertEqual(inventory.take_snapshots(now=timezone.now() + timedelta(hours=1)), 1)
+        self.assertEqual(StockSnapshot.objects.get().stock, 25)
+        self.product.reserve_stock(5)
+        # Fotografia + movimentos seguintes, numa consulta
+        with self.assertNumQueries(1):
+            self.assertEqual(inventory.ledger_stock(self.product.pk), 20)
+        # Nada movimentado desde a fotografia mais recente (o movimento novo ainda está no atraso)
+        self.assertEqual(inventory.take_snapshots(), 0)
+
+    def test_reserva_e_liberacao_nao_sobrescrevem_alteracao_concorrente(self):
+        from django.db.models import F
+        from store.models import Product
+        stale = Product.objects.get(pk=self.product.pk)
+        # Reserva do checkout (UPDATE em massa) depois da leitura da instância
+        Product.objects.filter(pk=self.product.pk).update(stock=F('stock') - 8)
+        stale.release_stock(1, order=self.order)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, 3)
+        self.assertFalse(stale.reserve_stock(4))
+        self.assertTrue(stale.reserve_stock(3))
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, 0)
+
+    def test_importacao_e_reconciliacao(self):
+        import io
+        from django.core.management import call_command
+        from django.db.models import F
+        from store.catalog_io import ProductImporter
+        from store.models import Product, StockMovement
+
+        ProductImporter().import_file(io.BytesIO('sku,stock\nCHA-1,4\n'.encode('utf-8')))
+        self.assertEqual(StockMovement.objects.order_by('-id').values_list('kind', 'quantity')[0], ('import', -6))
+
+        output = io.StringIO()
+        call_command('reconcile_stock', stdout=output)
+        self.assertIn('conferem', output.getvalue())
+
+        # Alteração sem movimento (ex.: UPDATE manual): divergência detectada e ajustada
+        Product.objects.filter(pk=self.product.pk).update(stock=F('stock') - 2)
+        output = io.StringIO()
+        call_command('reconcile_stock', stdout=output)
+        self.assertIn('CHA-1: estoque 2, razão 4 (-2)', output.getvalue())
+        call_command('reconcile_stock', '--corrigir', stdout=io.StringIO())
+        output = io.StringIO()
+        call_command('reconcile_stock', stdout=output)
+        self.assertIn('conferem', output.getvalue())
+
+
+class ReviewFeedTest(TestCase):
+    """Feed de avaliações: paginação por cursor, filtros e cache invalidado"""
+
+    def setUp(self):
+        from decimal import Decimal
+        from django.contrib.auth.models import User
+        from django.core.cache import cache
+        from store.models import Category, Product, Review
+        cache.clear()
+        category = Category.objects.create(name='Chás', slug='chas')
+        self.product = Product.objects.create(
+            category=category, name='Chá Verde', slug='cha-verde', description='Chá',
+            price=Decimal('10.00'), stock=3, image='products/cha-verde.jpg'
+        )
+        User.objects.bulk_create([User(username=f'cliente{i}') for i in range(25)])
+        users = User.objects.order_by('pk')
+        # Empates de nota e de votos: só o id desempata
+        for i, user in enumerate(users):
+            Review.objects.create(product=self.product, user=user, rating=5 if i % 5 else 1, helpful_count=i % 3)
+
+    def _feed(self, **params):
+        from django.urls import reverse
+        return self.client.get(reverse('store:review_feed', args=[self.product.pk]), params)
+
+    def test_percorre_todas_as_paginas_sem_repetir(self):
+        for sort in ('newest', 'helpful', 'rating_asc'):
+            seen, cursor = [], None
+            while True:
+                data = self._feed(sort=sort, **({'cursor': cursor} if cursor else {})).json()
+                seen += data['reviews']
+                cursor = data['next_cursor']
+                if not cursor:
+                    break
+            self.assertEqual(len({review['id'] for review in seen}), 25, sort)
+            if sort == 'helpful':
+                counts = [review['helpful_count'] for review in seen]
+                self.assertEqual(counts, sorted(counts, reverse=True))
+
+        data = self._feed(stars=1).json()
+        self.assertEqual({review['rating'] for review in data['reviews']}, {1})
+        self.assertEqual(len(data['reviews']), 5)
+        self.assertEqual(self._feed(cursor='lixo').status_code, 400)
+        self.assertEqual(self._feed(stars=9).status_code, 400)
+
+    def test_distribuicao_completa_e_cache_invalidado(self):
+        from django.contrib.auth.models import User
+        from store.models import Review
+        from store.reviews import rating_summary
+        total, distribution = rating_summary(self.product.pk)
+        self.assertEqual(total, 25)
+        self.assertEqual(distribution[1]['count'], 5)
+        self.assertEqual(distribution[5]['count'], 20)
+
+        first = self._feed().json()['reviews'][0]['id']
+        with self.assertNumQueries(1):  # página em cache: só a verificação do produto
+            self._feed()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            review = Review.objects.create(
+                product=self.product, user=User.objects.create(username='novo'), rating=3
+            )
+        self.assertNotEqual(first, review.pk)
+        self.assertEqual(self._feed().json()['reviews'][0]['id'], review.pk)
+        self.assertEqual(rating_summary(self.product.pk)[0], 26)
+
+
+class ProductPageCacheTest(TestCase):
+    """Cache de página do produto: 304 condicional, invalidação e estado por usuário"""
+
+    def setUp(self):
+        from decimal import Decimal
+        from django.contrib.auth.models import User
+        from django.core.cache import cache
+        from django.urls import reverse
+        from store.models import Category, Product
+        cache.clear()
+        category = Category.objects.create(name='Chás', slug='chas')
+        self.product = Product.objects.create(
+            category=category, name='Chá Verde', slug='cha-verde', description='Chá',
+            price=Decimal('10.00'), stock=3, image='products/cha-verde.jpg'
+        )
+        self.user = User.objects.create(username='leitora42')
+        self.url = reverse('store:product_detail', args=[self.product.slug])
+
+    def test_pagina_em_cache_responde_304_e_invalida_ao_salvar(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('public', first['Cache-Control'])
+        self.assertNotIn('leitora42', first.content.decode())
+
+        # Acerto no cache: só o contador de visualizações
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        # Usuário logado recebe a mesma página; o estado dele vem do JSON
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(self.url)['ETag'], first['ETag'])
+        self.client.logout()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.price = 12
+            self.product.save()
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+
+    def test_recalculo_de_precos_troca_a_versao_da_pagina(self):
+        from store.models import Product
+        from store.page_cache import get_cached_page
+        from store.pricing import refresh_prices
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        Product.objects.filter(pk=self.product.pk).update(discount_price=8)
+        self.assertEqual(refresh_prices(), 1)
+        self.assertIsNone(get_cached_page(self.product.slug))
+
+    def test_produto_desativado_ou_removido_sai_do_cache(self):
+        from django.contrib.admin.sites import site
+        from store.models import Product
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            site._registry[Product].desativar_produtos(None, Product.objects.filter(pk=self.product.pk))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            site._registry[Product].ativar_produtos(None, Product.objects.filter(pk=self.product.pk))
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_estado_do_usuario_nao_e_compartilhado(self):
+        from django.urls import reverse
+        from store.models import Review, Wishlist
+        review = Review.objects.create(product=self.product, user=self.user, rating=5)
+        review.toggle_helpful(self.user)
+        Wishlist.objects.create(user=self.user).products.add(self.product)
+        state_url = reverse('store:product_page_state', args=[self.product.pk])
+
+        anonymous = self.client.get(state_url)
+        self.assertFalse(anonymous.json()['authenticated'])
+        self.assertIn('no-store', anonymous['Cache-Control'])
+
+        self.client.force_login(self.user)
+        state = self.client.get(state_url, {'reviews': f'{review.pk},lixo'}).json()
+        self.assertTrue(state['in_wishlist'])
+        self.assertTrue(state['user_has_reviewed'])
+        self.assertEqual(state['wishlist_count'], 1)
+        self.assertEqual(state['helpful_review_ids'], [review.pk])
+        self.assertIn('leitora42', state['account_html'])
+
+
+class RecommendationTest(TestCase):
+    """Recomendações pré-calculadas: co-compras incrementais e leitura numa consulta"""
+
+    def setUp(self):
+        from decimal import Decimal
+        from django.contrib.auth.models import User
+        from store.models import Category, Product
+        category = Category.objects.create(name='Chás', slug='chas')
+        self.user = User.objects.create(username='cliente', email='cliente@example.com')
+        self.a, self.b, self.c, self.d = (
+            Product.objects.create(
+                category=category, name=f'Chá {name}', slug=f'cha-{name}', description='Chá',
+                price=Decimal('10.00'), stock=10, image=f'products/cha-{name}.jpg', sku=f'CHA-{name}'
+            )
+            for name in 'abcd'
+        )
+
+    def _order(self, *products, paid=True):
+        from decimal import Decimal
+        from store.models import Order, OrderItem
+        order = Order.objects.create(
+            user=self.user, first_name='Cliente', last_name='Teste', email=self.user.email,
+            address='Rua A', postal_code='01001-000', city='São Paulo', state='SP',
+            total_price=Decimal('10.00'), paid=paid
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, product_name=product.name,
+                      product_sku='SKU', price=product.price)
+            for product in products
+        ])
+
+    def _together(self):
+        from store.models import ProductRecommendation
+        return sorted(
+            ProductRecommendation.objects.filter(kind='together')
+            .values_list('product_id', 'recommended_id', 'rank')
+        )
+
+    def test_incremental_igual_a_recontagem_completa(self):
+        import io
+        from django.core.management import call_command
+        from store.recommendations import recommended_products
+        self._order(self.a, self.b)
+        self._order(self.a, self.b, self.c)
+        self._order(self.a, self.d, paid=False)
+        call_command('build_recommendations', '--full', stdout=io.StringIO())
+
+        with self.assertNumQueries(1):
+            together = recommended_products([self.a.pk], 'together', 4)
+        self.assertEqual([p.pk for p in together], [self.b.pk, self.c.pk])
+        # Relacionados completados pela categoria, sem o próprio produto
+        self.assertEqual(len(recommended_products([self.a.pk], 'related', 4)), 3)
+
+        self._order(self.c, self.d)
+        output = io.StringIO()
+        call_command('build_recommendations', stdout=output)
+        self.assertIn('1 pedido(s)', output.getvalue())
+        incremental = self._together()
+        self.assertIn(self.d.pk, [p.pk for p in recommended_products([self.c.pk], 'together', 4)])
+
+        call_command('build_recommendations', '--full', stdout=io.StringIO())
+        self.assertEqual(incremental, self._together())
+
+    def test_incremental_recalcula_quem_tem_o_produto_como_vizinho(self):
+        import io
+        from django.core.management import call_command
+        from store.recommendations import recommended_products
+        self._order(self.a, self.b)
+        self._order(self.a, self.c)
+        self._order(self.c)
+        call_command('build_recommendations', '--full', stdout=io.StringIO())
+        self.assertEqual([p.pk for p in recommended_products([self.a.pk], 'together', 4)], [self.b.pk, self.c.pk])
+
+        # Só b vende: a nota de b como vizinho de a cai e c passa à frente
+        for _ in range(3):
+            self._order(self.b)
+        call_command('build_recommendations', stdout=io.StringIO())
+        self.assertEqual([p.pk for p in recommended_products([self.a.pk], 'together', 4)], [self.c.pk, self.b.pk])
+        incremental = self._together()
+
+        call_command('build_recommendations', '--full', stdout=io.StringIO())
+        self.assertEqual(incremental, self._together())
+
+
+class SalesRankingTest(TestCase):
+    """Rankings de vendas por janela móvel e expiração de produtos novos"""
+
+    def setUp(self):
+        from decimal import Decimal
+        from django.contrib.auth.models import User
+        from store.models import Category, Product
+        category = Category.objects.create(name='Chás', slug='chas')
+        self.user = User.objects.create(username='cliente', email='cliente@example.com')
+        self.steady, self.rising, self.unpaid = (
+            Product.objects.create(
+                category=category, name=f'Chá {name}', slug=f'cha-{name}', description='Chá',
+                price=Decimal('10.00'), stock=10, image=f'products/cha-{name}.jpg', sku=f'CHA-{name}',
+                is_new=True,
+            )
+            for name in ('constante', 'subindo', 'nao-pago')
+        )
+
+    def _sale(self, product, quantity, days_ago, paid=True):
+        from datetime import timedelta
+        from decimal import Decimal
+        from django.utils import timezone
+        from store.models import Order, OrderItem
+        order = Order.objects.create(
+            user=self.user, first_name='Cliente', last_name='Teste', email=self.user.email,
+            address='Rua A', postal_code='01001-000', city='São Paulo', state='SP',
+            total_price=Decimal('10.00'), paid=paid
+        )
+        Order.objects.filter(pk=order.pk).update(created=timezone.now() - timedelta(days=days_ago))
+        OrderItem.objects.create(order=order, product=product, quantity=quantity, price=product.price)
+
+    def test_mais_vendidos_em_alta_e_novos(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from store.models import Product
+        from store.rankings import compute_rankings, ranked_products
+        self._sale(self.steady, 10, days_ago=20)
+        self._sale(self.rising, 4, days_ago=2)
+        self._sale(self.unpaid, 50, days_ago=1, paid=False)
+        self._sale(self.rising, 90, days_ago=60)  # fora da janela
+        Product.objects.filter(pk=self.steady.pk).update(created=timezone.now() - timedelta(days=90))
+
+        result = compute_rankings()
+        self.assertEqual(result, {'bestseller': 2, 'trending': 1, 'expired_new': 1})
+        with self.assertNumQueries(1):
+            self.assertEqual(ranked_products('bestseller', 4), [self.steady, self.rising])
+        self.assertEqual(ranked_products('trending', 4), [self.rising])
+        self.assertEqual(
+            set(Product.objects.filter(is_bestseller=True).values_list('pk', flat=True)),
+            {self.steady.pk, self.rising.pk}
+        )
+        self.assertEqual(
+            set(Product.objects.filter(is_new=True).values_list('pk', flat=True)),
+            {self.rising.pk, self.unpaid.pk}
+        )
+
+
+class SQLiteCacheTest(TestCase):
+    """Backend de cache em SQLite (india_oasis_project/sqlite_cache.py)"""
+
+    def setUp(self):
+        import shutil
+        import tempfile
+        from india_oasis_project.sqlite_cache import SQLiteCache
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.location = f'{directory}/cache.sqlite3'
+        self.cache = SQLiteCache(self.location, {
+            'TIMEOUT': 60, 'OPTIONS': {'MAX_ENTRIES': 6, 'CULL_FREQUENCY': 2, 'ACCESS_RESOLUTION': 0},
+        })
+
+    def test_leitura_escrita_e_expiracao(self):
+        cache = self.cache
+        cache.set('pagina', {'content': b'<html>', 'etag': '"1"'})
+        self.assertEqual(cache.get('pagina'), {'content': b'<html>', 'etag': '"1"'})
+        cache.set('expirada', 1, timeout=-1)
+        self.assertIsNone(cache.get('expirada'))
+        self.assertTrue(cache.add('expirada', 'nova'))
+        self.assertFalse(cache.add('pagina', 'outra'))
+        cache.set_many({'a': 1, 'b': [2]})
+        self.assertEqual(cache.get_many(['a', 'b', 'ausente']), {'a': 1, 'b': [2]})
+        self.assertEqual(cache.incr('a', 5), 6)
+        with self.assertRaises(ValueError):
+            cache.incr('ausente')
+        self.assertTrue(cache.delete('a'))
+        self.assertFalse(cache.has_key('a'))
+
+    def test_incr_entre_processos(self):
+        import multiprocessing
+        from india_oasis_project.sqlite_cache import SQLiteCache
+        self.cache.set('contador', 0)
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=_incr_sqlite_cache, args=(self.location, 50)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(SQLiteCache(self.location, {}).get('contador'), 150)
+
+    def test_descarte_mantem_chaves_lidas_recentemente(self):
+        import time
+        cache = self.cache
+        for i in range(6):
+            cache.set(f'chave-{i}', i)
+        time.sleep(0.01)
+        cache.get('chave-0')
+        cache.set('chave-6', 6)  # 7 > MAX_ENTRIES: descarta as menos usadas
+        self.assertEqual(cache.get('chave-0'), 0)
+        self.assertEqual(cache.get('chave-6'), 6)
+        self.assertIsNone(cache.get('chave-1'))
+        self.assertLessEqual(len(cache.get_many([f'chave-{i}' for i in range(7)])), 6)
+
+
+def _incr_sqlite_cache(location, times):
+    from india_oasis_project.sqlite_cache import SQLiteCache
+    cache = SQLiteCache(location, {})
+    for _ in range(times):
+        cache.incr('contador')
+
+
+class CepDatasetTest(TestCase):
+    """Base local de CEPs: carga incremental, consulta e validação"""
+
+    def setUp(self):
+        import shutil
+        import tempfile
+        from django.test import override_settings
+        from store import ceps
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        override = override_settings(CEP_DATABASE_PATH=f'{self.directory}/ceps.sqlite3')
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(ceps.close)
+
+    def _import(self, content, *args):
+        import io
+        from django.core.management import call_command
+        path = f'{self.directory}/carga.csv'
+        with open(path, 'w', encoding='utf-8') as source:
+            source.write(content)
+        output = io.StringIO()
+        call_command('import_ceps', path, *args, stdout=output)
+        return output.getvalue()
+
+    def test_sem_base_valida_so_o_formato(self):
+        from django.core.exceptions import ValidationError
+        from django.urls import reverse
+        from store.models import validate_cep
+        validate_cep('99999-999')
+        with self.assertRaises(ValidationError):
+            validate_cep('1234')
+        response = self.client.get(reverse('store:cep_lookup', args=['01001000']))
+        self.assertEqual((response.status_code, response.json()['available']), (503, False))
+
+    def test_carga_incremental_consulta_e_validacao(self):
+        from django.urls import reverse
+        from store import ceps
+        from store.forms import CustomUserCreationForm, ProfileForm
+        from store.models import validate_cep
+        output = self._import(
+            '01001-000;Praça da Sé;Sé;São Paulo;sp\n'
+            '20040-002;Rua da Assembleia;Centro;Rio de Janeiro;RJ\n'
+            'inválida;;;;\n'
+        )
+        self.assertIn('2 inserido(s), 0 atualizado(s), 0 removido(s), 1 linha(s) inválida(s)', output)
+        self.assertEqual(ceps.lookup('01001000'), {
+            'cep': '01001-000', 'logradouro': 'Praça da Sé', 'bairro': 'Sé', 'cidade': 'São Paulo', 'uf': 'SP',
+        })
+
+        # Delta: linha igual não conta, alteração e exclusão sim
+        output = self._import(
+            '01001000;Praça da Sé;Sé;São Paulo;SP;UPD\n'
+            '20040002;Rua da Assembleia;Centro;Rio de Janeiro;RJ;DEL\n'
+            '30130010;Praça Sete de Setembro;Centro;Belo Horizonte;MG;INS\n'
+        )
+        self.assertIn('1 inserido(s), 0 atualizado(s), 1 removido(s)', output)
+        self.assertIsNone(ceps.lookup('20040-002'))
+        self.assertEqual(ceps.total(), 2)
+
+        # Só o cadastro consulta a base; o modelo valida o formato (pedidos antigos continuam editáveis)
+        validate_cep('20040-002')
+        form = CustomUserCreationForm(data={'cep': '20040-002'})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['cep'], ['CEP não encontrado.'])
+        self.assertNotIn('cep', CustomUserCreationForm(data={'cep': '30130-010'}).errors)
+        # O perfil preenche o checkout: mesma conferência
+        self.assertEqual(ProfileForm(data={'cep': '20040-002'}).errors['cep'], ['CEP não encontrado.'])
+        self.assertNotIn('cep', ProfileForm(data={'cep': ''}).errors)
+
+        response = self.client.get(reverse('store:cep_lookup', args=['30130010']))
+        self.assertEqual(response.json()['cidade'], 'Belo Horizonte')
+        self.assertIn('max-age=86400', response['Cache-Control'])
+        self.assertEqual(self.client.get(reverse('store:cep_lookup', args=['99999999'])).status_code, 404)
+
+        # Carga completa remove o que não veio no arquivo
+        output = self._import('01001-000;Praça da Sé;Sé;São Paulo;SP\n', '--completo')
+        self.assertIn('0 inserido(s), 0 atualizado(s), 1 removido(s)', output)
+        self.assertEqual(ceps.total(), 1)
+
+
+class CatalogCacheTest(TestCase):
+    """Cache em dois níveis do catálogo: LRU local, cache compartilhado e versão global"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from store import catalog_cache
+        from store.models import Category
+        cache.clear()
+        catalog_cache.reset_stats()
+        self.catalog_cache = catalog_cache
+        self.category = Category.objects.create(name='Chás', slug='chas')
+
+    def _menu(self):
+        from store.models import Category
+        return self.catalog_cache.cached_query('categorias:teste', lambda: list(Category.objects.order_by('name')))
+
+    def test_niveis_local_e_compartilhado(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self._menu(), [self.category])
+        with self.assertNumQueries(0):
+            self.assertEqual(self._menu(), [self.category])
+        self.catalog_cache._local.reset(None)  # outro processo: só o cache compartilhado
+        with self.assertNumQueries(0):
+            self.assertEqual(self._menu(), [self.category])
+        stats = self.catalog_cache.cache_stats()['prefixes']['categorias']
+        self.assertEqual((stats['local'], stats['shared'], stats['miss']), (1, 1, 1))
+        self.assertEqual(stats['hit_ratio'], 0.667)
+
+    def test_salvar_categoria_troca_a_versao(self):
+        from store.models import Category
+        self._menu()
+        with self.captureOnCommitCallbacks(execute=True):
+            other = Category.objects.create(name='Incensos', slug='incensos')
+        with self.assertNumQueries(1):
+            self.assertEqual(self._menu(), [self.category, other])
+
+    def test_versao_lida_uma_vez_por_requisicao(self):
+        from unittest.mock import patch
+        from django.core.cache import cache
+        from django.urls import reverse
+        reads = []
+        original = cache.get_or_set
+
+        def get_or_set(key, *args, **kwargs):
+            reads.append(key)
+            return original(key, *args, **kwargs)
+
+        with patch.object(cache, 'get_or_set', get_or_set):
+            response = self.client.get(reverse('store:product_list_by_category', args=['chas']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(reads.count(self.catalog_cache.VERSION_KEY), 1)
+        self.assertEqual(
+            set(self.catalog_cache.cache_stats()['prefixes']), {'categorias'}
+        )
+
+
+@skipUnless('replica' in settings.DATABASES, 'requer o banco "replica" de india_oasis_project.settings_test')
+class ReplicaRouterTest(TransactionTestCase):
+    """Roteamento de leituras para a réplica: um SQLite em memória faz o papel de réplica"""
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        from django.test import override_settings
+        from india_oasis_project import db_router
+        from store.models import Category
+        db_router._lag.clear()
+        self.db_router = db_router
+        # Só existe na réplica: encontrá-la mostra de onde veio a leitura
+        Category.objects.using('replica').create(name='Réplica', slug='replica')
+        replicas = override_settings(DATABASE_REPLICAS=['replica'])
+        replicas.enable()
+        self.addCleanup(replicas.disable)
+
+    def _on_replica(self):
+        from store.models import Category
+        return Category.objects.filter(slug='replica').exists()
+
+    def _in_request(self):
+        # Estado que o ReplicaPinMiddleware cria para um GET sem cookie
+        token = self.db_router._request_state.set({'pinned': False})
+        self.addCleanup(self.db_router._request_state.reset, token)
+
+    def test_catalogo_na_replica_e_transacao_no_primario(self):
+        from django.contrib.auth.models import User
+        from django.db import transaction
+        # Cron e comandos (sem requisição) leem do primário; só a requisição usa a réplica
+        self.assertFalse(self._on_replica())
+        self._in_request()
+        self.assertTrue(self._on_replica())
+        User.objects.create_user('cliente', 'cliente@example.com', 'senha123')
+        self.assertTrue(User.objects.filter(username='cliente').exists())  # fora do catálogo: primário
+        with transaction.atomic():
+            self.assertFalse(self._on_replica())
+
+    def test_leitura_que_enche_cache_compartilhado_usa_o_primario(self):
+        from django.core.cache import cache
+        from store.catalog_cache import cached_query
+        cache.clear()
+        self._in_request()
+        with self.db_router.use_primary():
+            self.assertFalse(self._on_replica())
+        self.assertTrue(self._on_replica())
+        self.assertFalse(cached_query('teste:replica', self._on_replica))
+
+    def test_atraso_acima_do_limite_usa_o_primario(self):
+        self._in_request()
+        with patch.object(self.db_router, 'probe_lag', return_value=30.0):
+            self.assertFalse(self._on_replica())
+        self.db_router._lag.clear()
+        with patch.object(self.db_router, 'probe_lag', side_effect=Exception('sem conexão')):
+            self.assertFalse(self._on_replica())
+
+    def test_escrita_fixa_o_visitante_no_primario(self):
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+        middleware = self.db_router.ReplicaPinMiddleware(lambda request: HttpResponse(str(self._on_replica())))
+        factory = RequestFactory()
+
+        response = middleware(factory.post('/carrinho/'))
+        self.assertEqual(response.content, b'False')
+        cookie = response.cookies[self.db_router.PIN_COOKIE]
+
+        pinned = factory.get('/')
+        pinned.COOKIES[self.db_router.PIN_COOKIE] = cookie.value
+        self.assertEqual(middleware(pinned).content, b'False')
+        self.assertEqual(middleware(factory.get('/')).content, b'True')
+
+
+class ConnectionPoolTest(TestCase):
+    """Pool de conexões por processo (india_oasis_project/mysql_pool/pool.py)"""
+
+    class FakeConnection:
+        def __init__(self):
+            self.alive, self.closed = True, False
+
+        def ping(self):
+            if not self.alive:
+                raise OSError('MySQL server has gone away')
+
+        def close(self):
+            self.closed = True
+
+    def _pool(self, **options):
+        from india_oasis_project.mysql_pool.pool import ConnectionPool
+        return ConnectionPool(check=lambda connection: connection.ping(), **options)
+
+    def test_reuso_limite_e_timeout(self):
+        from india_oasis_project.mysql_pool.pool import PoolTimeout
+        pool = self._pool(max_size=1, timeout=0.05)
+        first, initialized = pool.acquire(self.FakeConnection)
+        self.assertFalse(initialized)
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(self.FakeConnection)
+        pool.release(first)
+        self.assertEqual(pool.acquire(self.FakeConnection), (first, True))
+        stats = pool.stats()
+        self.assertEqual((stats['created'], stats['reused'], stats['timeouts'], stats['in_use']), (1, 1, 1, 1))
+
+    def test_conexao_ociosa_derrubada_e_substituida(self):
+        pool = self._pool(max_size=2, min_size=2, check_idle=0)
+        self.assertEqual(pool.prewarm(self.FakeConnection), 2)
+        dead, _ = pool.acquire(self.FakeConnection)
+        dead.alive = False
+        pool.release(dead)
+        connection, initialized = pool.acquire(self.FakeConnection)
+        self.assertIsNot(connection, dead)
+        self.assertTrue(dead.closed)
+        self.assertFalse(initialized)  # aberta pelo prewarm: a sessão ainda não foi configurada
+        self.assertEqual(pool.stats()['discarded'], 1)
@@ -15,6 +15,7 @@ urlpatterns = [
     path('products/', views.product_list, name='product_list'),
     path('products/<slug:category_slug>/', views.product_list, name='product_list_by_category'),
     path('product/<slug:slug>/', views.product_detail, name='product_detail'),
+    path('product/<int:product_id>/state/', views.product_page_state, name='product_page_state'),
 
     # --- Cart Management ---
     path('cart/', views.cart_detail, name='cart'),
@@ -22,6 +23,11 @@ urlpatterns = [
     path('cart/remove/<int:product_id>/', views.cart_remove, name='cart_remove'),
     path('cart/count/', views.cart_count, name='cart_count'),
     path('cart/calculate-shipping/', views.calculate_shipping_ajax, name='calculate_shipping_ajax'),
+    path('cart/shipping-quotes/', views.shipping_quotes_stream, name='shipping_quotes_stream'),
+    path('cart/coupon/', views.apply_coupon, name='apply_coupon'),
+
+    # --- Address Lookup ---
+    path('cep/<str:cep>/', views.cep_lookup, name='cep_lookup'),
 
     # --- Checkout Process ---
     path('checkout/', views.checkout, name='checkout'),
@@ -41,5 +47,6 @@ urlpatterns = [
 
     # --- Reviews ---
     path('product/<int:product_id>/add_review/', views.add_review, name='add_review'),
+    path('product/<int:product_id>/reviews/', views.review_feed, name='review_feed'),
     path('review/<int:review_id>/helpful/', views.mark_review_helpful, name='mark_review_helpful'),
 ]
@@ -1,30 +1,49 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse, Http404
-from django.conf import settings
+from django.http import JsonResponse, Http404, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.template.loader import render_to_string
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST, require_GET
 from django.views.decorators.cache import cache_page
-from django.db.models import Q, Avg, Count, F
+from django.db.models import Q, Avg, Count, F, Case, When
 from django.contrib import messages
 from django.db import transaction
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.core.exceptions import ValidationError
 from django.views.decorators.vary import vary_on_headers
+from django.utils.cache import patch_cache_control
+from django.urls import reverse
 from django.middleware.csrf import get_token
+from contextlib import nullcontext
 from decimal import Decimal
 import json
 import logging
 
+from india_oasis_project.db_router import use_primary
+
 # Services and utilities
-from .services import calcular_frete_melhor_envio
+from . import coupons, inventory, shipping
 from .constants import (
     PRODUCTS_PER_PAGE, MAX_CART_QUANTITY, MIN_CART_QUANTITY,
-    CACHE_TIMEOUT, ERROR_MESSAGES, SUCCESS_MESSAGES
+    CACHE_TIMEOUT, ERROR_MESSAGES, SUCCESS_MESSAGES,
+    RELATED_PRODUCTS_COUNT, BOUGHT_TOGETHER_COUNT, HOME_RANKING_COUNT
 )
 from .models import (
     Product, Category, Cart, CartItem, Order, OrderItem,
-    Wishlist, Review, CustomerProfile, Banner
+    Wishlist, Review, ReviewHelpfulVote, CustomerProfile, Banner
+)
+from . import ceps
+from .catalog_cache import cached_query
+from .images import prime_variants
+from .page_cache import (
+    can_use_page_cache, current_versions, get_cached_page, invalidate_product_page, page_response, store_page
+)
+from .rankings import ranked_products
+from .recommendations import recommended_products
+from .wishlists import add_product, item_count, remove_product, toggle_product, wishlisted_ids
+from .reviews import (
+    invalidate_review_feed, parse_feed_params, rating_summary, review_page
 )
 from .forms import (
     CustomUserCreationForm, ReviewForm, ContactForm,
@@ -128,6 +147,29 @@ def restore_cart_from_session(request):
         logger.error(f"Error restoring cart from session: {str(e)}")
 
 
+def cart_coupon(request, cart_items):
+    """
+    Discount of the coupon kept in the session for these cart items, or None.
+    A coupon that stopped applying (expired, cart changed) leaves the session.
+    """
+    code = request.session.get('coupon_code')
+    if not code:
+        return None
+    try:
+        return coupons.validate(code, cart_items, request.user)
+    except ValidationError as e:
+        del request.session['coupon_code']
+        messages.warning(request, f"Cupom {code} removido: {e.messages[0]}")
+        return None
+
+
+def shipping_cost_for(subtotal, coupon=None):
+    """Flat shipping rate, free above R$ 250 or with a free-shipping coupon"""
+    if subtotal >= Decimal('250.00') or (coupon and coupon['free_shipping']):
+        return Decimal('0.00')
+    return Decimal('25.00')
+
+
 @cache_page(CACHE_TIMEOUT)
 @vary_on_headers('User-Agent')
 def home(request):
@@ -137,10 +179,10 @@ def home(request):
     """
     try:
         # Get active banners for home carousel
-        banners = Banner.objects.filter(
+        banners = cached_query('banners:home_carousel', lambda: list(Banner.objects.filter(
             ativo=True,
             posicao='home_carousel'
-        ).order_by('ordem')[:5]  # Limit to 5 banners
+        ).order_by('ordem')[:5]))  # Limit to 5 banners
 
         # Get featured products with optimized queries
         featured_products = Product.objects.select_related('category').filter(
@@ -160,14 +202,16 @@ def home(request):
             review_count=Count('reviews', filter=Q(reviews__is_approved=True))
         ).order_by('-created')[:4]
 
-        # Get bestsellers
-        bestsellers = Product.objects.select_related('category').filter(
-            available=True,
-            is_bestseller=True
-        ).annotate(
-            average_rating=Avg('reviews__rating', filter=Q(reviews__is_approved=True)),
-            review_count=Count('reviews', filter=Q(reviews__is_approved=True))
-        ).order_by('-view_count')[:4]
+        # Sales rankings (compute_rankings); manual flags until the job has run
+        bestsellers = ranked_products('bestseller', HOME_RANKING_COUNT)
+        if not bestsellers:
+            bestsellers = Product.objects.filter(
+                available=True,
+                is_bestseller=True
+            ).order_by('-view_count')[:HOME_RANKING_COUNT]
+        trending = ranked_products('trending', HOME_RANKING_COUNT)
+        featured_products = list(featured_products)
+        prime_variants(p.image.name for p in [*bestsellers, *featured_products, *trending])
 
         # Increment banner view counts
         for banner in banners:
@@ -178,6 +222,7 @@ def home(request):
             'featured_products': featured_products,
             'new_products': new_products,
             'bestsellers': bestsellers,
+            'trending': trending,
         }
 
         return render(request, 'store/index.html', context)
@@ -222,7 +267,12 @@ def product_list(request, category_slug=None):
         # Category filter
         category = None
         if category_slug:
-            category = get_object_or_404(Category, slug=category_slug, is_active=True)
+            category = cached_query(
+                f'categorias:slug:{category_slug}',
+                lambda: Category.objects.filter(slug=category_slug, is_active=True).first()
+            )
+            if category is None:
+                raise Http404
             products = products.filter(category=category)
 
         # Search filter
@@ -234,18 +284,18 @@ def product_list(request, category_slug=None):
                 Q(short_description__icontains=query)
             )
 
-        # Price range filter
+        # Price range filter on the materialized price (promotions included)
         min_price = request.GET.get('min_price')
         max_price = request.GET.get('max_price')
         if min_price:
             try:
-                products = products.filter(price__gte=Decimal(min_price))
-            except (ValueError, TypeError):
+                products = products.filter(effective_price__gte=Decimal(min_price))
+            except (ValueError, TypeError, ArithmeticError):
                 pass
         if max_price:
             try:
-                products = products.filter(price__lte=Decimal(max_price))
-            except (ValueError, TypeError):
+                products = products.filter(effective_price__lte=Decimal(max_price))
+            except (ValueError, TypeError, ArithmeticError):
                 pass
 
         # Rating filter
@@ -262,8 +312,11 @@ def product_list(request, category_slug=None):
         sort_option = request.GET.get('sort', 'name')
         sort_options = {
             'name': 'name',
-            'price_asc': 'price',
-            'price_desc': '-price',
+            'price_asc': 'effective_price',
+            'price_desc': '-effective_price',
+            # Values sent by the sort select of products.html
+            'price': 'effective_price',
+            '-price': '-effective_price',
             'newest': '-created',
             'rating': '-average_rating',
             'popular': '-view_count'
@@ -285,13 +338,15 @@ def product_list(request, category_slug=None):
         except EmptyPage:
             products_page = paginator.page(paginator.num_pages)
 
+        prime_variants(product.image.name for product in products_page)
+
         # Get categories for sidebar
-        categories = Category.objects.filter(
+        categories = cached_query('categorias:lateral', lambda: list(Category.objects.filter(
             is_active=True,
             parent=None
         ).annotate(
-            product_count=Count('products', filter=Q(products__available=True))
-        ).order_by('sort_order', 'name')
+            available_products=Count('products', filter=Q(products__available=True))
+        ).order_by('sort_order', 'name')))
 
         context = {
             'products': products_page,
@@ -305,6 +360,7 @@ def product_list(request, category_slug=None):
                 'rating': min_rating,
             },
             'paginator': paginator,
+            'wishlisted_ids': wishlisted_ids(request.user, [product.id for product in products_page]),
         }
 
         return render(request, 'store/products.html', context)
@@ -317,94 +373,93 @@ def product_list(request, category_slug=None):
 def product_detail(request, slug):
     """
     Product detail page with reviews and related products.
-    Optimized with prefetch and caching.
-    """
-    try:
-        # Get product with optimized queries
-        product = get_object_or_404(
-            Product.objects.select_related('category').annotate(
-                average_rating=Avg('reviews__rating', filter=Q(reviews__is_approved=True)),
-                review_count=Count('reviews', filter=Q(reviews__is_approved=True))
-            ),
-            slug=slug,
-            available=True
-        )
-
-        # Increment view count
-        Product.objects.filter(id=product.id).update(view_count=F('view_count') + 1)
 
-        # Get approved reviews with user info
-        reviews = Review.objects.select_related('user').filter(
-            product=product,
-            is_approved=True
-        ).order_by('-created_at')[:20]  # Limit reviews for performance
-
-        # Check if user already reviewed
-        user_has_reviewed = False
-        if request.user.is_authenticated:
-            user_has_reviewed = Review.objects.filter(
-                product=product,
-                user=request.user
-            ).exists()
+    Anonymous renderings are kept in the full-page cache (store/page_cache.py)
+    and served to every visitor; per-user state comes from product_page_state.
+    """
+    use_page_cache = can_use_page_cache(request)
+    if use_page_cache:
+        page = get_cached_page(slug)
+        if page is not None:
+            Product.objects.filter(id=page['product_id']).update(view_count=F('view_count') + 1)
+            return page_response(request, page)
+        # Only an anonymous rendering has nothing specific to the visitor
+        use_page_cache = not request.user.is_authenticated
 
-        # Mark helpful reviews for authenticated users
-        if request.user.is_authenticated and reviews:
-            helpful_review_ids = set(
-                request.user.helpful_reviews.filter(
-                    id__in=[r.id for r in reviews]
-                ).values_list('id', flat=True)
+    try:
+        # A shared rendering reads from the primary: the page is stored under
+        # versions bumped on the primary's commit, a lagging replica is older
+        with use_primary() if use_page_cache else nullcontext():
+            # Get product with optimized queries
+            product = get_object_or_404(
+                Product.objects.select_related('category').annotate(
+                    average_rating=Avg('reviews__rating', filter=Q(reviews__is_approved=True)),
+                    review_count=Count('reviews', filter=Q(reviews__is_approved=True))
+                ),
+                slug=slug,
+                available=True
             )
-            for review in reviews:
-                review.user_marked_helpful = review.id in helpful_review_ids
-        else:
-            for review in reviews:
-                review.user_marked_helpful = False
 
-        # Get related products (same category)
-        related_products = Product.objects.select_related('category').filter(
-            category=product.category,
-            available=True
-        ).exclude(id=product.id).annotate(
-            average_rating=Avg('reviews__rating', filter=Q(reviews__is_approved=True)),
-            review_count=Count('reviews', filter=Q(reviews__is_approved=True))
-        )[:4]
-
-        # Calculate rating distribution
-        rating_distribution = {}
-        total_reviews = reviews.count() if reviews else 0
-
-        if total_reviews > 0:
-            for rating in range(1, 6):
-                count = sum(1 for r in reviews if r.rating == rating)
-                rating_distribution[rating] = {
-                    'count': count,
-                    'percentage': int((count / total_reviews) * 100) if total_reviews > 0 else 0
-                }
+            # Versions read before rendering: a change meanwhile invalidates the stored page
+            versions = None
+            if use_page_cache:
+                versions = current_versions(product.id)
+                # Nothing from this visitor's session (cart badge) in the shared page
+                request.shared_page_render = True
 
-        # Forms
-        review_form = ReviewForm()
-
-        # Check if product is in user's wishlist
-        in_wishlist = False
-        if request.user.is_authenticated:
-            try:
-                wishlist = request.user.wishlist
-                in_wishlist = wishlist.has_product(product)
-            except Wishlist.DoesNotExist:
-                pass
+            # Increment view count
+            Product.objects.filter(id=product.id).update(view_count=F('view_count') + 1)
 
-        context = {
-            'product': product,
-            'reviews': reviews,
-            'review_form': review_form,
-            'user_has_reviewed': user_has_reviewed,
-            'related_products': related_products,
-            'rating_distribution': rating_distribution,
-            'total_reviews': total_reviews,
-            'in_wishlist': in_wishlist,
-        }
+            # First page of the review feed (the rest is lazy-loaded from review_feed)
+            reviews, next_cursor = review_page(product.id)
 
-        return render(request, 'store/product-detail.html', context)
+            # Check if user already reviewed
+            user_has_reviewed = False
+            if request.user.is_authenticated:
+                user_has_reviewed = Review.objects.filter(
+                    product=product,
+                    user=request.user
+                ).exists()
+
+            mark_user_helpful(reviews, request.user)
+
+            # Precomputed neighbors (build_recommendations); same category until the job covers it
+            related_products = recommended_products([product.id], 'related', RELATED_PRODUCTS_COUNT)
+            if not related_products:
+                related_products = Product.objects.select_related('category').filter(
+                    category=product.category,
+                    available=True
+                ).exclude(id=product.id).annotate(
+                    average_rating=Avg('reviews__rating', filter=Q(reviews__is_approved=True)),
+                    review_count=Count('reviews', filter=Q(reviews__is_approved=True))
+                )[:RELATED_PRODUCTS_COUNT]
+
+            # Rating distribution over all approved reviews, not just the first page
+            total_reviews, rating_distribution = rating_summary(product.id)
+
+            # Forms
+            review_form = ReviewForm()
+
+            # Check if product is in user's wishlist
+            in_wishlist = product.id in wishlisted_ids(request.user, [product.id])
+
+            context = {
+                'product': product,
+                'reviews': reviews,
+                'reviews_next_cursor': next_cursor,
+                'review_form': review_form,
+                'user_has_reviewed': user_has_reviewed,
+                'related_products': related_products,
+                'rating_distribution': rating_distribution,
+                'total_reviews': total_reviews,
+                'in_wishlist': in_wishlist,
+                'page_state_url': reverse('store:product_page_state', args=[product.id]) if use_page_cache else None,
+            }
+
+            response = render(request, 'store/product-detail.html', context)
+            if use_page_cache:
+                return page_response(request, store_page(slug, product.id, versions, response.content))
+            return response
 
     except Exception as e:
         logger.error(f"Error in product_detail view: {str(e)}", exc_info=True)
@@ -418,19 +473,29 @@ def cart_detail(request):
         cart = get_cart(request)
         cart_items = cart.items.select_related('product').all()
 
+        coupon = cart_coupon(request, cart_items)
+        discount = coupon['discount'] if coupon else Decimal('0.00')
+
         # Calculate shipping if items exist
         shipping_cost = Decimal('0.00')
         if cart_items:
-            # Default shipping calculation
-            total_weight = sum(item.total_weight for item in cart_items)
-            if cart.total_price < Decimal('250.00'):
-                shipping_cost = Decimal('25.00')
+            shipping_cost = shipping_cost_for(cart.total_price, coupon)
+
+        bought_together = []
+        if cart_items:
+            bought_together = recommended_products(
+                [item.product_id for item in cart_items], 'together', BOUGHT_TOGETHER_COUNT
+            )
 
         context = {
             'cart': cart,
             'cart_items': cart_items,
+            'bought_together': bought_together,
             'shipping_cost': shipping_cost,
-            'total_with_shipping': cart.total_price + shipping_cost,
+            'coupon': coupon,
+            'discount': discount,
+            'total_with_discount': cart.total_price - discount,
+            'total_with_shipping': cart.total_price - discount + shipping_cost,
         }
 
         return render(request, 'store/cart.html', context)
@@ -578,18 +643,20 @@ def checkout(request):
         except CustomerProfile.DoesNotExist:
             profile = None
 
-        # Calculate shipping
-        shipping_cost = Decimal('25.00')
-        if cart.total_price >= Decimal('250.00'):
-            shipping_cost = Decimal('0.00')
+        # Calculate shipping and the coupon discount
+        coupon = cart_coupon(request, cart_items)
+        discount = coupon['discount'] if coupon else Decimal('0.00')
+        shipping_cost = shipping_cost_for(cart.total_price, coupon)
 
-        total_with_shipping = cart.total_price + shipping_cost
+        total_with_shipping = cart.total_price - discount + shipping_cost
 
         context = {
             'cart': cart,
             'cart_items': cart_items,
             'profile': profile,
             'shipping_cost': shipping_cost,
+            'coupon': coupon,
+            'discount': discount,
             'total_with_shipping': total_with_shipping,
             'csrf_token': get_token(request),
         }
@@ -650,12 +717,24 @@ def create_order_and_redirect_to_payment(request):
             messages.error(request, "Todos os campos obrigatórios devem ser preenchidos")
             return redirect('store:checkout')
 
-        # Calculate totals
-        shipping_cost = Decimal('25.00')
-        if cart.total_price >= Decimal('250.00'):
-            shipping_cost = Decimal('0.00')
+        if not ceps.is_known(form_data['postal_code']):
+            messages.error(request, "CEP de entrega não encontrado")
+            return redirect('store:checkout')
+
+        # Calculate totals; the coupon is checked again against the final cart
+        coupon = None
+        coupon_code = request.session.get('coupon_code')
+        if coupon_code:
+            try:
+                coupon = coupons.validate(coupon_code, cart_items, request.user)
+            except ValidationError as e:
+                del request.session['coupon_code']
+                messages.error(request, f"Cupom {coupon_code} removido: {e.messages[0]}")
+                return redirect('store:checkout')
+        discount = coupon['discount'] if coupon else Decimal('0.00')
+        shipping_cost = shipping_cost_for(cart.total_price, coupon)
 
-        total_price = cart.total_price + shipping_cost
+        total_price = cart.total_price - discount + shipping_cost
 
         # Create order
         order = Order.objects.create(
@@ -673,20 +752,45 @@ def create_order_and_redirect_to_payment(request):
             state=form_data['state'],
             total_price=total_price,
             shipping_cost=shipping_cost,
+            coupon_code=coupon['code'] if coupon else '',
+            discount=discount,
         )
 
-        # Create order items and reserve stock
-        for item in cart_items:
-            if not item.product.reserve_stock(item.quantity):
-                # Rollback if can't reserve stock
-                order.delete()
-                messages.error(
-                    request,
-                    f"Erro ao reservar estoque para '{item.product.name}'"
-                )
+        if coupon:
+            # Conditional UPDATE on the coupon: sold out or edited since validation undoes the order
+            try:
+                coupons.redeem(coupon, order, request.user)
+            except ValidationError as e:
+                transaction.set_rollback(True)
+                del request.session['coupon_code']
+                messages.error(request, e.messages[0])
+                return redirect('store:checkout')
+
+        # Reserve stock for every tracked item in a single UPDATE
+        tracked = {item.product_id: item.quantity for item in cart_items if item.product.track_stock}
+        if tracked:
+            has_stock = Q()
+            for product_id, quantity in tracked.items():
+                has_stock |= Q(id=product_id, stock__gte=quantity)
+            reserved = Product.objects.filter(has_stock).update(stock=Case(
+                *[When(id=product_id, then=F('stock') - quantity) for product_id, quantity in tracked.items()],
+                default=F('stock'),
+                output_field=Product._meta.get_field('stock'),
+            ))
+            if reserved != len(tracked):
+                # Stock changed since validation: undo the order and the reservations
+                transaction.set_rollback(True)
+                messages.error(request, "Erro ao reservar estoque para um dos produtos do carrinho")
                 return redirect('store:cart')
-
-            OrderItem.objects.create(
+            inventory.record([
+                inventory.movement(product_id, 'reserve', -quantity, order=order)
+                for product_id, quantity in tracked.items()
+            ])
+            # Bulk UPDATE sends no post_save: drop the cached pages showing the old stock
+            transaction.on_commit(lambda: [invalidate_product_page(product_id) for product_id in tracked])
+
+        OrderItem.objects.bulk_create([
+            OrderItem(
                 order=order,
                 product=item.product,
                 product_name=item.product.name,
@@ -694,9 +798,12 @@ def create_order_and_redirect_to_payment(request):
                 price=item.product.final_price,
                 quantity=item.quantity,
             )
+            for item in cart_items
+        ])
 
         # Clear cart
         cart.clear()
+        request.session.pop('coupon_code', None)
 
         # Store order ID in session for payment
         request.session['order_id'] = order.id
@@ -775,7 +882,7 @@ def signup(request):
     else:
         form = CustomUserCreationForm()
 
-    return render(request, 'registration/signup.html', {'form': form})
+    return render(request, 'store/signup.html', {'form': form})
 
 
 def user_login(request):
@@ -806,7 +913,7 @@ def user_login(request):
     else:
         form = LoginForm()
 
-    return render(request, 'registration/login.html', {'form': form})
+    return render(request, 'store/login.html', {'form': form})
 
 
 @login_required
@@ -830,11 +937,10 @@ def add_review(request, product_id):
             messages.error(request, "Você já avaliou este produto")
             return redirect('store:product_detail', slug=product.slug)
 
-        form = ReviewForm(request.POST)
+        # Review.clean() (run by is_valid) needs user and product already set
+        form = ReviewForm(request.POST, instance=Review(user=request.user, product=product))
         if form.is_valid():
             review = form.save(commit=False)
-            review.user = request.user
-            review.product = product
 
             # Check if user bought this product (verified purchase)
             has_purchased = OrderItem.objects.filter(
@@ -858,6 +964,80 @@ def add_review(request, product_id):
         return redirect('store:home')
 
 
+def mark_user_helpful(reviews, user):
+    """Flag the feed reviews (dicts) the user marked as helpful, in one query"""
+    helpful_review_ids = set()
+    if user.is_authenticated and reviews:
+        helpful_review_ids = set(
+            ReviewHelpfulVote.objects.filter(
+                user=user,
+                review_id__in=[review['id'] for review in reviews]
+            ).values_list('review_id', flat=True)
+        )
+    for review in reviews:
+        review['user_marked_helpful'] = review['id'] in helpful_review_ids
+
+
+@require_GET
+def product_page_state(request, product_id):
+    """
+    Per-visitor state of a cached product page: account menu, wishlist
+    heart, review eligibility, helpful marks and a CSRF token for its forms.
+    """
+    reviews = [
+        {'id': int(review_id)} for review_id in request.GET.get('reviews', '').split(',')[:50]
+        if review_id.isdigit()
+    ]
+    state = {
+        'authenticated': request.user.is_authenticated,
+        'csrf_token': get_token(request),
+        'account_html': render_to_string('includes/header_account.html', {'user': request.user}),
+        'wishlist_count': 0,
+        'in_wishlist': False,
+        'user_has_reviewed': False,
+        'helpful_review_ids': [],
+    }
+    if request.user.is_authenticated:
+        state['wishlist_count'] = item_count(request.user)
+        state['in_wishlist'] = product_id in wishlisted_ids(request.user, [product_id])
+        state['user_has_reviewed'] = Review.objects.filter(product_id=product_id, user=request.user).exists()
+        mark_user_helpful(reviews, request.user)
+        state['helpful_review_ids'] = [review['id'] for review in reviews if review['user_marked_helpful']]
+
+    response = JsonResponse(state)
+    patch_cache_control(response, private=True, no_store=True)
+    return response
+
+
+@require_GET
+def review_feed(request, product_id):
+    """
+    JSON review feed: keyset pagination (cursor), sort and star filter.
+    Pages are cached per product until a review or vote changes.
+    """
+    if not Product.objects.filter(id=product_id, available=True).exists():
+        raise Http404("Produto não encontrado")
+
+    try:
+        sort, stars, cursor = parse_feed_params(request.GET)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    reviews, next_cursor = review_page(product_id, sort=sort, stars=stars, cursor=cursor)
+    mark_user_helpful(reviews, request.user)
+
+    return JsonResponse({
+        'success': True,
+        'reviews': reviews,
+        'html': ''.join(
+            render_to_string('store/includes/review_card.html', {'review': review}) for review in reviews
+        ),
+        'next_cursor': next_cursor,
+        'sort': sort,
+        'stars': stars,
+    })
+
+
 @login_required
 @require_POST
 def mark_review_helpful(request, review_id):
@@ -865,21 +1045,17 @@ def mark_review_helpful(request, review_id):
     try:
         review = get_object_or_404(Review, id=review_id, is_approved=True)
 
-        if review.user == request.user:
+        if review.user_id == request.user.id:
             return JsonResponse({
                 'success': False,
                 'message': 'Você não pode marcar sua própria avaliação como útil'
             })
 
         # Toggle helpful mark
-        if review.is_marked_helpful_by(request.user):
-            review.unmark_helpful(request.user)
-            is_helpful = False
-            message = "Marcação removida"
-        else:
-            review.mark_helpful(request.user)
-            is_helpful = True
-            message = "Marcado como útil"
+        is_helpful = review.toggle_helpful(request.user)
+        message = "Marcado como útil" if is_helpful else "Marcação removida"
+
+        invalidate_review_feed(review.product_id)
 
         return JsonResponse({
             'success': True,
@@ -953,16 +1129,13 @@ def wishlist(request):
 def wishlist_add(request, product_id):
     """Add product to wishlist"""
     try:
-        product = get_object_or_404(Product, id=product_id, available=True)
-        wishlist_obj, created = Wishlist.objects.get_or_create(user=request.user)
+        product = get_object_or_404(Product.objects.only('id', 'name'), id=product_id, available=True)
 
-        if not wishlist_obj.has_product(product):
-            wishlist_obj.add_product(product)
+        if add_product(request.user, product.id):
             message = f"'{product.name}' adicionado à lista de desejos"
-            success = True
         else:
             message = f"'{product.name}' já está na sua lista de desejos"
-            success = True
+        success = True
 
         if request.headers.get('x-requested-with') == 'XMLHttpRequest':
             return JsonResponse({
@@ -990,15 +1163,13 @@ def wishlist_add(request, product_id):
 def wishlist_remove(request, product_id):
     """Remove product from wishlist"""
     try:
-        product = get_object_or_404(Product, id=product_id)
+        product = get_object_or_404(Product.objects.only('id', 'name'), id=product_id)
 
-        try:
-            wishlist_obj = request.user.wishlist
-            wishlist_obj.remove_product(product)
+        if remove_product(request.user, product.id):
             message = f"'{product.name}' removido da lista de desejos"
             success = True
-        except Wishlist.DoesNotExist:
-            message = "Lista de desejos não encontrada"
+        else:
+            message = f"'{product.name}' não está na sua lista de desejos"
             success = False
 
         if request.headers.get('x-requested-with') == 'XMLHttpRequest':
@@ -1038,17 +1209,13 @@ def toggle_wishlist(request):
                 'message': 'ID do produto não fornecido'
             })
 
-        product = get_object_or_404(Product, id=product_id, available=True)
-        wishlist_obj, created = Wishlist.objects.get_or_create(user=request.user)
+        product = get_object_or_404(Product.objects.only('id', 'name'), id=product_id, available=True)
 
-        if wishlist_obj.has_product(product):
-            wishlist_obj.remove_product(product)
-            in_wishlist = False
-            message = f"'{product.name}' removido da lista de desejos"
-        else:
-            wishlist_obj.add_product(product)
-            in_wishlist = True
+        in_wishlist = toggle_product(request.user, product.id)
+        if in_wishlist:
             message = f"'{product.name}' adicionado à lista de desejos"
+        else:
+            message = f"'{product.name}' removido da lista de desejos"
 
         return JsonResponse({
             'success': True,
@@ -1064,67 +1231,175 @@ def toggle_wishlist(request):
         })
 
 
+def _shipping_quote_request(request):
+    """(destination CEP, cart package) of a quote request, or an error JsonResponse"""
+    data = json.loads(request.body.decode('utf-8'))
+    cep_destino = data.get('cep', '').strip()
+
+    if not cep_destino:
+        return None, JsonResponse({
+            'success': False,
+            'message': 'CEP de destino é obrigatório'
+        })
+
+    # Fail fast on unknown CEPs instead of waiting for the shipping API
+    if not ceps.is_known(cep_destino):
+        return None, JsonResponse({
+            'success': False,
+            'message': 'CEP não encontrado'
+        })
+
+    package = shipping.package_for(get_cart(request))
+    if package is None:
+        return None, JsonResponse({
+            'success': False,
+            'message': 'Carrinho vazio'
+        })
+    return (cep_destino, package), None
+
+
 @require_POST
 def calculate_shipping_ajax(request):
-    """Calculate shipping cost via AJAX"""
+    """Calculate shipping cost via AJAX (all services quoted in parallel)"""
     try:
-        data = json.loads(request.body.decode('utf-8'))
-        cep_destino = data.get('cep', '').strip()
+        quote, error = _shipping_quote_request(request)
+        if error:
+            return error
 
-        if not cep_destino:
+        options, failed = shipping.collect(shipping.iter_quotes(*quote))
+        if options:
+            return JsonResponse({
+                'success': True,
+                'options': options,
+                'unavailable': [result['service'] for result in failed],
+            })
+        else:
             return JsonResponse({
                 'success': False,
-                'message': 'CEP de destino é obrigatório'
+                'message': failed[0]['erro'] if failed else 'Serviço indisponível'
             })
 
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'message': 'Dados inválidos'
+        })
+    except Exception as e:
+        logger.error(f"Error calculating shipping: {str(e)}", exc_info=True)
+        return JsonResponse({
+            'success': False,
+            'message': 'Erro no servidor'
+        })
+
+
+@require_POST
+def shipping_quotes_stream(request):
+    """
+    Shipping quotes as NDJSON, one line per service as soon as it answers,
+    then a final ``{"done": true}`` line. Under ASGI the quotes are awaited
+    on the event loop; under WSGI (Passenger) a thread pool runs them.
+    """
+    try:
+        quote, error = _shipping_quote_request(request)
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'message': 'Dados inválidos'})
+    if error:
+        return error
+
+    def line(result):
+        return json.dumps(result, ensure_ascii=False) + '\n'
+
+    if isinstance(request, ASGIRequest):
+        async def stream():
+            async for result in shipping.aiter_quotes(*quote):
+                yield line(result)
+            yield line({'done': True})
+    else:
+        def stream():
+            for result in shipping.iter_quotes(*quote):
+                yield line(result)
+            yield line({'done': True})
+
+    response = StreamingHttpResponse(stream(), content_type='application/x-ndjson')
+    patch_cache_control(response, private=True, no_store=True)
+    # Proxies (nginx/Apache in front of Passenger) must not hold the lines back
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_GET
+def cep_lookup(request, cep):
+    """Address for a CEP from the local dataset (AJAX autofill)"""
+    if ceps.normalize(cep) is None:
+        return JsonResponse({'success': False, 'message': 'CEP deve ter 8 dígitos'}, status=400)
+    address = ceps.lookup(cep)
+    if address is None:
+        # 503 without the dataset: the page falls back to an external lookup
+        available = ceps.is_available()
+        return JsonResponse(
+            {'success': False, 'available': available, 'message': 'CEP não encontrado'},
+            status=404 if available else 503
+        )
+    response = JsonResponse({'success': True, **address})
+    patch_cache_control(response, public=True, max_age=86400)
+    return response
+
+
+@require_POST
+def apply_coupon(request):
+    """
+    Validate a coupon against the cart (AJAX) and keep it in the session.
+    An empty code removes the coupon. Rules come from the per-version
+    coupon cache, so validation itself costs at most one query.
+    """
+    try:
+        data = json.loads(request.body.decode('utf-8'))
+        code = coupons.normalize(data.get('code'))
         cart = get_cart(request)
-        cart_items = cart.items.select_related('product').all()
 
+        if not code:
+            request.session.pop('coupon_code', None)
+            return JsonResponse({
+                'success': True,
+                'message': 'Cupom removido',
+                'discount': '0.00',
+                'free_shipping': False,
+                'total': str(cart.total_price),
+            })
+
+        cart_items = list(cart.items.select_related('product'))
         if not cart_items:
             return JsonResponse({
                 'success': False,
                 'message': 'Carrinho vazio'
             })
 
-        # Calculate cart dimensions and weight
-        total_weight = sum(item.total_weight for item in cart_items)
-        total_length = sum(item.product.comprimento * item.quantity for item in cart_items)
-        max_height = max(item.product.altura for item in cart_items)
-        max_width = max(item.product.largura for item in cart_items)
-
-        # Use shipping service
-        cep_origem = getattr(settings, 'MELHOR_ENVIO_CEP_ORIGEM', '01034-001')
-
-        resultado = calcular_frete_melhor_envio(
-            cep_origem=cep_origem,
-            cep_destino=cep_destino,
-            peso_kg=total_weight,
-            valor_produtos=float(cart.total_price),
-            altura_cm=float(max_height),
-            largura_cm=float(max_width),
-            comprimento_cm=float(total_length),
-            servicos=["1", "2"]  # PAC, SEDEX
-        )
-
-        if isinstance(resultado, list) and resultado:
-            return JsonResponse({
-                'success': True,
-                'options': resultado
-            })
-        else:
-            error_msg = resultado.get('erro', 'Erro ao calcular frete') if isinstance(resultado, dict) else 'Serviço indisponível'
+        try:
+            coupon = coupons.validate(code, cart_items, request.user)
+        except ValidationError as e:
+            request.session.pop('coupon_code', None)
             return JsonResponse({
                 'success': False,
-                'message': error_msg
+                'message': e.messages[0]
             })
 
+        request.session['coupon_code'] = coupon['code']
+        return JsonResponse({
+            'success': True,
+            'message': f"Cupom {coupon['code']} aplicado",
+            'code': coupon['code'],
+            'discount': str(coupon['discount']),
+            'free_shipping': coupon['free_shipping'],
+            'total': str(coupon['subtotal'] - coupon['discount']),
+        })
+
     except json.JSONDecodeError:
         return JsonResponse({
             'success': False,
             'message': 'Dados inválidos'
         })
     except Exception as e:
-        logger.error(f"Error calculating shipping: {str(e)}", exc_info=True)
+        logger.error(f"Error applying coupon: {str(e)}", exc_info=True)
         return JsonResponse({
             'success': False,
             'message': 'Erro no servidor'
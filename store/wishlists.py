@@ -0,0 +1,120 @@
+"""
+Lista de desejos: operações com uma escrita na tabela de ligação.
+
+- ``add_product``: um ``INSERT IGNORE`` (``INSERT OR IGNORE`` no SQLite) na
+  tabela ``Wishlist.products.through``; o número de linhas inseridas diz
+  se o produto era novo, sem consulta de existência antes;
+- ``remove_product``: um ``DELETE``;
+- ``toggle_product``: tenta o ``DELETE`` e, se nada saiu, faz o ``INSERT``.
+
+``Wishlist.item_count`` guarda o total de itens e é ajustado com ``F()``
+só quando a linha entrou ou saiu de fato, então o contador do cabeçalho
+custa uma leitura. Alterações pelo admin (``m2m_changed``) e exclusões de
+produtos também o ajustam; ``rebuild_wishlist_counts`` corrige divergências.
+
+As escritas usam ``atomic(savepoint=False)``: dentro da transação de quem
+chama não criam savepoint (uma ida ao banco a menos por operação).
+
+``wishlisted_ids`` responde numa consulta quais produtos de uma grade
+(12 a 48 por página) estão na lista do usuário.
+"""
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.constants import OnConflict
+from django.db.models.functions import Coalesce
+
+from .models import Wishlist
+
+Item = Wishlist.products.through
+
+
+def wishlist_id(user):
+    """Id da lista de desejos do usuário, criando-a na primeira vez"""
+    wishlist, _ = Wishlist.objects.only('id').get_or_create(user=user)
+    return wishlist.id
+
+
+def _insert_ignore(wishlist_pk, product_id):
+    """INSERT que ignora a linha já existente; retorna se inseriu"""
+    ops = connection.ops
+    sql = '{insert} {table} ({wishlist}, {product}) VALUES (%s, %s) {suffix}'.format(
+        insert=ops.insert_statement(on_conflict=OnConflict.IGNORE),
+        table=ops.quote_name(Item._meta.db_table),
+        wishlist=ops.quote_name(Item._meta.get_field('wishlist').column),
+        product=ops.quote_name(Item._meta.get_field('product').column),
+        suffix=ops.on_conflict_suffix_sql([], OnConflict.IGNORE, None, None) or '',
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [wishlist_pk, product_id])
+        return cursor.rowcount == 1
+
+
+def _adjust_count(wishlist_pk, delta):
+    Wishlist.objects.filter(pk=wishlist_pk).update(item_count=F('item_count') + delta)
+
+
+def insert_item(wishlist_pk, product_id):
+    """Produto na lista ``wishlist_pk``; retorna se ele ainda não estava lá"""
+    with transaction.atomic(savepoint=False):
+        added = _insert_ignore(wishlist_pk, product_id)
+        if added:
+            _adjust_count(wishlist_pk, 1)
+    return added
+
+
+def delete_item(wishlist_pk, product_id):
+    """Produto fora da lista ``wishlist_pk``; retorna se ele estava lá"""
+    with transaction.atomic(savepoint=False):
+        deleted, _ = Item.objects.filter(wishlist_id=wishlist_pk, product_id=product_id).delete()
+        if deleted:
+            _adjust_count(wishlist_pk, -deleted)
+    return bool(deleted)
+
+
+def add_product(user, product_id):
+    """Adiciona o produto à lista do usuário; retorna se ele era novo"""
+    return insert_item(wishlist_id(user), product_id)
+
+
+def remove_product(user, product_id):
+    """Remove o produto da lista do usuário (sem criar a lista); retorna se ele estava lá"""
+    with transaction.atomic(savepoint=False):
+        deleted, _ = Item.objects.filter(wishlist__user=user, product_id=product_id).delete()
+        if deleted:
+            Wishlist.objects.filter(user=user).update(item_count=F('item_count') - deleted)
+    return bool(deleted)
+
+
+def toggle_product(user, product_id):
+    """Alterna o produto na lista do usuário; retorna se ele ficou na lista"""
+    pk = wishlist_id(user)
+    if delete_item(pk, product_id):
+        return False
+    # Clique duplo concorrente: se o outro request já inseriu, o produto fica
+    insert_item(pk, product_id)
+    return True
+
+
+def item_count(user):
+    """Total de itens da lista (0 se o usuário ainda não tem lista), sem criá-la"""
+    if not user.is_authenticated:
+        return 0
+    return Wishlist.objects.filter(user=user).values_list('item_count', flat=True).first() or 0
+
+
+def wishlisted_ids(user, product_ids):
+    """Ids, entre ``product_ids``, dos produtos na lista do usuário (uma consulta)"""
+    product_ids = list(product_ids)
+    if not user.is_authenticated or not product_ids:
+        return set()
+    return set(
+        Item.objects.filter(wishlist__user=user, product_id__in=product_ids).values_list('product_id', flat=True)
+    )
+
+
+def recount(wishlist_ids):
+    """Recalcula ``item_count`` das listas informadas a partir da tabela de ligação"""
+    items = Item.objects.filter(wishlist=OuterRef('pk')).order_by().values('wishlist')
+    return Wishlist.objects.filter(pk__in=list(wishlist_ids)).update(item_count=Coalesce(
+        Subquery(items.annotate(total=Count('pk')).values('total')), 0
+    ))